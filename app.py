@@ -7,6 +7,7 @@ import streamlit as st
 import pandas as pd
 import json
 import time
+import uuid
 import sys
 import re
 from typing import Dict, Optional
@@ -14,14 +15,19 @@ from typing import Dict, Optional
 sys.path.append("src")
 
 # Importar módulos refatorados
-from src.utils.data_loaders import load_parquet_data, initialize_agent
+from src.utils.data_loaders import load_parquet_data, initialize_agent, get_current_dataset_version
 from src.utils.formatters import format_context_for_display, format_sql_query
 from src.filters.ui.sidebar import (
     filter_user_friendly_context,
     create_enhanced_filter_manager
 )
 from src.filters.core.manager import get_json_filter_manager
-from src.visualization.plotly_charts import render_plotly_visualization
+from src.visualization.plotly_charts import render_plotly_visualization, clear_figure_cache, drop_cached_figures
+# Mesmo módulo usado pelas ferramentas (src/ no path): spans do app e das ferramentas no mesmo turno
+from utils.tracing import get_tracer, summarize_trace
+from utils.metrics import get_metrics_registry, start_metrics_server
+from utils.chat_history import ChatHistory
+from utils.sessions import get_session_manager
 
 # Page configuration
 st.set_page_config(page_title="Agente IA Target v0.60", page_icon="🤖", layout="wide")
@@ -29,12 +35,16 @@ st.set_page_config(page_title="Agente IA Target v0.60", page_icon="🤖", layout
 
 def main():
     """Função principal da aplicação"""
+    # Endpoint /metrics local e liberação de agentes ociosos (uma vez por processo)
+    start_metrics_server()
+    get_session_manager().start_sweeper()
+
     # Initialize CSS and header
     _setup_page_styling()
     _render_header()
 
     # Load data and initialize agent
-    df, data_error = load_parquet_data()
+    df, data_error = load_parquet_data(get_current_dataset_version())
     if data_error:
         st.error(f" {data_error}")
         st.stop()
@@ -587,6 +597,9 @@ def _render_sidebar(df):
     )
     st.session_state.debug_mode = debug_mode
 
+    if debug_mode:
+        _render_metrics_panel()
+
     st.markdown("---")
 
     # Enhanced Filter management with new JSON system
@@ -599,11 +612,114 @@ def _render_sidebar(df):
         create_enhanced_filter_manager({}, show_suggestions=False, df=df)
 
 
+def _render_metrics_panel():
+    """Painel de métricas do processo (latências p50/p95, cache e tokens) no modo debug"""
+    with st.expander("📈 Métricas", expanded=False):
+        rows = get_metrics_registry().summary()
+        if not rows:
+            st.caption("Nenhuma métrica registrada ainda.")
+            return
+
+        histograms = [r for r in rows if 'p50' in r]
+        counters = [r for r in rows if 'value' in r]
+
+        if histograms:
+            st.markdown("**Latências (s)**")
+            st.dataframe(pd.DataFrame([
+                {
+                    "métrica": r['metric'] + (f" {r['labels']}" if r['labels'] else ""),
+                    "n": r['count'],
+                    "p50": round(r['p50'], 3),
+                    "p95": round(r['p95'], 3)
+                }
+                for r in histograms
+            ]), hide_index=True, use_container_width=True)
+
+        # Taxa de acerto dos caches do DuckDbTools
+        for cache in ("metadata", "recent_queries"):
+            hits = sum(r['value'] for r in counters if r['metric'] == "duckdb_cache_lookups_total"
+                       and r['labels'] == {"cache": cache, "result": "hit"})
+            total = sum(r['value'] for r in counters if r['metric'] == "duckdb_cache_lookups_total"
+                        and r['labels'].get("cache") == cache)
+            if total:
+                st.markdown(f"**Cache {cache}:** {hits / total:.0%} de acerto ({int(hits)}/{int(total)})")
+
+        tokens = {}
+        for r in counters:
+            if r['metric'] == "llm_tokens_total":
+                tokens[r['labels'].get('type')] = tokens.get(r['labels'].get('type'), 0) + r['value']
+        if tokens:
+            st.markdown("**Tokens LLM:** " + ", ".join(f"{k}: {int(v):,}" for k, v in sorted(tokens.items())))
+
+        # Custo por turno de cada modo de memória (latência do run e tokens por execução)
+        runs_by_mode = {}
+        for r in counters:
+            if r['metric'] == "agent_runs_total" and 'memory_mode' in r['labels']:
+                mode = r['labels']['memory_mode']
+                runs_by_mode[mode] = runs_by_mode.get(mode, 0) + r['value']
+        if runs_by_mode:
+            run_histogram = get_metrics_registry().histogram("agent_run_seconds")
+            memory_rows = []
+            for mode, runs in sorted(runs_by_mode.items()):
+                mode_tokens = sum(r['value'] for r in counters if r['metric'] == "llm_tokens_total"
+                                  and r['labels'].get('memory_mode') == mode)
+                memory_calls = sum(r['value'] for r in counters if r['metric'] == "memory_tool_calls_total"
+                                   and r['labels'].get('memory_mode') == mode)
+                p50 = run_histogram.quantile(0.5, memory_mode=mode)
+                memory_rows.append({
+                    "memória": mode,
+                    "turnos": int(runs),
+                    "p50 run (s)": round(p50, 2) if p50 is not None else None,
+                    "tokens/turno": round(mode_tokens / runs) if runs else 0,
+                    "chamadas de memória/turno": round(memory_calls / runs, 2) if runs else 0
+                })
+            st.markdown("**Memória do agente**")
+            st.dataframe(pd.DataFrame(memory_rows), hide_index=True, use_container_width=True)
+
+        # Perfil por complexidade da pergunta (ferramentas e reasoning_effort reduzidos nas simples)
+        runs_by_level = {}
+        for r in counters:
+            if r['metric'] == "agent_runs_total" and 'complexity' in r['labels']:
+                level = r['labels']['complexity']
+                runs_by_level[level] = runs_by_level.get(level, 0) + r['value']
+        if runs_by_level:
+            run_histogram = get_metrics_registry().histogram("agent_run_seconds")
+            complexity_rows = []
+            for level in ("simple", "moderate", "complex"):
+                runs = runs_by_level.get(level, 0)
+                if not runs:
+                    continue
+                level_tokens = sum(r['value'] for r in counters if r['metric'] == "llm_tokens_total"
+                                   and r['labels'].get('complexity') == level)
+                p50 = run_histogram.quantile(0.5, complexity=level)
+                p95 = run_histogram.quantile(0.95, complexity=level)
+                complexity_rows.append({
+                    "complexidade": level,
+                    "turnos": int(runs),
+                    "p50 run (s)": round(p50, 2) if p50 is not None else None,
+                    "p95 run (s)": round(p95, 2) if p95 is not None else None,
+                    "tokens/turno": round(level_tokens / runs)
+                })
+            st.markdown("**Complexidade das perguntas**")
+            st.dataframe(pd.DataFrame(complexity_rows), hide_index=True, use_container_width=True)
+
+        session_manager = get_session_manager()
+        sessions = session_manager.stats()
+        active = [s for s in sessions if s['active']]
+        if sessions:
+            # Total inclui uma vez os DataFrames e o banco DuckDB de cada template compartilhado
+            st.markdown(f"**Sessões:** {len(active)} com agente em memória "
+                        f"({session_manager.total_bytes() / (1024 * 1024):,.0f} MB estimados), "
+                        f"{len(sessions) - len(active)} liberadas")
+
+
 def _render_chat_interface(agent):
     """Renderiza interface de chat principal"""
     # Initialize chat history
     if "messages" not in st.session_state:
-        st.session_state.messages = []
+        # Turnos recentes em memória; os antigos são arquivados em SQLite e carregados sob demanda
+        st.session_state.messages = ChatHistory(st.session_state.get('session_user_id') or str(uuid.uuid4()))
+        st.session_state.archived_window = 0
         st.session_state.last_context = {}
 
         # Add welcome message as first assistant message
@@ -615,24 +731,25 @@ Estou aqui para ajudá-lo a explorar e entender seus dados através de conversas
 - "Analise as tendências de vendas"
 
 Como posso ajudá-lo hoje?"""
-        st.session_state.messages.append(
-            {"role": "assistant", "content": welcome_msg}
-        )
+        _append_message({"role": "assistant", "content": welcome_msg})
 
     # Delete Chat button
     col1, col2 = st.columns([1, 4])
     with col1:
         if st.button("🗑️ Limpar", type="secondary"):
             # Clear all session state related to chat
-            st.session_state.messages = []
+            st.session_state.messages.clear()
+            st.session_state.archived_window = 0
+
+            # CORREÇÃO: Liberar o agente da sessão (recriado na próxima execução)
             if "session_user_id" in st.session_state:
-                del st.session_state.session_user_id
+                get_session_manager().remove(st.session_state.session_user_id)
+            # Nova sessão: o histórico passa a ser arquivado no arquivo do novo ID
+            # (o mesmo que o SessionManager usa para removê-lo ao esquecer a sessão)
+            st.session_state.session_user_id = str(uuid.uuid4())
+            st.session_state.messages.session_id = st.session_state.session_user_id
 
-            # CORREÇÃO: Limpar cache do agente
-            if "cached_agent" in st.session_state:
-                del st.session_state.cached_agent
-            if "cached_df_agent" in st.session_state:
-                del st.session_state.cached_df_agent
+            clear_figure_cache()
 
             # Clear agent persistent context
             if agent is not None:
@@ -655,7 +772,17 @@ Como posso ajudá-lo hoje?"""
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Display chat history
-    for message in st.session_state.messages:
+    history = st.session_state.messages
+    archived_window = min(st.session_state.get('archived_window', 0), history.archived_count)
+    if archived_window < history.archived_count:
+        remaining = history.archived_count - archived_window
+        if st.button(f"⬆️ Carregar mensagens anteriores ({remaining})", type="secondary"):
+            archived_window = min(archived_window + history.config["page_size"], history.archived_count)
+            st.session_state.archived_window = archived_window
+
+    # Mensagens arquivadas são lidas a cada renderização (não voltam para a memória da sessão)
+    archived = history.load(history.archived_count - archived_window, archived_window)
+    for message in archived + history.recent:
         with st.chat_message(message["role"]):
             if message["role"] == "assistant":
                 _render_assistant_message(message)
@@ -667,6 +794,13 @@ Como posso ajudá-lo hoje?"""
         _handle_user_input(prompt, agent)
 
 
+def _append_message(message):
+    """Adiciona mensagem ao histórico e libera as figuras das mensagens arquivadas"""
+    archived_ids = st.session_state.messages.append(message)
+    if archived_ids:
+        drop_cached_figures(archived_ids)
+
+
 def _render_assistant_message(message):
     """Renderiza mensagem do assistente com visualizações"""
     # SUBSTITUIÇÃO AUTOMÁTICA DE TABELAS (para mensagens históricas)
@@ -686,7 +820,9 @@ def _render_assistant_message(message):
             st.markdown(title_part)
         if context_part:
             st.markdown(context_part)
-        render_plotly_visualization(message["visualization_data"])
+        # Mensagens arquivadas não entram no cache de figuras
+        message_id = None if message.get("archived") else message.setdefault("id", str(uuid.uuid4()))
+        render_plotly_visualization(message["visualization_data"], message_id=message_id)
         if insights_part:
             st.markdown(insights_part)
     else:
@@ -709,6 +845,12 @@ def _render_debug_info(debug_info, message_context=None):
                 st.markdown(f"**Query {i}:**")
                 st.code(format_sql_query(query), language="sql")
 
+        # Rollups pré-agregados utilizados
+        if debug_info.get("rollup_rewrites"):
+            st.markdown("### 🧊 Queries Reescritas para Rollups")
+            for rewrite in debug_info["rollup_rewrites"]:
+                st.markdown(f"**{rewrite['rollup']}** ({rewrite['rollup_rows']:,} linhas)")
+                st.code(format_sql_query(rewrite['rewritten_query']), language="sql")
 
         # Show JSON Filter Structure from processed response
         st.markdown("### 🎯 Filtros JSON Detectados")
@@ -726,6 +868,18 @@ def _render_debug_info(debug_info, message_context=None):
         if "response_time" in debug_info:
             st.markdown(f"### ⏱️ Tempo de Resposta: {debug_info['response_time']:.2f}s")
 
+        # Etapas do turno (spans)
+        if debug_info.get("trace"):
+            st.markdown("### 🧭 Etapas do Turno")
+            st.dataframe(pd.DataFrame([
+                {
+                    "etapa": "\u2003" * span["depth"] + span["name"],
+                    "duração (ms)": round(span["duration_ms"] or 0, 1),
+                    "status": span["status"]
+                }
+                for span in debug_info["trace"]
+            ]), hide_index=True, use_container_width=True)
+
 
 def _split_title_and_content(response_content: str) -> tuple:
     """
@@ -1160,7 +1314,7 @@ def _handle_user_input(prompt, agent):
         st.info(f"🔄 Contexto sincronizado antes do processamento: {agent.persistent_context}")
 
     # Add user message to chat history
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    _append_message({"role": "user", "content": prompt})
 
     # Display user message
     with st.chat_message("user"):
@@ -1170,6 +1324,8 @@ def _handle_user_input(prompt, agent):
     with st.chat_message("assistant"):
         with st.spinner("🤖 Analisando..."):
             start_time = time.time()
+            tracer = get_tracer()
+            turn_span = tracer.start_span("turn", prompt=prompt)
 
             # CORREÇÃO: Pré-processamento desabilitado para evitar falsos positivos
             # O sistema usa extração via SQL (sql_filter_extractor.py) que é mais precisa
@@ -1217,7 +1373,8 @@ def _handle_user_input(prompt, agent):
                     agent.clear_execution_state()
 
                 # Get agent response
-                response = agent.run(prompt)
+                with tracer.span("agent.run"):
+                    response = agent.run(prompt)
                 response_time = time.time() - start_time
 
                 # Process response content
@@ -1238,12 +1395,18 @@ def _handle_user_input(prompt, agent):
                 context = {}
                 debug_info = {"response_time": response_time}
                 visualization_data = None
+                message_id = str(uuid.uuid4())  # Chave do cache de figuras desta mensagem
 
                 if hasattr(agent, 'debug_info'):
-                    debug_info.update(agent.debug_info)
+                    if hasattr(agent.debug_info, 'snapshot'):
+                        # Referências aos buffers do turno (sem cópia); o store limita a memória dos snapshots
+                        debug_info = agent.debug_info.snapshot(response_time=response_time)
+                    else:
+                        debug_info.update(agent.debug_info)
 
                     # CORREÇÃO CRÍTICA: Extrair filtros ANTES de limpar debug_info
                     # Processar filtros usando APENAS as queries SQL
+                    extract_span = tracer.start_span("filters.extract")
                     try:
                         df_dataset = getattr(agent, 'df_normalized', None)
                         # Usar debug_info local que contém as queries (não agent.debug_info)
@@ -1261,6 +1424,7 @@ def _handle_user_input(prompt, agent):
                                 debug_info['filter_changes'] = filter_changes
                     except Exception as e:
                         debug_info['filter_extraction_error'] = str(e)
+                    tracer.end_span(extract_span)
 
                     agent.debug_info.clear()  # Clear for next query
 
@@ -1284,6 +1448,7 @@ def _handle_user_input(prompt, agent):
                         st.info(f"🔍 Contexto atual: {len(context)} filtros ativos")
 
                 # SISTEMA LIMPO: Extrair filtros APENAS das queries SQL
+                apply_span = tracer.start_span("filters.apply")
                 try:
                     df_dataset = getattr(agent, 'df_normalized', None)
                     if df_dataset is not None:
@@ -1355,11 +1520,14 @@ def _handle_user_input(prompt, agent):
 
                     # Em caso de erro, manter contexto atual (não usar fallback)
                     pass
+                tracer.end_span(apply_span)
 
                 # FASE 2: Processar metadados de visualização do agent (tool-based)
                 # Priorizar visualization_metadata criado por VisualizationTools
-                if hasattr(agent, 'debug_info') and 'visualization_metadata' in agent.debug_info:
-                    viz_metadata_list = agent.debug_info['visualization_metadata']
+                visualization_span = tracer.start_span("visualization.prepare")
+                # Lido do snapshot do turno (agent.debug_info já foi limpo para a próxima pergunta)
+                if 'visualization_metadata' in debug_info:
+                    viz_metadata_list = debug_info['visualization_metadata']
 
                     if viz_metadata_list:
                         # Usar primeira visualização encontrada
@@ -1405,6 +1573,7 @@ def _handle_user_input(prompt, agent):
                                         if st.session_state.get('debug_mode', False):
                                             st.warning(f"Muitas linhas para visualização: {len(df_result)} > {max_rows}")
                                 break
+                tracer.end_span(visualization_span)
 
                 # SUBSTITUIÇÃO AUTOMÁTICA DE TABELAS POR GRÁFICOS
                 # Remove tabelas markdown quando há visualização disponível
@@ -1412,6 +1581,7 @@ def _handle_user_input(prompt, agent):
                     response_content = _extract_and_replace_tables(response_content, True)
 
                 # INSERIR GRÁFICO NA POSIÇÃO CORRETA: Título → Contexto → Gráfico → Insights
+                render_span = tracer.start_span("render", has_visualization=bool(visualization_data))
                 if visualization_data:
                     # Separar título, contexto e insights do conteúdo
                     title_part, context_part, insights_part = _split_title_and_content(response_content)
@@ -1421,18 +1591,26 @@ def _handle_user_input(prompt, agent):
                         st.markdown(title_part)
                     if context_part:
                         st.markdown(context_part)
-                    render_plotly_visualization(visualization_data)
+                    with tracer.span("plotly.render", chart_type=visualization_data.get('type')):
+                        render_plotly_visualization(visualization_data, message_id=message_id)
                     if insights_part:
                         st.markdown(insights_part)
                 else:
                     # Sem visualização: renderizar conteúdo normalmente
                     st.markdown(response_content)
+                tracer.end_span(render_span)
 
                 # Display response time
                 st.markdown(f"⏱️ *Tempo de resposta: {response_time:.2f}s*")
 
+                # Etapas do turno até aqui (o span raiz fecha ao final do processamento)
+                if turn_span is not None:
+                    debug_info["trace_id"] = turn_span.trace_id
+                    debug_info["trace"] = summarize_trace(tracer.trace_spans(turn_span.trace_id))
+
                 # Store message with all metadata
                 assistant_message = {
+                    "id": message_id,
                     "role": "assistant",
                     "content": response_content,
                     "context": context,
@@ -1442,7 +1620,7 @@ def _handle_user_input(prompt, agent):
                 if visualization_data:
                     assistant_message["visualization_data"] = visualization_data
 
-                st.session_state.messages.append(assistant_message)
+                _append_message(assistant_message)
 
                 # ATUALIZAÇÃO IMEDIATA DA SIDEBAR: Detectar se o contexto mudou
                 previous_context = st.session_state.get('last_context', {})
@@ -1468,14 +1646,21 @@ def _handle_user_input(prompt, agent):
                         st.rerun()
 
             except Exception as e:
+                tracer.end_span(turn_span, error=e)
                 error_msg = f" **Erro:** {str(e)}"
                 st.error(error_msg)
-                st.session_state.messages.append({
+                _append_message({
                     "role": "assistant",
                     "content": error_msg,
                     "context": {},
                     "debug_info": {"error": str(e), "response_time": time.time() - start_time}
                 })
+            finally:
+                # Exporta o turno (inclusive quando st.rerun() interrompe o fluxo)
+                tracer.end_span(turn_span)
+                get_metrics_registry().histogram(
+                    "turn_duration_seconds", "Duração total de um turno do chat"
+                ).observe(time.time() - start_time)
 
 
 
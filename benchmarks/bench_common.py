@@ -0,0 +1,36 @@
+"""
+Utilitários compartilhados pelos benchmarks: cronômetro de etapas e pico de RSS
+"""
+
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: pico de RSS não disponível
+    resource = None
+
+
+def peak_rss_mb() -> float:
+    """Pico de memória residente do processo até agora (MB)"""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class StageTimer:
+    """Cronometra etapas nomeadas e registra o pico de RSS ao final de cada uma"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name: str, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.stages[name] = {
+            'latency': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_mb()
+        }
+        return result
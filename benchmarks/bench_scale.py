@@ -0,0 +1,95 @@
+"""
+Benchmark de escala: carga, normalização, filtros e queries DuckDB de 1M a 200M linhas
+
+Gera (ou reutiliza) datasets sintéticos de DadosComercial nos tamanhos pedidos e
+mede, para cada um, o tempo e o pico de RSS das etapas que crescem com o dataset:
+
+    load        -> read_compact_dataset (carga do app com plano de tipos)
+    normalize   -> TextNormalizer.identify_text_columns + normalize_dataframe
+    filters     -> extração de filtros das queries SQL (processar_filtros_apenas_sql)
+    duckdb_load -> criação de dados_comerciais (build_dataset_ddl)
+    queries     -> queries típicas do agente (total por período, ranking, série mensal)
+
+O pico de RSS é do processo inteiro; para números independentes entre tamanhos,
+rode um tamanho por execução.
+
+Uso:
+    python benchmarks/bench_scale.py --rows 1000000 5000000 20000000 [--data-dir benchmarks/data]
+"""
+
+import argparse
+import os
+import sys
+
+import duckdb
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCHMARK_DIR, '..', 'src'))
+from bench_common import StageTimer
+from datastore.dtype_plan import read_compact_dataset
+from datastore.layout import build_dataset_ddl
+from datastore.synthetic import generate_synthetic_dataset
+from filters.core.manager import processar_filtros_apenas_sql
+from text_normalizer import TextNormalizer
+
+AGENT_QUERIES = {
+    'total_periodo': "SELECT SUM(Valor_Vendido) FROM dados_comerciais "
+                     "WHERE Data >= '2024-06-01' AND Data < '2024-07-01'",
+    'ranking_clientes_uf': "SELECT Cod_Cliente, SUM(Valor_Vendido) AS total FROM dados_comerciais "
+                           "WHERE UF_Cliente = 'SC' AND Data >= '2024-01-01' "
+                           "GROUP BY Cod_Cliente ORDER BY total DESC LIMIT 10",
+    'serie_mensal_linha': "SELECT DATE_TRUNC('month', Data) AS mes, Des_Linha_Produto, SUM(Valor_Vendido) AS total "
+                          "FROM dados_comerciais GROUP BY 1, 2 ORDER BY 1",
+    'municipio_acentuado': "SELECT COUNT(*) FROM dados_comerciais WHERE LOWER(Municipio_Cliente) = 'florianópolis'",
+}
+
+
+def bench_size(data_path: str) -> dict:
+    """Mede as etapas sensíveis ao tamanho do dataset para um arquivo"""
+    timer = StageTimer()
+
+    df = timer.run('load', read_compact_dataset, data_path)
+    normalizer = TextNormalizer()
+
+    def normalize():
+        normalizer.set_dataset_context(df)
+        text_columns = normalizer.identify_text_columns(df)
+        return normalizer.normalize_dataframe(df, text_columns)
+
+    df_normalized = timer.run('normalize', normalize)
+    timer.run('filters', processar_filtros_apenas_sql, list(AGENT_QUERIES.values()), {}, df_normalized)
+    del df, df_normalized
+
+    connection = duckdb.connect()
+    timer.run('duckdb_load', connection.execute, build_dataset_ddl(data_path))
+
+    def run_queries():
+        for query in AGENT_QUERIES.values():
+            connection.execute(query).fetchall()
+
+    timer.run('queries', run_queries)
+    connection.close()
+    return timer.stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 5_000_000])
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARK_DIR, 'data'))
+    args = parser.parse_args()
+
+    stage_names = ['load', 'normalize', 'filters', 'duckdb_load', 'queries']
+    print(f"{'linhas':>14}" + "".join(f"{stage:>14}" for stage in stage_names) + f"{'pico RSS':>12}")
+
+    for rows in args.rows:
+        data_path = os.path.join(args.data_dir, f"dados_sinteticos_{rows}.parquet")
+        if not os.path.exists(data_path):
+            generate_synthetic_dataset(data_path, rows)
+
+        stages = bench_size(data_path)
+        line = f"{rows:>14,}" + "".join(f"{stages[stage]['latency']:>13.2f}s" for stage in stage_names)
+        print(line + f"{max(s['peak_rss_mb'] for s in stages.values()):>9.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark de layout físico: volume varrido antes e depois da clusterização
+
+Compara, para queries típicas do agente (período + UF/município/cliente), as linhas
+varridas na tabela em memória e os bytes lidos do parquet entre o layout original
+(ordem do arquivo) e o layout clusterizado de DATA_CONFIG['table_layout'].
+
+Uso:
+    python benchmarks/bench_table_layout.py [--data caminho.parquet] [--secondary-key UF_Cliente]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import duckdb
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.model_config import DATA_CONFIG
+from datastore.layout import get_order_by_clause, profile_scan, write_clustered_parquet
+
+
+def _sample_filters(connection, table: str) -> dict:
+    """Escolhe valores reais para montar filtros representativos"""
+    month_start, month_end = connection.execute(f"""
+        SELECT DATE_TRUNC('month', m) AS inicio, DATE_TRUNC('month', m) + INTERVAL 1 MONTH AS fim
+        FROM (SELECT MAX(Data) - INTERVAL 3 MONTH AS m FROM {table})
+    """).fetchone()
+    sample = {'inicio': str(month_start)[:10], 'fim': str(month_end)[:10]}
+    for column in ['UF_Cliente', 'Municipio_Cliente', 'Cod_Cliente']:
+        row = connection.execute(
+            f"SELECT {column} FROM {table} GROUP BY 1 ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()
+        if row is not None:
+            sample[column] = row[0]
+    return sample
+
+
+def _benchmark_queries(sample: dict) -> dict:
+    """Queries representativas com filtros de período e dimensão"""
+    periodo = f"Data >= '{sample['inicio']}' AND Data < '{sample['fim']}'"
+    queries = {'periodo': f"SELECT SUM(Valor_Vendido) FROM {{table}} WHERE {periodo}"}
+    for column in ['UF_Cliente', 'Municipio_Cliente', 'Cod_Cliente']:
+        if column in sample:
+            queries[f"periodo + {column}"] = (
+                f"SELECT SUM(Valor_Vendido) FROM {{table}} WHERE {periodo} AND {column} = '{sample[column]}'"
+            )
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=DATA_CONFIG['data_path'])
+    parser.add_argument('--secondary-key', default=None)
+    args = parser.parse_args()
+
+    layout = dict(DATA_CONFIG.get('table_layout', {}))
+    if args.secondary_key:
+        layout['secondary_key'] = args.secondary_key
+
+    connection = duckdb.connect()
+    columns = [row[0] for row in connection.execute(
+        f"DESCRIBE SELECT * FROM read_parquet('{args.data}')"
+    ).fetchall()]
+    order_by = get_order_by_clause(layout, columns)
+
+    connection.execute(f"CREATE TABLE layout_original AS SELECT * FROM read_parquet('{args.data}')")
+    connection.execute(f"CREATE TABLE layout_clustered AS SELECT * FROM read_parquet('{args.data}') ORDER BY {order_by}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        original_parquet = os.path.join(tmp_dir, 'original.parquet')
+        clustered_parquet = os.path.join(tmp_dir, 'clustered.parquet')
+        connection.execute(
+            f"COPY layout_original TO '{original_parquet}' "
+            f"(FORMAT PARQUET, ROW_GROUP_SIZE {layout.get('row_group_size', 122880)})"
+        )
+        write_clustered_parquet(connection, args.data, clustered_parquet, layout)
+
+        sources = {
+            'tabela original': 'layout_original',
+            'tabela clusterizada': 'layout_clustered',
+            'parquet original': f"read_parquet('{original_parquet}')",
+            'parquet clusterizado': f"read_parquet('{clustered_parquet}')",
+        }
+
+        sample = _sample_filters(connection, 'layout_original')
+        print(f"Layout: ORDER BY {order_by} | row groups parquet: {layout.get('row_group_size')}")
+        print(f"{'query':<30} {'fonte':<22} {'linhas varridas':>16} {'bytes lidos':>14} {'latência (ms)':>14}")
+
+        for name, template in _benchmark_queries(sample).items():
+            for source_name, source in sources.items():
+                stats = profile_scan(connection, template.format(table=source))
+                print(f"{name:<30} {source_name:<22} {stats['rows_scanned']:>16,} "
+                      f"{stats['bytes_read']:>14,} {stats['latency'] * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Benchmark de ponta a ponta de um turno do chat: latência por etapa, pico de RSS e volume varrido
+
+Cria o agente com create_agent sobre um parquet sintético (5M linhas por padrão),
+mede também uma segunda sessão (clone do AgentTemplate já construído) e usa um modelo local (ReplayOpenAIChat) que reproduz chamadas de ferramenta gravadas
+em benchmarks/scenarios. Para cada roteiro executa as mesmas etapas de
+app._handle_user_input, sem a camada de UI do Streamlit:
+
+    clear_state    -> agent.clear_execution_state()
+    agent_run      -> agent.run(prompt) (ferramentas reais, LLM reproduzido)
+    filters        -> extração de filtros das queries SQL + substituição inteligente
+    visualization  -> visualization_metadata do agente ou fallback _prepare_visualization_data
+    layout         -> remoção das tabelas markdown e separação título/contexto/insights
+    figure         -> construção da figura Plotly
+
+O volume varrido (linhas e bytes) é medido reexecutando com profiling as queries
+que o agente registrou no turno, fora das etapas cronometradas.
+
+Com --baseline, compara com um resultado anterior (--save salva o atual) e termina
+com código 1 se alguma métrica piorar além da tolerância configurada.
+
+Uso:
+    python benchmarks/bench_turn_pipeline.py [--rows 5000000] [--data caminho.parquet]
+        [--scenarios benchmarks/scenarios] [--repeat 3] [--memory-mode off] [--complexity-profiles on]
+        [--save resultado.json] [--baseline resultado.json]
+        [--max-latency-regression 0.25] [--max-rss-regression 0.10] [--max-scan-regression 0.0]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BENCHMARK_DIR, '..'))
+sys.path.append(os.path.join(BENCHMARK_DIR, '..', 'src'))
+
+# O agente exige a chave, mas o modelo reproduzido nunca chama a API
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-replay")
+
+from bench_common import StageTimer, peak_rss_mb
+from config.agent_config import COMPLEXITY_CONFIG, MEMORY_CONFIG, ROLLUP_CONFIG
+from config.model_config import DATA_CONFIG, SELECTED_MODEL
+from datastore.layout import profile_scan
+from datastore.synthetic import generate_synthetic_dataset
+from stub_llm import ReplayOpenAIChat, load_scenarios
+
+STAGES = ['clear_state', 'agent_run', 'filters', 'visualization', 'layout', 'figure']
+
+# Diferenças absolutas abaixo destes valores são ruído e não contam como regressão
+MIN_LATENCY_DELTA = 0.005   # segundos
+MIN_RSS_DELTA = 20.0        # MB
+
+
+def _duckdb_tool(agent):
+    for tool in agent.tools:
+        if hasattr(tool, 'run_query') and hasattr(tool, 'connection'):
+            return tool
+    return None
+
+
+def _extract_filters(agent, debug_info: dict, context: dict) -> dict:
+    """Mesma sequência de app._handle_user_input: queries SQL -> filtros -> contexto validado"""
+    from filters.core.manager import processar_filtros_apenas_sql
+    from filters.core.replacer import (
+        apply_smart_filter_replacement,
+        auto_resolve_filter_conflicts,
+        validate_filter_consistency
+    )
+
+    sql_queries = debug_info.get('sql_queries', [])
+    df_dataset = getattr(agent, 'df_normalized', None)
+    if df_dataset is None or not sql_queries:
+        return context
+
+    extracted, _ = processar_filtros_apenas_sql(sql_queries, {}, df_dataset)
+    context, _ = apply_smart_filter_replacement(context, extracted)
+    is_valid, _ = validate_filter_consistency(context)
+    if not is_valid:
+        context, _ = auto_resolve_filter_conflicts(context)
+    agent.update_persistent_context(context)
+    return context
+
+
+def _prepare_visualization(app, agent, debug_info: dict, prompt: str):
+    """visualization_metadata gerado pelas ferramentas ou o fallback automático do app"""
+    viz_metadata_list = debug_info.get('visualization_metadata')
+    if viz_metadata_list:
+        return viz_metadata_list[0]
+
+    for tool in agent.tools:
+        df_result = getattr(tool, 'last_result_df', None)
+        if df_result is not None and not df_result.empty:
+            is_temporal = app._is_temporal_analysis(df_result, prompt)
+            if len(df_result) <= (50 if is_temporal else 20):
+                return app._prepare_visualization_data(
+                    df_result, is_temporal, prompt, last_query=getattr(tool, 'last_query', None)
+                )
+            break
+    return None
+
+
+def _layout_response(app, response_content: str, visualization_data):
+    if not visualization_data:
+        return response_content, None
+    response_content = app._extract_and_replace_tables(response_content, True)
+    return response_content, app._split_title_and_content(response_content)
+
+
+def _scan_volume(connection, debug_info: dict) -> dict:
+    """Linhas e bytes varridos pelas queries do turno (SQL do run_query e do compare_periods)"""
+    queries = [(query, None) for query in debug_info.get('sql_queries', [])]
+    queries += [(item['sql'], item['params']) for item in debug_info.get('comparative_analyses', [])]
+
+    total = {'queries': 0, 'rows_scanned': 0, 'bytes_read': 0}
+    for query, params in queries:
+        try:
+            stats = profile_scan(connection, query, params)
+        except Exception:
+            continue
+        total['queries'] += 1
+        total['rows_scanned'] += stats['rows_scanned']
+        total['bytes_read'] += stats['bytes_read']
+    return total
+
+
+def run_scenario(app, agent, model: ReplayOpenAIChat, scenario: dict) -> dict:
+    """Executa um turno completo do roteiro e devolve métricas por etapa"""
+    from visualization.plotly_charts import build_plotly_figure
+
+    prompt = scenario['prompt']
+    model.load_scenario(scenario)
+    timer = StageTimer()
+
+    timer.run('clear_state', agent.clear_execution_state)
+    response = timer.run('agent_run', agent.run, prompt)
+    response_content = str(response.content) if hasattr(response, 'content') else str(response)
+
+    debug_info = agent.debug_info.snapshot()
+    complexity = (debug_info.get('complexity') or [{}])[-1]
+    timer.run('filters', _extract_filters, agent, debug_info, dict(agent.persistent_context))
+    visualization_data = timer.run('visualization', _prepare_visualization, app, agent, debug_info, prompt)
+    timer.run('layout', _layout_response, app, response_content, visualization_data)
+    timer.run('figure', build_plotly_figure, visualization_data)
+
+    duckdb_tool = _duckdb_tool(agent)
+    scan = _scan_volume(duckdb_tool.connection, debug_info) if duckdb_tool else {}
+    agent.debug_info.clear()
+
+    return {
+        'stages': timer.stages,
+        'llm_steps': len(model.calls),
+        'has_visualization': bool(visualization_data),
+        'complexity': complexity.get('level'),
+        'scan': scan
+    }
+
+
+def _median_run(runs: list) -> dict:
+    """Combina repetições de um roteiro: mediana da latência, máximo do RSS"""
+    combined = dict(runs[-1])
+    combined['stages'] = {
+        stage: {
+            'latency': statistics.median(run['stages'][stage]['latency'] for run in runs),
+            'peak_rss_mb': max(run['stages'][stage]['peak_rss_mb'] for run in runs)
+        }
+        for stage in runs[-1]['stages']
+    }
+    return combined
+
+
+def flatten_metrics(results: dict) -> dict:
+    """Métricas comparáveis entre execuções: {nome: (tipo, valor)}"""
+    metrics = {
+        'create_agent/latency': ('latency', results['create_agent']['latency']),
+        'peak_rss_mb': ('rss', results['peak_rss_mb'])
+    }
+    if 'clone_agent' in results:
+        metrics['clone_agent/latency'] = ('latency', results['clone_agent']['latency'])
+    for name, scenario in results['scenarios'].items():
+        total = 0.0
+        for stage, values in scenario['stages'].items():
+            metrics[f"{name}/{stage}/latency"] = ('latency', values['latency'])
+            total += values['latency']
+        metrics[f"{name}/total/latency"] = ('latency', total)
+        for key in ['rows_scanned', 'bytes_read']:
+            if key in scenario.get('scan', {}):
+                metrics[f"{name}/{key}"] = ('scan', scenario['scan'][key])
+    return metrics
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerances: dict) -> list:
+    """
+    Lista as métricas que pioraram além da tolerância relativa do seu tipo.
+
+    Args:
+        results: Resultado da execução atual
+        baseline: Resultado salvo com --save
+        tolerances: {'latency': 0.25, 'rss': 0.10, 'scan': 0.0}
+
+    Returns:
+        Lista de descrições das regressões (vazia se nenhuma)
+    """
+    min_delta = {'latency': MIN_LATENCY_DELTA, 'rss': MIN_RSS_DELTA, 'scan': 0}
+    current = flatten_metrics(results)
+    previous = flatten_metrics(baseline)
+
+    regressions = []
+    for name, (kind, value) in current.items():
+        if name not in previous:
+            continue
+        reference = previous[name][1]
+        limit = reference * (1 + tolerances[kind])
+        if value > limit and value - reference > min_delta[kind]:
+            change = (value / reference - 1) * 100 if reference else float('inf')
+            regressions.append(f"{name}: {reference:,.4g} -> {value:,.4g} (+{change:.1f}%, tolerância {tolerances[kind]:.0%})")
+    return regressions
+
+
+def _print_results(results: dict):
+    print(f"Dataset: {results['rows']:,} linhas | create_agent: {results['create_agent']['latency']:.2f}s "
+          f"| nova sessão (clone): {results['clone_agent']['latency'] * 1000:.1f}ms "
+          f"| pico RSS: {results['peak_rss_mb']:.0f} MB")
+    header = f"{'roteiro':<26}{'nível':>10}{'passos LLM':>12}" + "".join(f"{stage:>14}" for stage in STAGES) + f"{'linhas varridas':>17}{'bytes lidos':>15}"
+    print(header)
+    for name, scenario in results['scenarios'].items():
+        line = f"{name:<26}{scenario.get('complexity') or '-':>10}{scenario.get('llm_steps', 0):>12}"
+        for stage in STAGES:
+            line += f"{scenario['stages'][stage]['latency'] * 1000:>12.1f}ms"
+        scan = scenario.get('scan', {})
+        line += f"{scan.get('rows_scanned', 0):>17,}{scan.get('bytes_read', 0):>15,}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5_000_000)
+    parser.add_argument('--data', default=None, help='Parquet a usar (gerado se não existir)')
+    parser.add_argument('--scenarios', default=os.path.join(BENCHMARK_DIR, 'scenarios'))
+    parser.add_argument('--repeat', type=int, default=3)
+    # Os roteiros gravados não incluem chamadas de memória; 'off' mantém a reprodução determinística
+    parser.add_argument('--memory-mode', choices=['agentic', 'background', 'off'], default='off')
+    # 'off' registra todas as ferramentas em todo turno (para comparar o efeito dos perfis por complexidade)
+    parser.add_argument('--complexity-profiles', choices=['on', 'off'], default='on')
+    parser.add_argument('--save', default=None, help='Salva o resultado em JSON (baseline futura)')
+    parser.add_argument('--baseline', default=None, help='Resultado anterior para detectar regressões')
+    parser.add_argument('--max-latency-regression', type=float, default=0.25)
+    parser.add_argument('--max-rss-regression', type=float, default=0.10)
+    parser.add_argument('--max-scan-regression', type=float, default=0.0)
+    args = parser.parse_args()
+
+    data_path = args.data or os.path.join(BENCHMARK_DIR, 'data', f"dados_sinteticos_{args.rows}.parquet")
+    if not os.path.exists(data_path):
+        print(f"Gerando {args.rows:,} linhas em {data_path}...")
+        generate_synthetic_dataset(data_path, args.rows)
+
+    # O agente passa a ler o parquet sintético e materializa os rollups ao lado dele
+    DATA_CONFIG['data_path'] = data_path
+    ROLLUP_CONFIG['cache_dir'] = os.path.join(os.path.dirname(os.path.abspath(data_path)), 'rollups')
+    MEMORY_CONFIG['mode'] = args.memory_mode
+    COMPLEXITY_CONFIG['enabled'] = args.complexity_profiles == 'on'
+
+    import chatbot_agents
+    chatbot_agents.OpenAIChat = ReplayOpenAIChat
+
+    # Funções de processamento do app (Streamlit sem servidor, apenas as funções puras)
+    import app
+
+    scenarios = load_scenarios(args.scenarios)
+
+    timer = StageTimer()
+    agent, df = timer.run('create_agent', chatbot_agents.create_agent, session_user_id='benchmark')
+    # Segunda sessão: clone do AgentTemplate já construído
+    timer.run('clone_agent', chatbot_agents.create_agent, session_user_id='benchmark-clone')
+    model = agent.model
+    del df
+
+    runs = {scenario['name']: [] for scenario in scenarios}
+    for _ in range(args.repeat):
+        for scenario in scenarios:
+            runs[scenario['name']].append(run_scenario(app, agent, model, scenario))
+
+    results = {
+        'rows': args.rows,
+        'model': SELECTED_MODEL,
+        'complexity_profiles': args.complexity_profiles,
+        'create_agent': timer.stages['create_agent'],
+        'clone_agent': timer.stages['clone_agent'],
+        'scenarios': {name: _median_run(scenario_runs) for name, scenario_runs in runs.items()},
+        'peak_rss_mb': peak_rss_mb()
+    }
+    _print_results(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        tolerances = {
+            'latency': args.max_latency_regression,
+            'rss': args.max_rss_regression,
+            'scan': args.max_scan_regression
+        }
+        regressions = compare_with_baseline(results, baseline, tolerances)
+        if regressions:
+            print("\nREGRESSÕES em relação à baseline:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            sys.exit(1)
+        print("\nSem regressões em relação à baseline.")
+
+
+if __name__ == "__main__":
+    main()
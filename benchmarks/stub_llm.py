@@ -0,0 +1,145 @@
+"""
+Modelo local determinístico para benchmarks: substitui o OpenAIChat do agente
+
+O ReplayOpenAIChat herda do OpenAIChat do agno e troca apenas o cliente HTTP:
+cada chamada a chat.completions.create devolve o próximo passo de um roteiro
+gravado (chamadas de ferramenta e, por fim, a resposta em texto). Todo o resto
+do pipeline do agente - formatação das mensagens, execução das ferramentas,
+parsing da resposta - roda exatamente como em produção, sem rede e sem custo.
+
+Formato de um roteiro (benchmarks/scenarios/*.json):
+    {
+        "prompt": "pergunta do usuário",
+        "steps": [
+            {"tool_calls": [{"name": "run_query", "arguments": {"query": "SELECT ..."}}]},
+            {"content": "resposta final em markdown"}
+        ]
+    }
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from agno.models.openai import OpenAIChat
+from openai.types.chat import ChatCompletion
+
+
+def load_scenarios(path: str) -> List[Dict]:
+    """Carrega os roteiros de um arquivo JSON (lista) ou de todos os .json de um diretório"""
+    if os.path.isdir(path):
+        scenarios = []
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.json'):
+                scenarios.extend(load_scenarios(os.path.join(path, name)))
+        return scenarios
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    scenarios = data if isinstance(data, list) else [data]
+    for scenario in scenarios:
+        scenario.setdefault('name', os.path.splitext(os.path.basename(path))[0])
+    return scenarios
+
+
+def _current_step(messages: List[Dict]) -> int:
+    """Passo do roteiro = respostas do assistente desde a última mensagem do usuário"""
+    step = 0
+    for message in reversed(messages):
+        role = message.get('role') if isinstance(message, dict) else getattr(message, 'role', None)
+        if role == 'user':
+            break
+        if role == 'assistant':
+            step += 1
+    return step
+
+
+def build_completion(step: Dict, model_id: str, call_index: int) -> ChatCompletion:
+    """Monta a ChatCompletion da OpenAI correspondente a um passo do roteiro"""
+    tool_calls = [
+        {
+            'id': f"call_{call_index}_{i}",
+            'type': 'function',
+            'function': {
+                'name': call['name'],
+                'arguments': json.dumps(call.get('arguments', {}), ensure_ascii=False)
+            }
+        }
+        for i, call in enumerate(step.get('tool_calls', []))
+    ]
+    message = {'role': 'assistant', 'content': step.get('content')}
+    if tool_calls:
+        message['tool_calls'] = tool_calls
+
+    return ChatCompletion.model_validate({
+        'id': f"replay-{call_index}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model_id,
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'tool_calls' if tool_calls else 'stop',
+            'message': message
+        }],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+    })
+
+
+class _ReplayCompletions:
+    """Imita client.chat.completions devolvendo os passos do roteiro ativo"""
+
+    def __init__(self, model: "ReplayOpenAIChat"):
+        self._model = model
+
+    def create(self, messages=None, **kwargs) -> ChatCompletion:
+        return self._model.next_completion(messages or [])
+
+
+class _ReplayAsyncCompletions(_ReplayCompletions):
+
+    async def create(self, messages=None, **kwargs) -> ChatCompletion:
+        return self._model.next_completion(messages or [])
+
+
+class _ReplayClient:
+    """Cliente OpenAI mínimo: apenas chat.completions.create"""
+
+    def __init__(self, completions):
+        self.chat = type('chat', (), {})()
+        self.chat.completions = completions
+
+
+class ReplayOpenAIChat(OpenAIChat):
+    """
+    OpenAIChat que reproduz um roteiro gravado em vez de chamar a API.
+
+    Use `load_scenario` antes de cada `agent.run`; `calls` guarda a duração de cada
+    passo servido, para separar o tempo do "LLM" (desprezível) do tempo das ferramentas.
+    """
+
+    scenario: Optional[Dict] = None
+
+    def load_scenario(self, scenario: Dict):
+        self.scenario = scenario
+        self.calls = []
+
+    def next_completion(self, messages: List[Dict]) -> ChatCompletion:
+        if not self.scenario:
+            raise RuntimeError("ReplayOpenAIChat sem roteiro carregado (use load_scenario)")
+
+        steps = self.scenario.get('steps', [])
+        step_index = _current_step(messages)
+        if step_index >= len(steps):
+            raise RuntimeError(
+                f"Roteiro '{self.scenario.get('name')}' esgotado: passo {step_index} de {len(steps)}"
+            )
+
+        self.calls.append({'step': step_index, 'at': time.perf_counter()})
+        return build_completion(steps[step_index], self.id, len(self.calls))
+
+    def get_client(self):
+        return _ReplayClient(_ReplayCompletions(self))
+
+    def get_async_client(self):
+        return _ReplayClient(_ReplayAsyncCompletions(self))
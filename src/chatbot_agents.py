@@ -11,20 +11,35 @@ from agno.knowledge import Knowledge
 from agno.tools.calculator import CalculatorTools
 from agno.tools.python import PythonTools
 from agno.db.in_memory import InMemoryDb
+from agno.memory import MemoryManager
 
+import hashlib
 import os
+import threading
 import pandas as pd
 import tempfile
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 # Importar módulos refatorados
 from text_normalizer import TextNormalizer, load_alias_mapping
 from config.model_config import SELECTED_MODEL, OPENAI_API_KEY, DATA_CONFIG
-from config.agent_config import COLUMN_HIERARCHY, AGENT_CONFIG, FILTER_BEHAVIOR_CONFIG
+from config.agent_config import COLUMN_HIERARCHY, AGENT_CONFIG, FILTER_BEHAVIOR_CONFIG, MEMORY_CONFIG
 from prompts.chatbot_prompt import create_chatbot_prompt
 from tools.optimized_python_tools import OptimizedPythonTools
 from tools.debug_duckdb_tools import DebugDuckDbTools
 from tools.visualization_tools import VisualizationTools
+from tools.comparative_tools import ComparativeTools
+from datastore.rollups import build_rollup_catalog
+from datastore.layout import build_dataset_ddl
+from datastore.partitions import read_dataset, create_partition_pruner
+from datastore.refresh import get_dataset_refresher, ingest_delta
+from utils.tracing import get_tracer
+from utils.metrics import get_metrics_registry, tool_metrics_hook
+from utils.diagnostics import DiagnosticsStore
+from utils.memory_updates import schedule_memory_update, count_memory_tool_calls
+from utils.question_complexity import classify_question, select_profile
+from insights.summary_executor import PendingInsights
 
 load_dotenv()
 
@@ -36,18 +51,21 @@ class PrincipalAgent(Agent):
     """
 
     def __init__(self, normalizer, alias_mapping, df_normalized, text_columns,
-                 session_user_id, conversation_memory="", *args, **kwargs):
+                 session_user_id, conversation_memory="", memory_mode="agentic", *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.normalizer = normalizer
         self.alias_mapping = alias_mapping
         self.df_normalized = df_normalized
         self.text_columns = text_columns
         self.session_user_id = session_user_id or "default_user"
-        self.debug_info = {}  # Para armazenar informações de debug
+        self.debug_info = DiagnosticsStore()  # Informações de debug (listas limitadas por turno)
 
         # MEMÓRIA DE CONVERSAÇÃO EFÊMERA (única funcionalidade mantida)
         self.conversation_memory = conversation_memory  # Histórico da conversação atual
 
+        # Memória de longo prazo do agno: 'agentic', 'background' ou 'off' (MEMORY_CONFIG)
+        self.memory_mode = memory_mode
+
         # SISTEMA DE FILTROS PERSISTENTES - RESTAURADO
         self.persistent_context = {}  # Context que persiste entre queries para filtros
 
@@ -56,7 +74,8 @@ class PrincipalAgent(Agent):
         self.visualization_tool_ref = None  # Referência para VisualizationTools
         for i, tool in enumerate(self.tools):
             if isinstance(tool, DuckDbTools):
-                self.tools[i] = DebugDuckDbTools(debug_info_ref=self)
+                # Preserva a conexão recebida (cursor do banco compartilhado do AgentTemplate)
+                self.tools[i] = DebugDuckDbTools(debug_info_ref=self, connection=getattr(tool, '_connection', None))
             elif isinstance(tool, PythonTools):
                 optimized_tool = OptimizedPythonTools(debug_info_ref=self, run_code=True, pip_install=False)
                 self.tools[i] = optimized_tool
@@ -65,6 +84,11 @@ class PrincipalAgent(Agent):
                 # VisualizationTools já está configurada corretamente
                 self.visualization_tool_ref = tool
 
+        # Prompts de insights dos gráficos: o resumo numérico segue em cálculo enquanto a
+        # ferramenta monta o gráfico e é aguardado pelo hook ao fim da chamada
+        if self.visualization_tool_ref is not None:
+            self.tool_hooks = [*(self.tool_hooks or []), self.visualization_tool_ref.pending_insights.tool_hook]
+
     def update_conversation_memory(self, new_memory):
         """
         Atualiza a memória de conversação com novo histórico.
@@ -283,8 +307,122 @@ class PrincipalAgent(Agent):
                 'persistent_context_used': bool(self.persistent_context)
             })
 
+        # Perfil do turno pela complexidade da pergunta (sem o contexto anexado ao prompt)
+        complexity = classify_question(message)
+        profile = select_profile(complexity['level'])
+        if hasattr(self, 'debug_info') and self.debug_info is not None:
+            if 'complexity' not in self.debug_info:
+                self.debug_info['complexity'] = []
+            self.debug_info['complexity'].append({
+                **complexity,
+                'tools': list(profile['tools']) if profile else [self._tool_kind(t) for t in self.tools],
+                'reasoning_effort': profile['reasoning_effort'] if profile else getattr(
+                    self.model, 'reasoning_effort', None)
+            })
+
         # Executar com a mensagem e contexto de conversação + filtros
-        return super().run(final_message, **kwargs)
+        # (métricas rotuladas pelo modo de memória e pela complexidade para comparar latência e tokens por turno)
+        metrics = get_metrics_registry()
+        labels = {'memory_mode': self.memory_mode, 'complexity': complexity['level']}
+        status = "ok"
+        restore = self._apply_complexity_profile(profile)
+        try:
+            with metrics.histogram("agent_run_seconds", "Duração de PrincipalAgent.run (LLM + ferramentas)").time(
+                    **labels):
+                response = super().run(final_message, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            restore()
+            metrics.counter("agent_runs_total", "Execuções de PrincipalAgent.run").inc(status=status, **labels)
+
+        # Uso de tokens informado pelo modelo (RunOutput.metrics no agno)
+        run_metrics = getattr(response, 'metrics', None)
+        for token_type in ('input_tokens', 'output_tokens', 'reasoning_tokens'):
+            tokens = getattr(run_metrics, token_type, None) if run_metrics is not None else None
+            if isinstance(tokens, (int, float)) and tokens > 0:
+                metrics.counter("llm_tokens_total", "Tokens consumidos pelo LLM").inc(
+                    tokens, type=token_type.replace('_tokens', ''), **labels)
+
+        # Marcadores de insights que não passaram pelo hook não chegam ao histórico
+        if self.visualization_tool_ref is not None:
+            if isinstance(getattr(response, 'content', None), str):
+                response.content = PendingInsights.strip_markers(response.content)
+            PendingInsights.strip_messages(getattr(response, 'messages', None))
+            self.visualization_tool_ref.pending_insights.discard()
+
+        self._after_run_memory(message, response)
+
+        return response
+
+    @staticmethod
+    def _tool_kind(tool):
+        """Nome da ferramenta nos perfis de COMPLEXITY_CONFIG"""
+        if isinstance(tool, ReasoningTools):
+            return "reasoning"
+        if isinstance(tool, CalculatorTools):
+            return "calculator"
+        if isinstance(tool, PythonTools):
+            return "python"
+        if isinstance(tool, DuckDbTools):
+            return "duckdb"
+        if isinstance(tool, VisualizationTools):
+            return "visualization"
+        if isinstance(tool, ComparativeTools):
+            return "comparative"
+        return type(tool).__name__
+
+    def _apply_complexity_profile(self, profile):
+        """
+        Registra apenas as ferramentas do perfil e ajusta o reasoning_effort durante o turno.
+
+        Menos ferramentas = menos schemas e instruções no prompt a cada passo do LLM.
+
+        Returns:
+            Função que restaura as ferramentas e o reasoning_effort originais
+        """
+        if not profile:
+            return lambda: None
+
+        original_tools = self.tools
+        original_effort = getattr(self.model, 'reasoning_effort', None)
+        allowed = set(profile['tools'])
+        self.tools = [tool for tool in original_tools if self._tool_kind(tool) in allowed]
+        if self.model is not None and profile.get('reasoning_effort'):
+            self.model.reasoning_effort = profile['reasoning_effort']
+
+        def restore():
+            self.tools = original_tools
+            if self.model is not None:
+                self.model.reasoning_effort = original_effort
+
+        return restore
+
+    def _after_run_memory(self, message, response):
+        """Conta as chamadas de memória do turno e, no modo 'background', agenda a extração"""
+        memory_tool_calls = count_memory_tool_calls(response)
+        if memory_tool_calls:
+            get_metrics_registry().counter(
+                "memory_tool_calls_total", "Chamadas da ferramenta de memória no caminho crítico"
+            ).inc(memory_tool_calls, memory_mode=self.memory_mode)
+
+        scheduled = False
+        memory_manager = getattr(self, 'memory_manager', None)
+        if self.memory_mode == "background" and memory_manager is not None:
+            # Apenas a pergunta do usuário (sem o contexto de filtros anexado ao prompt)
+            schedule_memory_update(memory_manager.create_user_memories,
+                                   message=message, user_id=self.session_user_id)
+            scheduled = True
+
+        if hasattr(self, 'debug_info') and self.debug_info is not None:
+            if 'memory_updates' not in self.debug_info:
+                self.debug_info['memory_updates'] = []
+            self.debug_info['memory_updates'].append({
+                'mode': self.memory_mode,
+                'memory_tool_calls': memory_tool_calls,
+                'background_scheduled': scheduled
+            })
 
 
     def clear_execution_state(self):
@@ -298,32 +436,208 @@ class PrincipalAgent(Agent):
                     important_vars[var_name] = var_value
             self.python_tool_ref.variable_cache = important_vars
 
+        # Prompts de insights não consumidos pela execução anterior
+        if self.visualization_tool_ref is not None:
+            self.visualization_tool_ref.pending_insights.discard()
 
-def create_agent(session_user_id=None, debug_mode=False, conversation_memory=""):
+        # Resultados SQL (result_id) e o atalho de queries repetidas valem apenas dentro da pergunta
+        for tool in self.tools:
+            if isinstance(tool, DebugDuckDbTools):
+                tool.results.clear()
+
+
+def get_prompt_version():
     """
-    Cria e configura o agente DuckDB com acesso aos dados comerciais e memória temporária
-    Versão refatorada e modularizada
+    Versão do prompt (hash de chatbot_prompt.py), recalculada apenas quando o arquivo muda.
+
+    Returns:
+        Hash curto do arquivo ou "unknown" se não puder ser lido
     """
-    os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+    prompt_file = os.path.join(os.path.dirname(__file__), 'prompts', 'chatbot_prompt.py')
+    try:
+        mtime = os.path.getmtime(prompt_file)
+    except OSError:
+        return "unknown"
 
-    # Carregar dados do parquet
-    data_path = DATA_CONFIG["data_path"]
-    df = pd.read_parquet(data_path)
+    with _templates_lock:
+        cached = _prompt_versions.get(prompt_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
 
-    # Aplicar normalização de texto aos dados
-    normalizer = TextNormalizer()
-    normalizer.set_dataset_context(df)  # Configurar contexto para detecção inteligente de "último mês"
-    text_columns = normalizer.identify_text_columns(df)
+    try:
+        with open(prompt_file, 'rb') as f:
+            prompt_hash = hashlib.md5(f.read()).hexdigest()[:8]
+    except OSError:
+        return "unknown"
+
+    with _templates_lock:
+        _prompt_versions[prompt_file] = (mtime, prompt_hash)
+    return prompt_hash
 
-    # Criar versão normalizada do DataFrame para buscas
-    df_normalized = normalizer.normalize_dataframe(df, text_columns)
 
-    # Carregar mapeamento de aliases
-    alias_mapping = load_alias_mapping()
+class AgentTemplate:
+    """
+    Partes imutáveis de um agente para uma versão do prompt e do dataset.
+
+    Construído uma vez (carga, normalização, Knowledge, prompt, tabela DuckDB e
+    rollups) e compartilhado por todas as sessões; clone() monta um PrincipalAgent
+    novo com estado por sessão e uma conexão própria (cursor) para o mesmo banco DuckDB.
+    """
+
+    def __init__(self, key, data_path, dataset_version, df, df_normalized, normalizer,
+                 text_columns, alias_mapping, knowledge, instructions):
+        self.key = key
+        self.data_path = data_path
+        self.dataset_version = dataset_version
+        self.df = df
+        self.df_normalized = df_normalized
+        self.normalizer = normalizer
+        self.text_columns = text_columns
+        self.alias_mapping = alias_mapping
+        self.knowledge = knowledge
+        self.instructions = instructions
+
+        # Preenchidos por _initialize_template_database
+        self.connection = None
+        self.rollup_catalog = None
+        self.partition_pruner = None
+        self.table_ready = False
+        self.initialization_warnings = []
+        self.derived_from = None  # Versão do template anterior reaproveitada na construção (só acréscimos)
+
+    def clone(self, session_user_id=None, debug_mode=False, conversation_memory=""):
+        """
+        Novo agente com estado por sessão (contexto, memória, caches e debug_info)
+        e partes compartilhadas do template.
+
+        Returns:
+            PrincipalAgent pronto para uso
+        """
+        connection = self.connection.cursor() if self.connection is not None else None
+        agent = _assemble_agent(self, session_user_id, debug_mode, conversation_memory, connection)
+        agent.template_key = self.key
+        agent.agent_template = self
+
+        duckdb_tool = _find_duckdb_tool(agent)
+        if duckdb_tool is not None and self.table_ready:
+            duckdb_tool.metadata_cache['tables_exist'].add('dados_comerciais')
+            duckdb_tool.metadata_cache['initialization_done'] = True
+            duckdb_tool.metadata_cache['table_verified'] = True
+            duckdb_tool.partition_pruner = self.partition_pruner
+            duckdb_tool.rollup_catalog = self.rollup_catalog
+
+        if self.initialization_warnings:
+            agent.debug_info['initialization_warnings'] = list(self.initialization_warnings)
+
+        return agent
+
+
+_agent_templates = OrderedDict()
+_prompt_versions = {}
+_templates_lock = threading.Lock()
+_template_build_locks = {}
+
+
+def get_agent_template(prompt_version=None):
+    """
+    Template da versão vigente do prompt e do dataset (construído na primeira chamada).
+
+    Sessões simultâneas que pedem o mesmo template aguardam uma única construção.
+    Cada versão do dataset tem seu próprio template (banco DuckDB, normalizador e
+    DataFrames): turnos em andamento nos clones da versão anterior terminam nela, e
+    os clones passam à nova versão entre turnos (refresh_agent_dataset). Quando a
+    versão nova só acrescenta linhas, o template é derivado do anterior sem alterá-lo
+    (apenas o delta é normalizado). Apenas os AGENT_CONFIG["max_templates"] mais
+    recentes ficam no registro; os anteriores vivem enquanto houver clones usando-os.
+    """
+    # Versão do dataset vigente (base para atualizações incrementais)
+    refresher = get_dataset_refresher()
+    dataset_version = None
+    if refresher is not None:
+        refresher.check_for_update()
+        dataset_version = refresher.current_version().version
+
+    data_path = DATA_CONFIG["data_path"]
+    key = (prompt_version or get_prompt_version(), dataset_version, data_path)
+
+    with _templates_lock:
+        template = _agent_templates.get(key)
+        if template is not None:
+            _agent_templates.move_to_end(key)
+            return template
+        build_lock = _template_build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _templates_lock:
+            template = _agent_templates.get(key)
+            previous = _find_previous_template(key) if template is None else None
+        if template is None:
+            # Só acréscimos desde a versão do template anterior: reaproveitar seus dados normalizados
+            pending = refresher.pending_versions(previous.dataset_version) if previous is not None else None
+            pending = [v for v in pending if v.version <= dataset_version] if pending else None
+            template = _build_agent_template(key, data_path, dataset_version, base=previous, versions=pending)
+            with _templates_lock:
+                _agent_templates[key] = template
+                while len(_agent_templates) > AGENT_CONFIG.get("max_templates", 2):
+                    _agent_templates.popitem(last=False)
+                _template_build_locks.pop(key, None)
+    return template
+
+
+def _find_previous_template(key):
+    """Template mais recente do mesmo prompt e dados em uma versão anterior do dataset (chamar com _templates_lock)"""
+    prompt_version, dataset_version, data_path = key
+    if dataset_version is None:
+        return None
+    candidates = [
+        template for template in _agent_templates.values()
+        if template.key[0] == prompt_version and template.key[2] == data_path
+        and template.dataset_version is not None and template.dataset_version < dataset_version
+    ]
+    return max(candidates, key=lambda t: t.dataset_version) if candidates else None
+
+
+def clear_agent_templates():
+    """Descarta os templates (o próximo create_agent reconstrói)"""
+    with _templates_lock:
+        _agent_templates.clear()
+
+
+def _build_agent_template(key, data_path, dataset_version, base=None, versions=None):
+    """
+    Carrega e prepara as partes compartilhadas do agente (a etapa cara).
+
+    Com base e versions (apenas acréscimos desde base.dataset_version), os DataFrames
+    são derivados dos do template anterior, normalizando só as linhas novas. Nada do
+    template anterior é alterado: seus clones seguem na versão anterior até trocarem
+    de template entre turnos.
+    """
+    normalizer = TextNormalizer()
+    if base is not None and versions:
+        delta = pd.concat([v.delta for v in versions], ignore_index=True)
+        df = pd.concat([base.df, delta], ignore_index=True)
+        normalizer.set_dataset_context(df)  # Contexto de "último mês" da nova versão
+        text_columns = base.text_columns
+        delta_normalized = normalizer.normalize_dataframe(delta, text_columns)
+        df_normalized = pd.concat([base.df_normalized, delta_normalized], ignore_index=True)
+        alias_mapping = base.alias_mapping
+    else:
+        base = None
+        # Carregar dados do parquet (arquivo único ou diretório particionado)
+        df = read_dataset(data_path)
+
+        # Aplicar normalização de texto aos dados
+        normalizer.set_dataset_context(df)  # Configurar contexto para detecção inteligente de "último mês"
+        text_columns = normalizer.identify_text_columns(df)
+
+        # Criar versão normalizada do DataFrame para buscas
+        df_normalized = normalizer.normalize_dataframe(df, text_columns)
+
+        # Carregar mapeamento de aliases
+        alias_mapping = load_alias_mapping()
 
     # Criar knowledge base com os dados usando Knowledge
     knowledge = Knowledge()
-    db = InMemoryDb()
     # Adicionar informações sobre o dataset
     dataset_info = f"""
 Dataset: DadosComercial_resumido_v02.parquet
@@ -364,46 +678,224 @@ Tipos de dados:
 
     knowledge.add_content(text_content=dataset_info)
 
+    template = AgentTemplate(
+        key=key,
+        data_path=data_path,
+        dataset_version=dataset_version,
+        df=df,
+        df_normalized=df_normalized,
+        normalizer=normalizer,
+        text_columns=text_columns,
+        alias_mapping=alias_mapping,
+        knowledge=knowledge,
+        instructions=create_chatbot_prompt(data_path, df, text_columns, alias_mapping),
+    )
+
+    template.derived_from = base.dataset_version if base is not None else None
+
+    # Tabela DuckDB e rollups criados uma vez em um agente semente; os clones usam cursores
+    # (banco próprio por versão: a origem em disco já contém as linhas acrescentadas)
+    seed = _assemble_agent(template, "template", False, "", connection=None)
+    _initialize_database_optimized(seed, data_path)
+
+    duckdb_tool = _find_duckdb_tool(seed)
+    if duckdb_tool is not None:
+        template.connection = duckdb_tool.connection
+        template.rollup_catalog = duckdb_tool.rollup_catalog
+        template.partition_pruner = duckdb_tool.partition_pruner
+        template.table_ready = bool(duckdb_tool.metadata_cache.get('table_verified'))
+    template.initialization_warnings = list(seed.debug_info.get('initialization_warnings', []))
+
+    return template
+
+
+def _assemble_agent(template, session_user_id, debug_mode, conversation_memory, connection):
+    """Monta um PrincipalAgent com ferramentas, modelo e memória novos sobre as partes do template"""
     # Nota: Versão simplificada sem memória persistente (compatibilidade com Agno 2.0.6)
 
+    # Spans por turno: cada passo do LLM e cada chamada de ferramenta
+    tracer = get_tracer()
+
+    # Memória do agno: ferramenta para o LLM ('agentic'), extração após a resposta ('background') ou nenhuma
+    memory_mode = MEMORY_CONFIG.get("mode", "agentic")
+    db = InMemoryDb()
+    memory_options = {'enable_agentic_memory': memory_mode == "agentic"}
+    if memory_mode == "background":
+        memory_options['memory_manager'] = MemoryManager(model=OpenAIChat(id=SELECTED_MODEL), db=db)
+        memory_options['add_memories_to_context'] = True
+
     # Criar o agente principal com todas as ferramentas
     agent = PrincipalAgent(
-        normalizer=normalizer,
-        alias_mapping=alias_mapping,
-        df_normalized=df_normalized,
-        text_columns=text_columns,
+        normalizer=template.normalizer,
+        alias_mapping=template.alias_mapping,
+        df_normalized=template.df_normalized,
+        text_columns=template.text_columns,
         session_user_id=session_user_id,
         conversation_memory=conversation_memory,
+        memory_mode=memory_mode,
+        user_id=session_user_id,
         db=db,
-        model=OpenAIChat(
+        model=tracer.instrument_model(OpenAIChat(
             id=SELECTED_MODEL,
             reasoning_effort="low",
             max_completion_tokens=8000,  # Garantir tokens suficientes para resposta completa
-        ),
+        )),
         tools=[
             ReasoningTools(add_instructions=True),
             CalculatorTools(),
             PythonTools(),
-            DuckDbTools(),
+            DuckDbTools(connection=connection),
             VisualizationTools(),  # ⬅️ NOVA TOOL para gráficos integrados
+            ComparativeTools(),  # Comparações entre períodos em uma única chamada
         ],
-        knowledge=knowledge,
-        enable_agentic_memory=True,
-        instructions=create_chatbot_prompt(data_path, df, text_columns, alias_mapping),
+        tool_hooks=[tracer.tool_hook, tool_metrics_hook],
+        knowledge=template.knowledge,
+        instructions=template.instructions,
         debug_mode=debug_mode,
         markdown=True,
+        **memory_options,
     )
 
-    # Após criar agent, configurar referência de debug_info em VisualizationTools
+    agent.dataset_version = template.dataset_version
+
+    # Após criar agent, configurar referência de debug_info em VisualizationTools e ComparativeTools
     for tool in agent.tools:
-        if isinstance(tool, VisualizationTools):
+        if isinstance(tool, (VisualizationTools, ComparativeTools)):
             tool.debug_info_ref = agent
+
+    return agent
+
+
+def _find_duckdb_tool(agent):
+    for tool in agent.tools:
+        if hasattr(tool, 'run_query') and hasattr(tool, 'connection'):
+            return tool
+    return None
+
+
+def create_agent(session_user_id=None, debug_mode=False, conversation_memory="", prompt_version=None):
+    """
+    Cria e configura o agente DuckDB com acesso aos dados comerciais e memória temporária
+
+    O trabalho pesado fica no AgentTemplate da versão vigente do prompt e do dataset;
+    cada sessão recebe um clone com estado próprio.
+
+    Returns:
+        (agent, df) com o DataFrame original compartilhado pelo template
+    """
+    os.environ["OPENAI_API_KEY"] = OPENAI_API_KEY
+
+    template = get_agent_template(prompt_version)
+    agent = template.clone(session_user_id=session_user_id, debug_mode=debug_mode,
+                           conversation_memory=conversation_memory)
+    return agent, template.df
+
+
+def refresh_agent_dataset(agent, df, versions):
+    """
+    Aplica ao agente as versões do dataset acrescentadas desde a sua criação.
+
+    Deve ser chamada entre turnos: a tabela DuckDB e os rollups recebem apenas as
+    linhas novas, o store normalizado é estendido e o contexto temporal é recalculado.
+    Para clones de um AgentTemplate, o clone troca as partes compartilhadas pelas
+    do template da versão vigente (construído uma vez para todas as sessões).
+
+    Args:
+        agent: PrincipalAgent em uso na sessão
+        df: DataFrame original associado ao agente
+        versions: Versões pendentes retornadas por DatasetRefresher.pending_versions
+
+    Returns:
+        DataFrame original acrescido das novas linhas
+    """
+    if not versions:
+        return df
+
+    if getattr(agent, 'agent_template', None) is not None:
+        return _sync_clone_with_template(agent, versions)
+
+    delta = pd.concat([v.delta for v in versions], ignore_index=True)
+
+    duckdb_tool = None
+    for tool in agent.tools:
+        if hasattr(tool, 'run_query') and hasattr(tool, 'connection'):
+            duckdb_tool = tool
             break
 
-    # Inicialização otimizada do DuckDB com verificação de existência da tabela
-    _initialize_database_optimized(agent, data_path)
+    if duckdb_tool is not None:
+        ingest_delta(duckdb_tool.connection, delta, rollup_catalog=duckdb_tool.rollup_catalog)
+        # Contagens e resultados em cache pertencem à versão anterior
+        duckdb_tool.metadata_cache['basic_stats'].clear()
+        duckdb_tool.results.clear()
+
+    df = pd.concat([df, delta], ignore_index=True)
+    delta_normalized = agent.normalizer.normalize_dataframe(delta, agent.text_columns)
+    agent.df_normalized = pd.concat([agent.df_normalized, delta_normalized], ignore_index=True)
 
-    return agent, df
+    # "Último mês" e períodos relativos passam a considerar a nova data máxima
+    agent.normalizer.set_dataset_context(df)
+    agent.instructions = create_chatbot_prompt(DATA_CONFIG["data_path"], df, agent.text_columns, agent.alias_mapping)
+    agent.dataset_version = versions[-1].version
+
+    if hasattr(agent, 'debug_info') and agent.debug_info is not None:
+        if 'dataset_refreshes' not in agent.debug_info:
+            agent.debug_info['dataset_refreshes'] = []
+        agent.debug_info['dataset_refreshes'].append({
+            'versions': [v.to_dict() for v in versions],
+            'rows_added': len(delta),
+            'new_max_date': str(df['Data'].max())
+        })
+
+    return df
+
+
+def _sync_clone_with_template(agent, versions):
+    """
+    Troca as partes compartilhadas do clone pelas do template da versão vigente.
+
+    Chamada entre turnos: o turno anterior terminou inteiro na versão antiga e o
+    próximo vê a versão nova completa (banco, rollups, normalizador e prompt).
+
+    Raises:
+        RuntimeError: Nenhum template da nova versão disponível (recriar o agente)
+    """
+    template = get_agent_template(agent.template_key[0])
+    if template.dataset_version is None or template.dataset_version < versions[-1].version:
+        raise RuntimeError("Template da nova versão do dataset indisponível; recriar o agente")
+
+    duckdb_tool = _find_duckdb_tool(agent)
+    if duckdb_tool is not None:
+        previous_connection = getattr(duckdb_tool, '_connection', None)
+        # Cursor do banco da nova versão; o banco anterior é liberado com o último clone que o usa
+        duckdb_tool._connection = template.connection.cursor() if template.connection is not None else None
+        if previous_connection is not None:
+            previous_connection.close()
+        duckdb_tool.rollup_catalog = template.rollup_catalog
+        duckdb_tool.partition_pruner = template.partition_pruner
+        # Contagens e resultados em cache pertencem à versão anterior
+        duckdb_tool.metadata_cache['basic_stats'].clear()
+        duckdb_tool.results.clear()
+
+    agent.normalizer = template.normalizer
+    agent.df_normalized = template.df_normalized
+    agent.knowledge = template.knowledge
+    agent.instructions = template.instructions
+    agent.dataset_version = template.dataset_version
+    agent.template_key = template.key
+    agent.agent_template = template
+
+    if hasattr(agent, 'debug_info') and agent.debug_info is not None:
+        if 'dataset_refreshes' not in agent.debug_info:
+            agent.debug_info['dataset_refreshes'] = []
+        agent.debug_info['dataset_refreshes'].append({
+            'versions': [v.to_dict() for v in versions],
+            'rows_added': sum(len(v.delta) for v in versions),
+            'new_max_date': str(template.df['Data'].max()),
+            'shared_template': True,
+            'derived_from': template.derived_from
+        })
+
+    return template.df
 
 
 def _initialize_database_optimized(agent, data_path):
@@ -411,6 +903,9 @@ def _initialize_database_optimized(agent, data_path):
     Inicializa o banco DuckDB de forma otimizada, evitando criação redundante de tabelas
     """
     try:
+        # Tabela clusterizada (Data + chave secundária) ou view sobre dataset particionado
+        dataset_ddl = build_dataset_ddl(data_path)
+
         # ABORDAGEM MAIS ROBUSTA: Usar DuckDbTools diretamente para garantir persistência
         duckdb_tool = None
         for tool in agent.tools:
@@ -420,10 +915,10 @@ def _initialize_database_optimized(agent, data_path):
 
         if duckdb_tool is None:
             # Fallback: usar o run normal do agente
-            result = agent.run(f"CREATE OR REPLACE TABLE dados_comerciais AS SELECT * FROM read_parquet('{data_path}');")
+            result = agent.run(f"{dataset_ddl};")
         else:
             # Usar DuckDbTools diretamente para garantir que a tabela seja criada na conexão correta
-            result = duckdb_tool.run_query(f"CREATE OR REPLACE TABLE dados_comerciais AS SELECT * FROM read_parquet('{data_path}')")
+            result = duckdb_tool.run_query(dataset_ddl)
 
             # Verificar imediatamente se a tabela foi criada
             verification = duckdb_tool.run_query("SELECT COUNT(*) as count FROM dados_comerciais LIMIT 1")
@@ -437,6 +932,12 @@ def _initialize_database_optimized(agent, data_path):
             else:
                 raise Exception(f"Table verification failed: {verification}")
 
+            # Poda de partições por período quando dados_comerciais é view particionada
+            duckdb_tool.partition_pruner = create_partition_pruner(data_path)
+
+            # Rollups pré-agregados para reescrita transparente das queries
+            _initialize_rollups(agent, duckdb_tool, data_path)
+
     except Exception as e:
         # Log do erro e tentar abordagem de fallback
         if hasattr(agent, 'debug_info') and agent.debug_info is not None:
@@ -450,11 +951,30 @@ def _initialize_database_optimized(agent, data_path):
 
         # FALLBACK: Tentar abordagem mais simples
         try:
-            agent.run(f"CREATE TABLE dados_comerciais AS SELECT * FROM read_parquet('{data_path}')")
+            agent.run(build_dataset_ddl(data_path))
         except:
             pass  # Se falhar, pelo menos tentamos
 
 
+def _initialize_rollups(agent, duckdb_tool, data_path):
+    """
+    Constrói (ou carrega do cache offline) os rollups e os associa ao DuckDbTools
+    """
+    try:
+        duckdb_tool.rollup_catalog = build_rollup_catalog(duckdb_tool.connection, data_path)
+    except Exception as e:
+        # Sem rollups as queries continuam na tabela base
+        duckdb_tool.rollup_catalog = None
+        if hasattr(agent, 'debug_info') and agent.debug_info is not None:
+            if 'initialization_warnings' not in agent.debug_info:
+                agent.debug_info['initialization_warnings'] = []
+            agent.debug_info['initialization_warnings'].append({
+                'type': 'rollup_build_error',
+                'message': str(e),
+                'status': 'Queries will use dados_comerciais directly'
+            })
+
+
 # Para compatibilidade com uso direto do arquivo
 if __name__ == "__main__":
     agent, df = create_agent()
@@ -5,15 +5,55 @@ Calcula automaticamente crescimento, variações e comparações temporais/dimen
 
 import pandas as pd
 from typing import Dict, List, Tuple, Optional, Any
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import os
 import re
+import sys
 import numpy as np
 
+sys.path.append(os.path.dirname(__file__))
+from config.agent_config import COMPARATIVE_CONFIG
+from utils.query_results import relation_to_arrow
+
 class ComparativeCalculator:
     """Classe responsável por cálculos comparativos inteligentes"""
     
-    def __init__(self):
-        self.calculation_cache = {}
+    # Análises executadas diretamente em SQL (uma chamada de ferramenta por pergunta)
+    COMPARATIVE_ANALYSES = ('period_comparison', 'growth_ranking', 'share_shift')
+    
+    # Palavras da pergunta -> coluna de dimensão
+    DIMENSION_KEYWORDS = [
+        (r'\bclientes?\b', 'Cod_Cliente'),
+        (r'\bsegmentos?\b', 'Cod_Segmento_Cliente'),
+        (r'\b(?:cidades?|municípios?|municipios?)\b', 'Municipio_Cliente'),
+        (r'\b(?:estados?|ufs?)\b', 'UF_Cliente'),
+        (r'\bvendedor(?:es)?\b', 'Cod_Vendedor'),
+        (r'\bfamílias?\b', 'Cod_Familia_Produto'),
+        (r'\bgrupos?\b', 'Cod_Grupo_Produto'),
+        (r'\blinhas?\b', 'Des_Linha_Produto'),
+        (r'\bprodutos?\b', 'Cod_Produto'),
+    ]
+    
+    # metric_focus -> agregação SQL
+    METRIC_AGGREGATES = {
+        'revenue': 'SUM("Valor_Vendido")',
+        'quantity': 'SUM("Qtd_Vendida")',
+        'clients': 'COUNT(DISTINCT "Cod_Cliente")'
+    }
+    
+    # temporal_granularity -> (grão do DATE_TRUNC, meses por período)
+    GRANULARITY = {
+        'monthly': ('month', 1),
+        'quarterly': ('quarter', 3),
+        'yearly': ('year', 12)
+    }
+    
+    def __init__(self, config: Dict = None):
+        self.config = config or COMPARATIVE_CONFIG
+        # Cache LRU de resultados: chave = (cálculo, colunas, parâmetros, impressão digital dos dados)
+        self.calculation_cache = OrderedDict()
+        self.cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
         self.supported_metrics = [
             'growth_rate', 'variation_percentage', 'absolute_change',
             'period_comparison', 'ranking_change', 'compound_growth'
@@ -40,7 +80,9 @@ class ComparativeCalculator:
             'calculation_type': None,
             'metric_focus': None,
             'temporal_granularity': 'monthly',
-            'comparison_baseline': None
+            'comparison_baseline': None,
+            'needs_share_shift': False,
+            'dimension_focus': None
         }
         
         # === DETECÇÃO DE TIPO DE CÁLCULO ===
@@ -70,6 +112,20 @@ class ComparativeCalculator:
         if any(keyword in query_lower for keyword in ranking_keywords):
             requirements['needs_ranking_comparison'] = True
         
+        # Mudança de participação (mix/share)
+        share_keywords = ['participação', 'share', 'fatia', 'mix', 'representatividade']
+        if any(keyword in query_lower for keyword in share_keywords):
+            requirements['needs_share_shift'] = True
+            if requirements['calculation_type'] in (None, 'period_comparison'):
+                requirements['calculation_type'] = 'share_shift'
+        
+        # === DETECÇÃO DE DIMENSÃO ===
+        
+        for pattern, column in self.DIMENSION_KEYWORDS:
+            if re.search(pattern, query_lower):
+                requirements['dimension_focus'] = column
+                break
+        
         # === DETECÇÃO DE MÉTRICA FOCO ===
         
         # Vendas/Receita
@@ -209,6 +265,11 @@ class ComparativeCalculator:
         if len(period_data) < 2:
             return {"error": "Necessários pelo menos 2 períodos para calcular crescimento"}
         
+        cache_key = ('growth_metrics', metric_column, self._data_fingerprint(period_data, ['periodo', metric_column]))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Ordenar por período
         period_data = period_data.sort_values('periodo')
         
@@ -270,8 +331,367 @@ class ComparativeCalculator:
                 else:
                     growth_metrics['trend'] = 'variable'
         
+        self._cache_put(cache_key, growth_metrics)
         return growth_metrics
     
+    def calculate_growth_metrics_batch(self, data: pd.DataFrame, entity_column: str, metric_column: str,
+                                       period_column: str = 'periodo', periods_per_year: int = None,
+                                       top_n: int = None) -> pd.DataFrame:
+        """
+        Calcula crescimento de todas as entidades de uma vez (ex: "quais clientes mais cresceram").
+        
+        Os dados em formato longo (entidade, período, valor) viram uma matriz
+        entidades x períodos, e as métricas saem de operações NumPy sobre a matriz
+        inteira, sem laço por entidade. Períodos sem registro contam como zero.
+        
+        Args:
+            data: DataFrame com uma linha por entidade e período (ex: resultado de GROUP BY cliente, mês)
+            entity_column: Coluna da entidade (cliente, produto, UF...)
+            metric_column: Coluna com a métrica
+            period_column: Coluna do período
+            periods_per_year: Períodos por ano para YoY e CAGR (padrão: COMPARATIVE_CONFIG)
+            top_n: Retornar apenas as N entidades que mais cresceram
+            
+        Returns:
+            DataFrame com uma linha por entidade, ordenado pelo crescimento total:
+            first_value, last_value, absolute_change, total_growth_pct,
+            average_growth_pct, last_period_growth_pct, yoy_growth_pct, cagr_pct,
+            periods_with_data
+        """
+        periods_per_year = periods_per_year or self.config.get('periods_per_year', 12)
+        
+        cache_key = (
+            'growth_batch', entity_column, metric_column, period_column, periods_per_year,
+            self._data_fingerprint(data, [entity_column, period_column, metric_column])
+        )
+        cached = self._cache_get(cache_key)
+        if cached is None:
+            cached = self._growth_batch(data, entity_column, metric_column, period_column, periods_per_year)
+            self._cache_put(cache_key, cached)
+        
+        result = cached.head(top_n) if top_n else cached
+        return result.copy()
+    
+    def _growth_batch(self, data: pd.DataFrame, entity_column: str, metric_column: str,
+                      period_column: str, periods_per_year: int) -> pd.DataFrame:
+        """Núcleo vetorizado de calculate_growth_metrics_batch"""
+        columns = [
+            entity_column, 'first_value', 'last_value', 'absolute_change', 'total_growth_pct',
+            'average_growth_pct', 'last_period_growth_pct', 'yoy_growth_pct', 'cagr_pct', 'periods_with_data'
+        ]
+        if data.empty:
+            return pd.DataFrame(columns=columns)
+        
+        # === MATRIZ ENTIDADES x PERÍODOS ===
+        
+        entity_codes, entities = pd.factorize(data[entity_column], sort=True)
+        period_codes, periods = pd.factorize(data[period_column], sort=True)
+        values = pd.to_numeric(data[metric_column], errors='coerce').fillna(0).to_numpy(dtype=float)
+        
+        matrix = np.zeros((len(entities), len(periods)))
+        np.add.at(matrix, (entity_codes, period_codes), values)
+        has_data = np.zeros(matrix.shape, dtype=bool)
+        has_data[entity_codes, period_codes] = True
+        
+        first = matrix[:, 0]
+        last = matrix[:, -1]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # === CRESCIMENTO TOTAL (primeiro vs último período) ===
+            total_growth = np.where(first != 0, (last - first) / first * 100, np.nan)
+            
+            # === PERÍODO A PERÍODO ===
+            if matrix.shape[1] >= 2:
+                previous = matrix[:, :-1]
+                pop = np.where(previous != 0, (matrix[:, 1:] - previous) / previous * 100, np.nan)
+                valid_pop = ~np.isnan(pop)
+                average_growth = np.where(
+                    valid_pop.any(axis=1),
+                    np.where(valid_pop, pop, 0).sum(axis=1) / np.maximum(valid_pop.sum(axis=1), 1),
+                    np.nan
+                )
+                last_period_growth = pop[:, -1]
+            else:
+                average_growth = np.full(len(entities), np.nan)
+                last_period_growth = np.full(len(entities), np.nan)
+            
+            # === YoY (último período vs mesmo período do ano anterior) ===
+            yoy_index = self._year_ago_index(periods, periods_per_year)
+            if yoy_index is not None:
+                year_ago = matrix[:, yoy_index]
+                yoy_growth = np.where(year_ago != 0, (last - year_ago) / year_ago * 100, np.nan)
+            else:
+                yoy_growth = np.full(len(entities), np.nan)
+            
+            # === CAGR ===
+            years = self._years_between(periods, periods_per_year)
+            if years > 0:
+                positive = (first > 0) & (last > 0)
+                cagr = np.where(positive, (np.power(last / first, 1.0 / years) - 1) * 100, np.nan)
+            else:
+                cagr = np.full(len(entities), np.nan)
+        
+        result = pd.DataFrame({
+            entity_column: entities,
+            'first_value': first,
+            'last_value': last,
+            'absolute_change': last - first,
+            'total_growth_pct': total_growth,
+            'average_growth_pct': average_growth,
+            'last_period_growth_pct': last_period_growth,
+            'yoy_growth_pct': yoy_growth,
+            'cagr_pct': cagr,
+            'periods_with_data': has_data.sum(axis=1)
+        }, columns=columns)
+        
+        # Maior crescimento primeiro; sem base de comparação (NaN) por último, depois pela variação absoluta
+        return result.sort_values(
+            ['total_growth_pct', 'absolute_change'], ascending=False, na_position='last', kind='stable'
+        ).reset_index(drop=True)
+    
+    def _year_ago_index(self, periods, periods_per_year: int) -> Optional[int]:
+        """Índice do período um ano antes do último (por data quando os períodos são datas)"""
+        if len(periods) < 2:
+            return None
+        if isinstance(periods, pd.DatetimeIndex):
+            target = periods[-1] - pd.DateOffset(years=1)
+            matches = np.flatnonzero(periods == target)
+            return int(matches[0]) if len(matches) else None
+        if len(periods) > periods_per_year:
+            return len(periods) - 1 - periods_per_year
+        return None
+    
+    def _years_between(self, periods, periods_per_year: int) -> float:
+        """Anos entre o primeiro e o último período"""
+        if len(periods) < 2:
+            return 0.0
+        if isinstance(periods, pd.DatetimeIndex):
+            return (periods[-1] - periods[0]).days / 365.25
+        return (len(periods) - 1) / periods_per_year
+    
+    # === CACHE DE CÁLCULOS ===
+    
+    def _data_fingerprint(self, data: pd.DataFrame, columns: List[str]) -> Tuple:
+        """Impressão digital dos dados usados no cálculo (hash vetorizado das colunas)"""
+        hashes = pd.util.hash_pandas_object(data[columns], index=False)
+        return (len(data), int(hashes.sum()))
+    
+    def _cache_get(self, key):
+        """Busca no cache LRU (marca a entrada como recente)"""
+        if key in self.calculation_cache:
+            self.calculation_cache.move_to_end(key)
+            self.cache_stats['hits'] += 1
+            return self.calculation_cache[key]
+        self.cache_stats['misses'] += 1
+        return None
+    
+    def _cache_put(self, key, value):
+        """Grava no cache LRU descartando as entradas mais antigas"""
+        self.calculation_cache[key] = value
+        self.calculation_cache.move_to_end(key)
+        max_entries = self.config.get('cache_max_entries', 32)
+        while len(self.calculation_cache) > max_entries:
+            self.calculation_cache.popitem(last=False)
+            self.cache_stats['evictions'] += 1
+    
+    def clear_cache(self):
+        """Limpa o cache de cálculos (ex: após atualização do dataset)"""
+        self.calculation_cache.clear()
+    
+    # === ANÁLISES COMPARATIVAS EM SQL ===
+    
+    def plan_comparative_analysis(self, requirements: dict, filters: dict = None, dimension: str = None,
+                                  metric: str = None, analysis: str = None, top_n: int = 10) -> Dict[str, Any]:
+        """
+        Converte os requisitos detectados em uma especificação de análise SQL.
+        
+        Args:
+            requirements: Saída de detect_calculation_requirements
+            filters: Filtros (coluna -> valor ou lista); chaves _preserve_<coluna> também são aplicadas
+            dimension: Coluna de dimensão (padrão: dimension_focus detectada)
+            metric: 'revenue', 'quantity' ou 'clients' (padrão: metric_focus detectada)
+            analysis: Uma de COMPARATIVE_ANALYSES (padrão: inferida dos requisitos)
+            top_n: Limite de linhas para rankings e mudanças de participação
+            
+        Returns:
+            dict: Especificação usada por build_comparative_query
+        """
+        filters = filters or {}
+        dimension = dimension or requirements.get('dimension_focus')
+        metric = metric or requirements.get('metric_focus') or 'revenue'
+        # "clientes que mais cresceram" compara clientes pelo faturamento, não pela contagem
+        if metric == 'clients' and dimension == 'Cod_Cliente':
+            metric = 'revenue'
+        
+        if not analysis:
+            if requirements.get('needs_share_shift') and dimension:
+                analysis = 'share_shift'
+            elif requirements.get('calculation_type') == 'growth' and dimension:
+                analysis = 'growth_ranking'
+            else:
+                analysis = 'period_comparison'
+        
+        # Filtros explícitos e geográficos preservados pela expansão de filtros
+        # (chaves temporais como 'Data_>=' ficam de fora: os períodos são definidos pela análise)
+        sql_filters = {}
+        for key, value in filters.items():
+            column = key.replace('_preserve_', '') if key.startswith('_preserve_') else key
+            if column.startswith('_') or column in ('Data', 'periodo', 'mes', 'ano'):
+                continue
+            if re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', column) and value not in (None, '', []):
+                sql_filters[column] = value
+        
+        return {
+            'analysis': analysis,
+            'dimension': dimension,
+            'metric': metric,
+            'granularity': requirements.get('temporal_granularity', 'monthly'),
+            'filters': sql_filters,
+            'top_n': top_n,
+            'temporal_range': (filters.get('_temporal_range_start'), filters.get('_temporal_range_end'))
+        }
+    
+    def resolve_comparison_periods(self, connection, spec: Dict[str, Any], table: str = 'dados_comerciais',
+                                   time_column: str = 'Data') -> Tuple[Tuple[str, str], Tuple[str, str]]:
+        """
+        Define os períodos A (base) e B (comparado) como intervalos [início, fim).
+        
+        Com intervalo temporal nos filtros, compara o primeiro e o último período do
+        intervalo; sem ele, compara o último período completo do dataset com o anterior.
+        """
+        grain, months = self.GRANULARITY.get(spec.get('granularity'), self.GRANULARITY['monthly'])
+        step = pd.DateOffset(months=months)
+        
+        range_start, range_end = spec.get('temporal_range') or (None, None)
+        if range_start and range_end:
+            a_start = self._truncate_period(pd.Timestamp(range_start), grain)
+            b_start = self._truncate_period(pd.Timestamp(range_end), grain)
+        else:
+            # Último período completo: o período que termina no dia seguinte ao último registro
+            last_end = connection.execute(
+                f"SELECT DATE_TRUNC('{grain}', MAX({self._quote(time_column)}) + INTERVAL 1 DAY) FROM {self._quote(table)}"
+            ).fetchone()[0]
+            if last_end is None:
+                raise ValueError(f"Tabela {table} sem dados para comparação")
+            b_start = pd.Timestamp(last_end) - step
+            a_start = b_start - step
+        
+        fmt = lambda ts: ts.strftime('%Y-%m-%d')
+        return (fmt(a_start), fmt(a_start + step)), (fmt(b_start), fmt(b_start + step))
+    
+    def build_comparative_query(self, spec: Dict[str, Any], periods: Tuple[Tuple[str, str], Tuple[str, str]],
+                                table: str = 'dados_comerciais', time_column: str = 'Data') -> Tuple[str, Dict[str, Any]]:
+        """
+        Gera a query parametrizada da análise comparativa (uma varredura para os dois períodos).
+        
+        Identificadores (tabela, colunas) são validados e citados; valores de período,
+        filtros e limite vão como parâmetros nomeados do DuckDB.
+        
+        Returns:
+            Tupla (sql, parâmetros)
+        """
+        analysis = spec['analysis']
+        if analysis not in self.COMPARATIVE_ANALYSES:
+            raise ValueError(f"Análise '{analysis}' não suportada. Use: {', '.join(self.COMPARATIVE_ANALYSES)}")
+        if analysis != 'period_comparison' and not spec.get('dimension'):
+            raise ValueError(f"Análise '{analysis}' requer uma dimensão (ex: Cod_Cliente, UF_Cliente)")
+        
+        aggregate = self.METRIC_AGGREGATES.get(spec.get('metric'))
+        if aggregate is None:
+            raise ValueError(f"Métrica '{spec.get('metric')}' não suportada. Use: {', '.join(self.METRIC_AGGREGATES)}")
+        
+        (a_start, a_end), (b_start, b_end) = periods
+        params = {'a_start': a_start, 'a_end': a_end, 'b_start': b_start, 'b_end': b_end}
+        
+        time_col = self._quote(time_column)
+        period_a = f"{time_col} >= CAST($a_start AS DATE) AND {time_col} < CAST($a_end AS DATE)"
+        period_b = f"{time_col} >= CAST($b_start AS DATE) AND {time_col} < CAST($b_end AS DATE)"
+        
+        where = [f"(({period_a}) OR ({period_b}))"]
+        for i, (column, value) in enumerate(sorted(spec.get('filters', {}).items())):
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            names = []
+            for j, item in enumerate(values):
+                params[f"f{i}_{j}"] = str(item)
+                names.append(f"LOWER($f{i}_{j})")
+            where.append(f"LOWER(CAST({self._quote(column)} AS VARCHAR)) IN ({', '.join(names)})")
+        
+        dimension = self._quote(spec['dimension']) if spec.get('dimension') else None
+        select_dimension = f"{dimension},\n        " if dimension else ""
+        group_by = f"\n    GROUP BY {dimension}" if dimension else ""
+        
+        base = (
+            f"SELECT {select_dimension}"
+            f"COALESCE({aggregate} FILTER (WHERE {period_a}), 0) AS valor_periodo_a,\n"
+            f"        COALESCE({aggregate} FILTER (WHERE {period_b}), 0) AS valor_periodo_b\n"
+            f"    FROM {self._quote(table)}\n"
+            f"    WHERE {' AND '.join(where)}{group_by}"
+        )
+        
+        if analysis == 'share_shift':
+            params['top_n'] = int(spec.get('top_n') or 10)
+            sql = (
+                f"WITH base AS (\n    {base}\n), participacao AS (\n"
+                f"    SELECT *,\n"
+                f"        valor_periodo_a * 100.0 / NULLIF(SUM(valor_periodo_a) OVER (), 0) AS participacao_a_pct,\n"
+                f"        valor_periodo_b * 100.0 / NULLIF(SUM(valor_periodo_b) OVER (), 0) AS participacao_b_pct\n"
+                f"    FROM base\n)\n"
+                f"SELECT *, participacao_b_pct - participacao_a_pct AS variacao_pp\n"
+                f"FROM participacao\n"
+                f"ORDER BY ABS(participacao_b_pct - participacao_a_pct) DESC NULLS LAST, {dimension}\n"
+                f"LIMIT $top_n"
+            )
+            return sql, params
+        
+        sql = (
+            f"WITH base AS (\n    {base}\n)\n"
+            f"SELECT *,\n"
+            f"    valor_periodo_b - valor_periodo_a AS variacao_absoluta,\n"
+            f"    CASE WHEN valor_periodo_a <> 0\n"
+            f"        THEN (valor_periodo_b - valor_periodo_a) * 100.0 / valor_periodo_a END AS variacao_pct\n"
+            f"FROM base"
+        )
+        if analysis == 'growth_ranking':
+            params['top_n'] = int(spec.get('top_n') or 10)
+            sql += f"\nWHERE valor_periodo_a > 0\nORDER BY variacao_pct DESC, {dimension}\nLIMIT $top_n"
+        elif dimension:
+            sql += f"\nORDER BY valor_periodo_b DESC, {dimension}"
+        
+        return sql, params
+    
+    def run_comparative_analysis(self, connection, spec: Dict[str, Any], periods=None,
+                                 table: str = 'dados_comerciais', time_column: str = 'Data') -> Dict[str, Any]:
+        """
+        Resolve os períodos (se não informados), gera e executa a análise comparativa.
+        
+        Args:
+            connection: Conexão DuckDB com a tabela de dados
+            spec: Especificação de plan_comparative_analysis
+            periods: ((início_a, fim_a), (início_b, fim_b)) com fim exclusivo (opcional)
+            
+        Returns:
+            dict com 'sql', 'params', 'periods' e 'table' (tabela Arrow do resultado)
+        """
+        if periods is None:
+            periods = self.resolve_comparison_periods(connection, spec, table=table, time_column=time_column)
+        sql, params = self.build_comparative_query(spec, periods, table=table, time_column=time_column)
+        arrow_table = relation_to_arrow(connection.execute(sql, params))
+        return {'sql': sql, 'params': params, 'periods': periods, 'table': arrow_table}
+    
+    def _quote(self, identifier: str) -> str:
+        """Cita um identificador SQL após validá-lo (nomes de coluna/tabela simples)"""
+        if not identifier or not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', identifier):
+            raise ValueError(f"Identificador inválido: {identifier!r}")
+        return f'"{identifier}"'
+    
+    def _truncate_period(self, timestamp: pd.Timestamp, grain: str) -> pd.Timestamp:
+        """Início do período (mês, trimestre ou ano) que contém a data"""
+        if grain == 'year':
+            return pd.Timestamp(timestamp.year, 1, 1)
+        if grain == 'quarter':
+            return pd.Timestamp(timestamp.year, 3 * ((timestamp.month - 1) // 3) + 1, 1)
+        return pd.Timestamp(timestamp.year, timestamp.month, 1)
+    
     def generate_comparative_summary(self, growth_metrics: Dict[str, Any], requirements: dict) -> str:
         """
         Gera um resumo textual dos resultados comparativos.
@@ -2,6 +2,11 @@
 Configurações do agente e hierarquia de colunas
 """
 
+import os
+
+# Raiz do projeto: diretórios gerados (logs, caches, histórico) não dependem do diretório de execução
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # HIERARQUIA DE COLUNAS: Define níveis hierárquicos para filtros inteligentes
 # IMPORTANTE: Filtros só se conflitam dentro da MESMA categoria hierárquica
 COLUMN_HIERARCHY = {
@@ -26,6 +31,26 @@ COLUMN_HIERARCHY = {
     ]
 }
 
+# ROLLUPS PRÉ-AGREGADOS: Tabelas materializadas a partir de dados_comerciais
+# Cada nível de COLUMN_HIERARCHY gera um rollup mensal com o nível e seus níveis mais amplos
+ROLLUP_CONFIG = {
+    "enabled": True,
+    "source_table": "dados_comerciais",
+    "table_prefix": "rollup_",
+    "time_column": "Data",
+    "time_grain": "month",           # Grão temporal dos rollups (DATE_TRUNC)
+    "measures": ['Valor_Vendido', 'Qtd_Vendida'],  # Medidas somadas nos rollups
+    "row_count_column": "Qtd_Registros",  # Substitui COUNT(*) nas queries reescritas
+    "max_size_ratio": 0.5,           # Descarta rollups que não reduzem ao menos 50% das linhas
+    "cache_dir": os.path.join(PROJECT_ROOT, "data", "rollups"),  # Materialização offline em parquet (None desativa)
+
+    # Combinações adicionais entre hierarquias (ex: mês × UF × segmento)
+    "extra_combinations": [
+        ['UF_Cliente', 'Cod_Segmento_Cliente'],
+        ['UF_Cliente', 'Des_Linha_Produto'],
+    ]
+}
+
 # COMPORTAMENTO DE FILTROS: Define como cada tipo de campo deve ser tratado
 FILTER_BEHAVIOR_CONFIG = {
     # Campos mutuamente exclusivos - apenas um valor por vez
@@ -90,7 +115,8 @@ AGENT_CONFIG = {
     "show_tool_calls": False,  # Será overridden por debug_mode
     "markdown": True,
     "run_code": True,
-    "pip_install": False
+    "pip_install": False,
+    "max_templates": 2  # AgentTemplates (versão do prompt × versão do dataset) mantidos em memória
 }
 
 # CONFIGURAÇÃO DE REMOÇÃO DE FILTROS - Detecção Inteligente
@@ -177,4 +203,114 @@ FILTER_REMOVAL_CONFIG = {
         r'\bapagar\s+todos\s+(?:os\s+)?filtros',
         r'\blimpar\s+contexto',
     ]
-}
\ No newline at end of file
+}
+
+# CONFIGURAÇÃO DE VISUALIZAÇÃO - Orçamento de pontos para gráficos de linha
+# Séries maiores que o orçamento são reduzidas antes da renderização
+VISUALIZATION_CONFIG = {
+    "line_chart_max_points": 1000,   # Pontos enviados ao navegador por gráfico (0 = sem redução)
+    "downsampling_method": "lttb",   # 'lttb' (forma da curva) ou 'minmax' (extremos por intervalo)
+    "min_points_per_series": 50,     # Mínimo por série em gráficos multi-série
+    "numeric_summary_workers": 2,    # Threads para resumo numérico + prompt de insights em segundo plano
+    "numeric_summary_timeout_seconds": 3.0,  # Espera máxima; depois disso o gráfico segue sem resumo
+    "result_digest_rows": 10,  # Linhas do resultado devolvidas ao LLM por query_and_chart (o gráfico usa todas)
+    "figure_cache_max_entries": 20   # Figuras em cache por sessão (LRU; mesmo tamanho do histórico em memória)
+}
+
+# Motor de crescimento em lote (ComparativeCalculator)
+COMPARATIVE_CONFIG = {
+    "periods_per_year": 12,     # Granularidade padrão dos períodos (mensal) para YoY e CAGR
+    "cache_max_entries": 32     # Resultados mantidos em calculation_cache (LRU)
+}
+# Rastreamento por turno (utils/tracing.py): spans de LLM, ferramentas, SQL, filtros e renderização
+TRACING_CONFIG = {
+    "enabled": True,
+    "export_format": "jsonl",           # 'jsonl' (um span por linha) ou 'otlp' (OTLP/JSON por turno)
+    "export_path": os.path.join(PROJECT_ROOT, "logs", "traces.jsonl"),  # None = manter apenas em memória (debug_info)
+    "max_attribute_length": 500,        # Atributos de texto (queries, argumentos) são truncados
+    "max_open_traces": 50               # Turnos ainda abertos mantidos em memória
+}
+
+# Métricas em processo (utils/metrics.py): contadores e histogramas expostos no formato Prometheus
+METRICS_CONFIG = {
+    # Endpoint /metrics local (formato de texto do Prometheus): desligado por padrão,
+    # habilitado com AGENT_METRICS_HTTP=1 no ambiente do processo
+    "http_enabled": os.getenv("AGENT_METRICS_HTTP", "").strip().lower() in ("1", "true", "yes", "on"),
+    "http_host": "127.0.0.1",       # Apenas local; use um proxy/scraper para acesso externo
+    "http_port": 9464,
+    # Limites dos histogramas de latência (segundos)
+    "latency_buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0]
+}
+
+# Diagnósticos por turno (utils/diagnostics.py): debug_info do agente com memória limitada
+DIAGNOSTICS_CONFIG = {
+    "max_entries_per_key": 50,          # Cada lista de debug_info é um buffer circular deste tamanho
+    "max_text_length": 2000,            # Textos longos (ex: prompt final) são truncados ao registrar
+    "max_snapshots": 50,                # Turnos com diagnóstico mantido nas mensagens do chat
+    "snapshot_budget_mb": 16,           # Orçamento estimado para todos os snapshots de turno
+    # Chaves que sobrevivem à limpeza por turno (registradas fora das perguntas)
+    "persistent_keys": ["initialization_warnings", "dataset_refreshes"],
+    # Chaves pesadas removidas primeiro dos snapshots antigos (dados já guardados na mensagem)
+    "transient_keys": ["visualization_metadata"]
+}
+
+# Histórico do chat (utils/chat_history.py): turnos recentes em memória, antigos em SQLite local
+CHAT_HISTORY_CONFIG = {
+    "max_recent_messages": 20,          # Mensagens mantidas em memória (usuário + assistente)
+    "page_size": 10,                    # Mensagens antigas carregadas por clique em "Carregar anteriores"
+    "storage_dir": os.path.join(PROJECT_ROOT, "data", "chat_history"),  # Um arquivo SQLite por sessão
+    "arrow_compression": "zstd",        # Compressão do Arrow IPC dos dados de gráfico ('lz4', 'zstd' ou None)
+    # Diagnóstico mantido nas mensagens arquivadas (o restante do debug_info é descartado)
+    "archived_debug_keys": ["sql_queries", "rollup_rewrites", "response_time", "trace", "error"]
+}
+
+# Ciclo de vida das sessões (utils/sessions.py): agentes ociosos são liberados e recriados ao voltar
+SESSION_CONFIG = {
+    "idle_ttl_seconds": 1800,           # Agente liberado após 30 min sem interação na sessão
+    "memory_budget_mb": 4096,           # Acima disso, libera os agentes menos recentes
+    "pressure_min_idle_seconds": 60,    # Sessões com interação recente não são liberadas por memória
+    "measure_interval_seconds": 30,     # Reestimativa da memória de um agente em uso
+    "forget_after_seconds": 86400,      # Estado leve de sessões liberadas é descartado após 24h
+    "sweep_interval_seconds": 60        # Varredura em segundo plano (0 = apenas a cada acesso)
+}
+
+# Memória de longo prazo do agno (utils/memory_updates.py)
+MEMORY_CONFIG = {
+    # 'agentic'    -> ferramenta de memória para o LLM (chamadas extras no caminho crítico do turno)
+    # 'background' -> extração de memórias em segundo plano depois que a resposta é entregue
+    # 'off'        -> sem memória do agno (o PrincipalAgent já injeta conversation_memory)
+    "mode": "background",
+    "workers": 1,                       # Threads para a extração em segundo plano
+    "tool_names": ["update_user_memory"]  # Ferramentas de memória contadas no modo agêntico
+}
+
+# Perfil do turno por complexidade da pergunta (utils/question_complexity.py)
+# Perguntas simples (um agregado, um ranking) rodam sem as ferramentas de raciocínio e cálculo,
+# cujos schemas e instruções inflam cada requisição; análises em várias etapas usam o conjunto completo.
+COMPLEXITY_CONFIG = {
+    "enabled": True,
+    "thresholds": {"moderate": 2, "complex": 4},  # Pontuação mínima de cada nível
+    "profiles": {
+        "simple": {
+            "tools": ["duckdb", "visualization"],
+            "reasoning_effort": "minimal"
+        },
+        "moderate": {
+            "tools": ["duckdb", "visualization", "comparative", "calculator"],
+            "reasoning_effort": "low"
+        },
+        "complex": {
+            "tools": ["reasoning", "calculator", "python", "duckdb", "visualization", "comparative"],
+            "reasoning_effort": "low"
+        }
+    },
+    # Sinais da pergunta e seus pesos (além dos requisitos detectados pelo ComparativeCalculator)
+    "analysis_keywords": ["por que", "porque", "explique", "explicar", "analise", "análise", "tendência",
+                          "correlação", "projeção", "previsão", "sazonalidade", "estratégia", "recomend",
+                          "oportunidade", "risco", "causa"],
+    "calculation_keywords": ["%", "percentual", "porcentagem", "proporção", "média", "desvio", "concentração",
+                             "cagr", "margem", "ticket médio", "acumulado"],
+    "series_keywords": ["evolução", "mês a mês", "mensal", "ao longo", "histórico", "série"],
+    "multi_step_markers": ["além disso", "também", "depois", "em seguida", " e compare", " e mostre"],
+    "long_question_chars": 200
+}
@@ -16,5 +16,57 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Configurações de dados
 DATA_CONFIG = {
     "data_path": "data/raw/DadosComercial_resumido_v02.parquet",
-    "alias_mapping_path": "data/mappings/alias.yaml"
+    "alias_mapping_path": "data/mappings/alias.yaml",
+
+    # Layout físico de dados_comerciais: ordenação para poda por zonemap (min/max por row group)
+    "table_layout": {
+        "cluster": True,
+        "time_column": "Data",
+        "time_bucket": "month",         # Agrupa por mês antes da chave secundária
+        "secondary_key": "UF_Cliente",  # Ex: 'UF_Cliente', 'Municipio_Cliente', 'Cod_Cliente'
+        "row_group_size": 61440,        # Row groups menores = poda mais fina no parquet reordenado
+        "clustered_path": None          # Parquet reordenado gerado offline por python src/datastore/layout.py (None = ordenar na carga)
+    },
+
+    # Dataset particionado: data_path pode apontar para um diretório Hive (year=/month=)
+    "partitioning": {
+        "columns": ["year", "month"],   # Colunas de partição derivadas de Data
+        "as_view": True                 # dados_comerciais como view com poda de partições
+    },
+
+    # Atualização incremental do dataset sem reiniciar a aplicação
+    "refresh": {
+        "enabled": True,
+        "check_interval_seconds": 30,   # Intervalo mínimo entre verificações dos arquivos
+        "max_versions": 10              # Versões (deltas) mantidas para agentes defasados
+    },
+
+    # Plano de tipos aplicado na carga do DataFrame (load_parquet_data)
+    "dtype_plan": {
+        "enabled": True,
+        "categorical_max_ratio": 0.1,   # Texto com valores distintos / linhas <= ratio vira category
+        "string_dtype": "string[pyarrow]",  # Demais colunas de texto
+        "downcast_integers": True,      # Códigos inteiros no menor tipo que comporta os valores
+        "overrides": {}                 # Tipos explícitos por coluna, ex: {"Cod_Cliente": "category"}
+    },
+
+    # Dataset sintético com o schema de DadosComercial (datastore/synthetic.py) para testes de carga
+    "synthetic": {
+        "start_date": "2015-01-01",
+        "end_date": "2024-12-31",
+        "clients": 40000,
+        "client_zipf_exponent": 1.1,    # Poucos clientes concentram a maior parte dos registros
+        "segments": 12,
+        "products": 6000,
+        "product_zipf_exponent": 0.9,
+        "families": 300,
+        "groups": 60,
+        "lines": 15,
+        "sellers": 400,
+        "seller_regions": 20,
+        "seasonality": 0.25,            # Amplitude da variação mensal (pico em novembro/dezembro)
+        "yearly_growth": 0.06,          # Crescimento anual do volume de registros
+        "chunk_rows": 1_000_000,        # Linhas geradas e gravadas por vez (memória limitada)
+        "seed": 42
+    }
 }
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+Datastore - Camada de armazenamento e otimização de acesso aos dados comerciais
+"""
+
+from .rollups import RollupCatalog, build_rollup_catalog, plan_rollups
+
+__all__ = [
+    # Rollups pré-agregados
+    'RollupCatalog',
+    'build_rollup_catalog',
+    'plan_rollups',
+]
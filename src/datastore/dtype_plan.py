@@ -0,0 +1,217 @@
+"""
+Plano de Tipos - Carga compacta do DataFrame de dados comerciais
+
+pd.read_parquet materializa todo texto como objetos Python. Aqui o dataset é lido
+como tabela Arrow, a limpeza de texto é feita de forma vetorizada e cada coluna é
+convertida conforme um plano declarativo: categorias para colunas de baixa
+cardinalidade, string[pyarrow] para o restante do texto e inteiros reduzidos ao
+menor tipo que comporta seus valores.
+"""
+
+import os
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.model_config import DATA_CONFIG
+from datastore.partitions import get_partition_columns, is_partitioned_dataset
+
+
+_INTEGER_CANDIDATES = [pa.int8(), pa.int16(), pa.int32(), pa.int64()]
+
+
+def _is_text_type(arrow_type) -> bool:
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+def _is_binary_type(arrow_type) -> bool:
+    return pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type)
+
+
+def clean_text_columns(table: pa.Table) -> pa.Table:
+    """
+    Limpa as colunas de texto diretamente na tabela Arrow.
+
+    Colunas string do Arrow já são UTF-8 válido, então basta preencher nulos com
+    string vazia. Colunas binárias são convertidas para texto; bytes inválidos
+    são substituídos apenas quando a conversão direta falha.
+
+    Args:
+        table: Tabela Arrow lida do parquet
+
+    Returns:
+        Tabela com texto limpo
+    """
+    for i, field in enumerate(table.schema):
+        column = table.column(i)
+
+        if _is_binary_type(field.type):
+            try:
+                column = column.cast(pa.string())
+            except pa.ArrowInvalid:
+                column = pa.chunked_array([
+                    pa.array([v.decode('utf-8', errors='replace') if v is not None else None
+                              for v in chunk.to_pylist()], type=pa.string())
+                    for chunk in column.chunks
+                ], type=pa.string())
+        elif not _is_text_type(field.type):
+            continue
+
+        table = table.set_column(i, pa.field(field.name, column.type), pc.fill_null(column, ""))
+
+    return table
+
+
+def plan_dtypes(table: pa.Table, config: Dict = None) -> Dict[str, str]:
+    """
+    Define o tipo final de cada coluna a partir das estatísticas da tabela Arrow.
+
+    Args:
+        table: Tabela Arrow (texto já limpo)
+        config: Configuração do plano (padrão: DATA_CONFIG['dtype_plan'])
+
+    Returns:
+        Dicionário coluna -> dtype ('category', 'string[pyarrow]', 'int16', ...)
+    """
+    config = config or DATA_CONFIG.get("dtype_plan", {})
+    overrides = config.get("overrides", {})
+    max_ratio = config.get("categorical_max_ratio", 0.1)
+    string_dtype = config.get("string_dtype", "string[pyarrow]")
+    num_rows = max(table.num_rows, 1)
+
+    plan = {}
+    for field in table.schema:
+        if field.name in overrides:
+            plan[field.name] = overrides[field.name]
+            continue
+
+        column = table.column(field.name)
+        if _is_text_type(field.type):
+            distinct = pc.count_distinct(column).as_py()
+            plan[field.name] = "category" if distinct / num_rows <= max_ratio else string_dtype
+        elif pa.types.is_integer(field.type) and config.get("downcast_integers", True) and column.null_count == 0:
+            bounds = pc.min_max(column).as_py()
+            if bounds['min'] is None:
+                continue
+            for candidate in _INTEGER_CANDIDATES:
+                info = np.iinfo(candidate.to_pandas_dtype())
+                if info.min <= bounds['min'] and bounds['max'] <= info.max:
+                    if candidate.bit_width < field.type.bit_width:
+                        plan[field.name] = str(candidate)
+                    break
+
+    return plan
+
+
+def apply_dtype_plan(table: pa.Table, plan: Dict[str, str]) -> pd.DataFrame:
+    """
+    Converte a tabela Arrow em DataFrame aplicando o plano de tipos.
+
+    Categorias são codificadas como dicionário no Arrow e inteiros são reduzidos
+    antes da conversão, de forma que nenhuma coluna passa por objetos Python.
+
+    Args:
+        table: Tabela Arrow
+        plan: Plano gerado por plan_dtypes
+
+    Returns:
+        DataFrame com tipos compactos
+    """
+    string_columns = set()
+    for name, dtype in plan.items():
+        if name not in table.column_names:
+            continue
+        i = table.column_names.index(name)
+        column = table.column(i)
+
+        if dtype == "category":
+            column = pc.dictionary_encode(column)
+        elif dtype.startswith("string"):
+            string_columns.add(name)
+            continue
+        elif dtype.startswith("int") or dtype.startswith("uint"):
+            column = column.cast(getattr(pa, dtype)())
+        else:
+            continue
+        table = table.set_column(i, pa.field(name, column.type), column)
+
+    df = table.to_pandas(types_mapper=lambda t: pd.StringDtype("pyarrow") if _is_text_type(t) else None)
+
+    # Colunas de texto fora do plano voltam a object, preservando o comportamento original
+    for name in df.columns:
+        if isinstance(df[name].dtype, pd.StringDtype) and name not in string_columns:
+            df[name] = df[name].astype(object)
+
+    for name, dtype in plan.items():
+        if name in df.columns and dtype != "category" and not dtype.startswith(("string", "int", "uint")):
+            df[name] = df[name].astype(dtype)
+
+    return df
+
+
+def read_compact_dataset(path: str, config: Dict = None) -> pd.DataFrame:
+    """
+    Lê o dataset (arquivo ou diretório particionado) com o plano de tipos aplicado.
+
+    Args:
+        path: Arquivo parquet ou diretório particionado
+        config: Configuração do plano (padrão: DATA_CONFIG['dtype_plan'])
+
+    Returns:
+        DataFrame compacto com o mesmo schema lógico de read_dataset
+    """
+    config = config or DATA_CONFIG.get("dtype_plan", {})
+    table = pq.read_table(path)
+
+    if is_partitioned_dataset(path):
+        partition_columns = [c for c in get_partition_columns(path) if c in table.column_names]
+        table = table.drop(partition_columns)
+        time_column = DATA_CONFIG.get("table_layout", {}).get("time_column", "Data")
+        if time_column in table.column_names:
+            table = table.sort_by(time_column)
+
+    table = clean_text_columns(table)
+    if not config.get("enabled", True):
+        return table.to_pandas()
+
+    return apply_dtype_plan(table, plan_dtypes(table, config))
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compara o uso de memória por coluna entre duas versões do DataFrame.
+
+    Args:
+        before: DataFrame na carga original
+        after: DataFrame com plano de tipos aplicado
+
+    Returns:
+        DataFrame com dtype e MB antes/depois por coluna, com linha de total
+    """
+    mb_before = before.memory_usage(deep=True, index=False) / 1024 ** 2
+    mb_after = after.memory_usage(deep=True, index=False) / 1024 ** 2
+
+    report = pd.DataFrame({
+        'dtype_antes': before.dtypes.astype(str),
+        'dtype_depois': after.dtypes.astype(str).reindex(before.columns),
+        'mb_antes': mb_before.round(2),
+        'mb_depois': mb_after.reindex(before.columns).round(2),
+    })
+    report.loc['TOTAL'] = ['', '', round(mb_before.sum(), 2), round(mb_after.sum(), 2)]
+    return report
+
+
+# Relatório de memória: python src/datastore/dtype_plan.py [caminho]
+if __name__ == "__main__":
+    from datastore.partitions import read_dataset
+
+    data_path = sys.argv[1] if len(sys.argv) > 1 else DATA_CONFIG["data_path"]
+    compact = read_compact_dataset(data_path)
+    original = read_dataset(data_path)
+    print(memory_report(original, compact).to_string())
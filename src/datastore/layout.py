@@ -0,0 +1,194 @@
+"""
+Layout Físico de dados_comerciais - Ordenação para poda por zonemap
+
+O DuckDB mantém min/max por row group (zonemaps) e o parquet guarda as mesmas
+estatísticas por row group. Ordenando a tabela por mês da Data e por uma chave
+secundária (UF, município ou cliente), filtros por período e localidade passam a
+descartar a maior parte dos row groups sem lê-los.
+
+Sem clustered_path configurado, a ordenação acontece a cada carga do dataset
+(CREATE TABLE ... ORDER BY). Para gravar o dataset de produção já reordenado uma
+única vez, gere o parquet offline e aponte DATA_CONFIG['table_layout']['clustered_path']
+para ele:
+
+    python src/datastore/layout.py [destino.parquet]
+
+Enquanto o parquet reordenado for mais novo que a origem, a carga o lê diretamente;
+quando a origem muda, a carga volta a ordenar até que o arquivo seja regerado.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.model_config import DATA_CONFIG
+from datastore.partitions import dataset_mtime, dataset_select_sql, is_partitioned_dataset
+
+
+def get_order_by_clause(layout: Dict = None, available_columns: Optional[List[str]] = None) -> str:
+    """
+    Monta a cláusula ORDER BY do layout clusterizado.
+
+    A ordem é: bucket temporal (mês) → chave secundária → data completa. Dentro de
+    cada mês as linhas ficam agrupadas pela chave secundária, de modo que filtros
+    combinados (período + UF/cidade/cliente) tocam poucos row groups.
+
+    Args:
+        layout: Configuração de layout (padrão: DATA_CONFIG['table_layout'])
+        available_columns: Colunas existentes (chave secundária ausente é ignorada)
+
+    Returns:
+        Expressões de ordenação separadas por vírgula ou string vazia
+    """
+    layout = layout or DATA_CONFIG.get("table_layout", {})
+    time_column = layout.get("time_column", "Data")
+    secondary_key = layout.get("secondary_key")
+    time_bucket = layout.get("time_bucket")
+
+    if available_columns is not None and time_column not in available_columns:
+        return ""
+
+    order_parts = []
+    if time_bucket:
+        order_parts.append(f"DATE_TRUNC('{time_bucket}', {time_column})")
+    if secondary_key and (available_columns is None or secondary_key in available_columns):
+        order_parts.append(secondary_key)
+    order_parts.append(time_column)
+
+    return ", ".join(order_parts)
+
+
+def build_table_source_sql(data_path: str, layout: Dict = None) -> str:
+    """
+    Gera o SELECT usado para popular dados_comerciais conforme o layout configurado.
+
+    Se existir um parquet reordenado offline (clustered_path) mais novo que a
+    origem, ele é lido diretamente e a ordenação na carga é dispensada.
+
+    Args:
+        data_path: Caminho do parquet de origem
+        layout: Configuração de layout (padrão: DATA_CONFIG['table_layout'])
+
+    Returns:
+        Query SELECT para o CREATE TABLE
+    """
+    layout = layout or DATA_CONFIG.get("table_layout", {})
+    source_sql = dataset_select_sql(data_path)
+
+    if not layout.get("cluster", False):
+        return source_sql
+
+    clustered_path = layout.get("clustered_path")
+    if clustered_path and os.path.exists(clustered_path):
+        if not os.path.exists(data_path) or os.path.getmtime(clustered_path) >= dataset_mtime(data_path):
+            return f"SELECT * FROM read_parquet('{clustered_path}')"
+
+    order_by = get_order_by_clause(layout)
+    return f"{source_sql} ORDER BY {order_by}"
+
+
+def build_dataset_ddl(data_path: str, table: str = "dados_comerciais") -> str:
+    """
+    Gera o DDL de dados_comerciais: view sobre diretório particionado ou tabela em memória.
+
+    Args:
+        data_path: Arquivo parquet ou diretório Hive particionado
+        table: Nome da tabela/view
+
+    Returns:
+        Comando CREATE OR REPLACE
+    """
+    partitioning = DATA_CONFIG.get("partitioning", {})
+    if is_partitioned_dataset(data_path) and partitioning.get("as_view", True):
+        return f"CREATE OR REPLACE VIEW {table} AS {dataset_select_sql(data_path)}"
+    return f"CREATE OR REPLACE TABLE {table} AS {build_table_source_sql(data_path)}"
+
+
+def write_clustered_parquet(connection, data_path: str, target_path: str, layout: Dict = None) -> str:
+    """
+    Gera offline um parquet reordenado com row groups dimensionados para poda.
+
+    Args:
+        connection: Conexão DuckDB
+        data_path: Parquet de origem
+        target_path: Caminho do parquet reordenado
+        layout: Configuração de layout (padrão: DATA_CONFIG['table_layout'])
+
+    Returns:
+        Caminho do arquivo gerado
+    """
+    layout = layout or DATA_CONFIG.get("table_layout", {})
+    columns = [row[0] for row in connection.execute(
+        f"DESCRIBE {dataset_select_sql(data_path)}"
+    ).fetchall()]
+    order_by = get_order_by_clause(layout, columns)
+    row_group_size = layout.get("row_group_size", 122880)
+
+    order_clause = f" ORDER BY {order_by}" if order_by else ""
+    target_dir = os.path.dirname(target_path)
+    if target_dir:
+        os.makedirs(target_dir, exist_ok=True)
+    connection.execute(
+        f"COPY ({dataset_select_sql(data_path)}{order_clause}) "
+        f"TO '{target_path}' (FORMAT PARQUET, ROW_GROUP_SIZE {row_group_size})"
+    )
+    return target_path
+
+
+def profile_scan(connection, query: str, params: Optional[Dict] = None) -> Dict:
+    """
+    Executa a query com profiling e retorna o volume efetivamente varrido.
+
+    Args:
+        connection: Conexão DuckDB
+        query: Query a perfilar
+        params: Parâmetros nomeados da query (ex: SQL gerado pelo ComparativeCalculator)
+
+    Returns:
+        Dicionário com rows_scanned, bytes_read (leitura de parquet) e latency
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profile_path = os.path.join(tmp_dir, "profile.json")
+        connection.execute("PRAGMA enable_profiling='json'")
+        connection.execute(f"PRAGMA profiling_output='{profile_path}'")
+        try:
+            if params:
+                connection.execute(query, params).fetchall()
+            else:
+                connection.execute(query).fetchall()
+        finally:
+            connection.execute("PRAGMA disable_profiling")
+
+        with open(profile_path, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+
+    return {
+        'rows_scanned': profile.get('cumulative_rows_scanned', 0),
+        'bytes_read': profile.get('total_bytes_read', 0),
+        'latency': profile.get('latency', 0.0)
+    }
+
+
+# Reordenação offline do dataset de produção: python src/datastore/layout.py [destino.parquet]
+if __name__ == "__main__":
+    import duckdb
+
+    data_path = DATA_CONFIG["data_path"]
+    layout = DATA_CONFIG.get("table_layout", {})
+    if not os.path.exists(data_path):
+        print(f"Dataset não encontrado: {data_path} (execute a partir da raiz do projeto)")
+        sys.exit(1)
+    if is_partitioned_dataset(data_path):
+        print("Dataset particionado: use python src/datastore/partitions.py (partições já gravadas ordenadas)")
+        sys.exit(1)
+
+    target_path = sys.argv[1] if len(sys.argv) > 1 else (
+        layout.get("clustered_path") or f"{os.path.splitext(data_path)[0]}_clustered.parquet"
+    )
+    write_clustered_parquet(duckdb.connect(), data_path, target_path, layout)
+    print(f"Parquet reordenado gravado em {target_path}")
+    if layout.get("clustered_path") != target_path:
+        print(f"Configure DATA_CONFIG['table_layout']['clustered_path'] = '{target_path}' para usá-lo na carga")
@@ -0,0 +1,365 @@
+"""
+Datasets Particionados - Suporte a diretórios parquet no formato Hive (year=/month=)
+
+Permite que DATA_CONFIG['data_path'] aponte para um diretório particionado por
+período. dados_comerciais passa a ser uma view sobre os arquivos, atualizações
+mensais apenas acrescentam uma partição e queries com filtro de Data leem somente
+as partições do período solicitado.
+"""
+
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.model_config import DATA_CONFIG
+
+
+# Expressões que derivam cada coluna de partição suportada a partir da Data
+PARTITION_EXPRESSIONS = {
+    'year': "YEAR({time_column})",
+    'month': "MONTH({time_column})",
+}
+
+_DATE_LITERAL = r"(?:DATE\s*)?'(\d{4})-(\d{2})-(\d{2})(?:[ T]00:00:00)?'(?!\s*[-+])"
+
+
+def is_partitioned_dataset(path: str) -> bool:
+    """Verifica se o caminho de dados é um diretório particionado"""
+    return bool(path) and os.path.isdir(path)
+
+
+def get_partition_columns(path: str) -> List[str]:
+    """
+    Detecta as colunas de partição Hive presentes no diretório.
+
+    Args:
+        path: Diretório do dataset
+
+    Returns:
+        Colunas de partição na ordem de aninhamento (ex: ['year', 'month'])
+    """
+    columns = []
+    current = path
+    while os.path.isdir(current):
+        partition_dirs = [d for d in sorted(os.listdir(current))
+                          if '=' in d and os.path.isdir(os.path.join(current, d))]
+        if not partition_dirs:
+            break
+        columns.append(partition_dirs[0].split('=', 1)[0])
+        current = os.path.join(current, partition_dirs[0])
+    return columns
+
+
+def parquet_source(path: str) -> str:
+    """
+    Retorna a expressão read_parquet adequada para arquivo único ou diretório Hive.
+
+    Args:
+        path: Arquivo parquet ou diretório particionado
+
+    Returns:
+        Expressão SQL para uso em FROM
+    """
+    if is_partitioned_dataset(path):
+        return f"read_parquet('{os.path.join(path, '**', '*.parquet')}', hive_partitioning = true)"
+    return f"read_parquet('{path}')"
+
+
+def dataset_select_sql(path: str) -> str:
+    """
+    SELECT com as colunas originais do dataset (sem as colunas de partição derivadas).
+
+    Args:
+        path: Arquivo parquet ou diretório particionado
+
+    Returns:
+        Query SELECT sobre os dados
+    """
+    partition_columns = get_partition_columns(path) if is_partitioned_dataset(path) else []
+    exclude = f" EXCLUDE ({', '.join(partition_columns)})" if partition_columns else ""
+    return f"SELECT *{exclude} FROM {parquet_source(path)}"
+
+
+def dataset_mtime(path: str) -> float:
+    """Última modificação do dataset (maior mtime entre os arquivos parquet do diretório)"""
+    if not is_partitioned_dataset(path):
+        return os.path.getmtime(path) if path and os.path.exists(path) else 0.0
+
+    latest = 0.0
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.parquet'):
+                latest = max(latest, os.path.getmtime(os.path.join(root, name)))
+    return latest
+
+
+def read_dataset(path: str, **kwargs) -> pd.DataFrame:
+    """
+    Carrega o dataset em DataFrame, aceitando arquivo único ou diretório particionado.
+
+    As colunas de partição derivadas (year, month) são descartadas para manter o
+    mesmo schema do arquivo monolítico.
+
+    Args:
+        path: Arquivo parquet ou diretório particionado
+        **kwargs: Argumentos repassados para pd.read_parquet
+
+    Returns:
+        DataFrame com os dados comerciais
+    """
+    df = pd.read_parquet(path, **kwargs)
+
+    if is_partitioned_dataset(path):
+        partition_columns = [c for c in get_partition_columns(path) if c in df.columns]
+        df = df.drop(columns=partition_columns)
+        time_column = DATA_CONFIG.get("table_layout", {}).get("time_column", "Data")
+        if time_column in df.columns:
+            df = df.sort_values(time_column, kind='stable').reset_index(drop=True)
+
+    return df
+
+
+def write_partitioned_dataset(connection, source_path: str, target_dir: str,
+                              order_by: str = "", append: bool = False) -> str:
+    """
+    Grava (ou acrescenta) dados em um diretório particionado por período.
+
+    Usado na conversão inicial do parquet monolítico e nas atualizações mensais,
+    quando apenas o novo período é acrescentado com append=True.
+
+    Args:
+        connection: Conexão DuckDB
+        source_path: Parquet de origem (arquivo ou diretório)
+        target_dir: Diretório particionado de destino
+        order_by: Ordenação aplicada dentro de cada partição (layout clusterizado)
+        append: Se deve acrescentar arquivos às partições existentes
+
+    Returns:
+        Diretório de destino
+    """
+    partitioning = DATA_CONFIG.get("partitioning", {})
+    time_column = DATA_CONFIG.get("table_layout", {}).get("time_column", "Data")
+    columns = [c for c in partitioning.get("columns", ['year', 'month']) if c in PARTITION_EXPRESSIONS]
+
+    derived = ", ".join(
+        f"{PARTITION_EXPRESSIONS[c].format(time_column=time_column)} AS {c}" for c in columns
+    )
+    order_clause = f" ORDER BY {order_by}" if order_by else ""
+    mode = "APPEND" if append else "OVERWRITE_OR_IGNORE"
+
+    connection.execute(
+        f"COPY (SELECT *, {derived} FROM ({dataset_select_sql(source_path)}){order_clause}) "
+        f"TO '{target_dir}' (FORMAT PARQUET, PARTITION_BY ({', '.join(columns)}), {mode})"
+    )
+    return target_dir
+
+
+class PartitionPruner:
+    """
+    Reescreve queries sobre a view particionada para ler apenas as partições necessárias.
+
+    O DuckDB só descarta arquivos Hive com filtros nas colunas de partição; como o
+    agente filtra por Data, os limites de período são convertidos em predicados
+    sobre year/month aplicados diretamente na leitura dos arquivos.
+    """
+
+    def __init__(self, path: str, table: str = "dados_comerciais", time_column: str = "Data"):
+        """
+        Args:
+            path: Diretório particionado
+            table: Nome da view exposta ao agente
+            time_column: Coluna temporal usada nos filtros
+        """
+        self.path = path
+        self.table = table
+        self.time_column = time_column
+        self.partition_columns = get_partition_columns(path)
+
+    def prune(self, query: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Restringe a leitura às partições do período filtrado pela query.
+
+        Args:
+            query: Query SQL sobre a view
+
+        Returns:
+            Tupla (query_final, info_da_poda) - info é None se não houve poda
+        """
+        if 'year' not in self.partition_columns:
+            return query, None
+        if re.search(r"\b(?:OR|NOT|UNION|JOIN|WITH)\b", query, re.IGNORECASE):
+            return query, None
+        if len(re.findall(r"\bSELECT\b", query, re.IGNORECASE)) != 1:
+            return query, None
+        if len(re.findall(rf"\bFROM\s+{self.table}\b", query, re.IGNORECASE)) != 1:
+            return query, None
+
+        where = _outer_where_span(query)
+        if where is None:
+            return query, None
+        # Data fora do WHERE externo (CASE WHEN Data ..., FILTER (WHERE Data ...)) pede todas as partições
+        outside = query[:where[0]] + query[where[1]:]
+        if re.search(rf"\b{re.escape(self.time_column)}\b", outside, re.IGNORECASE):
+            return query, None
+
+        lower, upper = self._extract_period_bounds(query[where[0]:where[1]])
+        if lower is None and upper is None:
+            return query, None
+        if lower is not None and upper is not None and lower > upper:
+            return query, None
+
+        use_month = 'month' in self.partition_columns
+        key_expr = "(year * 100 + month)" if use_month else "year"
+
+        def to_key(bound):
+            return bound[0] * 100 + bound[1] if use_month else bound[0]
+
+        predicates = []
+        if lower is not None:
+            predicates.append(f"{key_expr} >= {to_key(lower)}")
+        if upper is not None:
+            predicates.append(f"{key_expr} <= {to_key(upper)}")
+        partition_filter = " AND ".join(predicates)
+
+        exclude = ", ".join(self.partition_columns)
+        pruned_source = (
+            f"(SELECT * EXCLUDE ({exclude}) FROM {parquet_source(self.path)} "
+            f"WHERE {partition_filter}) {self.table}"
+        )
+        rewritten = re.sub(rf"\bFROM\s+{self.table}\b", f"FROM {pruned_source}", query,
+                           count=1, flags=re.IGNORECASE)
+        return rewritten, {'partition_filter': partition_filter}
+
+    def _extract_period_bounds(self, where_clause: str) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+        """
+        Extrai o menor e o maior mês (ano, mês) compatíveis com os filtros de Data.
+
+        Considera apenas os termos do AND de nível superior do WHERE externo; como
+        todos precisam valer, o período final é a interseção dos limites encontrados.
+        """
+        col = re.escape(self.time_column)
+        lowers, uppers = [], []
+        conjuncts = _split_top_level_and(where_clause)
+        query = "\n".join(c for c in conjuncts if re.match(rf"\s*(?:{col}\b|YEAR\b|EXTRACT\b)", c, re.IGNORECASE))
+
+        for match in re.finditer(rf"\b{col}\s*(>=|<=|<|>|=)\s*{_DATE_LITERAL}", query, re.IGNORECASE):
+            operator = match.group(1)
+            year, month, day = int(match.group(2)), int(match.group(3)), int(match.group(4))
+            if operator in ('>=', '>', '='):
+                lowers.append((year, month))
+            if operator in ('<=', '='):
+                uppers.append((year, month))
+            elif operator == '<':
+                # Data < 'YYYY-MM-01' exclui o próprio mês
+                if day == 1:
+                    uppers.append((year, month - 1) if month > 1 else (year - 1, 12))
+                else:
+                    uppers.append((year, month))
+
+        between = rf"\b{col}\s+BETWEEN\s+{_DATE_LITERAL}\s+AND\s+{_DATE_LITERAL}"
+        for match in re.finditer(between, query, re.IGNORECASE):
+            lowers.append((int(match.group(1)), int(match.group(2))))
+            uppers.append((int(match.group(4)), int(match.group(5))))
+
+        year_patterns = [
+            rf"\bYEAR\s*\(\s*{col}\s*\)\s*=\s*(\d{{4}})",
+            rf"EXTRACT\s*\(\s*YEAR\s+FROM\s+{col}\s*\)\s*=\s*(\d{{4}})",
+        ]
+        for pattern in year_patterns:
+            for match in re.finditer(pattern, query, re.IGNORECASE):
+                year = int(match.group(1))
+                lowers.append((year, 1))
+                uppers.append((year, 12))
+
+        lower = max(lowers) if lowers else None
+        upper = min(uppers) if uppers else None
+        return lower, upper
+
+
+_CLAUSE_END = r"\b(?:GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|QUALIFY|WINDOW|OFFSET)\b"
+
+
+def _outer_where_span(query: str) -> Optional[Tuple[int, int]]:
+    """
+    Posição (início, fim) da condição do WHERE da query externa (fora de parênteses).
+
+    Returns:
+        None se a query não tem WHERE externo
+    """
+    depth = 0
+    start = None
+    for match in re.finditer(rf"[()]|\bWHERE\b|{_CLAUSE_END}", query, re.IGNORECASE):
+        token = match.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0:
+            if token.upper() == 'WHERE':
+                start = match.end()
+            elif start is not None:
+                return start, match.start()
+    return (start, len(query.rstrip().rstrip(';'))) if start is not None else None
+
+
+def _split_top_level_and(condition: str) -> List[str]:
+    """Divide a condição nos termos do AND de nível superior (o AND de BETWEEN ... AND ... fica no termo)"""
+    terms = []
+    depth = 0
+    last = 0
+    pending_between = False
+    for match in re.finditer(r"[()]|\bBETWEEN\b|\bAND\b", condition, re.IGNORECASE):
+        token = match.group(0).upper()
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth == 0 and token == 'BETWEEN':
+            pending_between = True
+        elif depth == 0 and token == 'AND':
+            if pending_between:
+                pending_between = False
+                continue
+            terms.append(condition[last:match.start()])
+            last = match.end()
+    terms.append(condition[last:])
+    return [term.strip() for term in terms if term.strip()]
+
+
+def create_partition_pruner(data_path: str) -> Optional[PartitionPruner]:
+    """
+    Cria o PartitionPruner quando dados_comerciais é uma view sobre diretório particionado.
+
+    Args:
+        data_path: Caminho configurado em DATA_CONFIG
+
+    Returns:
+        PartitionPruner ou None se não aplicável
+    """
+    if not is_partitioned_dataset(data_path):
+        return None
+    if not DATA_CONFIG.get("partitioning", {}).get("as_view", True):
+        return None
+    time_column = DATA_CONFIG.get("table_layout", {}).get("time_column", "Data")
+    return PartitionPruner(data_path, time_column=time_column)
+
+
+# Conversão do parquet monolítico: python src/datastore/partitions.py origem.parquet destino/
+if __name__ == "__main__":
+    import duckdb
+    from datastore.layout import get_order_by_clause
+
+    if len(sys.argv) < 3:
+        print("Uso: python src/datastore/partitions.py <origem.parquet> <diretorio_destino> [--append]")
+        sys.exit(1)
+
+    connection = duckdb.connect()
+    layout = DATA_CONFIG.get("table_layout", {})
+    order_by = get_order_by_clause(layout) if layout.get("cluster", False) else ""
+    write_partitioned_dataset(connection, sys.argv[1], sys.argv[2],
+                              order_by=order_by, append='--append' in sys.argv)
+    print(f"Dataset particionado gravado em {sys.argv[2]} ({', '.join(get_partition_columns(sys.argv[2]))})")
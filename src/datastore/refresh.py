@@ -0,0 +1,268 @@
+"""
+Atualização Incremental - Detecção de novas versões do dataset sem reiniciar a aplicação
+
+Cada alteração detectada em DATA_CONFIG['data_path'] gera uma DatasetVersion. Quando
+a alteração é apenas um acréscimo de linhas (meses novos), a versão carrega somente
+o delta, que é aplicado à conexão DuckDB e aos rollups de cada agente na próxima
+interação. Turnos em andamento continuam na versão que já possuem; alterações que
+reescrevem o histórico exigem recriação do agente.
+"""
+
+import os
+import sys
+import time
+import threading
+from typing import Dict, List, Optional
+
+import duckdb
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.model_config import DATA_CONFIG
+from datastore.layout import get_order_by_clause
+from datastore.partitions import dataset_mtime, dataset_select_sql
+
+
+class DatasetVersion:
+    """Versão registrada do dataset com o delta em relação à versão anterior"""
+
+    def __init__(self, version: int, mtime: float, row_count: int, max_date, checksum: int,
+                 delta: Optional[pd.DataFrame] = None, full_reload: bool = False):
+        """
+        Args:
+            version: Número sequencial da versão
+            mtime: Última modificação dos arquivos quando a versão foi registrada
+            row_count: Total de linhas do dataset
+            max_date: Maior data do dataset
+            checksum: Assinatura do conteúdo (soma dos hashes das linhas)
+            delta: Linhas acrescentadas em relação à versão anterior
+            full_reload: Se a versão não pode ser aplicada incrementalmente
+        """
+        self.version = version
+        self.mtime = mtime
+        self.row_count = row_count
+        self.max_date = max_date
+        self.checksum = checksum
+        self.delta = delta
+        self.full_reload = full_reload
+
+    def to_dict(self) -> Dict:
+        """Resumo serializável para debug"""
+        return {
+            'version': self.version,
+            'row_count': self.row_count,
+            'max_date': str(self.max_date),
+            'delta_rows': len(self.delta) if self.delta is not None else 0,
+            'full_reload': self.full_reload
+        }
+
+
+class DatasetRefresher:
+    """
+    Detecta novas versões do dataset e mantém o histórico de deltas entre versões.
+
+    Uma única instância é compartilhada por todas as sessões do processo; cada agente
+    registra a versão com que foi criado e aplica os deltas pendentes entre turnos.
+    """
+
+    def __init__(self, data_path: str, config: Dict = None):
+        """
+        Args:
+            data_path: Arquivo parquet ou diretório particionado
+            config: Configuração de atualização (padrão: DATA_CONFIG['refresh'])
+        """
+        self.data_path = data_path
+        self.config = config or DATA_CONFIG.get("refresh", {})
+        self.time_column = DATA_CONFIG.get("table_layout", {}).get("time_column", "Data")
+        self.versions: List[DatasetVersion] = []
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def current_version(self) -> DatasetVersion:
+        """Versão vigente do dataset (registrada na primeira chamada)"""
+        with self._lock:
+            if not self.versions:
+                stats = self._dataset_stats()
+                self.versions.append(DatasetVersion(1, dataset_mtime(self.data_path), stats['row_count'],
+                                                    stats['max_date'], stats['checksum']))
+            return self.versions[-1]
+
+    def check_for_update(self, force: bool = False) -> Optional[DatasetVersion]:
+        """
+        Verifica se os arquivos mudaram e registra uma nova versão.
+
+        Args:
+            force: Ignora o intervalo mínimo entre verificações
+
+        Returns:
+            Nova DatasetVersion ou None se nada mudou
+        """
+        current = self.current_version()
+
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_check < self.config.get("check_interval_seconds", 30):
+                return None
+            self._last_check = now
+
+            mtime = dataset_mtime(self.data_path)
+            if mtime <= current.mtime:
+                return None
+
+            new_version = self._build_version(current, mtime)
+            if new_version is None:
+                # Arquivo regravado sem alteração de conteúdo
+                current.mtime = mtime
+                return None
+
+            self.versions.append(new_version)
+            max_versions = self.config.get("max_versions", 10)
+            if len(self.versions) > max_versions:
+                self.versions = self.versions[-max_versions:]
+            return new_version
+
+    def pending_versions(self, since_version: Optional[int]) -> Optional[List[DatasetVersion]]:
+        """
+        Lista as versões que um agente criado em since_version ainda não aplicou.
+
+        Args:
+            since_version: Versão registrada no agente
+
+        Returns:
+            Versões pendentes em ordem (lista vazia se atualizado) ou None se o agente
+            precisa ser recriado (versão fora do histórico ou recarga completa)
+        """
+        with self._lock:
+            if since_version is None or not self.versions:
+                return []
+            if since_version >= self.versions[-1].version:
+                return []
+            if since_version < self.versions[0].version:
+                return None
+
+            pending = [v for v in self.versions if v.version > since_version]
+            if any(v.full_reload or v.delta is None for v in pending):
+                return None
+            return pending
+
+    def _build_version(self, current: DatasetVersion, mtime: float) -> Optional[DatasetVersion]:
+        """Compara o dataset com a versão vigente e extrai o delta quando for só acréscimo"""
+        stats = self._dataset_stats(current.max_date)
+        if stats['checksum'] == current.checksum and stats['row_count'] == current.row_count:
+            return None
+
+        # Histórico intacto: as linhas até a data máxima anterior são as mesmas
+        append_only = (stats['previous_row_count'] == current.row_count
+                       and stats['previous_checksum'] == current.checksum)
+
+        delta = None
+        if append_only:
+            connection = duckdb.connect()
+            try:
+                delta = connection.execute(
+                    f"SELECT * FROM ({dataset_select_sql(self.data_path)}) "
+                    f"WHERE {self.time_column} > ? ORDER BY {self.time_column}",
+                    [current.max_date]
+                ).df()
+            finally:
+                connection.close()
+
+        return DatasetVersion(current.version + 1, mtime, stats['row_count'], stats['max_date'],
+                              stats['checksum'], delta=delta, full_reload=not append_only)
+
+    def _dataset_stats(self, previous_max_date=None) -> Dict:
+        """Contagem, data máxima e assinatura do dataset (total e até previous_max_date)"""
+        connection = duckdb.connect()
+        try:
+            previous_filter = f"{self.time_column} <= ?" if previous_max_date is not None else "FALSE"
+            params = [previous_max_date] * 2 if previous_max_date is not None else []
+            row = connection.execute(
+                f"SELECT COUNT(*), MAX({self.time_column}), SUM(CAST(hash(t) AS HUGEINT)), "
+                f"COUNT(*) FILTER (WHERE {previous_filter}), "
+                f"SUM(CAST(hash(t) AS HUGEINT)) FILTER (WHERE {previous_filter}) "
+                f"FROM ({dataset_select_sql(self.data_path)}) t",
+                params
+            ).fetchone()
+        finally:
+            connection.close()
+
+        return {
+            'row_count': row[0],
+            'max_date': row[1],
+            'checksum': row[2],
+            'previous_row_count': row[3],
+            'previous_checksum': row[4]
+        }
+
+
+def ingest_delta(connection, delta: pd.DataFrame, rollup_catalog=None,
+                 table: str = "dados_comerciais") -> int:
+    """
+    Acrescenta as linhas novas à tabela base e recalcula os meses afetados nos rollups.
+
+    Tudo ocorre em uma única transação: queries seguintes veem a nova versão
+    completa ou, em caso de erro, a versão anterior intacta. Quando a tabela é uma
+    view sobre diretório particionado, as novas partições já são lidas diretamente
+    e apenas os rollups são atualizados.
+
+    Args:
+        connection: Conexão DuckDB do agente
+        delta: Linhas acrescentadas
+        rollup_catalog: RollupCatalog associado à conexão (opcional)
+        table: Tabela base
+
+    Returns:
+        Número de linhas acrescentadas
+    """
+    if delta is None or delta.empty:
+        return 0
+
+    table_type = connection.execute(
+        "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [table]
+    ).fetchone()
+    is_view = table_type is not None and table_type[0] == 'VIEW'
+
+    layout = DATA_CONFIG.get("table_layout", {})
+    time_column = layout.get("time_column", "Data")
+    # Linhas novas seguem o layout clusterizado para manter a poda por zonemap
+    order_by = get_order_by_clause(layout, list(delta.columns)) if layout.get("cluster", False) else ""
+    order_clause = f" ORDER BY {order_by}" if order_by else ""
+
+    connection.register("_dataset_delta", delta)
+    connection.execute("BEGIN TRANSACTION")
+    try:
+        if not is_view:
+            connection.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _dataset_delta{order_clause}")
+        if rollup_catalog is not None and rollup_catalog.rollups:
+            rollup_catalog.refresh_period(delta[time_column].min())
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.unregister("_dataset_delta")
+
+    return len(delta)
+
+
+_refresher_lock = threading.Lock()
+_dataset_refresher: Optional[DatasetRefresher] = None
+
+
+def get_dataset_refresher() -> Optional[DatasetRefresher]:
+    """
+    Retorna o DatasetRefresher compartilhado do processo.
+
+    Returns:
+        DatasetRefresher ou None se a atualização incremental estiver desabilitada
+    """
+    global _dataset_refresher
+
+    if not DATA_CONFIG.get("refresh", {}).get("enabled", False):
+        return None
+
+    with _refresher_lock:
+        data_path = DATA_CONFIG["data_path"]
+        if _dataset_refresher is None or _dataset_refresher.data_path != data_path:
+            _dataset_refresher = DatasetRefresher(data_path)
+        return _dataset_refresher
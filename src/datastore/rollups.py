@@ -0,0 +1,381 @@
+"""
+Rollups Pré-Agregados - Camada de tabelas materializadas sobre dados_comerciais
+
+Constrói rollups mensais para os níveis declarados em COLUMN_HIERARCHY e reescreve
+de forma transparente as queries do agente para o menor rollup capaz de respondê-las.
+A reescrita é conservadora: qualquer construção não reconhecida mantém a query original.
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import calendar
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import COLUMN_HIERARCHY, ROLLUP_CONFIG
+from datastore.partitions import dataset_mtime
+
+
+# Funções temporais que continuam corretas sobre dados truncados no mês
+_TIME_FUNCTION_PATTERNS = [
+    r"DATE_TRUNC\s*\(\s*'(?:month|quarter|year)'\s*,\s*{col}\s*\)",
+    r"\b(?:YEAR|MONTH|QUARTER)\s*\(\s*{col}\s*\)",
+    r"EXTRACT\s*\(\s*(?:YEAR|MONTH|QUARTER)\s+FROM\s+{col}\s*\)",
+    r"STRFTIME\s*\(\s*{col}\s*,\s*'(?:[^'%]|%[Ymy])*'\s*\)",
+]
+
+_DATE_LITERAL = r"(?:DATE\s*)?'(\d{{4}}-\d{{2}}-\d{{2}})(?:[ T]00:00:00)?'(?:\s*::\s*(?:DATE|TIMESTAMP))?"
+_COMPARISON_PATTERN = r"\b{col}\s*(>=|<=|<>|!=|<|>|=)\s*" + _DATE_LITERAL
+_BETWEEN_PATTERN = r"\b{col}\s+BETWEEN\s+" + _DATE_LITERAL + r"\s+AND\s+" + _DATE_LITERAL
+
+_FORBIDDEN_KEYWORDS = r"\b(?:JOIN|UNION|INTERSECT|EXCEPT|WITH|INSERT|UPDATE|DELETE|CREATE|DROP|ALTER|COPY)\b"
+
+
+def plan_rollups(available_columns: List[str], config: Dict = None) -> List[Tuple[str, List[str]]]:
+    """
+    Define os rollups a construir a partir de COLUMN_HIERARCHY.
+
+    Cada nível de uma hierarquia gera um rollup com o próprio nível e os níveis
+    mais amplos (ex: Municipio_Cliente + UF_Cliente), permitindo drill-up sem
+    voltar à tabela base. Inclui também um rollup apenas temporal.
+
+    Args:
+        available_columns: Colunas existentes na tabela base
+        config: Configuração de rollups (padrão: ROLLUP_CONFIG)
+
+    Returns:
+        Lista de tuplas (nome_do_rollup, dimensões)
+    """
+    config = config or ROLLUP_CONFIG
+    prefix = config.get("table_prefix", "rollup_")
+    available = set(available_columns)
+
+    planned = [(f"{prefix}tempo", [])]
+    seen = {()}
+
+    for categoria, niveis in COLUMN_HIERARCHY.items():
+        niveis_existentes = [n for n in niveis if n in available]
+        for i, nivel in enumerate(niveis_existentes):
+            dimensoes = niveis_existentes[i:]
+            chave = tuple(sorted(dimensoes))
+            if chave in seen:
+                continue
+            seen.add(chave)
+            planned.append((f"{prefix}{categoria}_{nivel.lower()}", dimensoes))
+
+    for combinacao in config.get("extra_combinations", []):
+        dimensoes = [c for c in combinacao if c in available]
+        chave = tuple(sorted(dimensoes))
+        if len(dimensoes) != len(combinacao) or chave in seen:
+            continue
+        seen.add(chave)
+        planned.append((f"{prefix}{'_'.join(d.lower() for d in dimensoes)}", dimensoes))
+
+    return planned
+
+
+class RollupCatalog:
+    """
+    Catálogo de rollups materializados em uma conexão DuckDB.
+
+    Responsável por construir (ou carregar do cache offline) as tabelas de rollup
+    e por reescrever queries elegíveis para o menor rollup compatível.
+    """
+
+    def __init__(self, connection, config: Dict = None):
+        """
+        Args:
+            connection: Conexão DuckDB onde a tabela base já existe
+            config: Configuração de rollups (padrão: ROLLUP_CONFIG)
+        """
+        self.connection = connection
+        self.config = config or ROLLUP_CONFIG
+        self.source_table = self.config.get("source_table", "dados_comerciais")
+        self.time_column = self.config.get("time_column", "Data")
+        self.measures = []
+        self.row_count_column = self.config.get("row_count_column", "Qtd_Registros")
+        self.table_columns = []
+        self.day_granular = True  # Se a coluna temporal não possui componente de hora
+        self.time_type = "TIMESTAMP"
+        self.rollups = []  # Lista de dicts {'name', 'dimensions', 'row_count'} ordenada por tamanho
+        self.source_row_count = 0
+
+    def build(self, source_path: Optional[str] = None) -> List[Dict]:
+        """
+        Constrói os rollups planejados, reaproveitando o cache parquet quando atualizado.
+
+        Args:
+            source_path: Caminho dos dados de origem (usado para validar o cache offline)
+
+        Returns:
+            Lista de rollups disponíveis
+        """
+        schema = self.connection.execute(f"DESCRIBE {self.source_table}").fetchall()
+        column_types = {row[0]: row[1] for row in schema}
+        self.table_columns = list(column_types.keys())
+        self.measures = [m for m in self.config.get("measures", []) if m in column_types]
+
+        if self.time_column not in column_types or not self.measures:
+            return []
+
+        self.source_row_count = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.source_table}"
+        ).fetchone()[0]
+        self.day_granular = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.source_table} "
+            f"WHERE CAST({self.time_column} AS TIMESTAMP) <> DATE_TRUNC('day', {self.time_column})"
+        ).fetchone()[0] == 0
+
+        self.time_type = column_types[self.time_column]
+        max_ratio = self.config.get("max_size_ratio", 0.5)
+        cache_dir = self.config.get("cache_dir")
+
+        self.rollups = []
+        for name, dimensions in plan_rollups(self.table_columns, self.config):
+            cache_file = self._cache_file(cache_dir, name, dimensions) if cache_dir else None
+
+            if cache_file and self._cache_is_fresh(cache_file, source_path):
+                self.connection.execute(
+                    f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM read_parquet('{cache_file}')"
+                )
+            else:
+                self.connection.execute(f"CREATE OR REPLACE TABLE {name} AS {self._aggregate_sql(dimensions)}")
+
+            row_count = self.connection.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+            # Rollup que não reduz o volume não compensa a memória ocupada
+            if self.source_row_count and row_count > self.source_row_count * max_ratio:
+                self.connection.execute(f"DROP TABLE IF EXISTS {name}")
+                continue
+
+            if cache_file and not self._cache_is_fresh(cache_file, source_path):
+                os.makedirs(cache_dir, exist_ok=True)
+                # Caches do mesmo rollup gerados com outra configuração não serão mais lidos
+                for stale in glob.glob(os.path.join(cache_dir, f"{name}-*.parquet")):
+                    if stale != cache_file:
+                        os.remove(stale)
+                self.connection.execute(f"COPY {name} TO '{cache_file}' (FORMAT PARQUET)")
+
+            self.rollups.append({'name': name, 'dimensions': dimensions, 'row_count': row_count})
+
+        self.rollups.sort(key=lambda r: (r['row_count'], len(r['dimensions'])))
+        return self.rollups
+
+    def refresh_period(self, period_start) -> List[Dict]:
+        """
+        Recalcula os rollups a partir do período que recebeu novas linhas na tabela base.
+
+        Apenas os meses a partir de period_start são removidos e reagregados, o que
+        evita reconstruir o histórico inteiro após um acréscimo incremental.
+
+        Args:
+            period_start: Menor data das linhas acrescentadas
+
+        Returns:
+            Lista de rollups atualizada
+        """
+        grain = self.config.get("time_grain", "month")
+        period_filter = f"{self.time_column} >= DATE_TRUNC('{grain}', CAST(? AS TIMESTAMP))"
+
+        for rollup in self.rollups:
+            self.connection.execute(f"DELETE FROM {rollup['name']} WHERE {period_filter}", [period_start])
+            self.connection.execute(
+                f"INSERT INTO {rollup['name']} {self._aggregate_sql(rollup['dimensions'], period_filter)}",
+                [period_start]
+            )
+            rollup['row_count'] = self.connection.execute(f"SELECT COUNT(*) FROM {rollup['name']}").fetchone()[0]
+
+        self.source_row_count = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.source_table}"
+        ).fetchone()[0]
+        self.day_granular = self.connection.execute(
+            f"SELECT COUNT(*) FROM {self.source_table} "
+            f"WHERE CAST({self.time_column} AS TIMESTAMP) <> DATE_TRUNC('day', {self.time_column})"
+        ).fetchone()[0] == 0
+
+        self.rollups.sort(key=lambda r: (r['row_count'], len(r['dimensions'])))
+        return self.rollups
+
+    def _aggregate_sql(self, dimensions: List[str], where: str = "") -> str:
+        """SELECT que agrega a tabela base no grão temporal do rollup"""
+        grain = self.config.get("time_grain", "month")
+        select_dims = "".join(f", {d}" for d in dimensions)
+        select_measures = ", ".join(f"SUM({m}) AS {m}" for m in self.measures)
+        where_clause = f" WHERE {where}" if where else ""
+        return (
+            f"SELECT CAST(DATE_TRUNC('{grain}', {self.time_column}) AS {self.time_type}) AS {self.time_column}"
+            f"{select_dims}, {select_measures}, COUNT(*) AS {self.row_count_column} "
+            f"FROM {self.source_table}{where_clause} GROUP BY ALL"
+        )
+
+    def _cache_file(self, cache_dir: str, name: str, dimensions: List[str]) -> str:
+        """
+        Parquet de cache do rollup, identificado também pela configuração que o gerou
+        (dimensões, medidas, grão e colunas), para que uma mudança em ROLLUP_CONFIG
+        não reaproveite um cache com outra estrutura.
+        """
+        signature = json.dumps({
+            'dimensions': dimensions,
+            'measures': self.measures,
+            'time_grain': self.config.get("time_grain", "month"),
+            'time_column': self.time_column,
+            'time_type': self.time_type,
+            'row_count_column': self.row_count_column,
+            'source_table': self.source_table
+        }, sort_keys=True)
+        return os.path.join(cache_dir, f"{name}-{hashlib.md5(signature.encode()).hexdigest()[:8]}.parquet")
+
+    def _cache_is_fresh(self, cache_file: str, source_path: Optional[str]) -> bool:
+        """Verifica se o parquet de cache existe e é mais novo que os dados de origem"""
+        if not os.path.exists(cache_file):
+            return False
+        if not source_path or not os.path.exists(source_path):
+            return False
+        return os.path.getmtime(cache_file) >= dataset_mtime(source_path)
+
+    def rewrite(self, query: str) -> Tuple[str, Optional[Dict]]:
+        """
+        Reescreve a query para o menor rollup capaz de respondê-la.
+
+        Args:
+            query: Query SQL (já normalizada) sobre a tabela base
+
+        Returns:
+            Tupla (query_final, rollup_utilizado) - rollup é None se não houve reescrita
+        """
+        if not self.rollups:
+            return query, None
+
+        referenced = self._referenced_dimensions(query)
+        if referenced is None:
+            return query, None
+
+        for rollup in self.rollups:
+            if referenced.issubset(rollup['dimensions']):
+                rewritten = re.sub(
+                    rf"\bFROM\s+{self.source_table}\b",
+                    f"FROM {rollup['name']}",
+                    query,
+                    flags=re.IGNORECASE
+                )
+                rewritten = re.sub(
+                    r"COUNT\s*\(\s*\*\s*\)",
+                    f"SUM({self.row_count_column})",
+                    rewritten,
+                    flags=re.IGNORECASE
+                )
+                return rewritten, rollup
+
+        return query, None
+
+    def _referenced_dimensions(self, query: str) -> Optional[set]:
+        """
+        Extrai as colunas-dimensão referenciadas pela query.
+
+        Returns:
+            Conjunto de dimensões ou None se a query não for elegível para rollup
+        """
+        if re.search(_FORBIDDEN_KEYWORDS, query, re.IGNORECASE):
+            return None
+        # Referências qualificadas (dados_comerciais.coluna, alias.coluna) não existiriam no rollup
+        if re.search(r"\b[A-Za-z_]\w*\s*\.\s*[A-Za-z_\"]", re.sub(r"'[^']*'", " ", query)):
+            return None
+        if len(re.findall(r"\bSELECT\b", query, re.IGNORECASE)) != 1:
+            return None
+        froms = re.findall(r"\bFROM\s+(\w+)", query, re.IGNORECASE)
+        if len(froms) != 1 or froms[0].lower() != self.source_table.lower():
+            return None
+        if re.search(r"\bSELECT\s+(?:DISTINCT\s+)?\*", query, re.IGNORECASE):
+            return None
+        # COUNT(coluna) sem DISTINCT contaria grupos do rollup, não linhas
+        if re.search(r"COUNT\s*\(\s*(?!\*|DISTINCT\b)", query, re.IGNORECASE):
+            return None
+
+        analysis = query
+        col = re.escape(self.time_column)
+
+        # Filtros de data só são equivalentes se alinhados ao grão mensal
+        for match in re.finditer(_BETWEEN_PATTERN.format(col=col), analysis, re.IGNORECASE):
+            if not (self._is_month_start(match.group(1)) and self._is_month_end(match.group(2))):
+                return None
+        analysis = re.sub(_BETWEEN_PATTERN.format(col=col), " ", analysis, flags=re.IGNORECASE)
+
+        for match in re.finditer(_COMPARISON_PATTERN.format(col=col), analysis, re.IGNORECASE):
+            operator, literal = match.group(1), match.group(2)
+            if operator in ('>=', '<') and self._is_month_start(literal):
+                continue
+            if operator in ('<=', '>') and self._is_month_end(literal):
+                continue
+            return None
+        analysis = re.sub(_COMPARISON_PATTERN.format(col=col), " ", analysis, flags=re.IGNORECASE)
+
+        for pattern in _TIME_FUNCTION_PATTERNS:
+            analysis = re.sub(pattern.format(col=col), " ", analysis, flags=re.IGNORECASE)
+
+        # Medidas só podem aparecer dentro de SUM()
+        for measure in self.measures:
+            analysis = re.sub(rf"SUM\s*\(\s*(?:\w+\.)?{re.escape(measure)}\s*\)", " ", analysis, flags=re.IGNORECASE)
+
+        # Remover literais antes de procurar identificadores
+        analysis = re.sub(r"'[^']*'", " ", analysis)
+        identifiers = {token.lower() for token in re.findall(r"\b[A-Za-z_]\w*\b", analysis)}
+
+        if self.time_column.lower() in identifiers:
+            return None
+        if any(m.lower() in identifiers for m in self.measures):
+            return None
+        if self.row_count_column.lower() in identifiers:
+            return None
+
+        return {c for c in self.table_columns if c.lower() in identifiers}
+
+    def _is_month_start(self, literal: str) -> bool:
+        """Verifica se a data literal é o primeiro dia do mês"""
+        return literal.endswith('-01')
+
+    def _is_month_end(self, literal: str) -> bool:
+        """Verifica se a data literal é o último dia do mês (somente para dados diários)"""
+        if not self.day_granular:
+            return False
+        try:
+            year, month, day = (int(p) for p in literal.split('-'))
+            return day == calendar.monthrange(year, month)[1]
+        except ValueError:
+            return False
+
+
+def build_rollup_catalog(connection, source_path: Optional[str] = None) -> Optional[RollupCatalog]:
+    """
+    Cria e constrói o catálogo de rollups se habilitado em ROLLUP_CONFIG.
+
+    Args:
+        connection: Conexão DuckDB com a tabela base carregada
+        source_path: Caminho dos dados de origem (validação do cache offline)
+
+    Returns:
+        RollupCatalog construído ou None se desabilitado
+    """
+    if not ROLLUP_CONFIG.get("enabled", False):
+        return None
+
+    catalog = RollupCatalog(connection)
+    catalog.build(source_path)
+    return catalog
+
+
+# Materialização offline: python src/datastore/rollups.py
+if __name__ == "__main__":
+    import duckdb
+    from config.model_config import DATA_CONFIG
+    from datastore.layout import build_dataset_ddl
+
+    data_path = DATA_CONFIG["data_path"]
+    connection = duckdb.connect()
+    connection.execute(build_dataset_ddl(data_path, ROLLUP_CONFIG['source_table']))
+    catalog = RollupCatalog(connection)
+    for rollup in catalog.build(data_path):
+        print(f"{rollup['name']}: {rollup['row_count']:,} linhas ({', '.join(rollup['dimensions']) or 'apenas tempo'})")
@@ -0,0 +1,289 @@
+"""
+Dataset Sintético - Gera parquet com o schema de DadosComercial em escala configurável
+
+Os dados de produção não podem ser compartilhados, então testes de carga e de
+escala (1M a 200M linhas) usam um dataset gerado com as mesmas colunas de
+COLUMN_HIERARCHY e distribuições parecidas com as reais:
+
+- Clientes e produtos com frequência Zipfiana (poucos concentram o volume)
+- Hierarquias consistentes: produto -> família -> grupo -> linha, cliente ->
+  município -> UF, vendedor -> região
+- Datas com sazonalidade mensal, crescimento anual e menos vendas no fim de semana
+- Nomes de municípios brasileiros com acentos (exercitam a normalização de texto)
+
+As linhas são geradas em blocos de `chunk_rows` em ordem cronológica e gravadas
+incrementalmente, então a memória não cresce com o tamanho do arquivo.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.model_config import DATA_CONFIG
+from datastore.partitions import write_partitioned_dataset
+
+
+# Municípios (com acentos) e UF, em ordem aproximada de relevância comercial
+MUNICIPIOS = [
+    ('JOINVILLE', 'SC'), ('FLORIANÓPOLIS', 'SC'), ('BLUMENAU', 'SC'), ('SÃO JOSÉ', 'SC'),
+    ('CRICIÚMA', 'SC'), ('CHAPECÓ', 'SC'), ('ITAJAÍ', 'SC'), ('JARAGUÁ DO SUL', 'SC'),
+    ('LAGES', 'SC'), ('PALHOÇA', 'SC'), ('BALNEÁRIO CAMBORIÚ', 'SC'), ('BRUSQUE', 'SC'),
+    ('TUBARÃO', 'SC'), ('SÃO BENTO DO SUL', 'SC'), ('CAÇADOR', 'SC'), ('CONCÓRDIA', 'SC'),
+    ('CURITIBA', 'PR'), ('LONDRINA', 'PR'), ('MARINGÁ', 'PR'), ('PONTA GROSSA', 'PR'),
+    ('CASCAVEL', 'PR'), ('SÃO JOSÉ DOS PINHAIS', 'PR'), ('FOZ DO IGUAÇU', 'PR'), ('GUARAPUAVA', 'PR'),
+    ('PARANAGUÁ', 'PR'), ('UMUARAMA', 'PR'), ('PATO BRANCO', 'PR'),
+    ('PORTO ALEGRE', 'RS'), ('CAXIAS DO SUL', 'RS'), ('PELOTAS', 'RS'), ('CANOAS', 'RS'),
+    ('SANTA MARIA', 'RS'), ('PASSO FUNDO', 'RS'), ('NOVO HAMBURGO', 'RS'), ('SÃO LEOPOLDO', 'RS'),
+    ('ERECHIM', 'RS'), ('LAJEADO', 'RS'),
+    ('SÃO PAULO', 'SP'), ('CAMPINAS', 'SP'), ('RIBEIRÃO PRETO', 'SP'), ('SÃO JOSÉ DOS CAMPOS', 'SP'),
+    ('SOROCABA', 'SP'), ('JUNDIAÍ', 'SP'), ('PIRACICABA', 'SP'), ('BAURU', 'SP'),
+    ('SÃO JOSÉ DO RIO PRETO', 'SP'), ('MARÍLIA', 'SP'),
+    ('BELO HORIZONTE', 'MG'), ('UBERLÂNDIA', 'MG'), ('CONTAGEM', 'MG'), ('JUIZ DE FORA', 'MG'),
+    ('MONTES CLAROS', 'MG'), ('IPATINGA', 'MG'),
+    ('RIO DE JANEIRO', 'RJ'), ('NITERÓI', 'RJ'), ('PETRÓPOLIS', 'RJ'), ('VOLTA REDONDA', 'RJ'),
+    ('VITÓRIA', 'ES'), ('VILA VELHA', 'ES'), ('SERRA', 'ES'),
+    ('GOIÂNIA', 'GO'), ('ANÁPOLIS', 'GO'), ('APARECIDA DE GOIÂNIA', 'GO'),
+    ('BRASÍLIA', 'DF'),
+    ('CAMPO GRANDE', 'MS'), ('DOURADOS', 'MS'),
+    ('CUIABÁ', 'MT'), ('RONDONÓPOLIS', 'MT'), ('SINOP', 'MT'),
+    ('SALVADOR', 'BA'), ('FEIRA DE SANTANA', 'BA'), ('VITÓRIA DA CONQUISTA', 'BA'),
+    ('RECIFE', 'PE'), ('CARUARU', 'PE'), ('PETROLINA', 'PE'),
+    ('FORTALEZA', 'CE'), ('JUAZEIRO DO NORTE', 'CE'),
+    ('JOÃO PESSOA', 'PB'), ('CAMPINA GRANDE', 'PB'),
+    ('NATAL', 'RN'), ('MOSSORÓ', 'RN'),
+    ('MACEIÓ', 'AL'), ('ARACAJU', 'SE'),
+    ('TERESINA', 'PI'), ('SÃO LUÍS', 'MA'), ('IMPERATRIZ', 'MA'),
+    ('BELÉM', 'PA'), ('MARABÁ', 'PA'), ('SANTARÉM', 'PA'),
+    ('MANAUS', 'AM'), ('MACAPÁ', 'AP'), ('BOA VISTA', 'RR'),
+    ('PORTO VELHO', 'RO'), ('JI-PARANÁ', 'RO'), ('RIO BRANCO', 'AC'),
+    ('PALMAS', 'TO'), ('ARAGUAÍNA', 'TO'),
+]
+
+LINHAS_PRODUTO = [
+    'MATERIAL ELÉTRICO', 'HIDRÁULICA', 'FERRAMENTAS MANUAIS', 'FERRAMENTAS ELÉTRICAS',
+    'ILUMINAÇÃO', 'FIXAÇÃO', 'TINTAS E VERNIZES', 'CONSTRUÇÃO CIVIL', 'JARDINAGEM',
+    'SEGURANÇA DO TRABALHO', 'UTILIDADES DOMÉSTICAS', 'HIGIENE E LIMPEZA',
+    'ACESSÓRIOS AUTOMOTIVOS', 'EMBALAGENS PLÁSTICAS', 'PAPELARIA',
+]
+
+SCHEMA = pa.schema([
+    ('Data', pa.timestamp('ns')),
+    ('Cod_Cliente', pa.string()),
+    ('Cod_Segmento_Cliente', pa.string()),
+    ('Municipio_Cliente', pa.string()),
+    ('UF_Cliente', pa.string()),
+    ('Cod_Produto', pa.string()),
+    ('Cod_Familia_Produto', pa.string()),
+    ('Cod_Grupo_Produto', pa.string()),
+    ('Cod_Linha_Produto', pa.string()),
+    ('Des_Linha_Produto', pa.string()),
+    ('Cod_Vendedor', pa.string()),
+    ('Cod_Regiao_Vendedor', pa.string()),
+    ('Qtd_Vendida', pa.int32()),
+    ('Valor_Vendido', pa.float64()),
+])
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    """Probabilidades proporcionais a 1 / rank^exponent (rank 1 = mais frequente)"""
+    weights = 1.0 / np.power(np.arange(1, n + 1, dtype=np.float64), exponent)
+    return weights / weights.sum()
+
+
+def _codes(rng: np.random.Generator, n: int, digits: int) -> np.ndarray:
+    """Códigos numéricos únicos (como texto), sem ordem relacionada à relevância"""
+    # Ao menos 10x mais códigos possíveis que valores, para que pareçam esparsos
+    digits = max(digits, len(str(n)) + 1)
+    low = 10 ** (digits - 1)
+    values = rng.choice(np.arange(low, low * 10), size=n, replace=False)
+    return values.astype(str).astype(object)
+
+
+def _assign(rng: np.random.Generator, n_children: int, n_parents: int) -> np.ndarray:
+    """Atribui cada filho a um pai garantindo que todo pai tenha ao menos um filho"""
+    parents = np.arange(n_children) % n_parents
+    rng.shuffle(parents)
+    return parents
+
+
+def build_dimensions(config: Dict, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """
+    Gera as tabelas de dimensão (clientes, produtos, vendedores) com hierarquias consistentes.
+
+    Args:
+        config: Configuração do dataset sintético (DATA_CONFIG['synthetic'])
+        rng: Gerador aleatório
+
+    Returns:
+        Dicionário de arrays indexados pelo cliente/produto/vendedor
+    """
+    n_clients = config['clients']
+    n_products = config['products']
+    n_sellers = config['sellers']
+
+    municipios = np.array([m for m, _ in MUNICIPIOS], dtype=object)
+    ufs = np.array([uf for _, uf in MUNICIPIOS], dtype=object)
+    city_of_client = rng.choice(len(MUNICIPIOS), size=n_clients, p=zipf_weights(len(MUNICIPIOS), 0.8))
+    segment_codes = np.array([str(i + 1) for i in range(config['segments'])], dtype=object)
+    segment_of_client = rng.choice(config['segments'], size=n_clients, p=zipf_weights(config['segments'], 0.7))
+
+    lines = [
+        LINHAS_PRODUTO[i % len(LINHAS_PRODUTO)] + (f" {i // len(LINHAS_PRODUTO) + 1}" if i >= len(LINHAS_PRODUTO) else '')
+        for i in range(config['lines'])
+    ]
+    family_of_product = _assign(rng, n_products, config['families'])
+    group_of_family = _assign(rng, config['families'], config['groups'])
+    line_of_group = _assign(rng, config['groups'], config['lines'])
+    line_of_product = line_of_group[group_of_family[family_of_product]]
+
+    region_of_seller = _assign(rng, n_sellers, config['seller_regions'])
+    seller_of_client = rng.integers(0, n_sellers, size=n_clients)
+
+    family_codes = _codes(rng, config['families'], 4)
+    group_codes = _codes(rng, config['groups'], 3)
+    line_codes = _codes(rng, config['lines'], 2)
+    seller_codes = _codes(rng, n_sellers, 4)
+    region_codes = _codes(rng, config['seller_regions'], 2)
+
+    return {
+        'client_code': _codes(rng, n_clients, 5),
+        'client_segment': segment_codes[segment_of_client],
+        'client_city': municipios[city_of_client],
+        'client_uf': ufs[city_of_client],
+        'client_seller': seller_codes[seller_of_client],
+        'client_region': region_codes[region_of_seller[seller_of_client]],
+        'client_p': zipf_weights(n_clients, config['client_zipf_exponent']),
+        'product_code': _codes(rng, n_products, 6),
+        'product_family': family_codes[family_of_product],
+        'product_group': group_codes[group_of_family[family_of_product]],
+        'product_line': line_codes[line_of_product],
+        'product_line_name': np.array(lines, dtype=object)[line_of_product],
+        'product_price': np.round(rng.lognormal(mean=3.5, sigma=1.0, size=n_products), 2),
+        'product_p': zipf_weights(n_products, config['product_zipf_exponent']),
+    }
+
+
+def daily_weights(config: Dict) -> pd.DataFrame:
+    """
+    Peso relativo de cada dia: sazonalidade mensal, crescimento anual e fim de semana.
+
+    Returns:
+        DataFrame com as colunas day (datetime64) e p (probabilidade)
+    """
+    days = pd.date_range(config['start_date'], config['end_date'], freq='D')
+    months = days.month.to_numpy()
+    years = (days.year - days.year.min()).to_numpy()
+
+    # Pico entre novembro e dezembro, vale em maio/junho
+    seasonal = 1 + config['seasonality'] * np.cos(2 * np.pi * (months - 11.5) / 12)
+    trend = np.power(1 + config['yearly_growth'], years)
+    weekday = np.where(days.dayofweek.to_numpy() >= 5, 0.3, 1.0)
+
+    weights = seasonal * trend * weekday
+    return pd.DataFrame({'day': days, 'p': weights / weights.sum()})
+
+
+def _generate_chunk(rng: np.random.Generator, dims: Dict, dates: np.ndarray) -> pa.Table:
+    """Gera as linhas de um bloco já com as datas definidas (em ordem cronológica)"""
+    n = len(dates)
+    client = rng.choice(len(dims['client_code']), size=n, p=dims['client_p'])
+    product = rng.choice(len(dims['product_code']), size=n, p=dims['product_p'])
+    quantity = rng.geometric(0.12, size=n).astype(np.int32)
+    value = np.round(quantity * dims['product_price'][product] * rng.lognormal(0.0, 0.1, size=n), 2)
+
+    return pa.table({
+        'Data': pa.array(dates, type=pa.timestamp('ns')),
+        'Cod_Cliente': dims['client_code'][client],
+        'Cod_Segmento_Cliente': dims['client_segment'][client],
+        'Municipio_Cliente': dims['client_city'][client],
+        'UF_Cliente': dims['client_uf'][client],
+        'Cod_Produto': dims['product_code'][product],
+        'Cod_Familia_Produto': dims['product_family'][product],
+        'Cod_Grupo_Produto': dims['product_group'][product],
+        'Cod_Linha_Produto': dims['product_line'][product],
+        'Des_Linha_Produto': dims['product_line_name'][product],
+        'Cod_Vendedor': dims['client_seller'][client],
+        'Cod_Regiao_Vendedor': dims['client_region'][client],
+        'Qtd_Vendida': quantity,
+        'Valor_Vendido': value,
+    }, schema=SCHEMA)
+
+
+def _chunk_day_ranges(counts: np.ndarray, chunk_rows: int) -> List[slice]:
+    """Agrupa dias consecutivos em blocos de aproximadamente chunk_rows linhas"""
+    ranges = []
+    start, accumulated = 0, 0
+    for i, count in enumerate(counts):
+        accumulated += count
+        if accumulated >= chunk_rows:
+            ranges.append(slice(start, i + 1))
+            start, accumulated = i + 1, 0
+    if start < len(counts):
+        ranges.append(slice(start, len(counts)))
+    return ranges
+
+
+def generate_synthetic_dataset(path: str, rows: int, config: Optional[Dict] = None,
+                               partitioned: bool = False, row_group_size: Optional[int] = None) -> Dict:
+    """
+    Grava um dataset sintético com o schema de DadosComercial.
+
+    Args:
+        path: Arquivo parquet de destino (ou diretório, se partitioned=True)
+        rows: Número exato de linhas
+        config: Sobrescreve valores de DATA_CONFIG['synthetic'] (ex: {'clients': 1000, 'seed': 7})
+        partitioned: Grava diretório Hive por ano/mês (mesmo formato de write_partitioned_dataset)
+        row_group_size: Linhas por row group do parquet (None = padrão do pyarrow)
+
+    Returns:
+        Resumo da geração: caminho, linhas, cardinalidades e tempo gasto
+    """
+    config = {**DATA_CONFIG.get('synthetic', {}), **(config or {})}
+    rng = np.random.default_rng(config.get('seed'))
+    start_time = time.time()
+
+    dims = build_dimensions(config, rng)
+    calendar = daily_weights(config)
+    counts = rng.multinomial(rows, calendar['p'].to_numpy())
+    days = calendar['day'].to_numpy()
+
+    target_dir = None
+    if partitioned:
+        target_dir = path
+        path = os.path.join(tempfile.mkdtemp(), 'synthetic.parquet')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    with pq.ParquetWriter(path, SCHEMA) as writer:
+        for day_range in _chunk_day_ranges(counts, config.get('chunk_rows', 1_000_000)):
+            dates = np.repeat(days[day_range], counts[day_range])
+            if len(dates):
+                writer.write_table(_generate_chunk(rng, dims, dates), row_group_size=row_group_size)
+
+    if target_dir is not None:
+        connection = duckdb.connect()
+        try:
+            write_partitioned_dataset(connection, path, target_dir)
+        finally:
+            connection.close()
+            os.remove(path)
+        path = target_dir
+
+    return {
+        'path': path,
+        'rows': rows,
+        'clients': config['clients'],
+        'products': config['products'],
+        'municipios': len(MUNICIPIOS),
+        'start_date': config['start_date'],
+        'end_date': config['end_date'],
+        'seconds': time.time() - start_time
+    }
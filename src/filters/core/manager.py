@@ -7,6 +7,11 @@ focando exclusivamente na extração das cláusulas WHERE do SQL.
 import pandas as pd
 from typing import Dict, List, Set, Optional, Tuple
 import copy
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
+from utils.metrics import timed
 
 
 class JSONFilterManager:
@@ -256,6 +261,7 @@ def reset_json_filter_manager():
     _global_json_filter_manager = None
 
 
+@timed("filter_extraction_seconds", "Extração de filtros a partir das queries SQL do turno")
 def processar_filtros_apenas_sql(sql_queries: List[str], contexto_atual: Dict,
                                 df_dataset: pd.DataFrame) -> Tuple[Dict, List[str]]:
     """
@@ -17,6 +17,10 @@ def gerar_resumo_numerico(df: pd.DataFrame, eixo_x: str, eixo_y: str, tipo_grafi
     Esta função analisa o DataFrame e extrai estatísticas relevantes
     que servirão como base analítica para a LLM gerar insights.
 
+    As métricas são calculadas sobre arrays NumPy contíguos extraídos uma única
+    vez do DataFrame (sem ordenar ou copiar o DataFrame inteiro), para que o custo
+    continue baixo em resultados com dezenas de milhares de linhas.
+
     Args:
         df: DataFrame com os dados do gráfico
         eixo_x: Nome da coluna do eixo X (labels/categorias)
@@ -33,31 +37,67 @@ def gerar_resumo_numerico(df: pd.DataFrame, eixo_x: str, eixo_y: str, tipo_grafi
         >>> resumo['concentracao_top3_pct']
         42.0
     """
-    resumo = {
-        "tipo_grafico": tipo_grafico,
-        "num_categorias": len(df),
-        "total_geral": float(df[eixo_y].sum()),
-        "media": float(df[eixo_y].mean()),
-        "mediana": float(df[eixo_y].median())
-    }
+    valores = _valores_contiguos(df, eixo_y)
 
-    # Métricas específicas por tipo de gráfico
-    if tipo_grafico == "horizontal_bar":
-        resumo.update(_analisar_ranking(df, eixo_x, eixo_y, total_universo=total_universo))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resumo = {
+            "tipo_grafico": tipo_grafico,
+            "num_categorias": len(df),
+            "total_geral": float(np.nansum(valores)),
+            "media": float(np.nanmean(valores)) if len(valores) else float('nan'),
+            "mediana": float(np.nanmedian(valores)) if len(valores) else float('nan')
+        }
 
-    elif tipo_grafico == "vertical_bar":
-        resumo.update(_analisar_comparacao(df, eixo_x, eixo_y))
+        # Métricas específicas por tipo de gráfico
+        if tipo_grafico == "horizontal_bar":
+            resumo.update(_analisar_ranking(df, eixo_x, eixo_y, total_universo=total_universo, valores=valores))
 
-    elif tipo_grafico in ["grouped_vertical_bar", "stacked_bar"]:
-        resumo.update(_analisar_comparacao_agrupada(df, eixo_x, eixo_y))
+        elif tipo_grafico == "vertical_bar":
+            resumo.update(_analisar_comparacao(df, eixo_x, eixo_y, valores=valores))
 
-    elif tipo_grafico == "line":
-        resumo.update(_analisar_temporal(df, eixo_x, eixo_y))
+        elif tipo_grafico in ["grouped_vertical_bar", "stacked_bar"]:
+            resumo.update(_analisar_comparacao_agrupada(df, eixo_x, eixo_y, valores=valores))
+
+        elif tipo_grafico == "line":
+            resumo.update(_analisar_temporal(df, eixo_x, eixo_y, valores=valores))
 
     return resumo
 
 
-def _analisar_ranking(df: pd.DataFrame, label_col: str, value_col: str, total_universo: float = None) -> Dict[str, Any]:
+def _valores_contiguos(df: pd.DataFrame, value_col: str) -> np.ndarray:
+    """Coluna de valores como array float64 contíguo (não numéricos viram NaN)"""
+    serie = df[value_col]
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = pd.to_numeric(serie, errors='coerce')
+    return np.ascontiguousarray(serie.to_numpy(dtype=float, na_value=np.nan))
+
+
+def _posicoes_validas(valores: np.ndarray) -> np.ndarray:
+    """Posições dos valores não nulos (NaN é ignorado como no pandas)"""
+    validos = ~np.isnan(valores)
+    return np.arange(len(valores)) if validos.all() else np.flatnonzero(validos)
+
+
+def _top_posicoes(valores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Posições dos k maiores valores em ordem decrescente, sem ordenar o array inteiro.
+    Empates seguem a ordem original das linhas.
+    """
+    n = len(valores)
+    if k >= n:
+        candidatos = np.arange(n)
+    else:
+        candidatos = np.argpartition(-valores, k - 1)[:k]
+    return candidatos[np.lexsort((candidatos, -valores[candidatos]))]
+
+
+def _posicao_minimo(valores: np.ndarray) -> int:
+    """Posição do menor valor (a última entre empates, como no fim de um ranking decrescente)"""
+    return len(valores) - 1 - int(np.argmin(valores[::-1]))
+
+
+def _analisar_ranking(df: pd.DataFrame, label_col: str, value_col: str, total_universo: float = None,
+                      valores: np.ndarray = None) -> Dict[str, Any]:
     """
     Analisa dados de ranking (horizontal bar charts).
 
@@ -72,39 +112,51 @@ def _analisar_ranking(df: pd.DataFrame, label_col: str, value_col: str, total_un
         label_col: Nome da coluna de labels
         value_col: Nome da coluna de valores
         total_universo: Total do universo completo filtrado (para cálculo correto de concentração)
+        valores: Valores já extraídos como array contíguo (opcional)
     """
-    df_sorted = df.sort_values(value_col, ascending=False).reset_index(drop=True)
-    
+    if valores is None:
+        valores = _valores_contiguos(df, value_col)
+    posicoes = _posicoes_validas(valores)
+    if len(posicoes) == 0:
+        return {}
+
+    labels = df[label_col]
+    valores_validos = valores[posicoes]
+    n = len(valores_validos)
+
+    # Apenas os 5 primeiros do ranking precisam de ordem; o mínimo vem de um argmin
+    top = _top_posicoes(valores_validos, 5)
+    top_valores = valores_validos[top]
+    posicao_min = _posicao_minimo(valores_validos)
+
     # CORREÇÃO CRÍTICA: Usar total_universo se disponível, senão usar total do df (comportamento legado)
     # O total_universo representa a soma de TODOS os elementos com os filtros ativos,
     # não apenas a soma do Top N
-    total = total_universo if total_universo is not None else df_sorted[value_col].sum()
-    total_topn = df_sorted[value_col].sum()
+    total_topn = valores_validos.sum()
+    total = total_universo if total_universo is not None else total_topn
 
     metricas = {
-        "top_categorias": df_sorted[label_col].head(3).tolist(),
-        "valor_max": float(df_sorted[value_col].iloc[0]),
-        "valor_min": float(df_sorted[value_col].iloc[-1]),
-        "categoria_max": str(df_sorted[label_col].iloc[0]),
-        "categoria_min": str(df_sorted[label_col].iloc[-1]),
+        "top_categorias": labels.iloc[posicoes[top[:3]]].tolist(),
+        "valor_max": float(top_valores[0]),
+        "valor_min": float(valores_validos[posicao_min]),
+        "categoria_max": str(labels.iloc[posicoes[top[0]]]),
+        "categoria_min": str(labels.iloc[posicoes[posicao_min]]),
         "total_topn": float(total_topn),  # Soma do Top N
         "total_universo": float(total)    # Soma do universo completo
     }
 
     # Concentração CORRIGIDA - agora calcula sobre o universo completo
-    if len(df_sorted) >= 3:
-        top3_sum = df_sorted[value_col].head(3).sum()
-        metricas["concentracao_top3_pct"] = round((top3_sum / total) * 100, 1)
+    if n >= 3:
+        metricas["concentracao_top3_pct"] = round((top_valores[:3].sum() / total) * 100, 1)
 
-    if len(df_sorted) >= 5:
-        top5_sum = df_sorted[value_col].head(5).sum()
-        metricas["concentracao_top5_pct"] = round((top5_sum / total) * 100, 1)
+    if n >= 5:
+        metricas["concentracao_top5_pct"] = round((top_valores[:5].sum() / total) * 100, 1)
 
     # Gaps entre posições
-    if len(df_sorted) >= 2:
-        gap_1_2 = df_sorted[value_col].iloc[0] - df_sorted[value_col].iloc[1]
+    if n >= 2:
+        gap_1_2 = top_valores[0] - top_valores[1]
         metricas["gap_1_2"] = float(gap_1_2)
-        metricas["gap_1_2_pct"] = round((gap_1_2 / df_sorted[value_col].iloc[1]) * 100, 1)
+        metricas["gap_1_2_pct"] = round((gap_1_2 / top_valores[1]) * 100, 1)
 
     # Diferença max-min
     diferenca = metricas["valor_max"] - metricas["valor_min"]
@@ -112,13 +164,13 @@ def _analisar_ranking(df: pd.DataFrame, label_col: str, value_col: str, total_un
     metricas["amplitude_relativa"] = round((diferenca / metricas["valor_min"]) * 100, 1) if metricas["valor_min"] > 0 else None
 
     # Desvio do líder em relação à média
-    media = df_sorted[value_col].mean()
+    media = valores_validos.mean()
     desvio_lider = metricas["valor_max"] - media
     metricas["desvio_lider_media_pct"] = round((desvio_lider / media) * 100, 1)
 
     # Múltiplo do líder vs segundo
-    if len(df_sorted) >= 2 and df_sorted[value_col].iloc[1] > 0:
-        metricas["multiplo_1_vs_2"] = round(df_sorted[value_col].iloc[0] / df_sorted[value_col].iloc[1], 2)
+    if n >= 2 and top_valores[1] > 0:
+        metricas["multiplo_1_vs_2"] = round(top_valores[0] / top_valores[1], 2)
 
     # Contribuição do líder ao total
     metricas["contribuicao_lider_pct"] = round((metricas["valor_max"] / total) * 100, 1)
@@ -126,7 +178,7 @@ def _analisar_ranking(df: pd.DataFrame, label_col: str, value_col: str, total_un
     return metricas
 
 
-def _analisar_comparacao(df: pd.DataFrame, label_col: str, value_col: str) -> Dict[str, Any]:
+def _analisar_comparacao(df: pd.DataFrame, label_col: str, value_col: str, valores: np.ndarray = None) -> Dict[str, Any]:
     """
     Analisa comparações diretas (vertical bar charts com 2-5 itens).
 
@@ -135,13 +187,22 @@ def _analisar_comparacao(df: pd.DataFrame, label_col: str, value_col: str) -> Di
     - Categoria dominante
     - Variação relativa
     """
-    df_sorted = df.sort_values(value_col, ascending=False).reset_index(drop=True)
+    if valores is None:
+        valores = _valores_contiguos(df, value_col)
+    posicoes = _posicoes_validas(valores)
+    if len(posicoes) == 0:
+        return {}
+
+    labels = df[label_col]
+    valores_validos = valores[posicoes]
+    posicao_max = int(np.argmax(valores_validos))
+    posicao_min = _posicao_minimo(valores_validos)
 
     metricas = {
-        "categoria_maior": str(df_sorted[label_col].iloc[0]),
-        "categoria_menor": str(df_sorted[label_col].iloc[-1]),
-        "valor_maior": float(df_sorted[value_col].iloc[0]),
-        "valor_menor": float(df_sorted[value_col].iloc[-1])
+        "categoria_maior": str(labels.iloc[posicoes[posicao_max]]),
+        "categoria_menor": str(labels.iloc[posicoes[posicao_min]]),
+        "valor_maior": float(valores_validos[posicao_max]),
+        "valor_menor": float(valores_validos[posicao_min])
     }
 
     # Diferença percentual
@@ -150,7 +211,7 @@ def _analisar_comparacao(df: pd.DataFrame, label_col: str, value_col: str) -> Di
         metricas["diferenca_pct"] = round(diferenca_pct, 1)
 
     # Diferença de pontos percentuais (se houver total)
-    total = df_sorted[value_col].sum()
+    total = valores_validos.sum()
     pct_maior = (metricas["valor_maior"] / total) * 100
     pct_menor = (metricas["valor_menor"] / total) * 100
     metricas["diferenca_pontos_percentuais"] = round(pct_maior - pct_menor, 1)
@@ -160,13 +221,13 @@ def _analisar_comparacao(df: pd.DataFrame, label_col: str, value_col: str) -> Di
     metricas["contribuicao_menor_pct"] = round(pct_menor, 1)
 
     # Se houver 2 itens, calcular proporção
-    if len(df_sorted) == 2:
+    if len(valores_validos) == 2:
         metricas["proporcao_relativa"] = f"{round(pct_maior, 0)}% vs {round(pct_menor, 0)}%"
 
     return metricas
 
 
-def _analisar_comparacao_agrupada(df: pd.DataFrame, group_col: str, value_col: str) -> Dict[str, Any]:
+def _analisar_comparacao_agrupada(df: pd.DataFrame, group_col: str, value_col: str, valores: np.ndarray = None) -> Dict[str, Any]:
     """
     Analisa comparações agrupadas (grouped vertical bar charts).
 
@@ -175,10 +236,17 @@ def _analisar_comparacao_agrupada(df: pd.DataFrame, group_col: str, value_col: s
     """
     # Fallback para análise de comparação simples
     # (a estrutura agrupada seria melhor analisada com acesso a 'category' também)
-    return _analisar_comparacao(df, group_col, value_col)
+    return _analisar_comparacao(df, group_col, value_col, valores=valores)
 
 
-def _analisar_temporal(df: pd.DataFrame, date_col: str, value_col: str) -> Dict[str, Any]:
+def _ordem_temporal(datas: pd.Series) -> np.ndarray:
+    """Posições das linhas em ordem cronológica (dispensa ordenação se já estiver ordenado)"""
+    if datas.is_monotonic_increasing:
+        return np.arange(len(datas))
+    return datas.reset_index(drop=True).sort_values(kind='stable').index.to_numpy()
+
+
+def _analisar_temporal(df: pd.DataFrame, date_col: str, value_col: str, valores: np.ndarray = None) -> Dict[str, Any]:
     """
     Analisa séries temporais (line charts).
 
@@ -188,12 +256,20 @@ def _analisar_temporal(df: pd.DataFrame, date_col: str, value_col: str) -> Dict[
     - Picos e vales
     - Variação período a período
     """
-    df_sorted = df.sort_values(date_col).reset_index(drop=True)
+    if valores is None:
+        valores = _valores_contiguos(df, value_col)
+    if len(valores) == 0:
+        return {}
+
+    datas = df[date_col]
+    ordem = _ordem_temporal(datas)
+    serie = valores[ordem]
+    n = len(serie)
 
     metricas = {
-        "num_periodos": len(df_sorted),
-        "valor_inicial": float(df_sorted[value_col].iloc[0]),
-        "valor_final": float(df_sorted[value_col].iloc[-1])
+        "num_periodos": n,
+        "valor_inicial": float(serie[0]),
+        "valor_final": float(serie[-1])
     }
 
     # Tendência
@@ -210,31 +286,34 @@ def _analisar_temporal(df: pd.DataFrame, date_col: str, value_col: str) -> Dict[
         metricas["taxa_crescimento_pct"] = round(taxa_crescimento, 1)
 
     # Picos e vales
-    idx_max = df_sorted[value_col].idxmax()
-    idx_min = df_sorted[value_col].idxmin()
+    if not np.isnan(serie).all():
+        idx_max = int(np.nanargmax(serie))
+        idx_min = int(np.nanargmin(serie))
 
-    metricas["pico_valor"] = float(df_sorted.loc[idx_max, value_col])
-    metricas["pico_periodo"] = str(df_sorted.loc[idx_max, date_col])
-    metricas["vale_valor"] = float(df_sorted.loc[idx_min, value_col])
-    metricas["vale_periodo"] = str(df_sorted.loc[idx_min, date_col])
+        metricas["pico_valor"] = float(serie[idx_max])
+        metricas["pico_periodo"] = str(datas.iloc[ordem[idx_max]])
+        metricas["vale_valor"] = float(serie[idx_min])
+        metricas["vale_periodo"] = str(datas.iloc[ordem[idx_min]])
 
-    # Amplitude (diferença entre pico e vale)
-    metricas["amplitude"] = float(metricas["pico_valor"] - metricas["vale_valor"])
-    if metricas["vale_valor"] > 0:
-        metricas["amplitude_pct"] = round((metricas["amplitude"] / metricas["vale_valor"]) * 100, 1)
+        # Amplitude (diferença entre pico e vale)
+        metricas["amplitude"] = float(metricas["pico_valor"] - metricas["vale_valor"])
+        if metricas["vale_valor"] > 0:
+            metricas["amplitude_pct"] = round((metricas["amplitude"] / metricas["vale_valor"]) * 100, 1)
 
     # Variação média período a período
-    if len(df_sorted) > 1:
-        variacoes = df_sorted[value_col].pct_change().dropna()
+    if n > 1:
+        variacoes = serie[1:] / serie[:-1] - 1
+        variacoes = variacoes[~np.isnan(variacoes)]
         if len(variacoes) > 0:
             metricas["variacao_media_pct"] = round(variacoes.mean() * 100, 1)
-            metricas["volatilidade"] = round(variacoes.std() * 100, 1)
+            volatilidade = variacoes.std(ddof=1) if len(variacoes) > 1 else np.float64(np.nan)
+            metricas["volatilidade"] = round(volatilidade * 100, 1)
 
     # Detectar aceleração (segundo semestre vs primeiro semestre)
-    if len(df_sorted) >= 6:
-        metade = len(df_sorted) // 2
-        media_primeira_metade = df_sorted[value_col].iloc[:metade].mean()
-        media_segunda_metade = df_sorted[value_col].iloc[metade:].mean()
+    if n >= 6:
+        metade = n // 2
+        media_primeira_metade = np.nanmean(serie[:metade])
+        media_segunda_metade = np.nanmean(serie[metade:])
 
         if media_primeira_metade > 0:
             aceleracao = ((media_segunda_metade - media_primeira_metade) / media_primeira_metade) * 100
@@ -0,0 +1,170 @@
+"""
+Execução do resumo numérico fora do caminho crítico das ferramentas de gráfico.
+
+O resumo numérico e o prompt de insights são iniciados em uma thread assim que
+os dados do gráfico existem, e seguem em cálculo enquanto a ferramenta monta o
+gráfico e seus metadados. A resposta da ferramenta leva um marcador
+(PendingInsights) que o hook de ferramenta do agno (PendingInsights.tool_hook)
+troca pelo prompt de insights ao fim da chamada, antes de o resultado voltar ao
+modelo. A espera tem tempo máximo: se estourar, o gráfico segue sem o resumo.
+Marcadores que não passaram pelo hook são removidos da resposta do turno
+(strip_markers), para nunca chegarem ao histórico.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import VISUALIZATION_CONFIG
+from insights.numeric_analyzer import gerar_resumo_numerico, gerar_prompt_insights
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Executor compartilhado do processo (criado sob demanda)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=VISUALIZATION_CONFIG.get("numeric_summary_workers", 2),
+                thread_name_prefix="numeric_summary"
+            )
+        return _executor
+
+
+def gerar_resumo_e_prompt(df: pd.DataFrame, eixo_x: str, eixo_y: str, tipo_grafico: str,
+                          total_universo: float = None, max_insights: int = 5) -> Tuple[Dict[str, Any], str]:
+    """Resumo numérico e prompt de insights (executado na thread de segundo plano)"""
+    resumo = gerar_resumo_numerico(df, eixo_x, eixo_y, tipo_grafico, total_universo=total_universo)
+    return resumo, gerar_prompt_insights(resumo, tipo_grafico, max_insights=max_insights)
+
+
+def iniciar_resumo(df: pd.DataFrame, eixo_x: str, eixo_y: str, tipo_grafico: str,
+                   total_universo: float = None) -> Future:
+    """
+    Agenda o resumo numérico e o prompt de insights em segundo plano.
+
+    Args:
+        df: DataFrame completo do gráfico (não deve ser alterado depois)
+        eixo_x: Coluna de labels/datas
+        eixo_y: Coluna de valores
+        tipo_grafico: Tipo esperado pelo numeric_analyzer
+        total_universo: Total do universo filtrado (Top N)
+
+    Returns:
+        Future com a tupla (resumo_numerico, prompt_insights)
+    """
+    return _get_executor().submit(gerar_resumo_e_prompt, df, eixo_x, eixo_y, tipo_grafico, total_universo)
+
+
+def aguardar_resumo(future: Future, timeout: float = None) -> Optional[Tuple[Dict[str, Any], str]]:
+    """
+    Espera o resumo até o tempo máximo configurado.
+
+    Returns:
+        Tupla (resumo_numerico, prompt_insights) ou None se o tempo estourar.
+        Erros do cálculo são propagados.
+    """
+    if timeout is None:
+        timeout = VISUALIZATION_CONFIG.get("numeric_summary_timeout_seconds", 3.0)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        future.cancel()  # Ainda na fila: não vale mais a pena calcular
+        return None
+
+
+class PendingInsights:
+    """
+    Prompts de insights ainda em cálculo, referenciados por marcadores nas respostas das ferramentas.
+
+    A ferramenta registra uma função que aguarda o resumo (defer) e devolve o
+    marcador no texto da resposta; o tool_hook troca os marcadores do resultado
+    pelo prompt (ou os remove, sem resumo) antes de o agno entregá-lo ao modelo.
+    """
+
+    MARKER = "[[insights:{}]]"
+    MARKER_PATTERN = re.compile(r"(?:\n\n)?\[\[insights:\d+\]\]")
+
+    def __init__(self):
+        self._pending: "OrderedDict[str, Callable[[], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counter = 0
+
+    def defer(self, await_prompt: Callable[[], str]) -> str:
+        """Registra a espera do prompt e devolve o marcador a incluir na resposta da ferramenta"""
+        with self._lock:
+            self._counter += 1
+            marker = self.MARKER.format(self._counter)
+            self._pending[marker] = await_prompt
+        return marker
+
+    def resolve_text(self, text):
+        """Troca os marcadores pendentes do texto pelos prompts (aguardando os resumos)"""
+        if not isinstance(text, str) or "[[insights:" not in text:
+            return text
+        with self._lock:
+            found = [(marker, self._pending.pop(marker)) for marker in list(self._pending) if marker in text]
+        for marker, await_prompt in found:
+            try:
+                prompt = await_prompt() or ""
+            except Exception:
+                prompt = ""
+            if prompt:
+                text = text.replace(marker, prompt)
+            else:
+                text = text.replace(f"\n\n{marker}", "").replace(marker, "")
+        return text
+
+    def tool_hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        """Hook de ferramenta do agno: resolve os marcadores do resultado da chamada"""
+        return self.resolve_text(function_call(**arguments))
+
+    @classmethod
+    def strip_markers(cls, text):
+        """Remove marcadores que não foram resolvidos (ex: ferramenta chamada fora do agente)"""
+        if not isinstance(text, str) or "[[insights:" not in text:
+            return text
+        return cls.MARKER_PATTERN.sub("", text)
+
+    @classmethod
+    def strip_messages(cls, messages) -> int:
+        """
+        Remove marcadores não resolvidos do conteúdo das mensagens (objetos com .content ou dicts).
+
+        Returns:
+            Quantidade de mensagens alteradas
+        """
+        changed = 0
+        for message in messages or []:
+            is_dict = isinstance(message, dict)
+            content = message.get('content') if is_dict else getattr(message, 'content', None)
+            stripped = cls.strip_markers(content)
+            if stripped is not content:
+                if is_dict:
+                    message['content'] = stripped
+                else:
+                    message.content = stripped
+                changed += 1
+        return changed
+
+    def discard(self):
+        """Esquece os resumos pendentes (nova pergunta ou execução interrompida)"""
+        with self._lock:
+            self._pending.clear()
+
+    def __len__(self):
+        return len(self._pending)
+
@@ -279,9 +279,9 @@ VISUALIZATION_RULES = """
 
 Quando executar **qualquer query SQL que retorna rankings, evoluções temporais ou comparações**:
 
-1. **PASSO 1**: Executar query SQL para extrair dados
-2. **PASSO 2**: CHAMAR IMEDIATAMENTE `create_chart_from_last_query()` com título e tipo adequados
-3. **PASSO 3**: Gerar resposta completa seguindo a ESTRUTURA OBRIGATÓRIA de 5 elementos
+1. **PASSO 1**: CHAMAR `query_and_chart()` com a query, título e tipo adequados (executa e cria o gráfico em uma chamada)
+   - Com queries intermediárias: `run_query` e, em seguida, `create_chart_from_last_query()`
+2. **PASSO 2**: Gerar resposta completa seguindo a ESTRUTURA OBRIGATÓRIA de 5 elementos
    - NUNCA gere APENAS insights
    - SEMPRE inclua: Título + Contexto + Insights + Próximos Passos
 
@@ -298,7 +298,7 @@ Quando executar **qualquer query SQL que retorna rankings, evoluções temporais
 
 🚨 **SEMPRE faça quando há visualização**:
 - ✅ Gerar contexto breve (1-2 frases) sobre o que foi analisado
-- ✅ Inserir gráfico automaticamente (via `create_chart_from_last_query`)
+- ✅ Inserir gráfico automaticamente (via `query_and_chart` ou `create_chart_from_last_query`)
 - ✅ Fornecer insights interpretativos (concentração, tendências, oportunidades)
 - ✅ Sugerir próximos passos analíticos
 - ✅ Usar estrutura: **Título** → Contexto → [GRÁFICO AUTO] → Insights → Próximos Passos
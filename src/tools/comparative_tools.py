@@ -0,0 +1,134 @@
+"""
+ComparativeTools - Análises comparativas executadas diretamente em SQL
+Responde perguntas de crescimento, variação e participação com uma única chamada de ferramenta.
+"""
+
+from agno.tools import Toolkit
+from typing import Any, Dict, Optional
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from comparative_calculator import ComparativeCalculator
+from utils.query_results import format_result_text
+from utils.tracing import get_tracer
+
+
+class ComparativeTools(Toolkit):
+    """
+    Toolkit que gera e executa queries comparativas parametrizadas.
+
+    Em vez de instruções para o LLM escrever a SQL de comparação (várias idas e
+    voltas), a ferramenta detecta os requisitos da pergunta, monta a query e
+    devolve o resultado pronto, registrado no DuckDbTools para gráficos.
+    """
+
+    def __init__(self, debug_info_ref=None):
+        """
+        Inicializa ComparativeTools.
+
+        Args:
+            debug_info_ref: Referência ao agent (acesso às ferramentas e ao debug_info)
+        """
+        super().__init__(name="comparative_tools")
+        self.debug_info_ref = debug_info_ref
+        self.duckdb_tool_ref = None  # Referência para DuckDbTools (conexão e resultados)
+        self.calculator = ComparativeCalculator()
+        self.register(self.compare_periods)
+
+    def compare_periods(
+        self,
+        question: str,
+        analysis: str = "auto",
+        dimension: str = None,
+        metric: str = None,
+        period_a_start: str = None,
+        period_a_end: str = None,
+        period_b_start: str = None,
+        period_b_end: str = None,
+        filters: Optional[Dict[str, Any]] = None,
+        top_n: int = 10
+    ) -> str:
+        """
+        Executa uma análise comparativa completa em uma única chamada.
+
+        Args:
+            question: Pergunta do usuário (usada para detectar tipo, métrica e dimensão)
+            analysis: "auto", "period_comparison" (total ou por dimensão entre dois períodos),
+                "growth_ranking" (quem mais cresceu) ou "share_shift" (mudança de participação)
+            dimension: Coluna de dimensão (ex: "Cod_Cliente", "UF_Cliente", "Cod_Produto")
+            metric: "revenue" (Valor_Vendido), "quantity" (Qtd_Vendida) ou "clients" (clientes únicos)
+            period_a_start: Início do período base (YYYY-MM-DD)
+            period_a_end: Fim EXCLUSIVO do período base (YYYY-MM-DD)
+            period_b_start: Início do período comparado (YYYY-MM-DD)
+            period_b_end: Fim EXCLUSIVO do período comparado (YYYY-MM-DD)
+            filters: Filtros por coluna, ex: {"UF_Cliente": "sc"} ou {"UF_Cliente": ["sc", "pr"]}
+            top_n: Número de linhas em rankings e mudanças de participação
+
+        Returns:
+            Resultado tabular com períodos comparados e result_id para gráficos
+
+        Examples:
+            >>> compare_periods(
+            ...     question="quais clientes mais cresceram em vendas?",
+            ...     period_a_start="2015-01-01", period_a_end="2015-02-01",
+            ...     period_b_start="2015-02-01", period_b_end="2015-03-01"
+            ... )
+        """
+        if self.duckdb_tool_ref is None:
+            if self.debug_info_ref and hasattr(self.debug_info_ref, 'tools'):
+                for tool in self.debug_info_ref.tools:
+                    if hasattr(tool, 'get_result'):
+                        self.duckdb_tool_ref = tool
+                        break
+
+        if self.duckdb_tool_ref is None:
+            return "❌ Erro: Não foi possível acessar o banco de dados"
+
+        filters = filters or {}
+        requirements = self.calculator.detect_calculation_requirements(question or "", filters)
+        spec = self.calculator.plan_comparative_analysis(
+            requirements, filters, dimension=dimension, metric=metric,
+            analysis=None if analysis in (None, "", "auto") else analysis, top_n=top_n
+        )
+
+        periods = None
+        if all([period_a_start, period_a_end, period_b_start, period_b_end]):
+            periods = ((period_a_start, period_a_end), (period_b_start, period_b_end))
+
+        with get_tracer().span("sql.execute", analysis=spec.get('analysis'), dimension=spec.get('dimension')) as span:
+            try:
+                execution = self.calculator.run_comparative_analysis(self.duckdb_tool_ref.connection, spec, periods=periods)
+            except Exception as e:
+                span.record_error(e)
+                return f"❌ Erro na análise comparativa: {str(e)}"
+            span.set_attribute("query", execution['sql'])
+            span.set_attribute("rows", execution['table'].num_rows)
+
+        table = execution['table']
+        (a_start, a_end), (b_start, b_end) = execution['periods']
+
+        handle = None
+        if table.num_rows > 0:
+            handle = self.duckdb_tool_ref.results.add(execution['sql'], table)
+
+        if self.debug_info_ref is not None and hasattr(self.debug_info_ref, 'debug_info'):
+            if 'comparative_analyses' not in self.debug_info_ref.debug_info:
+                self.debug_info_ref.debug_info['comparative_analyses'] = []
+            self.debug_info_ref.debug_info['comparative_analyses'].append({
+                'question': question,
+                'spec': {k: v for k, v in spec.items() if k != 'temporal_range'},
+                'sql': execution['sql'],
+                'params': execution['params'],
+                'rows': table.num_rows,
+                'result_id': handle.result_id if handle else None
+            })
+
+        header = (
+            f"📊 Análise comparativa ({spec['analysis']}, métrica: {spec['metric']})\n"
+            f"Período A: {a_start} até {a_end} (exclusivo) | Período B: {b_start} até {b_end} (exclusivo)"
+        )
+        if handle is None:
+            return f"{header}\n\nNenhum dado encontrado para os períodos e filtros informados."
+
+        return f"{header}\n\n{format_result_text(table)}\n\n[result_id: {handle.result_id}]"
@@ -7,8 +7,11 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 # from parsers.sql_context_parser import extract_where_clause_context  # Removido - agora usando sistema JSON
-import pandas as pd
 import re
+from utils.universe_total import add_universe_total, UNIVERSE_TOTAL_COLUMN
+from utils.query_results import QueryResultStore, format_result_text, relation_to_arrow
+from utils.tracing import get_tracer
+from utils.metrics import get_metrics_registry
 
 
 class DebugDuckDbTools(DuckDbTools):
@@ -20,8 +23,9 @@ class DebugDuckDbTools(DuckDbTools):
     def __init__(self, debug_info_ref=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.debug_info_ref = debug_info_ref
-        self.last_result_df = None  # Armazenar último DataFrame resultado
-        self.last_query = None  # Armazenar última query SQL executada (para mapeamento de aliases)
+        self.results = QueryResultStore()  # Resultados Arrow da pergunta atual, por result_id
+        self.rollup_catalog = None  # Catálogo de rollups pré-agregados (configurado na inicialização)
+        self.partition_pruner = None  # Poda de partições quando dados_comerciais é view particionada
 
         # Cache inteligente de metadados para evitar queries redundantes
         self.metadata_cache = {
@@ -29,10 +33,30 @@ class DebugDuckDbTools(DuckDbTools):
             'table_schemas': {},    # Schema de tabelas já consultadas
             'basic_stats': {},      # Estatísticas básicas já calculadas
             'initialization_done': False,  # Se a inicialização foi concluída
-            'recent_queries': {},   # Cache de queries recentes para evitar duplicação
-            'last_query_hash': None  # Hash da última query executada
         }
 
+    @property
+    def last_result_df(self):
+        """DataFrame do resultado mais recente (compatibilidade com o fallback do app)"""
+        latest = self.results.latest()
+        return latest.df if latest is not None else None
+
+    @property
+    def last_query(self):
+        """Query que gerou o resultado mais recente (para mapeamento de aliases)"""
+        latest = self.results.latest()
+        return latest.query if latest is not None else None
+
+    @property
+    def last_universe_total(self):
+        """Total do universo filtrado do resultado mais recente (queries Top N)"""
+        latest = self.results.latest()
+        return latest.universe_total if latest is not None else None
+
+    def get_result(self, result_id: str = None):
+        """Handle do resultado pelo result_id (ou o mais recente quando omitido)"""
+        return self.results.get(result_id)
+
     def _normalize_query_strings(self, query: str) -> str:
         """Aplica normalização LOWER() automaticamente a todas as comparações de strings na query"""
 
@@ -84,6 +108,55 @@ class DebugDuckDbTools(DuckDbTools):
 
         return normalized_query
 
+    def _rewrite_to_rollup(self, query: str) -> str:
+        """Reescreve a query para o menor rollup pré-agregado capaz de respondê-la"""
+        if self.rollup_catalog is None:
+            return query
+
+        try:
+            rewritten_query, rollup = self.rollup_catalog.rewrite(query)
+        except Exception:
+            return query
+
+        if rollup is None:
+            return query
+
+        # Registrar reescrita para exibição no debug
+        if self.debug_info_ref and hasattr(self.debug_info_ref, "debug_info"):
+            if "rollup_rewrites" not in self.debug_info_ref.debug_info:
+                self.debug_info_ref.debug_info["rollup_rewrites"] = []
+            self.debug_info_ref.debug_info["rollup_rewrites"].append({
+                "original_query": query.strip(),
+                "rewritten_query": rewritten_query.strip(),
+                "rollup": rollup['name'],
+                "rollup_rows": rollup['row_count']
+            })
+
+        return rewritten_query
+
+    def _apply_partition_pruning(self, query: str) -> str:
+        """Restringe a leitura da view particionada às partições do período filtrado"""
+        if self.partition_pruner is None:
+            return query
+
+        try:
+            pruned_query, pruning = self.partition_pruner.prune(query)
+        except Exception:
+            return query
+
+        if pruning is None:
+            return query
+
+        if self.debug_info_ref and hasattr(self.debug_info_ref, "debug_info"):
+            if "partition_pruning" not in self.debug_info_ref.debug_info:
+                self.debug_info_ref.debug_info["partition_pruning"] = []
+            self.debug_info_ref.debug_info["partition_pruning"].append({
+                "query": query.strip(),
+                "partition_filter": pruning['partition_filter']
+            })
+
+        return pruned_query
+
     def _is_redundant_metadata_query(self, query: str) -> tuple[bool, str]:
         """
         Detecta se a query é redundante baseada no cache de metadados
@@ -147,8 +220,12 @@ class DebugDuckDbTools(DuckDbTools):
     def run_query(self, query: str) -> str:
         """Override do método run_query com normalização automática de strings e captura de contexto"""
 
+        metrics = get_metrics_registry()
+        cache_lookups = metrics.counter("duckdb_cache_lookups_total", "Consultas aos caches do DebugDuckDbTools")
+
         # VERIFICAR CACHE PRIMEIRO para evitar queries redundantes
         is_redundant, cached_result = self._is_redundant_metadata_query(query)
+        cache_lookups.inc(cache="metadata", result="hit" if is_redundant else "miss")
         if is_redundant:
             # Log da otimização
             if self.debug_info_ref and hasattr(self.debug_info_ref, "debug_info"):
@@ -161,51 +238,39 @@ class DebugDuckDbTools(DuckDbTools):
                 })
             return cached_result
 
-        # VERIFICAR QUERY DUPLICADA recentemente
-        query_hash = hash(query.strip().lower())
-        if query_hash == self.metadata_cache['last_query_hash']:
-            # Query idêntica executada recentemente
-            if query_hash in self.metadata_cache['recent_queries']:
-                if self.debug_info_ref and hasattr(self.debug_info_ref, "debug_info"):
-                    if "duplicate_queries_avoided" not in self.debug_info_ref.debug_info:
-                        self.debug_info_ref.debug_info["duplicate_queries_avoided"] = []
-                    self.debug_info_ref.debug_info["duplicate_queries_avoided"].append(query.strip())
-                return self.metadata_cache['recent_queries'][query_hash]
+        # VERIFICAR QUERY DUPLICADA recentemente (apenas enquanto o handle do resultado existir)
+        recalled = self.results.recall(query)
+        cache_lookups.inc(cache="recent_queries", result="hit" if recalled is not None else "miss")
+        if recalled is not None:
+            cached_text, handle = recalled
+            if self.debug_info_ref and hasattr(self.debug_info_ref, "debug_info"):
+                if "duplicate_queries_avoided" not in self.debug_info_ref.debug_info:
+                    self.debug_info_ref.debug_info["duplicate_queries_avoided"] = []
+                self.debug_info_ref.debug_info["duplicate_queries_avoided"].append(query.strip())
+            if handle is not None:
+                return f"{cached_text}\n\n[result_id: {handle.result_id}]"
+            return cached_text
 
         # APLICAR NORMALIZAÇÃO AUTOMÁTICA de todas as strings na query
         normalized_query = self._normalize_query_strings(query)
 
-        # Executar a query normalizada
-        result = super().run_query(normalized_query)
+        # REESCRITA TRANSPARENTE para rollups pré-agregados quando possível
+        execution_query = self._rewrite_to_rollup(normalized_query)
+        source = "rollup"
+        if execution_query == normalized_query:
+            # Sem rollup: ler apenas as partições necessárias (dataset particionado)
+            execution_query = self._apply_partition_pruning(normalized_query)
+            source = "partitions" if execution_query != normalized_query else "table"
+
+        # Executar uma única vez: texto para o LLM e resultado Arrow para as visualizações
+        with metrics.histogram("duckdb_query_seconds", "Duração das queries executadas no DuckDB").time(source=source):
+            result, handle = self._execute_query(execution_query, normalized_query)
 
         # CACHE o resultado se for metadados
         self._cache_query_result(query, result)
 
-        # CACHE da query recente para evitar duplicação
-        self.metadata_cache['recent_queries'][query_hash] = result
-        self.metadata_cache['last_query_hash'] = query_hash
-
-        # Limitar cache de queries recentes para evitar vazamento de memória
-        if len(self.metadata_cache['recent_queries']) > 10:
-            # Remover a query mais antiga
-            oldest_hash = min(self.metadata_cache['recent_queries'].keys())
-            del self.metadata_cache['recent_queries'][oldest_hash]
-
-        # CAPTURAR DADOS DO RESULTADO para visualização
-        try:
-            # Tentar executar novamente a query para capturar DataFrame
-            if hasattr(self, 'connection') and self.connection:
-                df_result = self.connection.execute(normalized_query).df()
-                if not df_result.empty:
-                    self.last_result_df = df_result
-                    # Salvar query que gerou este DataFrame (para mapeamento de aliases)
-                    self.last_query = normalized_query
-        except Exception as e:
-            # Se falhar, tentar extrair dados do resultado textual
-            self.last_result_df = self._parse_result_to_dataframe(result)
-            # Ainda assim salvar a query
-            if self.last_result_df is not None:
-                self.last_query = normalized_query
+        # CACHE da query recente para evitar duplicação (limitado e descartado com os resultados)
+        self.results.remember(query, result, handle)
 
         # Debug info e context extraction
         if self.debug_info_ref is not None and hasattr(
@@ -230,36 +295,78 @@ class DebugDuckDbTools(DuckDbTools):
                 # Adicionar contexto mesmo se vazio (para garantir que sempre apareça)
                 self.debug_info_ref.debug_info["query_contexts"].append(context if context else {})
 
+            if handle is not None:
+                if "query_results" not in self.debug_info_ref.debug_info:
+                    self.debug_info_ref.debug_info["query_results"] = []
+                self.debug_info_ref.debug_info["query_results"].append(handle.to_dict())
+
+        # Identificador do resultado para gráficos de queries anteriores (não entra nos caches)
+        if handle is not None:
+            return f"{result}\n\n[result_id: {handle.result_id}]"
         return result
 
-    def _parse_result_to_dataframe(self, result_text):
-        """Converte resultado textual em DataFrame quando possível"""
-        try:
-            # Procurar por padrões de tabela no resultado
-            lines = result_text.split('\n')
-            data_rows = []
-
-            # Procurar por linhas que parecem dados tabulares
-            for line in lines:
-                line = line.strip()
-                if '|' in line or '\t' in line:
-                    # Possível linha de dados
-                    if '|' in line:
-                        cells = [cell.strip() for cell in line.split('|') if cell.strip()]
-                    else:
-                        cells = [cell.strip() for cell in line.split('\t') if cell.strip()]
-
-                    if len(cells) >= 2:
-                        # Tentar converter última célula para número
-                        try:
-                            value = float(cells[-1].replace(',', '').replace('$', ''))
-                            data_rows.append({
-                                'label': cells[0],
-                                'value': value
-                            })
-                        except:
-                            continue
-
-            return pd.DataFrame(data_rows) if data_rows else None
-        except:
-            return None
\ No newline at end of file
+    def run_query_with_result(self, query: str):
+        """
+        Executa a query pelo run_query (caches, normalização, rollups e debug_info) e
+        devolve também o resultado estruturado.
+
+        Returns:
+            Tupla (texto devolvido pelo run_query, QueryResult ou None quando não há linhas,
+            houve erro ou a query foi respondida pelo cache de metadados)
+        """
+        text = self.run_query(query)
+        # Executada agora ou repetida: em ambos os casos é a última query registrada
+        recalled = self.results.recall(query)
+        return text, recalled[1] if recalled is not None else None
+
+    def _execute_query(self, execution_query: str, source_query: str):
+        """
+        Executa a query uma única vez e registra o resultado estruturado.
+
+        Returns:
+            Tupla (texto no formato do DuckDbTools, QueryResult ou None)
+        """
+        formatted_sql = execution_query.replace("`", "").split(";")[0]
+        with get_tracer().span("sql.execute", query=formatted_sql) as span:
+            try:
+                table, universe_total = self._execute_with_universe_total(formatted_sql)
+            except Exception as e:
+                span.record_error(e)
+                return str(e), None
+
+            if table is None:
+                return "No output", None
+
+            span.set_attribute("rows", table.num_rows)
+            span.set_attribute("universe_total_fused", universe_total is not None)
+            handle = None
+            if table.num_rows > 0:
+                handle = self.results.add(source_query, table, universe_total)
+                span.set_attribute("result_id", handle.result_id)
+            return format_result_text(table), handle
+
+    def _execute_with_universe_total(self, query: str):
+        """
+        Executa a query capturando a tabela Arrow e, para Top N, o total do universo no mesmo passo.
+
+        Returns:
+            Tupla (tabela sem a coluna auxiliar ou None para comandos sem resultado,
+            total do universo ou None)
+        """
+        fused_query = add_universe_total(query)
+        if fused_query is not None:
+            try:
+                table = relation_to_arrow(self.connection.sql(fused_query))
+                universe_total = None
+                if table.num_rows > 0:
+                    first_total = table.column(UNIVERSE_TOTAL_COLUMN)[0].as_py()
+                    universe_total = float(first_total) if first_total is not None else None
+                columns = [c for c in table.column_names if c != UNIVERSE_TOTAL_COLUMN]
+                return table.select(columns), universe_total
+            except Exception:
+                pass  # Reescrita não suportada: executar a query original
+
+        relation = self.connection.sql(query)
+        if relation is None:
+            return None, None
+        return relation_to_arrow(relation), None
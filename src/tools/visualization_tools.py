@@ -5,6 +5,7 @@ Permite que o agent crie gráficos DURANTE sua execução, não após.
 
 from agno.tools import Toolkit
 import pandas as pd
+import numpy as np
 import json
 from typing import Dict, List, Optional, Any
 import sys
@@ -12,7 +13,13 @@ import os
 
 # Adicionar src ao path para importar numeric_analyzer
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from insights.numeric_analyzer import gerar_resumo_numerico, gerar_prompt_insights
+from insights.summary_executor import PendingInsights, iniciar_resumo, aguardar_resumo
+from config.agent_config import VISUALIZATION_CONFIG
+from visualization.downsampling import downsample_series
+from utils.formatters import parse_numeric_cells
+from utils.query_results import format_result_digest
+from utils.tracing import get_tracer
+from utils.metrics import get_metrics_registry, timed
 
 
 class VisualizationTools(Toolkit):
@@ -33,6 +40,9 @@ class VisualizationTools(Toolkit):
         super().__init__(name="visualization_tools")
         self.debug_info_ref = debug_info_ref
         self.duckdb_tool_ref = None  # Referência para DuckDbTools
+        self.active_result = None  # QueryResult sendo visualizado por create_chart_from_last_query
+        self.pending_insights = PendingInsights()  # Prompts de insights resolvidos pelo hook ao fim da chamada
+        self.register(self.query_and_chart)
         self.register(self.create_chart_from_last_query)
         self.register(self.prepare_bar_chart)
         self.register(self.prepare_vertical_bar_chart)
@@ -44,18 +54,22 @@ class VisualizationTools(Toolkit):
         self,
         title: str,
         chart_type: str = "auto",
-        value_format: str = "number"
+        value_format: str = "number",
+        result_id: str = None
     ) -> str:
         """
         MÉTODO SIMPLIFICADO - Cria gráfico automaticamente a partir da última query SQL executada.
 
         Este método acessa automaticamente o resultado da última query DuckDB e cria
         o gráfico apropriado, sem necessidade de extrair dados manualmente.
+        Com result_id (ex: "q2", informado ao final do resultado de cada query), usa
+        uma query anterior da mesma pergunta em vez da última.
 
         Args:
             title: Título do gráfico
             chart_type: Tipo do gráfico ("auto", "bar", "line", "multi_series")
             value_format: Formato dos valores ("number" ou "currency")
+            result_id: Identificador do resultado a visualizar (padrão: último)
 
         Returns:
             Mensagem de confirmação
@@ -69,22 +83,88 @@ class VisualizationTools(Toolkit):
             ... )
             "✅ Gráfico criado automaticamente: 'Top 5 Clientes' com 5 itens"
         """
-        # Encontrar DuckDbTools para acessar last_result_df
+        # Encontrar DuckDbTools para acessar os resultados estruturados
+        if self._find_duckdb_tool() is None:
+            return "❌ Erro: Não foi possível acessar resultados SQL"
+
+        result = self.duckdb_tool_ref.get_result(result_id)
+        if result is None:
+            if result_id:
+                disponiveis = ", ".join(self.duckdb_tool_ref.results.ids()) or "nenhum"
+                return f"❌ Erro: Resultado '{result_id}' não encontrado (disponíveis: {disponiveis})"
+            return "❌ Erro: Nenhum resultado SQL disponível para visualização"
+
+        self.active_result = result
+        try:
+            return self._create_chart_from_df(result.df, title, chart_type, value_format)
+        finally:
+            self.active_result = None
+
+    def query_and_chart(
+        self,
+        query: str,
+        title: str,
+        chart_type: str = "auto",
+        value_format: str = "number"
+    ) -> str:
+        """
+        Executa a query SQL e cria o gráfico do resultado em UMA chamada.
+
+        Substitui a sequência run_query + create_chart_from_last_query no caminho comum
+        (ranking, série temporal, comparação): a query roda uma vez, o gráfico, o resumo
+        numérico e o total do universo (Top N) são preparados e o retorno traz um resumo
+        compacto do resultado (primeiras linhas) em vez da tabela completa.
+
+        Args:
+            query: Query SQL (mesmas regras do run_query)
+            title: Título do gráfico
+            chart_type: Tipo do gráfico ("auto", "bar", "vertical_bar", "line", "multi_series")
+            value_format: Formato dos valores ("number" ou "currency")
+
+        Returns:
+            Resumo do resultado com result_id, confirmação do gráfico e prompt de insights
+
+        Examples:
+            >>> query_and_chart(
+            ...     query="SELECT Cod_Cliente, SUM(Valor_Vendido) AS Total FROM dados_comerciais "
+            ...           "GROUP BY Cod_Cliente ORDER BY Total DESC LIMIT 5",
+            ...     title="Top 5 Clientes por Faturamento",
+            ...     chart_type="bar",
+            ...     value_format="currency"
+            ... )
+        """
+        duckdb_tool = self._find_duckdb_tool()
+        if duckdb_tool is None or not hasattr(duckdb_tool, 'run_query_with_result'):
+            return "❌ Erro: Não foi possível acessar resultados SQL"
+
+        # Repetição da última query reaproveita o handle; handle já descartado (nova pergunta) reexecuta
+        text, result = duckdb_tool.run_query_with_result(query)
+        if result is None:
+            # Erro, resultado sem linhas ou resposta de cache de metadados: devolver o texto do run_query
+            return f"{text}\n\n⚠️ Gráfico não criado: nenhum resultado tabular para visualizar"
+
+        self.active_result = result
+        try:
+            chart_msg = self._create_chart_from_df(result.df, title, chart_type, value_format)
+        finally:
+            self.active_result = None
+
+        digest = format_result_digest(result, VISUALIZATION_CONFIG.get("result_digest_rows", 10))
+        return f"{digest}\n[result_id: {result.result_id}]\n\n{chart_msg}"
+
+    def _find_duckdb_tool(self):
+        """DuckDbTools do agente (resultados estruturados e execução de queries)"""
         if self.duckdb_tool_ref is None:
             if self.debug_info_ref and hasattr(self.debug_info_ref, 'tools'):
                 for tool in self.debug_info_ref.tools:
-                    if hasattr(tool, 'last_result_df'):
+                    if hasattr(tool, 'get_result'):
                         self.duckdb_tool_ref = tool
                         break
+        return self.duckdb_tool_ref
 
-        if self.duckdb_tool_ref is None:
-            return "❌ Erro: Não foi possível acessar resultados SQL"
-
-        if self.duckdb_tool_ref.last_result_df is None or self.duckdb_tool_ref.last_result_df.empty:
-            return "❌ Erro: Nenhum resultado SQL disponível para visualização"
-
-        df = self.duckdb_tool_ref.last_result_df
-
+    @timed("visualization_prepare_seconds", "Preparo de gráficos a partir de resultados SQL")
+    def _create_chart_from_df(self, df: pd.DataFrame, title: str, chart_type: str, value_format: str) -> str:
+        """Cria o gráfico do tipo solicitado (ou detectado) a partir do DataFrame do resultado"""
         # Detectar tipo de gráfico automaticamente se necessário
         if chart_type == "auto":
             chart_type = self._detect_chart_type(df)
@@ -224,10 +304,11 @@ class VisualizationTools(Toolkit):
         original_col = df.columns[1]
 
         # Tentar mapear de volta para coluna original se houver query disponível
-        if self.duckdb_tool_ref and hasattr(self.duckdb_tool_ref, 'last_query') and self.duckdb_tool_ref.last_query:
+        source_query = self._source_query()
+        if source_query:
             from src.utils.sql_column_mapper import extract_original_column_from_alias
             mapped_col = extract_original_column_from_alias(
-                self.duckdb_tool_ref.last_query, original_col
+                source_query, original_col
             )
             original_value_column = mapped_col if mapped_col else original_col
         else:
@@ -248,10 +329,11 @@ class VisualizationTools(Toolkit):
         original_col = df.columns[1]
 
         # Tentar mapear de volta para coluna original se houver query disponível
-        if self.duckdb_tool_ref and hasattr(self.duckdb_tool_ref, 'last_query') and self.duckdb_tool_ref.last_query:
+        source_query = self._source_query()
+        if source_query:
             from src.utils.sql_column_mapper import extract_original_column_from_alias
             mapped_col = extract_original_column_from_alias(
-                self.duckdb_tool_ref.last_query, original_col
+                source_query, original_col
             )
             original_value_column = mapped_col if mapped_col else original_col
         else:
@@ -278,10 +360,11 @@ class VisualizationTools(Toolkit):
         original_col = df.columns[2]  # Terceira coluna = valores
 
         # Tentar mapear de volta para coluna original se houver query disponível
-        if self.duckdb_tool_ref and hasattr(self.duckdb_tool_ref, 'last_query') and self.duckdb_tool_ref.last_query:
+        source_query = self._source_query()
+        if source_query:
             from src.utils.sql_column_mapper import extract_original_column_from_alias
             mapped_col = extract_original_column_from_alias(
-                self.duckdb_tool_ref.last_query, original_col
+                source_query, original_col
             )
             original_value_column = mapped_col if mapped_col else original_col
         else:
@@ -311,10 +394,11 @@ class VisualizationTools(Toolkit):
         original_col = df.columns[1]
 
         # Tentar mapear de volta para coluna original se houver query disponível
-        if self.duckdb_tool_ref and hasattr(self.duckdb_tool_ref, 'last_query') and self.duckdb_tool_ref.last_query:
+        source_query = self._source_query()
+        if source_query:
             from src.utils.sql_column_mapper import extract_original_column_from_alias
             mapped_col = extract_original_column_from_alias(
-                self.duckdb_tool_ref.last_query, original_col
+                source_query, original_col
             )
             original_value_column = mapped_col if mapped_col else original_col
         else:
@@ -348,10 +432,11 @@ class VisualizationTools(Toolkit):
         original_col = df.columns[2]  # Terceira coluna = valores
 
         # Tentar mapear de volta para coluna original se houver query disponível
-        if self.duckdb_tool_ref and hasattr(self.duckdb_tool_ref, 'last_query') and self.duckdb_tool_ref.last_query:
+        source_query = self._source_query()
+        if source_query:
             from src.utils.sql_column_mapper import extract_original_column_from_alias
             mapped_col = extract_original_column_from_alias(
-                self.duckdb_tool_ref.last_query, original_col
+                source_query, original_col
             )
             original_value_column = mapped_col if mapped_col else original_col
         else:
@@ -415,18 +500,12 @@ class VisualizationTools(Toolkit):
         }
 
         # Salvar em debug_info para captura por app.py
-        self._save_visualization_metadata(viz_metadata)
-
-        # NOVO: Verificar se numeric_summary foi gerado e incluir prompt de insights
-        insights_prompt = viz_metadata.get('insights_prompt', '')
+        summary_future = self._save_visualization_metadata(viz_metadata)
 
         base_msg = f"✅ Gráfico de barras preparado: '{title}' com {len(labels)} itens"
 
-        if insights_prompt:
-            # Incluir prompt estruturado para geração de insights
-            return f"{base_msg}\n\n{insights_prompt}"
-        else:
-            return base_msg
+        # Resumo numérico segue em segundo plano; o hook da ferramenta troca o marcador pelo prompt
+        return self._chart_response(base_msg, viz_metadata, summary_future)
 
     def prepare_vertical_bar_chart(
         self,
@@ -488,17 +567,12 @@ class VisualizationTools(Toolkit):
         }
 
         # Salvar em debug_info para captura por app.py
-        self._save_visualization_metadata(viz_metadata)
-
-        # NOVO: Verificar se numeric_summary foi gerado e incluir prompt de insights
-        insights_prompt = viz_metadata.get('insights_prompt', '')
+        summary_future = self._save_visualization_metadata(viz_metadata)
 
         base_msg = f"✅ Gráfico de barras verticais preparado: '{title}' com {len(labels)} itens"
 
-        if insights_prompt:
-            return f"{base_msg}\n\n{insights_prompt}"
-        else:
-            return base_msg
+        # Resumo numérico segue em segundo plano; o hook da ferramenta troca o marcador pelo prompt
+        return self._chart_response(base_msg, viz_metadata, summary_future)
 
     def prepare_grouped_vertical_bar_chart(
         self,
@@ -589,17 +663,12 @@ class VisualizationTools(Toolkit):
         }
 
         # Salvar em debug_info para captura por app.py
-        self._save_visualization_metadata(viz_metadata)
-
-        # NOVO: Verificar se numeric_summary foi gerado e incluir prompt de insights
-        insights_prompt = viz_metadata.get('insights_prompt', '')
+        summary_future = self._save_visualization_metadata(viz_metadata)
 
         base_msg = f"✅ Gráfico de barras agrupadas preparado: '{title}' ({len(unique_groups)} grupos × {len(unique_categories)} categorias)"
 
-        if insights_prompt:
-            return f"{base_msg}\n\n{insights_prompt}"
-        else:
-            return base_msg
+        # Resumo numérico segue em segundo plano; o hook da ferramenta troca o marcador pelo prompt
+        return self._chart_response(base_msg, viz_metadata, summary_future)
 
     def prepare_line_chart(
         self,
@@ -662,17 +731,12 @@ class VisualizationTools(Toolkit):
         }
 
         # Salvar em debug_info para captura por app.py
-        self._save_visualization_metadata(viz_metadata)
-
-        # NOVO: Verificar se numeric_summary foi gerado e incluir prompt de insights
-        insights_prompt = viz_metadata.get('insights_prompt', '')
+        summary_future = self._save_visualization_metadata(viz_metadata)
 
         base_msg = f"✅ Gráfico de linha preparado: '{title}' com {len(dates)} períodos"
 
-        if insights_prompt:
-            return f"{base_msg}\n\n{insights_prompt}"
-        else:
-            return base_msg
+        # Resumo numérico segue em segundo plano; o hook da ferramenta troca o marcador pelo prompt
+        return self._chart_response(base_msg, viz_metadata, summary_future)
 
     def prepare_multi_series_chart(
         self,
@@ -756,150 +820,54 @@ class VisualizationTools(Toolkit):
         }
 
         # Salvar em debug_info para captura por app.py
-        self._save_visualization_metadata(viz_metadata)
-
-        # NOVO: Verificar se numeric_summary foi gerado e incluir prompt de insights
-        insights_prompt = viz_metadata.get('insights_prompt', '')
+        summary_future = self._save_visualization_metadata(viz_metadata)
 
         n_periods = len(set(dates))
         base_msg = f"✅ Gráfico multi-série preparado: '{title}' com {len(unique_categories)} categorias e {n_periods} períodos"
 
-        if insights_prompt:
-            return f"{base_msg}\n\n{insights_prompt}"
-        else:
-            return base_msg
+        # Resumo numérico segue em segundo plano; o hook da ferramenta troca o marcador pelo prompt
+        return self._chart_response(base_msg, viz_metadata, summary_future)
+
+    def _source_result(self):
+        """Resultado em visualização: o escolhido por result_id ou o mais recente"""
+        if self.active_result is not None:
+            return self.active_result
+        if self.duckdb_tool_ref is not None and hasattr(self.duckdb_tool_ref, 'get_result'):
+            return self.duckdb_tool_ref.get_result()
+        return None
+
+    def _source_query(self) -> Optional[str]:
+        """Query SQL que gerou o resultado em visualização (para mapeamento de aliases)"""
+        result = self._source_result()
+        return result.query if result is not None else None
 
     def _calcular_total_universo(self) -> Optional[float]:
         """
-        Calcula o total do universo completo filtrado para queries Top N.
-        
-        Detecta se a última query tinha LIMIT (Top N) e executa uma query
-        auxiliar SEM o LIMIT para calcular o total correto do universo.
-        
+        Retorna o total do universo completo filtrado para queries Top N.
+
+        O total é calculado pelo DuckDbTools na mesma execução da query Top N
+        (coluna SUM(...) OVER ()), sem nova varredura da tabela.
+
         Returns:
             Total do universo completo ou None se não for aplicável
         """
-        if self.duckdb_tool_ref is None or not hasattr(self.duckdb_tool_ref, 'last_query'):
-            return None
-            
-        last_query = self.duckdb_tool_ref.last_query
-        if not last_query:
+        result = self._source_result()
+        if result is None:
             return None
-            
-        # Detectar se é uma query Top N (tem LIMIT)
-        query_upper = last_query.upper()
-        if 'LIMIT' not in query_upper:
+
+        last_query = result.query
+        if not last_query or 'LIMIT' not in last_query.upper():
             return None  # Não é Top N, não precisa de correção
-            
-        try:
-            # Extrair a coluna de valor que está sendo agregada
-            # Padrão típico: SELECT col1, SUM(col2) as alias FROM ... WHERE ... ORDER BY ... LIMIT N
-            
-            # 1. Remover LIMIT e ORDER BY
-            query_sem_limit = self._remover_limit_orderby(last_query)
-            
-            # 2. Extrair a coluna agregada (SUM, COUNT, AVG, etc.)
-            coluna_agregada = self._extrair_coluna_agregada(last_query)
-            
-            if not coluna_agregada:
-                return None
-                
-            # 3. Construir query auxiliar para calcular total do universo
-            # Manter WHERE, mas remover GROUP BY, ORDER BY e LIMIT
-            query_total = self._construir_query_total(query_sem_limit, coluna_agregada)
-            
-            if not query_total:
-                return None
-                
-            # 4. Executar query auxiliar
-            result_df = self.duckdb_tool_ref.connection.execute(query_total).df()
-            
-            if result_df.empty or len(result_df.columns) == 0:
-                return None
-                
-            # Pegar o primeiro valor (total)
-            total = float(result_df.iloc[0, 0])
-            
-            return total
-            
-        except Exception as e:
-            # Em caso de erro, retornar None (usará comportamento legado)
-            if self.debug_info_ref and hasattr(self.debug_info_ref, 'debug_info'):
-                if 'total_universo_errors' not in self.debug_info_ref.debug_info:
-                    self.debug_info_ref.debug_info['total_universo_errors'] = []
-                self.debug_info_ref.debug_info['total_universo_errors'].append({
-                    'error': str(e),
-                    'query': last_query
-                })
-            return None
-    
-    def _remover_limit_orderby(self, query: str) -> str:
-        """Remove LIMIT e ORDER BY da query"""
-        import re
-        
-        # Remover ORDER BY ... LIMIT N (case insensitive)
-        query_limpo = re.sub(r'\s+ORDER\s+BY\s+[^;]+LIMIT\s+\d+', '', query, flags=re.IGNORECASE)
-        
-        # Se ainda houver LIMIT sozinho, remover
-        query_limpo = re.sub(r'\s+LIMIT\s+\d+', '', query_limpo, flags=re.IGNORECASE)
-        
-        # Se ainda houver ORDER BY sozinho, remover
-        query_limpo = re.sub(r'\s+ORDER\s+BY\s+[^;]+', '', query_limpo, flags=re.IGNORECASE)
-        
-        return query_limpo
-    
-    def _extrair_coluna_agregada(self, query: str) -> Optional[str]:
-        """Extrai a coluna que está sendo agregada (SUM, COUNT, etc.)"""
-        import re
-        
-        # Procurar por padrões de agregação
-        patterns = [
-            r'SUM\s*\(\s*([^\)]+)\s*\)',
-            r'COUNT\s*\(\s*([^\)]+)\s*\)',
-            r'AVG\s*\(\s*([^\)]+)\s*\)',
-            r'MAX\s*\(\s*([^\)]+)\s*\)',
-            r'MIN\s*\(\s*([^\)]+)\s*\)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, query, re.IGNORECASE)
-            if match:
-                coluna = match.group(1).strip()
-                # Retornar a função agregada completa
-                funcao_match = re.search(r'(SUM|COUNT|AVG|MAX|MIN)\s*\([^\)]+\)', query, re.IGNORECASE)
-                if funcao_match:
-                    return funcao_match.group(0)
-        
-        return None
-    
-    def _construir_query_total(self, query_base: str, coluna_agregada: str) -> Optional[str]:
-        """Constrói query para calcular total do universo"""
-        import re
-        
-        # Extrair FROM ... WHERE ... (sem GROUP BY)
-        # Padrão: SELECT ... FROM table WHERE conditions GROUP BY ...
-        
-        # 1. Encontrar FROM
-        match_from = re.search(r'\bFROM\b', query_base, re.IGNORECASE)
-        if not match_from:
-            return None
-            
-        inicio_from = match_from.start()
-        
-        # 2. Encontrar GROUP BY (se existir)
-        match_group = re.search(r'\bGROUP\s+BY\b', query_base, re.IGNORECASE)
-        
-        if match_group:
-            # Pegar até o GROUP BY
-            from_where_clause = query_base[inicio_from:match_group.start()].strip()
-        else:
-            # Pegar até o final
-            from_where_clause = query_base[inicio_from:].strip()
-        
-        # 3. Construir query final
-        query_total = f"SELECT {coluna_agregada} as total {from_where_clause}"
-        
-        return query_total.strip()
+
+        total = result.universe_total
+        if total is None and self.debug_info_ref and hasattr(self.debug_info_ref, 'debug_info'):
+            if 'total_universo_errors' not in self.debug_info_ref.debug_info:
+                self.debug_info_ref.debug_info['total_universo_errors'] = []
+            self.debug_info_ref.debug_info['total_universo_errors'].append({
+                'error': 'Total do universo indisponível para a query Top N',
+                'query': last_query
+            })
+        return total
 
     def _detect_categorical_ids(self, labels: List[str]) -> bool:
         """
@@ -924,6 +892,27 @@ class VisualizationTools(Toolkit):
 
         return False
 
+    def _summary_axes(self, chart_type: str) -> tuple:
+        """Tipo do numeric_analyzer e colunas de eixo X/Y para o tipo de gráfico"""
+        # Mapear tipo de gráfico para formato esperado pelo analyzer
+        tipo_grafico_map = {
+            'bar_chart': 'horizontal_bar',
+            'vertical_bar_chart': 'vertical_bar',
+            'grouped_vertical_bar_chart': 'grouped_vertical_bar',
+            'line_chart': 'line'
+        }
+        tipo_grafico = tipo_grafico_map.get(chart_type, 'horizontal_bar')
+
+        # Identificar colunas de eixo X e Y baseado no tipo
+        if chart_type == 'grouped_vertical_bar_chart':
+            # Estrutura: group, category, value
+            return tipo_grafico, 'group', 'value'
+        elif chart_type == 'line_chart':
+            # Série única (date, value) ou multi-série (date, category, value)
+            return tipo_grafico, 'date', 'value'
+        # Padrão: label, value
+        return tipo_grafico, 'label', 'value'
+
     def _save_visualization_metadata(self, viz_metadata: Dict[str, Any]):
         """
         Salva metadados de visualização em debug_info do agent.
@@ -931,82 +920,121 @@ class VisualizationTools(Toolkit):
         NOVO: Gera resumo numérico automaticamente para insights inteligentes.
         CORREÇÃO: Detecta Top N e calcula total do universo filtrado corretamente.
 
+        O resumo numérico e o prompt de insights são iniciados em segundo plano
+        assim que os dados existem; o restante do preparo segue em paralelo.
+
         Args:
             viz_metadata: Dicionário com metadados do gráfico
+
+        Returns:
+            Future do resumo numérico (ou None quando não aplicável)
         """
         if self.debug_info_ref is None:
-            return
+            return None
 
         if not hasattr(self.debug_info_ref, 'debug_info'):
-            return
+            return None
 
-        # NOVA FUNCIONALIDADE: Gerar resumo numérico para insights
+        # NOVA FUNCIONALIDADE: Gerar resumo numérico para insights (em segundo plano)
+        summary_future = None
         try:
             df = viz_metadata.get('data')
             chart_type = viz_metadata.get('type')
 
             if df is not None and not df.empty and chart_type:
-                # Mapear tipo de gráfico para formato esperado pelo analyzer
-                tipo_grafico_map = {
-                    'bar_chart': 'horizontal_bar',
-                    'vertical_bar_chart': 'vertical_bar',
-                    'grouped_vertical_bar_chart': 'grouped_vertical_bar',
-                    'line_chart': 'line'
-                }
+                tipo_grafico, eixo_x, eixo_y = self._summary_axes(chart_type)
 
-                tipo_grafico = tipo_grafico_map.get(chart_type, 'horizontal_bar')
-
-                # Identificar colunas de eixo X e Y baseado no tipo
-                if chart_type == 'grouped_vertical_bar_chart':
-                    # Estrutura: group, category, value
-                    eixo_x = 'group'
-                    eixo_y = 'value'
-                elif chart_type == 'line_chart' and 'category' in df.columns:
-                    # Multi-série: date, category, value
-                    eixo_x = 'date'
-                    eixo_y = 'value'
-                elif chart_type == 'line_chart':
-                    # Série única: date, value
-                    eixo_x = 'date'
-                    eixo_y = 'value'
-                else:
-                    # Padrão: label, value
-                    eixo_x = 'label'
-                    eixo_y = 'value'
-
-                # NOVA FUNCIONALIDADE: Detectar Top N e calcular total do universo
+                # NOVA FUNCIONALIDADE: Detectar Top N e obter total do universo
+                # (lido aqui, pois depende do resultado ativo desta thread)
                 total_universo = None
                 if chart_type == 'bar_chart' and tipo_grafico == 'horizontal_bar':
                     total_universo = self._calcular_total_universo()
 
-                # Gerar resumo numérico com total do universo correto
-                resumo_numerico = gerar_resumo_numerico(df, eixo_x, eixo_y, tipo_grafico, total_universo=total_universo)
-
-                # Gerar prompt de insights para a LLM
-                prompt_insights = gerar_prompt_insights(resumo_numerico, tipo_grafico, max_insights=5)
-
-                # Adicionar ao viz_metadata
-                viz_metadata['numeric_summary'] = resumo_numerico
-                viz_metadata['insights_prompt'] = prompt_insights
+                summary_future = iniciar_resumo(df, eixo_x, eixo_y, tipo_grafico, total_universo=total_universo)
 
         except Exception as e:
             # Em caso de erro, continuar sem resumo numérico
             # (não bloquear a visualização)
             viz_metadata['numeric_summary_error'] = str(e)
 
+        # Reduzir séries longas para renderização (o resumo acima usa todos os pontos)
+        if viz_metadata.get('type') == 'line_chart' and viz_metadata.get('data') is not None:
+            df_full = viz_metadata['data']
+            group_col = 'category' if 'category' in df_full.columns else None
+            df_render = downsample_series(df_full, 'date', 'value', group_col=group_col)
+            if len(df_render) < len(df_full):
+                viz_metadata['data'] = df_render
+                viz_metadata['downsampling'] = {
+                    'original_points': len(df_full),
+                    'rendered_points': len(df_render)
+                }
+
         # Criar lista se não existir
         if 'visualization_metadata' not in self.debug_info_ref.debug_info:
             self.debug_info_ref.debug_info['visualization_metadata'] = []
 
-        # Adicionar metadados (agora com numeric_summary)
+        # Adicionar metadados (numeric_summary é preenchido ao aguardar o resumo)
         self.debug_info_ref.debug_info['visualization_metadata'].append(viz_metadata)
 
+        return summary_future
+
+    def _chart_response(self, base_msg: str, viz_metadata: Dict[str, Any], summary_future) -> str:
+        """Confirmação do gráfico sem esperar o resumo (marcador resolvido por PendingInsights)"""
+        if summary_future is None:
+            return base_msg
+        marker = self.pending_insights.defer(lambda: self._await_insights_prompt(viz_metadata, summary_future))
+        return f"{base_msg}\n\n{marker}"
+
+    def _await_insights_prompt(self, viz_metadata: Dict[str, Any], summary_future) -> str:
+        """
+        Aguarda o resumo numérico com tempo máximo e o anexa aos metadados.
+
+        Returns:
+            Prompt de insights ou string vazia (sem resumo, erro ou tempo esgotado)
+        """
+        if summary_future is None:
+            return ''
+
+        timeout = VISUALIZATION_CONFIG.get("numeric_summary_timeout_seconds", 3.0)
+        with get_tracer().span("insights.summary_wait", chart_type=viz_metadata.get('type')) as span:
+            try:
+                resultado = aguardar_resumo(summary_future, timeout=timeout)
+            except Exception as e:
+                span.record_error(e)
+                viz_metadata['numeric_summary_error'] = str(e)
+                return ''
+            span.set_attribute("timed_out", resultado is None)
+
+        if resultado is None:
+            # Tempo esgotado: o gráfico segue sem resumo numérico
+            get_metrics_registry().counter(
+                "numeric_summary_timeouts_total", "Resumos numéricos que excederam o tempo máximo"
+            ).inc(chart_type=viz_metadata.get('type'))
+            viz_metadata['numeric_summary_error'] = f"Resumo numérico excedeu {timeout}s"
+            if self.debug_info_ref is not None and hasattr(self.debug_info_ref, 'debug_info'):
+                if 'numeric_summary_timeouts' not in self.debug_info_ref.debug_info:
+                    self.debug_info_ref.debug_info['numeric_summary_timeouts'] = []
+                self.debug_info_ref.debug_info['numeric_summary_timeouts'].append({
+                    'chart_type': viz_metadata.get('type'),
+                    'title': viz_metadata.get('config', {}).get('title'),
+                    'timeout_seconds': timeout
+                })
+            return ''
+
+        resumo_numerico, prompt_insights = resultado
+        viz_metadata['numeric_summary'] = resumo_numerico
+        viz_metadata['insights_prompt'] = prompt_insights
+        return prompt_insights
+
 
 # Função helper para conversão de resultados SQL para listas
 def sql_result_to_lists(result_string: str) -> tuple:
     """
     Converte resultado de query SQL em listas para uso com VisualizationTools.
 
+    Apenas para texto tabular de outras fontes: resultados do DebugDuckDbTools
+    devem ser usados pelo handle estruturado (get_result / result_id).
+
     Args:
         result_string: String com resultado da query (formato tabular)
 
@@ -1021,11 +1049,8 @@ def sql_result_to_lists(result_string: str) -> tuple:
         >>> print(values)
         [1000.0]
     """
-    lines = result_string.strip().split('\n')
-    labels = []
-    values = []
-
-    for line in lines:
+    rows = []
+    for line in result_string.strip().split('\n'):
         line = line.strip()
         # Pular linhas vazias, separadores e cabeçalhos
         if not line or line.startswith('|---') or line.startswith('+-'):
@@ -1035,12 +1060,14 @@ def sql_result_to_lists(result_string: str) -> tuple:
         if '|' in line:
             cells = [cell.strip() for cell in line.split('|') if cell.strip()]
             if len(cells) >= 2:
-                # Tentar converter segunda célula para número
-                try:
-                    value = float(cells[-1].replace(',', '').replace('R$', '').strip())
-                    labels.append(cells[0])
-                    values.append(value)
-                except ValueError:
-                    continue
-
-    return labels, values
+                rows.append((cells[0], cells[-1]))
+
+    if not rows:
+        return [], []
+
+    # Converter a última célula de todas as linhas de uma vez (cabeçalhos viram NaN)
+    values = parse_numeric_cells([value for _, value in rows])
+    valid = ~np.isnan(values)
+    labels = [label for (label, _), ok in zip(rows, valid) if ok]
+
+    return labels, values[valid].tolist()
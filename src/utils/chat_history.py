@@ -0,0 +1,228 @@
+"""
+Histórico do chat com memória constante por sessão.
+
+As mensagens mais recentes ficam em memória como dicionários (o formato que o app
+já renderiza). Quando passam de `max_recent_messages`, as mais antigas vão para um
+arquivo SQLite da sessão:
+
+- markdown da resposta comprimido com zlib;
+- DataFrame do gráfico (visualization_data['data']) como Arrow IPC comprimido;
+- contexto, metadados do gráfico e um diagnóstico reduzido (SQL, tempo, etapas) como
+  JSON (valores sem representação JSON viram texto).
+
+Mensagens arquivadas não são mantidas em memória: load() as reconstrói sob demanda,
+quando o usuário pede para ver o histórico anterior. O arquivo da sessão é removido
+quando o SessionManager descarta ou esquece a sessão (remove_archive), e arquivos
+órfãos (ex: sessões de um processo anterior) são removidos por sweep_archives.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import CHAT_HISTORY_CONFIG
+
+
+def dataframe_to_ipc(df: pd.DataFrame, compression: Optional[str] = "zstd") -> bytes:
+    """Serializa um DataFrame como stream Arrow IPC (com compressão de buffers se disponível)"""
+    table = pa.Table.from_pandas(df)
+    if compression and not pa.Codec.is_available(compression):
+        compression = None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema, options=pa.ipc.IpcWriteOptions(compression=compression)) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def ipc_to_dataframe(data: bytes) -> pd.DataFrame:
+    with pa.ipc.open_stream(data) as reader:
+        return reader.read_all().to_pandas()
+
+
+def archive_path(session_id: str, config: Dict = None) -> str:
+    """Arquivo SQLite do histórico da sessão"""
+    config = {**CHAT_HISTORY_CONFIG, **(config or {})}
+    return os.path.join(config["storage_dir"], f"{session_id}.sqlite")
+
+
+def remove_archive(session_id: str, config: Dict = None) -> bool:
+    """
+    Remove o arquivo do histórico da sessão (sessão descartada ou esquecida).
+
+    Returns:
+        True se havia arquivo para remover
+    """
+    try:
+        os.remove(archive_path(session_id, config))
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def sweep_archives(keep: Iterable[str], max_age_seconds: float, config: Dict = None,
+                   now: Optional[float] = None) -> List[str]:
+    """
+    Remove arquivos de histórico sem sessão conhecida e sem escrita há mais de max_age_seconds.
+
+    Args:
+        keep: IDs das sessões ainda registradas (seus arquivos são preservados)
+        max_age_seconds: Idade mínima (pela data de modificação) para remover um arquivo órfão
+
+    Returns:
+        IDs das sessões cujos arquivos foram removidos
+    """
+    config = {**CHAT_HISTORY_CONFIG, **(config or {})}
+    storage_dir = config["storage_dir"]
+    if not os.path.isdir(storage_dir):
+        return []
+
+    now = now if now is not None else time.time()
+    keep = set(keep)
+    removed = []
+    for name in os.listdir(storage_dir):
+        session_id, extension = os.path.splitext(name)
+        if extension != ".sqlite" or session_id in keep:
+            continue
+        path = os.path.join(storage_dir, name)
+        try:
+            if now - os.path.getmtime(path) > max_age_seconds:
+                os.remove(path)
+                removed.append(session_id)
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+class ChatHistory:
+    """
+    Histórico de mensagens de uma sessão: recentes em memória, antigas em SQLite.
+
+    Args:
+        session_id: Identificador da sessão (nome do arquivo SQLite)
+        config: Sobrescritas de CHAT_HISTORY_CONFIG
+    """
+
+    def __init__(self, session_id: str, config: Dict = None):
+        self.config = {**CHAT_HISTORY_CONFIG, **(config or {})}
+        self.session_id = session_id
+        self.recent: List[Dict] = []
+        self.archived_count = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return archive_path(self.session_id, self.config)
+
+    def __len__(self) -> int:
+        return self.archived_count + len(self.recent)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(self.config["storage_dir"], exist_ok=True)
+            # Reruns do Streamlit podem acontecer em threads diferentes (acesso protegido por _lock)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("DROP TABLE IF EXISTS messages")
+            self._connection.execute(
+                "CREATE TABLE messages (seq INTEGER PRIMARY KEY, role TEXT, content BLOB, "
+                "chart_data BLOB, metadata TEXT)"
+            )
+        return self._connection
+
+    def append(self, message: Dict) -> List[str]:
+        """
+        Adiciona uma mensagem; as excedentes mais antigas são arquivadas.
+
+        Returns:
+            IDs das mensagens arquivadas agora (para liberar caches associados, ex: figuras)
+        """
+        self.recent.append(message)
+        excess = len(self.recent) - self.config["max_recent_messages"]
+        if excess <= 0:
+            return []
+
+        to_archive, self.recent = self.recent[:excess], self.recent[excess:]
+        with self._lock:
+            connection = self._connect()
+            rows = []
+            for message in to_archive:
+                rows.append((self.archived_count, *self._serialize(message)))
+                self.archived_count += 1
+            connection.executemany("INSERT INTO messages VALUES (?, ?, ?, ?, ?)", rows)
+            connection.commit()
+        return [message["id"] for message in to_archive if message.get("id")]
+
+    def _serialize(self, message: Dict) -> tuple:
+        metadata = {k: v for k, v in message.items() if k not in ("role", "content")}
+        chart_data = None
+
+        visualization_data = metadata.get("visualization_data")
+        if visualization_data:
+            visualization_data = dict(visualization_data)
+            df = visualization_data.pop("data", None)
+            if isinstance(df, pd.DataFrame):
+                chart_data = dataframe_to_ipc(df, self.config["arrow_compression"])
+            metadata["visualization_data"] = visualization_data
+
+        debug_info = metadata.get("debug_info")
+        if debug_info:
+            metadata["debug_info"] = {
+                key: list(value) if isinstance(value, deque) else value
+                for key, value in debug_info.items() if key in self.config["archived_debug_keys"]
+            }
+
+        content = zlib.compress(str(message.get("content", "")).encode("utf-8"))
+        return message.get("role"), content, chart_data, json.dumps(metadata, default=str, ensure_ascii=False)
+
+    def load(self, start: int, count: int) -> List[Dict]:
+        """
+        Reconstrói mensagens arquivadas (posições [start, start + count) da sessão).
+
+        Returns:
+            Mensagens no mesmo formato das recentes, da mais antiga para a mais nova
+        """
+        if self.archived_count == 0 or count <= 0:
+            return []
+
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT role, content, chart_data, metadata FROM messages "
+                "WHERE seq >= ? AND seq < ? ORDER BY seq",
+                (max(start, 0), start + count)
+            ).fetchall()
+
+        messages = []
+        for role, content, chart_data, metadata in rows:
+            message = json.loads(metadata)
+            message["role"] = role
+            message["content"] = zlib.decompress(content).decode("utf-8")
+            if chart_data is not None and message.get("visualization_data") is not None:
+                message["visualization_data"]["data"] = ipc_to_dataframe(chart_data)
+            message["archived"] = True
+            messages.append(message)
+        return messages
+
+    def clear(self):
+        """Remove todas as mensagens (memória e arquivo da sessão)"""
+        self.recent = []
+        self.archived_count = 0
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def archive_bytes(self) -> int:
+        """Tamanho do arquivo SQLite da sessão"""
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
@@ -9,51 +9,43 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from config.model_config import DATA_CONFIG
-from chatbot_agents import create_agent
+from chatbot_agents import create_agent, refresh_agent_dataset, get_prompt_version
+from datastore.dtype_plan import read_compact_dataset
+from datastore.refresh import get_dataset_refresher
+from utils.sessions import get_session_manager
 
 
-@st.cache_data
-def load_parquet_data():
-    """Carrega arquivo Parquet com tratamento robusto de codificação"""
+def get_current_dataset_version():
+    """
+    Verifica se o dataset foi atualizado e retorna a versão vigente.
+
+    A versão é usada como chave de cache de load_parquet_data, de modo que uma nova
+    versão invalida os dados em cache sem reiniciar a aplicação.
+
+    Returns:
+        Número da versão ou None se a atualização incremental estiver desabilitada
+    """
+    refresher = get_dataset_refresher()
+    if refresher is None:
+        return None
+    refresher.check_for_update()
+    return refresher.current_version().version
+
+
+@st.cache_data(max_entries=2)
+def load_parquet_data(dataset_version=None):
+    """
+    Carrega arquivo Parquet com tratamento robusto de codificação
+
+    Args:
+        dataset_version: Versão do dataset (apenas chave de cache)
+    """
     data_path = DATA_CONFIG["data_path"]
 
-    # Method 1: Try direct pandas loading
     try:
         with st.spinner("🔄 Carregando dados..."):
-            df = pd.read_parquet(data_path)
-
-            # Process string columns for encoding issues
-            string_cols = df.select_dtypes(include=["object"]).columns
-            for col in string_cols:
-                try:
-                    # Convert to string and clean encoding
-                    original_values = df[col].fillna("")
-                    cleaned_values = []
-
-                    for val in original_values:
-                        if isinstance(val, bytes):
-                            # Handle bytes
-                            try:
-                                cleaned_val = val.decode("utf-8", errors="replace")
-                            except:
-                                cleaned_val = str(val)
-                        else:
-                            # Handle strings with potential encoding issues
-                            cleaned_val = (
-                                str(val)
-                                .encode("utf-8", errors="ignore")
-                                .decode("utf-8")
-                            )
-                        cleaned_values.append(cleaned_val)
-
-                    df[col] = cleaned_values
-
-                except Exception as col_error:
-                    # If column processing fails, keep original
-                    st.warning(
-                        f"⚠️ Mantendo coluna {col} original devido a: {col_error}"
-                    )
-                    continue
+            # Leitura via Arrow com limpeza vetorizada de texto e plano de tipos compacto
+            df = read_compact_dataset(data_path)
 
             return df, None
 
@@ -64,30 +56,41 @@ def load_parquet_data():
 def initialize_agent():
     """
     Inicializa o agente DuckDB configurado com memória temporária baseada em sessão
-    CORREÇÃO: Removido cache para garantir sincronização de contexto
+
+    O agente fica no SessionManager do processo (não no session_state), que o libera
+    após inatividade ou sob pressão de memória; nesse caso ele é recriado aqui com o
+    contexto de filtros e a memória de conversação guardados na liberação.
     """
     try:
         # Gerar um ID único para a sessão do Streamlit se não existir
         if "session_user_id" not in st.session_state:
             st.session_state.session_user_id = str(uuid.uuid4())
 
-        # CORREÇÃO: Versão do prompt para invalidar cache quando necessário
-        import hashlib
-        import os
-        prompt_file = os.path.join(os.path.dirname(__file__), '..', 'prompts', 'chatbot_prompt.py')
-        try:
-            with open(prompt_file, 'r', encoding='utf-8') as f:
-                prompt_content = f.read()
-            prompt_hash = hashlib.md5(prompt_content.encode()).hexdigest()[:8]
-        except:
-            prompt_hash = "unknown"
+        # CORREÇÃO: Versão do prompt para invalidar cache quando necessário (hash refeito só se o arquivo mudar)
+        prompt_hash = get_prompt_version()
 
         # Verificar se já existe um agente na sessão e se o prompt não mudou
-        if ("cached_agent" in st.session_state and "cached_df_agent" in st.session_state and
-            st.session_state.get('cached_prompt_hash') == prompt_hash):
-
-            agent = st.session_state.cached_agent
-            df_agent = st.session_state.cached_df_agent
+        session_manager = get_session_manager()
+        session_id = st.session_state.session_user_id
+        cached = session_manager.get(session_id, prompt_hash)
+        if cached is not None:
+            agent, df_agent = cached
+
+            # Aplicar versões novas do dataset entre turnos (None = agente precisa ser recriado);
+            # clones passam ao template da nova versão, construído uma única vez para todas as sessões
+            refresher = get_dataset_refresher()
+            pending = refresher.pending_versions(getattr(agent, 'dataset_version', None)) if refresher else []
+            if pending is None:
+                session_manager.remove(session_id, forget_history=False)
+                return initialize_agent()
+            if pending:
+                try:
+                    df_agent = refresh_agent_dataset(agent, df_agent, pending)
+                    session_manager.put(session_id, agent, df_agent, prompt_hash)
+                except Exception:
+                    # Falha na aplicação incremental: recriar o agente na versão vigente
+                    session_manager.remove(session_id, forget_history=False)
+                    return initialize_agent()
 
             # SEMPRE sincronizar contexto do session_state para o agente
             if st.session_state.get('last_context'):
@@ -101,7 +104,14 @@ def initialize_agent():
         import time
         current_time = time.time()
 
-        agent, df_agent = create_agent(session_user_id=st.session_state.session_user_id)
+        # Estado guardado quando o agente desta sessão foi liberado (inatividade/memória)
+        restored = session_manager.restored_state(session_id)
+
+        agent, df_agent = create_agent(
+            session_user_id=session_id,
+            conversation_memory=restored.get('conversation_memory', ""),
+            prompt_version=prompt_hash
+        )
 
         # Marcar o agente com timestamp
         agent._creation_time = current_time
@@ -110,11 +120,14 @@ def initialize_agent():
         if st.session_state.get('last_context'):
             agent.persistent_context = st.session_state.last_context.copy()
             print(f"🔄 CONTEXTO RESTAURADO na criação do agente: {agent.persistent_context}")
+        elif restored.get('persistent_context'):
+            agent.persistent_context = restored['persistent_context'].copy()
+
+        if restored and st.session_state.get('debug_mode', False):
+            print(f"♻️ AGENTE RECRIADO após liberação ({restored.get('evicted_reason')}) - sessão {session_id}")
 
-        # Cache na sessão com hash do prompt
-        st.session_state.cached_agent = agent
-        st.session_state.cached_df_agent = df_agent
-        st.session_state.cached_prompt_hash = prompt_hash
+        # Registrar no gerenciador de sessões com o hash do prompt
+        session_manager.put(session_id, agent, df_agent, prompt_hash)
 
         # Log criação
         if st.session_state.get('debug_mode', False):
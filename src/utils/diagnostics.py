@@ -0,0 +1,172 @@
+"""
+Diagnósticos por turno com memória limitada (debug_info do agente).
+
+O debug_info continua sendo um dicionário de listas preenchido pelas ferramentas
+com o padrão `if chave not in debug_info: debug_info[chave] = []`, mas:
+
+- toda lista atribuída vira um RingBuffer (deque com tamanho máximo), e textos
+  longos são truncados ao registrar;
+- ao fim do turno, snapshot() devolve um dicionário com REFERÊNCIAS aos buffers
+  do turno (sem cópia) e clear() apenas desliga as chaves do store, então o
+  snapshot guardado na mensagem do chat continua válido;
+- os snapshots têm orçamento fixo: os antigos perdem primeiro as chaves pesadas
+  (DataFrames de visualização, já guardados na própria mensagem) e, se ainda
+  assim o orçamento estourar, são esvaziados do mais antigo para o mais novo.
+"""
+
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import DIAGNOSTICS_CONFIG
+
+
+def clip_text(value: Any, limit: int) -> Any:
+    """Trunca strings (inclusive valores de dicionários) acima de `limit` caracteres"""
+    if isinstance(value, str):
+        return value if len(value) <= limit else value[:limit] + f"... [+{len(value) - limit} caracteres]"
+    if isinstance(value, dict):
+        return {k: clip_text(v, limit) if isinstance(v, str) else v for k, v in value.items()}
+    return value
+
+
+def estimate_size(value: Any, _seen: Optional[set] = None) -> int:
+    """
+    Estimativa barata (em bytes) da memória retida por um valor de diagnóstico.
+
+    Objetos compartilhados são contados uma única vez; DataFrames usam
+    memory_usage sem inspecionar strings (deep=False) para não custar uma varredura.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, seen) + estimate_size(v, seen) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, deque)):
+        return sys.getsizeof(value) + sum(estimate_size(item, seen) for item in value)
+    return sys.getsizeof(value)
+
+
+class RingBuffer(deque):
+    """Lista de diagnóstico com tamanho máximo; as entradas mais antigas são descartadas"""
+
+    def __init__(self, iterable: Iterable = (), maxlen: int = 50, max_text_length: int = 2000):
+        self.max_text_length = max_text_length
+        super().__init__((clip_text(item, max_text_length) for item in iterable), maxlen)
+
+    def append(self, item):
+        super().append(clip_text(item, self.max_text_length))
+
+    def extend(self, items: Iterable):
+        super().extend(clip_text(item, self.max_text_length) for item in items)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self), self.maxlen, self.max_text_length))
+
+
+class DiagnosticsStore(dict):
+    """
+    debug_info do agente: listas limitadas por chave e snapshots de turno por referência.
+
+    Uso no fim do turno:
+        debug_info = agent.debug_info.snapshot(response_time=t)  # referências
+        agent.debug_info.clear()                                  # próximo turno
+    """
+
+    def __init__(self, config: Dict = None):
+        super().__init__()
+        self.config = {**DIAGNOSTICS_CONFIG, **(config or {})}
+        # [snapshot, tamanho estimado (None = turno ainda aberto)]
+        self._snapshots = deque()
+        self._lock = threading.Lock()
+
+    def __setitem__(self, key, value):
+        if isinstance(value, list):
+            value = RingBuffer(value, self.config["max_entries_per_key"], self.config["max_text_length"])
+        super().__setitem__(key, value)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        """Encerra o turno: remove as chaves do store sem esvaziar os buffers (snapshots continuam válidos)"""
+        persistent = {key: self[key] for key in self.config["persistent_keys"] if key in self}
+        super().clear()
+        for key, value in persistent.items():
+            super().__setitem__(key, value)
+
+    def snapshot(self, **extra) -> Dict:
+        """
+        Diagnóstico do turno para a mensagem do chat, com referências aos buffers atuais.
+
+        Args:
+            **extra: Campos adicionais do turno (ex: response_time)
+
+        Returns:
+            Dicionário do turno (pode ser compactado ou esvaziado depois pelo orçamento)
+        """
+        snapshot = dict(self)
+        snapshot.update(extra)
+        with self._lock:
+            # Turnos anteriores já estão fechados: o tamanho deles não muda mais
+            for entry in self._snapshots:
+                if entry[1] is None:
+                    entry[1] = estimate_size(entry[0])
+            self._snapshots.append([snapshot, None])
+            self._enforce_budget()
+        return snapshot
+
+    def _enforce_budget(self):
+        budget = self.config["snapshot_budget_mb"] * 1024 * 1024
+        closed = list(self._snapshots)[:-1]
+
+        while len(self._snapshots) > self.config["max_snapshots"]:
+            self._snapshots.popleft()[0].clear()
+            closed.pop(0)
+
+        total = sum(entry[1] for entry in closed)
+        # 1º: remover chaves pesadas dos snapshots antigos
+        for entry in closed:
+            if total <= budget:
+                return
+            removed = [entry[0].pop(key) for key in self.config["transient_keys"] if key in entry[0]]
+            if removed:
+                total -= entry[1]
+                entry[1] = estimate_size(entry[0])
+                total += entry[1]
+
+        # 2º: esvaziar os snapshots mais antigos
+        while total > budget and len(self._snapshots) > 1:
+            snapshot, size = self._snapshots.popleft()
+            snapshot.clear()
+            total -= size
+
+    @property
+    def snapshots(self) -> List[Dict]:
+        """Snapshots ainda mantidos, do mais antigo para o mais novo"""
+        with self._lock:
+            return [entry[0] for entry in self._snapshots]
+
+    def snapshot_bytes(self) -> int:
+        """Tamanho estimado de todos os snapshots mantidos"""
+        seen = set()
+        return sum(estimate_size(snapshot, seen) for snapshot in self.snapshots)
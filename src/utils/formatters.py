@@ -4,6 +4,9 @@ Funções de formatação centralizadas para contexto, SQL e números
 
 import re
 
+import numpy as np
+import pandas as pd
+
 
 def format_context_for_display(context_dict):
     """
@@ -187,4 +190,62 @@ def format_compact_number(value):
         else:
             return f"{value:.0f}"
     except:
-        return str(value)
\ No newline at end of file
+        return str(value)
+
+
+# Limiares e sufixos de format_compact_number, do maior para o menor
+_COMPACT_SCALES = ((1_000_000_000, "B"), (1_000_000, "M"), (1_000, "K"))
+
+
+def format_compact_numbers(values):
+    """
+    Versão vetorizada de format_compact_number para séries inteiras.
+
+    Escolhe a escala de todos os valores de uma vez com NumPy e monta as strings
+    por array, mantendo o mesmo resultado da função escalar. Valores não numéricos
+    caem na função escalar individualmente.
+
+    Args:
+        values: Lista, array ou Series de valores
+
+    Returns:
+        Array (dtype object) com os rótulos compactos, na ordem de entrada
+    """
+    original = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype=object)
+    numbers = pd.to_numeric(original, errors='coerce').to_numpy(dtype=float)
+
+    scales = [numbers >= threshold for threshold, _ in _COMPACT_SCALES]
+    divisors = np.select(scales, [float(threshold) for threshold, _ in _COMPACT_SCALES], default=1.0)
+    suffixes = np.select(scales, [suffix for _, suffix in _COMPACT_SCALES], default="")
+
+    labels = np.where(
+        divisors > 1,
+        np.char.mod("%.1f", numbers / divisors),
+        np.char.mod("%.0f", numbers)
+    )
+    labels = np.char.add(labels, suffixes).astype(object)
+
+    # NaN e valores não numéricos (None, texto) seguem o comportamento escalar
+    for i in np.flatnonzero(np.isnan(numbers)):
+        labels[i] = format_compact_number(original.iloc[i])
+
+    return labels
+
+
+def parse_numeric_cells(cells):
+    """
+    Converte células de texto (ex: "R$ 1,234.50") em floats de uma só vez.
+
+    Args:
+        cells: Lista ou Series de strings
+
+    Returns:
+        Array float com NaN onde a célula não é numérica
+    """
+    text = pd.Series(list(cells), dtype=object).astype(str)
+    cleaned = (
+        text.str.replace(',', '', regex=False)
+        .str.replace('R$', '', regex=False)
+        .str.strip()
+    )
+    return pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=float)
@@ -0,0 +1,75 @@
+"""
+Atualização da memória de longo prazo fora do caminho crítico do turno.
+
+No modo 'agentic' o LLM recebe a ferramenta de memória e pode gastar passos e
+tokens com ela antes de responder. No modo 'background' o agente responde sem
+essa ferramenta e a extração de memórias (MemoryManager do agno) é agendada
+aqui, depois que a resposta foi entregue.
+
+As métricas rotuladas por memory_mode (agent_run_seconds, llm_tokens_total,
+memory_tool_calls_total) permitem comparar latência e tokens por turno entre os
+modos; memory_update_seconds mede o trabalho que saiu do caminho crítico.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import MEMORY_CONFIG
+from utils.metrics import get_metrics_registry
+
+
+_executor_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Executor compartilhado do processo (criado sob demanda)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MEMORY_CONFIG.get("workers", 1),
+                thread_name_prefix="memory_update"
+            )
+        return _executor
+
+
+def _run_update(update: Callable, kwargs: dict):
+    registry = get_metrics_registry()
+    status = "ok"
+    try:
+        with registry.histogram(
+                "memory_update_seconds", "Extração de memórias fora do caminho crítico").time(mode="background"):
+            return update(**kwargs)
+    except Exception:
+        # Falha na memória não afeta o chat (a resposta já foi entregue)
+        status = "error"
+        return None
+    finally:
+        registry.counter("memory_updates_total", "Extrações de memória em segundo plano").inc(status=status)
+
+
+def schedule_memory_update(update: Callable, **kwargs) -> Future:
+    """
+    Agenda a extração de memórias em segundo plano.
+
+    Args:
+        update: Função de extração (ex: MemoryManager.create_user_memories)
+        **kwargs: Argumentos repassados (mensagem, user_id...)
+
+    Returns:
+        Future da extração (resultado None em caso de erro)
+    """
+    return _get_executor().submit(_run_update, update, kwargs)
+
+
+def count_memory_tool_calls(response, tool_names=None) -> int:
+    """Chamadas de ferramenta de memória feitas pelo LLM no turno (RunOutput.tools do agno)"""
+    names = set(tool_names or MEMORY_CONFIG.get("tool_names", []))
+    tools = getattr(response, 'tools', None) or []
+    return sum(1 for tool in tools if getattr(tool, 'tool_name', None) in names)
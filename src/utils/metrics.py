@@ -0,0 +1,304 @@
+"""
+Métricas em processo: contadores e histogramas com labels, expostos no formato Prometheus.
+
+O registro é compartilhado pelo processo (todas as sessões Streamlit) e pode ser
+lido de duas formas: pelo endpoint HTTP local /metrics, para um Prometheus sob
+carga, e pelo painel de debug do app, que mostra p50/p95 estimados a partir dos
+buckets dos histogramas (mesma interpolação do histogram_quantile do Prometheus).
+"""
+
+import bisect
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import METRICS_CONFIG
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key: Tuple, extra: Optional[Tuple] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Contador monotônico por combinação de labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in items]
+
+
+class Histogram:
+    """Histograma de buckets cumulativos por combinação de labels"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help_text
+        self.buckets = sorted(buckets)
+        # labels -> [contagens por bucket (+Inf no fim), soma, total]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[key] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração do bloco em segundos"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(labels))
+        return series[2] if series else 0
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """
+        Estima o quantil por interpolação linear dentro do bucket (como histogram_quantile).
+
+        Combina todas as séries cujos labels incluem os informados (sem labels, todas as séries).
+        """
+        wanted = set(_label_key(labels))
+        with self._lock:
+            selected = [series for key, series in self._series.items() if wanted.issubset(key)]
+            counts = [sum(s[0][i] for s in selected) for i in range(len(self.buckets) + 1)]
+
+        total = sum(counts)
+        if total == 0:
+            return None
+
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count > 0:
+                if i == len(self.buckets):
+                    # Acima do maior limite: o melhor palpite é o próprio limite
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+
+        lines = []
+        for key, (counts, total_sum, total_count) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float('inf')], counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total_sum:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {total_count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Registro de métricas nomeadas (criadas sob demanda e reutilizadas pelo nome)"""
+
+    def __init__(self, config: Dict = None):
+        self.config = {**METRICS_CONFIG, **(config or {})}
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text)
+            return self._metrics[name]
+
+    def histogram(self, name: str, help_text: str = "", buckets: Optional[Sequence[float]] = None) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, buckets or self.config["latency_buckets"])
+            return self._metrics[name]
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render_prometheus(self) -> str:
+        """Todas as métricas no formato de exposição de texto do Prometheus (0.0.4)"""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> List[Dict]:
+        """
+        Resumo para o painel de debug: contagem, p50 e p95 dos histogramas e total dos contadores.
+
+        Returns:
+            Lista de dicionários com métrica, labels e valores
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+
+        rows = []
+        for name, metric in metrics:
+            if isinstance(metric, Histogram):
+                with metric._lock:
+                    keys = sorted(metric._series)
+                for key in keys:
+                    labels = dict(key)
+                    rows.append({
+                        'metric': name,
+                        'labels': labels,
+                        'count': metric.count(**labels),
+                        'p50': metric.quantile(0.5, **labels),
+                        'p95': metric.quantile(0.95, **labels)
+                    })
+            else:
+                with metric._lock:
+                    items = sorted(metric._values.items())
+                for key, value in items:
+                    rows.append({'metric': name, 'labels': dict(key), 'value': value})
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+_server = None
+_server_error: Optional[OSError] = None  # Falha ao abrir a porta (não tenta de novo)
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Retorna o registro de métricas compartilhado do processo"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+
+def timed(name: str, help_text: str = "") -> Callable:
+    """Decorador que observa a duração da função no histograma `name` do registro global"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics_registry().histogram(name, help_text).time():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def tool_metrics_hook(function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+    """Hook de ferramenta do agno: latência e número de chamadas por ferramenta"""
+    registry = get_metrics_registry()
+    status = "ok"
+    try:
+        with registry.histogram("tool_call_seconds", "Duração das chamadas de ferramenta do agente").time(
+                tool=function_name):
+            return function_call(**arguments)
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        registry.counter("tool_calls_total", "Chamadas de ferramenta do agente").inc(tool=function_name, status=status)
+
+
+def start_metrics_server(registry: Optional[MetricsRegistry] = None, host: Optional[str] = None,
+                         port: Optional[int] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Inicia (uma única vez por processo) o endpoint HTTP /metrics em uma thread daemon.
+
+    Returns:
+        Servidor em execução ou None se desabilitado ou a porta estiver ocupada
+        (a falha é lembrada: reruns do Streamlit não tentam abrir a porta de novo)
+    """
+    global _server, _server_error
+    registry = registry or get_metrics_registry()
+    config = registry.config
+    if not config.get("http_enabled", False):
+        return None
+
+    with _registry_lock:
+        if _server is not None or _server_error is not None:
+            return _server
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sem log por requisição no console do Streamlit
+
+        try:
+            _server = ThreadingHTTPServer(
+                (host or config.get("http_host", "127.0.0.1"), config.get("http_port", 9464) if port is None else port),
+                MetricsHandler
+            )
+        except OSError as e:
+            # Porta ocupada (ex: outro processo do app): segue sem endpoint, sem interromper o app
+            _server_error = e
+            return None
+
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        return _server
@@ -0,0 +1,192 @@
+"""
+Resultados estruturados das queries SQL executadas pelo agente.
+
+Cada query de dados executada pelo DebugDuckDbTools fica guardada como tabela
+Arrow com um identificador (q1, q2, ...). As ferramentas de visualização recebem
+o resultado por esse identificador em vez de reconstruir um DataFrame a partir
+do texto devolvido ao LLM, então não há perda de tipos nem novo parsing, e um
+gráfico pode usar qualquer query anterior da mesma pergunta, não só a última.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import pyarrow as pa
+
+
+class QueryResult:
+    """Resultado de uma query: tabela Arrow, query de origem e metadados"""
+
+    def __init__(self, result_id: str, query: str, table: pa.Table, universe_total: Optional[float] = None):
+        self.result_id = result_id
+        self.query = query
+        self.table = table
+        self.universe_total = universe_total
+        self._df = None
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def columns(self) -> List[str]:
+        return self.table.column_names
+
+    @property
+    def df(self):
+        """
+        DataFrame pandas do resultado (convertido uma única vez, sob demanda).
+
+        Segue a conversão do `.df()` do DuckDB: DECIMAL vira float64 e DATE vira datetime64.
+        """
+        if self._df is None:
+            table = self.table
+            fields = [
+                pa.field(f.name, pa.float64()) if pa.types.is_decimal(f.type) else f
+                for f in table.schema
+            ]
+            if fields != list(table.schema):
+                table = table.cast(pa.schema(fields))
+            self._df = table.to_pandas(date_as_object=False)
+        return self._df
+
+    def to_dict(self) -> dict:
+        return {
+            'result_id': self.result_id,
+            'query': self.query,
+            'rows': self.num_rows,
+            'columns': self.columns,
+            'universe_total': self.universe_total
+        }
+
+
+class QueryResultStore:
+    """
+    Registro limitado dos resultados da pergunta atual.
+
+    Mantém os `max_results` mais recentes; os mais antigos são descartados.
+    Guarda também o texto das queries recentes, para que a repetição imediata da
+    mesma query seja respondida sem nova execução; esse atalho vale apenas enquanto
+    o handle do resultado existir e é descartado junto com os resultados.
+    """
+
+    def __init__(self, max_results: int = 20, max_recent: int = 10):
+        self.max_results = max_results
+        self.max_recent = max_recent
+        self._results = OrderedDict()
+        self._counter = 0
+        self._recent = OrderedDict()  # query normalizada -> (texto devolvido ao LLM, result_id ou None)
+        self._last_query = None
+
+    def add(self, query: str, table: pa.Table, universe_total: Optional[float] = None) -> QueryResult:
+        """Registra um resultado e devolve seu handle com o identificador gerado"""
+        self._counter += 1
+        result = QueryResult(f"q{self._counter}", query, table, universe_total)
+        self._results[result.result_id] = result
+
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+        return result
+
+    def get(self, result_id: Optional[str] = None) -> Optional[QueryResult]:
+        """Resultado pelo identificador ou, sem identificador, o mais recente"""
+        if result_id is None:
+            return self.latest()
+        return self._results.get(str(result_id).strip())
+
+    def latest(self) -> Optional[QueryResult]:
+        if not self._results:
+            return None
+        return next(reversed(self._results.values()))
+
+    def ids(self) -> List[str]:
+        return list(self._results.keys())
+
+    def remember(self, query: str, text: str, result: Optional[QueryResult] = None):
+        """Registra o texto devolvido para a query (e o handle, quando houve linhas)"""
+        key = _query_key(query)
+        self._recent[key] = (text, result.result_id if result is not None else None)
+        self._recent.move_to_end(key)
+        self._last_query = key
+        while len(self._recent) > self.max_recent:
+            self._recent.popitem(last=False)
+
+    def recall(self, query: str) -> Optional[Tuple[str, Optional[QueryResult]]]:
+        """
+        Resposta da query quando ela repete a última registrada.
+
+        Returns:
+            (texto, handle ou None para resultado sem linhas) ou None se a query
+            precisa ser executada (outra query, ou handle já descartado)
+        """
+        key = _query_key(query)
+        if key != self._last_query or key not in self._recent:
+            return None
+        text, result_id = self._recent[key]
+        if result_id is None:
+            return text, None
+        result = self._results.get(result_id)
+        if result is None:
+            return None
+        return text, result
+
+    def clear(self):
+        """Descarta os resultados e o atalho de queries repetidas (início de uma nova pergunta)"""
+        self._results.clear()
+        self._counter = 0
+        self._recent.clear()
+        self._last_query = None
+
+    def __len__(self):
+        return len(self._results)
+
+    def nbytes(self) -> int:
+        """Memória ocupada pelas tabelas Arrow retidas"""
+        return sum(result.table.nbytes for result in self._results.values())
+
+
+def _query_key(query: str) -> str:
+    return query.strip().lower()
+
+
+def relation_to_arrow(relation) -> pa.Table:
+    """Materializa uma relação DuckDB como tabela Arrow (compatível com versões antigas e novas)"""
+    if hasattr(relation, 'to_arrow_table'):
+        return relation.to_arrow_table()
+    result = relation.arrow()
+    # Versões recentes do DuckDB devolvem um RecordBatchReader em .arrow()
+    if isinstance(result, pa.RecordBatchReader):
+        return result.read_all()
+    return result
+
+
+def format_result_text(table: pa.Table) -> str:
+    """
+    Formata a tabela no texto devolvido ao LLM (mesmo formato do DuckDbTools do agno):
+    cabeçalho com os nomes das colunas e uma linha por registro, separados por vírgula.
+    """
+    rows = []
+    columns = [table.column(i).to_pylist() for i in range(table.num_columns)]
+    for row in zip(*columns):
+        if len(row) == 1:
+            rows.append(str(row[0]))
+        else:
+            rows.append(",".join(str(value) for value in row))
+    return ",".join(table.column_names) + "\n" + "\n".join(rows)
+
+
+def format_result_digest(result: QueryResult, max_rows: int = 10) -> str:
+    """
+    Resumo compacto de um resultado para o LLM (usado quando o resultado já virou gráfico).
+
+    Traz identificador, tamanho, total do universo (Top N) e as primeiras `max_rows`
+    linhas no formato de format_result_text; o gráfico e o resumo numérico usam todas.
+    """
+    lines = [f"Resultado {result.result_id}: {result.num_rows} linhas ({', '.join(result.columns)})"]
+    if result.universe_total is not None:
+        lines.append(f"Total do universo filtrado: {result.universe_total:g}")
+    lines.append(format_result_text(result.table.slice(0, max_rows)))
+    if result.num_rows > max_rows:
+        lines.append(f"... {result.num_rows - max_rows} linhas omitidas")
+    return "\n".join(lines)
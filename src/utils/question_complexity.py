@@ -0,0 +1,96 @@
+"""
+Classificação da complexidade da pergunta antes do PrincipalAgent.run.
+
+Mesma abordagem de _calculate_query_complexity (parsers/legacy/sql_context_parser.py):
+uma pontuação somada a partir de sinais da pergunta e classificada por faixas.
+Os sinais são os requisitos do ComparativeCalculator (crescimento, variação,
+comparação de períodos, participação), o número de dimensões citadas e palavras
+de análise, cálculo derivado, série temporal e pedidos em várias etapas.
+
+O nível escolhe o perfil do turno em COMPLEXITY_CONFIG: ferramentas registradas
+e reasoning_effort do modelo.
+"""
+
+import os
+import re
+import sys
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import COMPLEXITY_CONFIG
+from comparative_calculator import ComparativeCalculator
+
+
+_calculator = ComparativeCalculator()
+
+
+def _count_dimensions(question_lower: str) -> int:
+    return sum(1 for pattern, _ in ComparativeCalculator.DIMENSION_KEYWORDS if re.search(pattern, question_lower))
+
+
+def classify_question(question: str, config: Dict = None) -> Dict:
+    """
+    Pontua a pergunta e classifica sua complexidade.
+
+    Args:
+        question: Pergunta do usuário (sem o contexto de filtros anexado ao prompt)
+        config: Sobrescritas de COMPLEXITY_CONFIG
+
+    Returns:
+        {'level': 'simple' | 'moderate' | 'complex', 'score': int, 'signals': [str]}
+    """
+    config = {**COMPLEXITY_CONFIG, **(config or {})}
+    question_lower = (question or "").lower()
+    score = 0
+    signals: List[str] = []
+
+    def add(points: int, signal: str):
+        nonlocal score
+        score += points
+        signals.append(signal)
+
+    # Requisitos comparativos (uma análise comparativa já custa mais de uma etapa)
+    requirements = _calculator.detect_calculation_requirements(question_lower, {})
+    for key in ('needs_growth_calculation', 'needs_variation_calculation',
+                'needs_period_comparison', 'needs_share_shift'):
+        if requirements.get(key):
+            add(2 if key != 'needs_period_comparison' else 1, key)
+
+    # Várias dimensões cruzadas na mesma pergunta
+    dimensions = _count_dimensions(question_lower)
+    if dimensions > 1:
+        add(dimensions - 1, f"dimensions:{dimensions}")
+
+    if any(keyword in question_lower for keyword in config["analysis_keywords"]):
+        add(3, "analysis")
+    if any(keyword in question_lower for keyword in config["calculation_keywords"]):
+        add(1, "derived_calculation")
+    if any(keyword in question_lower for keyword in config["series_keywords"]):
+        add(1, "time_series")
+    if any(marker in question_lower for marker in config["multi_step_markers"]) or question_lower.count('?') > 1:
+        add(2, "multi_step")
+    if len(question_lower) > config["long_question_chars"]:
+        add(1, "long_question")
+
+    thresholds = config["thresholds"]
+    if score >= thresholds["complex"]:
+        level = "complex"
+    elif score >= thresholds["moderate"]:
+        level = "moderate"
+    else:
+        level = "simple"
+
+    return {'level': level, 'score': score, 'signals': signals}
+
+
+def select_profile(level: str, config: Dict = None) -> Optional[Dict]:
+    """
+    Perfil do turno para o nível (ferramentas e reasoning_effort).
+
+    Returns:
+        {'tools': [...], 'reasoning_effort': str} ou None com a classificação desabilitada
+    """
+    config = {**COMPLEXITY_CONFIG, **(config or {})}
+    if not config.get("enabled", True):
+        return None
+    return config["profiles"].get(level) or config["profiles"]["complex"]
@@ -0,0 +1,369 @@
+"""
+Ciclo de vida das sessões: agentes por sessão com liberação por inatividade ou memória.
+
+Cada sessão Streamlit tem seu PrincipalAgent, com conexão DuckDB, DataFrames e
+caches próprios. Uma aba abandonada mantinha tudo isso vivo até o fim da sessão
+do Streamlit. O SessionManager guarda os agentes (a sessão guarda apenas o seu
+session_user_id), registra a última atividade e a memória estimada de cada um e
+libera os agentes:
+
+- ociosos há mais de `idle_ttl_seconds`;
+- menos recentes, quando o total estimado passa de `memory_budget_mb`.
+
+Da sessão liberada fica apenas o estado leve (contexto de filtros e memória de
+conversação); ao voltar, o agente é recriado e recebe esse estado de volta. O
+histórico do chat continua na própria sessão (ChatHistory); o arquivo SQLite das
+mensagens arquivadas é removido quando a sessão é descartada ou esquecida.
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import SESSION_CONFIG
+from utils.chat_history import remove_archive, sweep_archives
+from utils.metrics import get_metrics_registry
+
+
+def _tool_connection(tool):
+    # No DuckDbTools do agno, `connection` cria uma conexão quando ainda não existe
+    if hasattr(tool, '_connection'):
+        return tool._connection
+    return getattr(tool, 'connection', None)
+
+
+def estimate_agent_bytes(agent, df_agent: Optional[pd.DataFrame] = None) -> Dict[str, int]:
+    """
+    Memória estimada retida por um agente, por componente.
+
+    Agentes clonados de um AgentTemplate (atributo template_key) compartilham os
+    DataFrames e o banco DuckDB do template: essa parte vai para 'shared' e o
+    SessionManager a conta uma vez por template; o restante é da sessão.
+
+    Returns:
+        {'dataframes', 'duckdb', 'query_results', 'diagnostics', 'shared'} em bytes
+    """
+    usage = {'dataframes': 0, 'duckdb': 0, 'query_results': 0, 'diagnostics': 0, 'shared': 0}
+    shared = getattr(agent, 'template_key', None) is not None
+
+    seen = set()
+    for df in (getattr(agent, 'df_normalized', None), df_agent):
+        if isinstance(df, pd.DataFrame) and id(df) not in seen:
+            seen.add(id(df))
+            usage['shared' if shared else 'dataframes'] += int(df.memory_usage(index=True, deep=False).sum())
+
+    for tool in getattr(agent, 'tools', None) or []:
+        connection = _tool_connection(tool)
+        if connection is not None and id(connection) not in seen:
+            seen.add(id(connection))
+            try:
+                usage['shared' if shared else 'duckdb'] += int(connection.execute(
+                    "SELECT COALESCE(SUM(memory_usage_bytes), 0) FROM duckdb_memory()"
+                ).fetchone()[0])
+            except Exception:
+                pass  # Conexão fechada ou versão sem duckdb_memory()
+        results = getattr(tool, 'results', None)
+        if hasattr(results, 'nbytes'):
+            usage['query_results'] += results.nbytes()
+
+    debug_info = getattr(agent, 'debug_info', None)
+    if hasattr(debug_info, 'snapshot_bytes'):
+        usage['diagnostics'] = debug_info.snapshot_bytes()
+
+    return usage
+
+
+def release_agent(agent):
+    """Fecha as conexões DuckDB e descarta os caches do agente (o objeto não deve mais ser usado)"""
+    for tool in getattr(agent, 'tools', None) or []:
+        connection = _tool_connection(tool)
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        results = getattr(tool, 'results', None)
+        if hasattr(results, 'clear'):
+            results.clear()
+
+    debug_info = getattr(agent, 'debug_info', None)
+    if debug_info is not None:
+        debug_info.clear()
+
+
+class SessionRecord:
+    """Agente de uma sessão e sua contabilidade"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.agent = None
+        self.df_agent = None
+        self.agent_version = None
+        self.last_activity = time.time()
+        self.last_measure = 0.0
+        self.bytes: Dict[str, int] = {}
+        self.shared_key = None  # template_key do agente (memória compartilhada entre clones)
+        # Estado leve guardado quando o agente é liberado
+        self.saved_state: Dict = {}
+        self.evicted_reason: Optional[str] = None
+
+    @property
+    def total_bytes(self) -> int:
+        """Memória própria da sessão (sem a parte compartilhada do template)"""
+        if self.agent is None:
+            return 0
+        return sum(value for name, value in self.bytes.items() if name != 'shared')
+
+    @property
+    def shared_bytes(self) -> int:
+        return self.bytes.get('shared', 0) if self.agent is not None else 0
+
+
+class SessionManager:
+    """Registro de agentes por sessão com liberação por inatividade e por orçamento de memória"""
+
+    def __init__(self, config: Dict = None):
+        self.config = {**SESSION_CONFIG, **(config or {})}
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def get(self, session_id: str, agent_version: Optional[str] = None) -> Optional[Tuple]:
+        """
+        Agente em memória da sessão (registra a atividade).
+
+        Args:
+            session_id: session_user_id da sessão Streamlit
+            agent_version: Versão esperada (ex: hash do prompt); outra versão conta como ausente
+
+        Returns:
+            (agent, df_agent) ou None se a sessão não tem agente válido
+        """
+        now = time.time()
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None:
+                return None
+            record.last_activity = now
+            if record.agent is None or record.agent_version != agent_version:
+                return None
+            agent, df_agent = record.agent, record.df_agent
+            remeasure = now - record.last_measure >= self.config["measure_interval_seconds"]
+
+        if remeasure:
+            self._measure(session_id)
+        self.evict_idle()
+        return agent, df_agent
+
+    def put(self, session_id: str, agent, df_agent=None, agent_version: Optional[str] = None):
+        """Registra o agente da sessão (substitui o anterior) e aplica o orçamento de memória"""
+        with self._lock:
+            record = self._sessions.setdefault(session_id, SessionRecord(session_id))
+            previous = record.agent if record.agent is not agent else None
+            record.agent, record.df_agent, record.agent_version = agent, df_agent, agent_version
+            record.last_activity = time.time()
+            record.saved_state = {}
+            record.evicted_reason = None
+
+        if previous is not None:
+            release_agent(previous)
+        self._measure(session_id)
+        self.evict_idle()
+        self.enforce_memory_budget(protect=session_id)
+
+    def restored_state(self, session_id: str) -> Dict:
+        """
+        Estado leve de um agente liberado (para a recriação ao voltar à sessão).
+
+        Returns:
+            {'persistent_context', 'conversation_memory', 'evicted_reason'} ou {} se não houve liberação
+        """
+        with self._lock:
+            record = self._sessions.get(session_id)
+            if record is None or not record.saved_state:
+                return {}
+            return {**record.saved_state, 'evicted_reason': record.evicted_reason}
+
+    def remove(self, session_id: str, forget_history: bool = True):
+        """
+        Descarta a sessão e libera o agente (ex: ao limpar o chat).
+
+        Args:
+            forget_history: Remove também o histórico arquivado da sessão; False quando
+                apenas o agente é recriado e a conversa continua
+        """
+        with self._lock:
+            record = self._sessions.pop(session_id, None)
+        if record is not None and record.agent is not None:
+            release_agent(record.agent)
+        if forget_history:
+            remove_archive(session_id)
+
+    def _measure(self, session_id: str):
+        with self._lock:
+            record = self._sessions.get(session_id)
+            agent, df_agent = (record.agent, record.df_agent) if record else (None, None)
+        if agent is None:
+            return
+        usage = estimate_agent_bytes(agent, df_agent)
+        with self._lock:
+            if record.agent is agent:
+                record.bytes = usage
+                record.shared_key = getattr(agent, 'template_key', None)
+                record.last_measure = time.time()
+
+    def _evict(self, record: SessionRecord, reason: str):
+        """Libera o agente mantendo o estado leve (chamar com _lock)"""
+        agent = record.agent
+        record.saved_state = {
+            'persistent_context': dict(getattr(agent, 'persistent_context', {}) or {}),
+            'conversation_memory': getattr(agent, 'conversation_memory', "") or ""
+        }
+        record.agent = None
+        record.df_agent = None
+        record.bytes = {}
+        record.shared_key = None
+        record.evicted_reason = reason
+        get_metrics_registry().counter(
+            "sessions_evicted_total", "Agentes de sessão liberados"
+        ).inc(reason=reason)
+        return agent
+
+    def evict_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Libera os agentes sem atividade há mais de idle_ttl_seconds e esquece as sessões
+        liberadas sem retorno há mais de forget_after_seconds (com o histórico arquivado).
+
+        Returns:
+            IDs das sessões liberadas
+        """
+        now = now if now is not None else time.time()
+        ttl = self.config["idle_ttl_seconds"]
+        released = []
+        forgotten = []
+        with self._lock:
+            for record in list(self._sessions.values()):
+                idle = now - record.last_activity
+                if record.agent is not None and idle > ttl:
+                    released.append((record.session_id, self._evict(record, "idle")))
+                elif record.agent is None and idle > self.config["forget_after_seconds"]:
+                    del self._sessions[record.session_id]
+                    forgotten.append(record.session_id)
+
+        for _, agent in released:
+            release_agent(agent)
+        for session_id in forgotten:
+            remove_archive(session_id)
+        return [session_id for session_id, _ in released]
+
+    def sweep_chat_archives(self, now: Optional[float] = None) -> List[str]:
+        """
+        Remove históricos arquivados de sessões que o processo não conhece mais
+        (ex: criadas antes de um reinício) e sem escrita há mais de forget_after_seconds.
+
+        Returns:
+            IDs das sessões cujos arquivos foram removidos
+        """
+        with self._lock:
+            known = list(self._sessions)
+        return sweep_archives(known, self.config["forget_after_seconds"], now=now)
+
+    def enforce_memory_budget(self, protect: Optional[str] = None, now: Optional[float] = None) -> List[str]:
+        """
+        Libera os agentes menos recentes até o total estimado caber no orçamento.
+
+        Args:
+            protect: Sessão que nunca é liberada (a que está sendo atendida)
+
+        Returns:
+            IDs das sessões liberadas
+        """
+        now = now if now is not None else time.time()
+        budget = self.config["memory_budget_mb"] * 1024 * 1024
+        min_idle = self.config["pressure_min_idle_seconds"]
+        released = []
+        with self._lock:
+            total = self._total_bytes()
+            candidates = sorted(
+                (r for r in self._sessions.values()
+                 if r.agent is not None and r.session_id != protect and now - r.last_activity >= min_idle),
+                key=lambda r: r.last_activity
+            )
+            for record in candidates:
+                if total <= budget:
+                    break
+                total -= record.total_bytes
+                shared_key, shared_bytes = record.shared_key, record.shared_bytes
+                released.append((record.session_id, self._evict(record, "memory")))
+                # Memória do template só é liberada com o último clone ativo
+                if shared_key is not None and not any(
+                        r.agent is not None and r.shared_key == shared_key for r in self._sessions.values()):
+                    total -= shared_bytes
+
+        for _, agent in released:
+            release_agent(agent)
+        return [session_id for session_id, _ in released]
+
+    def _total_bytes(self) -> int:
+        """Memória própria das sessões ativas + a de cada template compartilhado, uma vez (chamar com _lock)"""
+        shared = {}
+        total = 0
+        for record in self._sessions.values():
+            total += record.total_bytes
+            if record.shared_key is not None and record.agent is not None:
+                shared[record.shared_key] = max(shared.get(record.shared_key, 0), record.shared_bytes)
+        return total + sum(shared.values())
+
+    def total_bytes(self) -> int:
+        """Memória estimada de todos os agentes em memória (templates compartilhados contados uma vez)"""
+        with self._lock:
+            return self._total_bytes()
+
+    def stats(self) -> List[Dict]:
+        """Uma linha por sessão: atividade, memória estimada e estado"""
+        now = time.time()
+        with self._lock:
+            return [
+                {
+                    'session_id': record.session_id,
+                    'active': record.agent is not None,
+                    'idle_seconds': now - record.last_activity,
+                    'memory_mb': record.total_bytes / (1024 * 1024),
+                    'evicted_reason': record.evicted_reason
+                }
+                for record in sorted(self._sessions.values(), key=lambda r: -r.last_activity)
+            ]
+
+    def start_sweeper(self):
+        """Varredura periódica em thread daemon (idempotente)"""
+        interval = self.config["sweep_interval_seconds"]
+        if not interval or self._sweeper is not None:
+            return
+
+        def sweep():
+            while True:
+                time.sleep(interval)
+                self.evict_idle()
+                self.enforce_memory_budget()
+                self.sweep_chat_archives()
+
+        self._sweeper = threading.Thread(target=sweep, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager() -> SessionManager:
+    """Retorna o SessionManager compartilhado do processo"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = SessionManager()
+        return _manager
@@ -0,0 +1,321 @@
+"""
+Rastreamento leve por turno: spans aninhados com início e fim de cada etapa.
+
+Um turno do chat abre o span raiz "turn"; dentro dele ficam os passos do LLM,
+as chamadas de ferramenta, as execuções SQL, a extração de filtros, a preparação
+da visualização e a renderização Plotly. O span ativo é mantido em um ContextVar,
+então sessões Streamlit em threads diferentes não misturam seus spans.
+
+Quando o span raiz termina, o turno completo é exportado para arquivo como
+JSON lines (um span por linha) ou OTLP/JSON (um ExportTraceServiceRequest por
+linha, o formato do file exporter do OpenTelemetry Collector).
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import TRACING_CONFIG
+
+
+_current_span: ContextVar = ContextVar('current_span', default=None)
+
+
+class Span:
+    """Etapa cronometrada de um turno"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = 'ok'
+        self._token = None
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = 'error'
+        self.attributes['error.type'] = type(error).__name__
+        self.attributes['error.message'] = str(error)
+
+    def to_dict(self) -> Dict:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_unix_nano': self.start_ns,
+            'end_unix_nano': self.end_ns,
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'attributes': self.attributes
+        }
+
+
+class Tracer:
+    """
+    Cria spans aninhados e exporta cada turno ao fechar o span raiz.
+
+    Uso:
+        with tracer.span("sql.execute", query=sql) as span:
+            ...
+            span.set_attribute("rows", n)
+
+    ou, quando o bloco não cabe em um `with`, start_span/end_span.
+    """
+
+    def __init__(self, config: Dict = None):
+        self.config = {**TRACING_CONFIG, **(config or {})}
+        self.enabled = self.config.get("enabled", True)
+        self._open_traces = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_trace: List[Dict] = []
+
+    def _clip(self, value: Any) -> Any:
+        if isinstance(value, (int, float, bool)) or value is None:
+            return value
+        text = str(value)
+        limit = self.config.get("max_attribute_length", 500)
+        return text if len(text) <= limit else text[:limit] + "..."
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, **attributes) -> Optional[Span]:
+        """Abre um span filho do span ativo (ou raiz de um novo turno) e o torna o ativo"""
+        if not self.enabled:
+            return None
+
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        span = Span(name, trace_id, parent.span_id if parent is not None else None,
+                    {k: self._clip(v) for k, v in attributes.items()})
+        span._token = _current_span.set(span)
+        return span
+
+    def end_span(self, span: Optional[Span], error: Optional[BaseException] = None):
+        """Fecha o span; ao fechar o raiz, exporta o turno completo"""
+        if span is None or span.end_ns is not None:
+            return
+
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.record_error(error)
+        span.attributes = {k: self._clip(v) for k, v in span.attributes.items()}
+        if span._token is not None:
+            try:
+                _current_span.reset(span._token)
+            except ValueError:
+                pass  # Fechado em outro contexto (ex: outra thread): o span ativo de lá não muda
+            span._token = None
+
+        with self._lock:
+            spans = self._open_traces.setdefault(span.trace_id, [])
+            spans.append(span.to_dict())
+            finished = None
+            if span.parent_id is None:
+                finished = self._open_traces.pop(span.trace_id)
+                self.last_trace = finished
+            while len(self._open_traces) > self.config.get("max_open_traces", 50):
+                self._open_traces.popitem(last=False)
+
+        if finished is not None:
+            self.export(finished)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = self.start_span(name, **attributes)
+        try:
+            yield span if span is not None else _NoopSpan()
+        except BaseException as e:
+            self.end_span(span, error=e)
+            raise
+        else:
+            self.end_span(span)
+
+    def trace_spans(self, trace_id: str) -> List[Dict]:
+        """Spans já encerrados de um turno (aberto ou o último exportado)"""
+        with self._lock:
+            if trace_id in self._open_traces:
+                return list(self._open_traces[trace_id])
+        if self.last_trace and self.last_trace[0]['trace_id'] == trace_id:
+            return list(self.last_trace)
+        return []
+
+    # ------------------------------------------------------------------
+    # Integração com o agente (agno)
+    # ------------------------------------------------------------------
+
+    def tool_hook(self, function_name: str, function_call: Callable, arguments: Dict[str, Any]):
+        """Hook de ferramenta do agno: cada chamada vira um span tool.<nome>"""
+        with self.span(f"tool.{function_name}", tool=function_name,
+                       arguments=json.dumps(arguments, ensure_ascii=False, default=str)) as span:
+            result = function_call(**arguments)
+            if isinstance(result, str):
+                span.set_attribute('result_chars', len(result))
+            return result
+
+    def instrument_model(self, model):
+        """Envolve invoke/ainvoke do modelo para registrar cada passo do LLM como span llm.step"""
+        if not self.enabled or getattr(model, '_tracing_instrumented', False):
+            return model
+
+        tracer = self
+        model_id = getattr(model, 'id', type(model).__name__)
+
+        def _describe(span, messages, response):
+            span.set_attribute('messages', len(messages) if messages is not None else 0)
+            tool_calls = getattr(response, 'tool_calls', None)
+            span.set_attribute('tool_calls', len(tool_calls) if tool_calls else 0)
+
+        if hasattr(model, 'invoke'):
+            original_invoke = model.invoke
+
+            @functools.wraps(original_invoke)
+            def invoke(*args, **kwargs):
+                with tracer.span("llm.step", model=model_id) as span:
+                    response = original_invoke(*args, **kwargs)
+                    _describe(span, kwargs.get('messages', args[0] if args else None), response)
+                    return response
+
+            object.__setattr__(model, 'invoke', invoke)
+
+        if hasattr(model, 'ainvoke'):
+            original_ainvoke = model.ainvoke
+
+            @functools.wraps(original_ainvoke)
+            async def ainvoke(*args, **kwargs):
+                with tracer.span("llm.step", model=model_id) as span:
+                    response = await original_ainvoke(*args, **kwargs)
+                    _describe(span, kwargs.get('messages', args[0] if args else None), response)
+                    return response
+
+            object.__setattr__(model, 'ainvoke', ainvoke)
+
+        object.__setattr__(model, '_tracing_instrumented', True)
+        return model
+
+    # ------------------------------------------------------------------
+    # Exportação
+    # ------------------------------------------------------------------
+
+    def export(self, spans: List[Dict]):
+        """Grava o turno no arquivo configurado (falhas de escrita não afetam o chat)"""
+        path = self.config.get("export_path")
+        if not path or not spans:
+            return
+
+        if self.config.get("export_format") == "otlp":
+            lines = [json.dumps(to_otlp(spans), ensure_ascii=False, default=str)]
+        else:
+            lines = [json.dumps(span, ensure_ascii=False, default=str) for span in spans]
+
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            with self._lock, open(path, 'a', encoding='utf-8') as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError:
+            pass
+
+
+class _NoopSpan:
+    """Span vazio usado com o rastreamento desabilitado"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': '' if value is None else str(value)}
+
+
+def to_otlp(spans: List[Dict], service_name: str = "target-ai-agent") -> Dict:
+    """Converte os spans de um turno para OTLP/JSON (ExportTraceServiceRequest)"""
+    otlp_spans = []
+    for span in spans:
+        otlp_span = {
+            'traceId': span['trace_id'],
+            'spanId': span['span_id'],
+            'name': span['name'],
+            'kind': 1,  # SPAN_KIND_INTERNAL
+            'startTimeUnixNano': str(span['start_unix_nano']),
+            'endTimeUnixNano': str(span['end_unix_nano']),
+            'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in span['attributes'].items()],
+            'status': {'code': 2 if span['status'] == 'error' else 1}
+        }
+        if span['parent_id']:
+            otlp_span['parentSpanId'] = span['parent_id']
+        otlp_spans.append(otlp_span)
+
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'target-ai-agent.tracing'}, 'spans': otlp_spans}]
+        }]
+    }
+
+
+def summarize_trace(spans: List[Dict]) -> List[Dict]:
+    """
+    Spans de um turno em ordem de início, com a profundidade na árvore.
+
+    Returns:
+        Lista de {'name', 'depth', 'duration_ms', 'status'} para exibição no debug
+    """
+    by_id = {span['span_id']: span for span in spans}
+
+    def depth(span):
+        level, parent = 0, span['parent_id']
+        while parent in by_id:
+            level += 1
+            parent = by_id[parent]['parent_id']
+        return level
+
+    return [
+        {'name': span['name'], 'depth': depth(span), 'duration_ms': span['duration_ms'], 'status': span['status']}
+        for span in sorted(spans, key=lambda s: s['start_unix_nano'])
+    ]
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Retorna o Tracer compartilhado do processo"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
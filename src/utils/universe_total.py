@@ -0,0 +1,243 @@
+"""
+Total do universo para queries Top N calculado na mesma execução.
+
+Queries de ranking (GROUP BY + ORDER BY + LIMIT) mostram apenas os N primeiros
+grupos, mas as métricas de concentração precisam do total de todos os grupos
+filtrados. Em vez de montar uma segunda query sem LIMIT, a medida ranqueada ganha
+uma coluna `SUM(medida) OVER ()`: a janela é avaliada após o GROUP BY e antes do
+LIMIT, então cada linha retornada carrega o total do universo sem nova varredura.
+
+Exemplo:
+    SELECT UF_Cliente, SUM(Valor_Vendido) AS total FROM dados_comerciais
+    GROUP BY UF_Cliente ORDER BY total DESC LIMIT 5
+    →
+    SELECT UF_Cliente, SUM(Valor_Vendido) AS total, SUM(SUM(Valor_Vendido)) OVER () AS __total_universo
+    FROM dados_comerciais GROUP BY UF_Cliente ORDER BY total DESC LIMIT 5
+
+A medida pode estar dentro de wrappers escalares que preservam a soma entre grupos
+(ROUND, CAST, COALESCE com literal, multiplicação ou divisão por constante): a
+janela soma a própria expressão ranqueada, na mesma unidade exibida no gráfico.
+
+Com HAVING, a janela seria avaliada apenas sobre os grupos que passam no filtro;
+a condição é movida para QUALIFY (avaliado depois das janelas), de modo que o
+total cobre todos os grupos do universo filtrado pelo WHERE, como a query sem LIMIT.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+
+UNIVERSE_TOTAL_COLUMN = "__total_universo"
+
+# Agregações cuja soma entre grupos é igual ao total do universo
+_ADDITIVE_AGGREGATE = re.compile(r"^(?:SUM|COUNT)\s*\((?!\s*DISTINCT\b)", re.IGNORECASE)
+_AGGREGATE_CALL = re.compile(r"\b(?:SUM|COUNT|AVG|MIN|MAX|MEDIAN|STDDEV\w*)\s*\(", re.IGNORECASE)
+_SCALAR_WRAPPER = re.compile(r"^(ROUND|CAST|TRY_CAST|COALESCE)\s*\(", re.IGNORECASE)
+_NUMERIC_LITERAL = re.compile(r"^[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:E[+-]?\d+)?$", re.IGNORECASE)
+_ALIAS = re.compile(r"^(.*?)(?:\s+AS)?\s+(\"[^\"]+\"|[A-Za-z_][A-Za-z0-9_]*)$", re.IGNORECASE | re.DOTALL)
+
+
+def _depth_map(query: str) -> List[int]:
+    """Profundidade de parênteses por posição (-1 dentro de strings e identificadores entre aspas)"""
+    depths = []
+    depth = 0
+    quote = None
+    for char in query:
+        if quote:
+            depths.append(-1)
+            if char == quote:
+                quote = None
+            continue
+        if char in ("'", '"'):
+            quote = char
+            depths.append(-1)
+            continue
+        if char == '(':
+            depths.append(depth)
+            depth += 1
+            continue
+        if char == ')':
+            depth -= 1
+        depths.append(depth)
+    return depths
+
+
+def _top_level_matches(pattern: str, query: str, depths: List[int]) -> List[re.Match]:
+    """Ocorrências do padrão fora de parênteses e strings"""
+    return [m for m in re.finditer(pattern, query, re.IGNORECASE) if depths[m.start()] == 0]
+
+
+def _is_additive_aggregate(expression: str) -> bool:
+    """Verifica se a expressão é uma única chamada SUM/COUNT (sem DISTINCT)"""
+    match = _ADDITIVE_AGGREGATE.match(expression)
+    if not match or not expression.endswith(')'):
+        return False
+    # O parêntese aberto pela agregação deve fechar apenas no final da expressão
+    depths = _depth_map(expression)
+    return all(d != 0 for d in depths[match.end():-1])
+
+
+def _wraps_whole(expression: str, open_index: int) -> bool:
+    """Verifica se o parêntese aberto em open_index fecha apenas no final da expressão"""
+    depths = _depth_map(expression)
+    base = depths[open_index]
+    return expression.endswith(')') and all(d > base for d in depths[open_index + 1:-1])
+
+
+def _top_level_split(expression: str, pattern: str) -> List[str]:
+    """Divide a expressão nas ocorrências de nível superior do padrão"""
+    depths = _depth_map(expression)
+    parts, start = [], 0
+    for match in re.finditer(pattern, expression, re.IGNORECASE):
+        if depths[match.start()] == 0:
+            parts.append(expression[start:match.start()].strip())
+            start = match.end()
+    parts.append(expression[start:].strip())
+    return parts
+
+
+def _unwrap_scalar(expression: str) -> str:
+    """
+    Remove wrappers escalares que preservam a soma entre grupos.
+
+    Ex: ROUND(SUM(x), 2), CAST(SUM(x) AS BIGINT), SUM(x)::DOUBLE, SUM(x) / 1000,
+    100 * COUNT(*), COALESCE(SUM(x), 0) → a agregação interna
+    """
+    while True:
+        expression = expression.strip()
+        if expression.startswith('(') and _wraps_whole(expression, 0):
+            expression = expression[1:-1]
+            continue
+
+        cast_suffix = _top_level_split(expression, r"::")
+        if len(cast_suffix) == 2 and re.match(r"^[A-Za-z_][\w\s(),]*$", cast_suffix[1]):
+            expression = cast_suffix[0]
+            continue
+
+        wrapper = _SCALAR_WRAPPER.match(expression)
+        if wrapper and _wraps_whole(expression, wrapper.end() - 1):
+            inner = expression[wrapper.end():-1]
+            name = wrapper.group(1).upper()
+            if name in ('CAST', 'TRY_CAST'):
+                arguments = _top_level_split(inner, r"\bAS\b")
+            else:
+                arguments = _split_select_items(inner)
+            if name == 'COALESCE' and not all(_NUMERIC_LITERAL.match(a) for a in arguments[1:]):
+                return expression
+            expression = arguments[0]
+            continue
+
+        product = _top_level_split(expression, r"[*/]")
+        if len(product) == 2:
+            operator = expression[len(product[0]):].lstrip()[0]
+            if _NUMERIC_LITERAL.match(product[1]):
+                expression = product[0]
+                continue
+            if operator == '*' and _NUMERIC_LITERAL.match(product[0]):
+                expression = product[1]
+                continue
+        return expression
+
+
+def _is_additive_measure(expression: str) -> bool:
+    """Agregação aditiva, possivelmente dentro de wrappers escalares lineares"""
+    return _is_additive_aggregate(_unwrap_scalar(expression))
+
+
+def _split_select_items(select_list: str) -> List[str]:
+    """Divide a lista do SELECT nas vírgulas de nível superior"""
+    depths = _depth_map(select_list)
+    items, start = [], 0
+    for i, char in enumerate(select_list):
+        if char == ',' and depths[i] == 0:
+            items.append(select_list[start:i].strip())
+            start = i + 1
+    items.append(select_list[start:].strip())
+    return [item for item in items if item]
+
+
+def _split_alias(item: str) -> Tuple[str, Optional[str]]:
+    """Separa expressão e alias de um item do SELECT"""
+    if item.endswith(')'):
+        return item, None
+    match = _ALIAS.match(item)
+    if match and match.group(1).strip():
+        return match.group(1).strip(), match.group(2).strip('"')
+    return item, None
+
+
+def add_universe_total(query: str) -> Optional[str]:
+    """
+    Acrescenta à query Top N uma coluna com o total do universo filtrado.
+
+    A medida considerada é a do primeiro critério do ORDER BY quando ele aponta
+    para uma agregação aditiva (SUM ou COUNT sem DISTINCT, possivelmente dentro de
+    wrappers escalares lineares); caso contrário, a primeira medida aditiva do SELECT.
+    HAVING é reescrito como QUALIFY para que o total inclua os grupos filtrados.
+
+    Args:
+        query: Query SQL executada pelo agente
+
+    Returns:
+        Query com a coluna UNIVERSE_TOTAL_COLUMN ou None se não for Top N elegível
+    """
+    if not query:
+        return None
+
+    query = query.strip().rstrip(';')
+    depths = _depth_map(query)
+
+    if _top_level_matches(r"\b(?:UNION|INTERSECT|EXCEPT|WITH|QUALIFY)\b", query, depths):
+        return None
+    if UNIVERSE_TOTAL_COLUMN in query or re.search(r"\bOVER\s*\(", query, re.IGNORECASE):
+        return None
+
+    selects = _top_level_matches(r"\bSELECT\b", query, depths)
+    froms = _top_level_matches(r"\bFROM\b", query, depths)
+    group_by = _top_level_matches(r"\bGROUP\s+BY\b", query, depths)
+    order_by = _top_level_matches(r"\bORDER\s+BY\b", query, depths)
+    limit = _top_level_matches(r"\bLIMIT\s+\d+", query, depths)
+    if len(selects) != 1 or not froms or not group_by or not limit:
+        return None
+
+    select_end = froms[0].start()
+    select_list = query[selects[0].end():select_end]
+    if re.match(r"\s*DISTINCT\b", select_list, re.IGNORECASE):
+        return None
+
+    items = [_split_alias(item) for item in _split_select_items(select_list)]
+    ranked = None
+
+    if order_by:
+        order_end = limit[0].start() if limit[0].start() > order_by[0].end() else len(query)
+        first_key = _split_select_items(query[order_by[0].end():order_end])[0]
+        first_key = re.sub(r"\s+(?:ASC|DESC)(?:\s+NULLS\s+(?:FIRST|LAST))?$", "", first_key, flags=re.IGNORECASE).strip()
+        for expression, alias in items:
+            if first_key.lower() in (expression.lower(), (alias or "").lower()):
+                ranked = expression
+                break
+        else:
+            if first_key.isdigit() and 0 < int(first_key) <= len(items):
+                ranked = items[int(first_key) - 1][0]
+            elif _AGGREGATE_CALL.search(first_key):
+                ranked = first_key
+
+    if ranked is not None and _AGGREGATE_CALL.search(ranked):
+        # Ranking por uma medida: só há total do universo se ela for aditiva
+        measure = ranked if _is_additive_measure(ranked) else None
+    else:
+        # Sem ORDER BY ou ranking por dimensão: primeira medida aditiva do SELECT
+        measure = next((e for e, _ in items if _is_additive_measure(e)), None)
+    if measure is None:
+        return None
+
+    rest = query[select_end:]
+    having = _top_level_matches(r"\bHAVING\b", rest, _depth_map(rest))
+    if len(having) > 1:
+        return None
+    if having:
+        # Janela antes do filtro de grupos: total de todos os grupos, não só dos que passam no HAVING
+        rest = f"{rest[:having[0].start()]}QUALIFY{rest[having[0].end():]}"
+
+    total_item = f", SUM({measure}) OVER () AS {UNIVERSE_TOTAL_COLUMN}"
+    return f"{query[:select_end].rstrip()}{total_item} {rest}"
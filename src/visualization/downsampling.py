@@ -0,0 +1,146 @@
+"""
+Redução de pontos para séries temporais longas antes da renderização.
+
+Séries diárias cobrindo todo o período do dataset (ou até 10 séries simultâneas)
+geram payloads Plotly pesados. Aqui cada série é reduzida a um orçamento de pontos
+preservando a forma visual: LTTB (Largest-Triangle-Three-Buckets) mantém os pontos
+de maior área relativa aos vizinhos e min/max mantém os extremos de cada intervalo.
+O resumo numérico continua sendo calculado sobre os dados completos.
+"""
+
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import VISUALIZATION_CONFIG
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Seleciona índices pelo algoritmo Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: Eixo X numérico e ordenado
+        y: Valores
+        threshold: Número de pontos desejado (>= 3)
+
+    Returns:
+        Índices selecionados em ordem crescente
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Pontos internos divididos em threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    previous = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Média do próximo bucket (ou último ponto) como terceiro vértice
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs(
+            (x[previous] - avg_x) * (bucket_y - y[previous])
+            - (x[previous] - bucket_x) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Seleciona o mínimo e o máximo de cada intervalo (além do primeiro e último ponto).
+
+    Args:
+        y: Valores
+        threshold: Número máximo de pontos
+
+    Returns:
+        Índices selecionados em ordem crescente
+    """
+    n = len(y)
+    if threshold >= n or threshold < 4:
+        return np.arange(n)
+
+    n_buckets = (threshold - 2) // 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    indices = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        bucket = y[start:end]
+        indices.extend([start + int(np.argmin(bucket)), start + int(np.argmax(bucket))])
+
+    return np.unique(indices)
+
+
+def _downsample_single(df: pd.DataFrame, x_col: str, y_col: str, max_points: int, method: str) -> pd.DataFrame:
+    """Reduz uma única série já ordenada pelo eixo X"""
+    if len(df) <= max_points:
+        return df
+
+    y = pd.to_numeric(df[y_col], errors='coerce').fillna(0).to_numpy(dtype=float)
+    if method == 'minmax':
+        indices = minmax_indices(y, max_points)
+    else:
+        x_values = df[x_col]
+        if pd.api.types.is_datetime64_any_dtype(x_values):
+            x = x_values.astype('int64').to_numpy(dtype=float)
+        else:
+            x = np.arange(len(df), dtype=float)
+        indices = lttb_indices(x, y, max_points)
+
+    return df.iloc[indices]
+
+
+def downsample_series(df: pd.DataFrame, x_col: str = 'date', y_col: str = 'value',
+                      group_col: Optional[str] = None, config: Dict = None) -> pd.DataFrame:
+    """
+    Reduz séries temporais ao orçamento de pontos configurado.
+
+    Em gráficos multi-série o orçamento é dividido entre as categorias, com um
+    mínimo por série para não descaracterizar séries curtas.
+
+    Args:
+        df: DataFrame com eixo X, valores e (opcional) coluna de categoria
+        x_col: Coluna do eixo X
+        y_col: Coluna de valores
+        group_col: Coluna de categoria para múltiplas séries
+        config: Configuração de visualização (padrão: VISUALIZATION_CONFIG)
+
+    Returns:
+        DataFrame reduzido (o próprio df se já estiver dentro do orçamento)
+    """
+    config = config or VISUALIZATION_CONFIG
+    max_points = config.get("line_chart_max_points", 1000)
+    method = config.get("downsampling_method", "lttb")
+
+    if df is None or not max_points or len(df) <= max_points:
+        return df
+
+    if group_col and group_col in df.columns:
+        groups = list(df.groupby(group_col, sort=False))
+        per_series = max(max_points // max(len(groups), 1), config.get("min_points_per_series", 50))
+        parts = [_downsample_single(g.sort_values(x_col), x_col, y_col, per_series, method) for _, g in groups]
+        return pd.concat(parts).sort_values([x_col, group_col]).reset_index(drop=True)
+
+    return _downsample_single(df.sort_values(x_col), x_col, y_col, max_points, method).reset_index(drop=True)
@@ -0,0 +1,43 @@
+"""
+Cache LRU das figuras Plotly por mensagem do chat.
+
+Reruns do Streamlit reexibem todo o histórico; com a figura em cache (por
+message_id e tema) o gráfico não é reconstruído. O cache fica em
+st.session_state['chart_figure_cache'] e guarda no máximo
+figure_cache_max_entries figuras, descartando as usadas há mais tempo.
+"""
+
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from config.agent_config import VISUALIZATION_CONFIG
+
+
+def cached_figure(cache: OrderedDict, message_id: str, theme_key: str) -> Optional[Any]:
+    """Busca a figura da mensagem no cache (None se ausente ou de outro tema)"""
+    cached = cache.get(message_id)
+    if cached is None or cached[0] != theme_key:
+        return None
+    cache.move_to_end(message_id)
+    return cached[1]
+
+
+def cache_figure(cache: OrderedDict, message_id: str, theme_key: str, fig: Any,
+                 max_entries: Optional[int] = None):
+    """Grava a figura no cache descartando as mais antigas"""
+    cache[message_id] = (theme_key, fig)
+    cache.move_to_end(message_id)
+    if max_entries is None:
+        max_entries = VISUALIZATION_CONFIG.get("figure_cache_max_entries", 20)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+def drop_figures(cache: Optional[OrderedDict], message_ids: Iterable[str]):
+    """Remove as figuras das mensagens (ex: arquivadas pelo ChatHistory)"""
+    if cache:
+        for message_id in message_ids:
+            cache.pop(message_id, None)
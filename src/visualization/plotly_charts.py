@@ -7,44 +7,90 @@ import plotly.express as px
 import pandas as pd
 import sys
 import os
+from collections import OrderedDict
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.formatters import format_compact_number
+from utils.formatters import format_compact_numbers
+from visualization.downsampling import downsample_series
+from visualization.figure_cache import cache_figure, cached_figure, drop_figures
 
 
-def render_plotly_visualization(visualization_data):
+CHART_TYPES = ['bar_chart', 'line_chart', 'vertical_bar_chart', 'grouped_vertical_bar_chart']
+
+
+def _get_theme_key():
+    """Identifica o tema ativo do Streamlit (figuras em cache são invalidadas ao trocar)"""
+    try:
+        theme = getattr(getattr(st, 'context', None), 'theme', None)
+        if theme is not None and getattr(theme, 'type', None):
+            return theme.type
+    except Exception:
+        pass
+    try:
+        return st.get_option("theme.base") or "default"
+    except Exception:
+        return "default"
+
+
+def build_plotly_figure(visualization_data):
     """
-    Renderiza gráfico Plotly baseado nos dados de visualização do agente.
-    Retorna True se renderizou um gráfico, False se renderizou uma tabela.
+    Constrói a figura Plotly a partir dos dados de visualização do agente.
+    Retorna None se os dados não geram gráfico.
     """
     if not visualization_data:
-        return False
+        return None
 
-    # Se não é para visualizar como gráfico, não fazer nada
     chart_type = visualization_data.get('type')
-    if chart_type not in ['bar_chart', 'line_chart', 'vertical_bar_chart', 'grouped_vertical_bar_chart'] or not visualization_data.get('has_data', False):
+    if chart_type not in CHART_TYPES or not visualization_data.get('has_data', False):
+        return None
+
+    df = visualization_data.get('data')
+    config = visualization_data.get('config', {})
+
+    if df is None or df.empty:
+        return None
+
+    # Processar baseado no tipo de gráfico
+    if chart_type == 'line_chart':
+        return build_line_chart(df, config)
+    elif chart_type == 'vertical_bar_chart':
+        return build_vertical_bar_chart(df, config)
+    elif chart_type == 'grouped_vertical_bar_chart':
+        return build_grouped_vertical_bar_chart(df, config)
+    else:
+        # Gráfico de barra horizontal (rankings)
+        return build_bar_chart(df, config)
+
+
+def render_plotly_visualization(visualization_data, message_id=None):
+    """
+    Renderiza gráfico Plotly baseado nos dados de visualização do agente.
+    Retorna True se renderizou um gráfico, False se renderizou uma tabela.
+
+    Com message_id, a figura fica em cache na sessão: reruns do Streamlit que
+    reexibem o histórico não reconstroem o gráfico, exceto se o tema mudar. O cache
+    guarda no máximo figure_cache_max_entries figuras (as mais recentes) e perde as
+    das mensagens arquivadas pelo ChatHistory (drop_cached_figures).
+    """
+    if not visualization_data:
         return False
 
     try:
-        # Obter dados do DataFrame
-        df = visualization_data.get('data')
-        config = visualization_data.get('config', {})
-
-        if df is None or df.empty:
-            return False
-
-        # Processar baseado no tipo de gráfico
-        if chart_type == 'line_chart':
-            # Lógica específica para gráficos de linha
-            return render_line_chart(df, config)
-        elif chart_type == 'vertical_bar_chart':
-            # Lógica para gráficos de barras verticais (comparações)
-            return render_vertical_bar_chart(df, config)
-        elif chart_type == 'grouped_vertical_bar_chart':
-            # Lógica para gráficos de barras verticais agrupadas (comparações com categorias)
-            return render_grouped_vertical_bar_chart(df, config)
-        else:
-            # Lógica original para gráficos de barra horizontal (rankings)
-            return render_bar_chart(df, config)
+        fig = None
+        theme_key = _get_theme_key()
+        cache = st.session_state.setdefault('chart_figure_cache', OrderedDict()) if message_id else None
+
+        if cache is not None:
+            fig = cached_figure(cache, message_id, theme_key)
+
+        if fig is None:
+            fig = build_plotly_figure(visualization_data)
+            if fig is None:
+                return False
+            if cache is not None:
+                cache_figure(cache, message_id, theme_key, fig)
+
+        st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+        return True
 
     except Exception as e:
         # Em caso de erro, não fazer nada e deixar o conteúdo textual aparecer
@@ -52,13 +98,24 @@ def render_plotly_visualization(visualization_data):
         return False
 
 
-def render_bar_chart(df, config):
+def clear_figure_cache():
+    """Remove as figuras em cache da sessão (ex: ao limpar o chat)"""
+    if 'chart_figure_cache' in st.session_state:
+        del st.session_state['chart_figure_cache']
+
+
+def drop_cached_figures(message_ids):
+    """Remove do cache as figuras de mensagens que saíram da memória (histórico arquivado)"""
+    drop_figures(st.session_state.get('chart_figure_cache'), message_ids)
+
+
+def build_bar_chart(df, config):
     """
-    Renderiza gráfico de barras horizontais
+    Constrói gráfico de barras horizontais
     """
     # Preparar rótulos compactos para as barras
     df_with_labels = df.copy()
-    df_with_labels['value_label'] = df_with_labels['value'].apply(format_compact_number)
+    df_with_labels['value_label'] = format_compact_numbers(df_with_labels['value'])
 
     # Verificar se foi detectado como ID categórico pelo backend e ajustar labels
     is_categorical_id = config.get('is_categorical_id', False)
@@ -153,20 +210,17 @@ def render_bar_chart(df, config):
         title_x=0.5  # Centralizar título
     )
 
-    # Renderizar o gráfico no Streamlit
-    st.plotly_chart(fig, use_container_width=True, theme="streamlit")
+    return fig
 
-    return True
 
-
-def render_vertical_bar_chart(df, config):
+def build_vertical_bar_chart(df, config):
     """
-    Renderiza gráfico de barras verticais para comparações diretas.
+    Constrói gráfico de barras verticais para comparações diretas.
     Ideal para comparar 2-5 categorias ou períodos específicos.
     """
     # Preparar rótulos compactos para as barras
     df_with_labels = df.copy()
-    df_with_labels['value_label'] = df_with_labels['value'].apply(format_compact_number)
+    df_with_labels['value_label'] = format_compact_numbers(df_with_labels['value'])
 
     # Verificar se foi detectado como ID categórico pelo backend
     is_categorical_id = config.get('is_categorical_id', False)
@@ -262,15 +316,12 @@ def render_vertical_bar_chart(df, config):
         title_x=0.5  # Centralizar título
     )
 
-    # Renderizar o gráfico no Streamlit
-    st.plotly_chart(fig, use_container_width=True, theme="streamlit")
-
-    return True
+    return fig
 
 
-def render_grouped_vertical_bar_chart(df, config):
+def build_grouped_vertical_bar_chart(df, config):
     """
-    Renderiza gráfico de barras verticais agrupadas para comparações entre poucos itens/períodos.
+    Constrói gráfico de barras verticais agrupadas para comparações entre poucos itens/períodos.
     Ideal para comparar 1-2 grupos (períodos/itens) com 2-5 categorias cada, usando cores distintas.
 
     Estrutura esperada do DataFrame:
@@ -285,11 +336,11 @@ def render_grouped_vertical_bar_chart(df, config):
     # Validar estrutura do DataFrame
     if 'group' not in df.columns or 'category' not in df.columns or 'value' not in df.columns:
         st.error(f"Erro: DataFrame para grouped_vertical_bar_chart deve ter colunas 'group', 'category' e 'value'. Recebido: {list(df.columns)}")
-        return False
+        return None
 
     # Preparar rótulos compactos para valores
     df_with_labels = df.copy()
-    df_with_labels['value_label'] = df_with_labels['value'].apply(format_compact_number)
+    df_with_labels['value_label'] = format_compact_numbers(df_with_labels['value'])
 
     # Validar limites (1-2 grupos, 2-5 categorias)
     n_groups = df_with_labels['group'].nunique()
@@ -297,15 +348,15 @@ def render_grouped_vertical_bar_chart(df, config):
 
     if n_groups > 2:
         st.warning(f"Aviso: Muitos grupos ({n_groups}) para visualização comparativa. Limite: 2 grupos.")
-        return False
+        return None
 
     if n_categories > 5:
         st.warning(f"Aviso: Muitas categorias ({n_categories}) para visualização comparativa. Limite: 5 categorias.")
-        return False
+        return None
 
     if n_categories < 2:
         st.warning(f"Aviso: Poucas categorias ({n_categories}) para comparação. Mínimo: 2 categorias.")
-        return False
+        return None
 
     # Paleta de cores distintas para categorias (até 5)
     color_palette = [
@@ -396,17 +447,14 @@ def render_grouped_vertical_bar_chart(df, config):
         title_xanchor='center'  # Ancorar ao centro para centralização perfeita
     )
 
-    # Renderizar o gráfico no Streamlit
-    st.plotly_chart(fig, use_container_width=True, theme="streamlit")
-
-    return True
+    return fig
 
 
-def render_line_chart(df, config):
+def build_line_chart(df, config):
     """
-    Renderiza gráfico de linha para análise temporal.
+    Constrói gráfico de linha para análise temporal.
     Suporta série única ou múltiplas séries (até 10).
-    Retorna True se renderizou com sucesso, False caso contrário.
+    Retorna a figura ou None em caso de erro.
     """
     try:
         # Preparar dados para o gráfico de linha
@@ -421,6 +469,9 @@ def render_line_chart(df, config):
         # Detectar se é múltiplas séries
         has_multiple_series = 'category' in df_chart.columns
 
+        # Respeitar o orçamento de pontos mesmo para dados que não passaram pelo VisualizationTools
+        df_chart = downsample_series(df_chart, 'date', 'value', group_col='category' if has_multiple_series else None)
+
         if has_multiple_series:
             # MÚLTIPLAS SÉRIES: Gerar uma linha para cada categoria
 
@@ -489,7 +540,7 @@ def render_line_chart(df, config):
             # SÉRIE ÚNICA: Comportamento original
 
             # Formatar valores para exibição
-            df_chart['value_label'] = df_chart['value'].apply(format_compact_number)
+            df_chart['value_label'] = format_compact_numbers(df_chart['value'])
 
             # Criar gráfico de linha única
             fig = px.line(
@@ -547,11 +598,8 @@ def render_line_chart(df, config):
             gridwidth=1
         )
 
-        # Renderizar no Streamlit
-        st.plotly_chart(fig, use_container_width=True, theme="streamlit")
-
-        return True
+        return fig
 
     except Exception as e:
         st.error(f"Erro ao renderizar gráfico de linha: {str(e)}")
-        return False
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Testes para o módulo utils/chat_history.py
+Valida o arquivamento das mensagens antigas e a reconstrução sob demanda
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.chat_history import (ChatHistory, dataframe_to_ipc, ipc_to_dataframe, remove_archive,
+                                sweep_archives)
+from utils.diagnostics import DiagnosticsStore
+
+
+def _mensagem(i):
+    df = pd.DataFrame({'label': [f'Cliente {i}', 'Outro'], 'value': [float(i), 1.5]})
+    return {
+        'id': f'msg-{i}',
+        'role': 'assistant',
+        'content': f"## Resposta {i}\n\n" + "Texto da análise. " * 200,
+        'context': {'UF_Cliente': 'SC'},
+        'visualization_data': {'type': 'bar_chart', 'data': df, 'config': {'title': f'Top {i}'}},
+        'debug_info': {'response_time': 1.0 + i, 'sql_queries': [f'SELECT {i}'],
+                       'visualization_metadata': [{'data': df}]}
+    }
+
+
+class TestChatHistory:
+    """Testes para ChatHistory"""
+
+    def test_mensagens_recentes_ficam_em_memoria(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            historico = ChatHistory('sessao', {'storage_dir': tmp_dir, 'max_recent_messages': 4})
+            arquivadas = [historico.append(_mensagem(i)) for i in range(3)]
+
+            assert arquivadas == [[], [], []]
+            assert historico.archived_count == 0
+            assert not os.path.exists(historico.path)
+
+    def test_excedentes_sao_arquivados(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            historico = ChatHistory('sessao', {'storage_dir': tmp_dir, 'max_recent_messages': 3})
+            ids = []
+            for i in range(10):
+                ids.extend(historico.append(_mensagem(i)))
+
+            assert len(historico) == 10
+            assert len(historico.recent) == 3
+            assert historico.archived_count == 7
+            assert ids == [f'msg-{i}' for i in range(7)]
+            # Markdown comprimido: o arquivo é menor que o texto bruto das mensagens arquivadas
+            assert historico.archive_bytes() < sum(len(_mensagem(i)['content']) for i in range(7))
+
+    def test_mensagem_arquivada_reconstruida(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            historico = ChatHistory('sessao', {'storage_dir': tmp_dir, 'max_recent_messages': 1})
+            original = _mensagem(1)
+            original['debug_info'] = DiagnosticsStore()
+            original['debug_info']['sql_queries'] = ['SELECT 1']
+            original['debug_info']['visualization_metadata'] = [{'data': None}]
+            historico.append(original)
+            historico.append(_mensagem(2))
+
+            [mensagem] = historico.load(0, 5)
+
+        assert mensagem['archived'] is True
+        assert mensagem['content'] == original['content']
+        assert mensagem['context'] == {'UF_Cliente': 'SC'}
+        assert mensagem['visualization_data']['config'] == {'title': 'Top 1'}
+        assert mensagem['visualization_data']['data'].equals(original['visualization_data']['data'])
+        # Diagnóstico reduzido: apenas as chaves renderizáveis, sem DataFrames
+        assert mensagem['debug_info'] == {'sql_queries': ['SELECT 1']}
+
+    def test_carga_por_janela(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            historico = ChatHistory('sessao', {'storage_dir': tmp_dir, 'max_recent_messages': 2})
+            for i in range(8):
+                historico.append(_mensagem(i))
+
+            janela = historico.load(historico.archived_count - 3, 3)
+            assert [m['id'] for m in janela] == ['msg-3', 'msg-4', 'msg-5']
+
+            historico.clear()
+            assert len(historico) == 0
+            assert not os.path.exists(historico.path)
+            assert historico.load(0, 3) == []
+
+    def test_metadados_arquivados_em_json(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            historico = ChatHistory('sessao', {'storage_dir': tmp_dir, 'max_recent_messages': 1})
+            original = _mensagem(1)
+            original['timestamp'] = pd.Timestamp('2024-03-01 10:30')
+            historico.append(original)
+            historico.append(_mensagem(2))
+
+            connection = sqlite3.connect(historico.path)
+            [(metadata,)] = connection.execute("SELECT metadata FROM messages").fetchall()
+            connection.close()
+            [mensagem] = historico.load(0, 1)
+
+        # Texto JSON legível, sem objetos Python serializados
+        assert json.loads(metadata)['context'] == {'UF_Cliente': 'SC'}
+        # Valores sem representação JSON voltam como texto
+        assert mensagem['timestamp'] == '2024-03-01 10:30:00'
+
+    def test_remove_arquivo_da_sessao(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config = {'storage_dir': tmp_dir, 'max_recent_messages': 1}
+            historico = ChatHistory('sessao', config)
+            historico.append(_mensagem(1))
+            historico.append(_mensagem(2))
+            historico._connection.close()
+
+            assert remove_archive('sessao', config) is True
+            assert not os.path.exists(historico.path)
+            assert remove_archive('sessao', config) is False
+
+    def test_varredura_remove_apenas_orfaos_antigos(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for session_id in ('ativa', 'orfa_antiga', 'orfa_recente'):
+                open(os.path.join(tmp_dir, f'{session_id}.sqlite'), 'wb').close()
+            open(os.path.join(tmp_dir, 'outro.txt'), 'wb').close()
+            antigo = time.time() - 7200
+            os.utime(os.path.join(tmp_dir, 'ativa.sqlite'), (antigo, antigo))
+            os.utime(os.path.join(tmp_dir, 'orfa_antiga.sqlite'), (antigo, antigo))
+
+            removidas = sweep_archives(['ativa'], 3600, {'storage_dir': tmp_dir})
+
+            assert removidas == ['orfa_antiga']
+            assert sorted(os.listdir(tmp_dir)) == ['ativa.sqlite', 'orfa_recente.sqlite', 'outro.txt']
+
+    def test_arrow_ipc_preserva_tipos(self):
+        df = pd.DataFrame({
+            'date': pd.date_range('2024-01-01', periods=3, freq='MS'),
+            'category': pd.Categorical(['a', 'b', 'a']),
+            'value': [1.0, 2.5, 3.0]
+        })
+        assert ipc_to_dataframe(dataframe_to_ipc(df)).equals(df)
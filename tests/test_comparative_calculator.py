@@ -0,0 +1,157 @@
+"""
+Testes para o motor de crescimento em lote do comparative_calculator.py
+Valida PoP, YoY e CAGR por entidade e o cache de cálculos
+"""
+
+import duckdb
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from comparative_calculator import ComparativeCalculator
+
+
+def _vendas_mensais(clientes=50, meses=25, seed=3):
+    rng = np.random.default_rng(seed)
+    periodos = pd.date_range('2022-01-01', periods=meses, freq='MS')
+    linhas = []
+    for c in range(clientes):
+        base = rng.uniform(1_000, 10_000)
+        tendencia = rng.uniform(-0.03, 0.05)
+        for m, periodo in enumerate(periodos):
+            linhas.append((f"cliente {c}", periodo, base * (1 + tendencia) ** m))
+    return pd.DataFrame(linhas, columns=['Cod_Cliente', 'periodo', 'Valor_Vendido'])
+
+
+class TestCrescimentoEmLote:
+    """Testes para calculate_growth_metrics_batch"""
+
+    def test_igual_ao_calculo_por_entidade(self):
+        df = _vendas_mensais()
+        calc = ComparativeCalculator()
+        lote = calc.calculate_growth_metrics_batch(df, 'Cod_Cliente', 'Valor_Vendido').set_index('Cod_Cliente')
+
+        for cliente, parte in df.groupby('Cod_Cliente'):
+            individual = calc.calculate_growth_metrics(parte, 'Valor_Vendido')
+            assert np.isclose(lote.loc[cliente, 'total_growth_pct'], individual['total_growth'])
+            assert np.isclose(lote.loc[cliente, 'average_growth_pct'], individual['average_growth_rate'])
+
+    def test_yoy_e_cagr(self):
+        df = pd.DataFrame({
+            'UF_Cliente': ['sc'] * 25,
+            'periodo': pd.date_range('2022-01-01', periods=25, freq='MS'),
+            'Valor_Vendido': [100.0 * 1.01 ** m for m in range(25)]
+        })
+        resultado = ComparativeCalculator().calculate_growth_metrics_batch(df, 'UF_Cliente', 'Valor_Vendido').iloc[0]
+
+        assert np.isclose(resultado['yoy_growth_pct'], (1.01 ** 12 - 1) * 100)
+        # 2 anos entre jan/2022 e jan/2024
+        assert np.isclose(resultado['cagr_pct'], (1.01 ** 12 - 1) * 100, rtol=1e-3)
+
+    def test_ordenacao_top_n_e_periodos_faltantes(self):
+        df = pd.DataFrame({
+            'Cod_Cliente': ['a', 'a', 'b', 'b', 'c'],
+            'periodo': ['2024-01', '2024-02', '2024-01', '2024-02', '2024-02'],
+            'Valor_Vendido': [100.0, 150.0, 100.0, 300.0, 50.0]
+        })
+        resultado = ComparativeCalculator().calculate_growth_metrics_batch(
+            df, 'Cod_Cliente', 'Valor_Vendido', top_n=2
+        )
+
+        assert resultado['Cod_Cliente'].tolist() == ['b', 'a']
+        assert resultado['total_growth_pct'].tolist() == [200.0, 50.0]
+
+
+class TestCacheDeCalculos:
+    """Testes para o cache LRU de calculation_cache"""
+
+    def test_reuso_e_descarte(self):
+        calc = ComparativeCalculator(config={'periods_per_year': 12, 'cache_max_entries': 2})
+        df = _vendas_mensais(clientes=5)
+
+        primeiro = calc.calculate_growth_metrics_batch(df, 'Cod_Cliente', 'Valor_Vendido')
+        primeiro.loc[0, 'total_growth_pct'] = -1  # Alterar o retorno não pode afetar o cache
+        segundo = calc.calculate_growth_metrics_batch(df, 'Cod_Cliente', 'Valor_Vendido')
+
+        assert calc.cache_stats['hits'] == 1
+        assert segundo.loc[0, 'total_growth_pct'] != -1
+
+        for seed in [10, 11]:
+            calc.calculate_growth_metrics_batch(_vendas_mensais(clientes=5, seed=seed), 'Cod_Cliente', 'Valor_Vendido')
+
+        assert len(calc.calculation_cache) == 2
+        assert calc.cache_stats['evictions'] == 1
+
+
+def _criar_conexao():
+    connection = duckdb.connect()
+    connection.execute("""
+        CREATE TABLE dados_comerciais AS
+        SELECT
+            DATE '2015-01-01' + CAST(i % 181 AS INTEGER) AS Data,
+            ['sc', 'pr', 'rs'][1 + i % 3] AS UF_Cliente,
+            CAST(i % 20 AS VARCHAR) AS Cod_Cliente,
+            CAST(i % 11 AS DOUBLE) + (i % 181) / 10.0 AS Valor_Vendido,
+            1 AS Qtd_Vendida
+        FROM range(5000) t(i)
+    """)
+    return connection
+
+
+class TestAnaliseComparativaSQL:
+    """Testes para a geração e execução de queries comparativas"""
+
+    def test_ranking_de_crescimento(self):
+        connection = _criar_conexao()
+        calc = ComparativeCalculator()
+        requisitos = calc.detect_calculation_requirements("quais clientes mais cresceram em vendas?", {})
+        spec = calc.plan_comparative_analysis(requisitos, {'_preserve_UF_Cliente': 'SC'}, top_n=5)
+        periodos = (('2015-01-01', '2015-02-01'), ('2015-02-01', '2015-03-01'))
+
+        resultado = calc.run_comparative_analysis(connection, spec, periods=periodos)['table'].to_pandas()
+
+        df = connection.execute("SELECT * FROM dados_comerciais WHERE UF_Cliente = 'sc'").df()
+        mes = df['Data'].dt.month
+        a = df[mes == 1].groupby('Cod_Cliente')['Valor_Vendido'].sum()
+        b = df[mes == 2].groupby('Cod_Cliente')['Valor_Vendido'].sum()
+        # Clientes sem base no período A ficam fora do ranking
+        esperado = ((b - a) / a * 100)[a > 0].sort_values(ascending=False).head(5)
+
+        assert spec['analysis'] == 'growth_ranking'
+        assert resultado['Cod_Cliente'].tolist() == esperado.index.tolist()
+        assert np.allclose(resultado['variacao_pct'], esperado.values)
+
+    def test_mudanca_de_participacao_e_periodo_padrao(self):
+        connection = _criar_conexao()
+        calc = ComparativeCalculator()
+        requisitos = calc.detect_calculation_requirements("como mudou a participação dos estados?", {})
+        spec = calc.plan_comparative_analysis(requisitos)
+
+        execucao = calc.run_comparative_analysis(connection, spec)
+        resultado = execucao['table'].to_pandas()
+
+        # Último registro em 30/06: junho é o último mês completo
+        assert execucao['periods'] == (('2015-05-01', '2015-06-01'), ('2015-06-01', '2015-07-01'))
+        assert spec['analysis'] == 'share_shift'
+        assert np.isclose(resultado['participacao_b_pct'].sum(), 100)
+        assert np.isclose(resultado['variacao_pp'].sum(), 0)
+
+    def test_identificadores_validados_e_valores_parametrizados(self):
+        connection = _criar_conexao()
+        calc = ComparativeCalculator()
+        periodos = (('2015-01-01', '2015-02-01'), ('2015-02-01', '2015-03-01'))
+
+        spec = {'analysis': 'growth_ranking', 'dimension': 'Cod_Cliente; DROP TABLE x', 'metric': 'revenue', 'filters': {}}
+        try:
+            calc.build_comparative_query(spec, periodos)
+            assert False, "esperava ValueError"
+        except ValueError:
+            pass
+
+        spec = {'analysis': 'period_comparison', 'dimension': None, 'metric': 'revenue',
+                'filters': {'UF_Cliente': "sc' OR '1'='1"}}
+        resultado = calc.run_comparative_analysis(connection, spec, periods=periodos)['table']
+        assert resultado.to_pydict()['valor_periodo_a'] == [0]
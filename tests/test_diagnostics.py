@@ -0,0 +1,96 @@
+"""
+Testes para o módulo utils/diagnostics.py
+Valida buffers limitados, snapshots por referência e o orçamento de memória
+"""
+
+import os
+import sys
+
+import pandas as pd
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.diagnostics import DiagnosticsStore, RingBuffer
+
+
+def _turno(store, n_queries=3, df=None, **extra):
+    """Simula as ferramentas registrando um turno e o app fechando o turno"""
+    if 'sql_queries' not in store:
+        store['sql_queries'] = []
+    for i in range(n_queries):
+        store['sql_queries'].append(f"SELECT {i}")
+    if df is not None:
+        if 'visualization_metadata' not in store:
+            store['visualization_metadata'] = []
+        store['visualization_metadata'].append({'type': 'bar_chart', 'data': df})
+    snapshot = store.snapshot(**extra)
+    store.clear()
+    return snapshot
+
+
+class TestDiagnosticsStore:
+    """Testes para DiagnosticsStore"""
+
+    def test_listas_viram_buffers_limitados(self):
+        store = DiagnosticsStore({'max_entries_per_key': 3})
+        if 'duplicate_queries_avoided' not in store:
+            store['duplicate_queries_avoided'] = []
+        store['duplicate_queries_avoided'].extend(f"q{i}" for i in range(10))
+
+        assert isinstance(store['duplicate_queries_avoided'], RingBuffer)
+        assert list(store['duplicate_queries_avoided']) == ['q7', 'q8', 'q9']
+        assert 'q9' in store['duplicate_queries_avoided']
+
+    def test_texto_longo_truncado(self):
+        store = DiagnosticsStore({'max_text_length': 100})
+        store['query_modifications'] = []
+        store['query_modifications'].append({'final_message': 'x' * 10000, 'persistent_context_used': True})
+
+        entrada = store['query_modifications'][0]
+        assert len(entrada['final_message']) < 200
+        assert entrada['persistent_context_used'] is True
+
+    def test_snapshot_guarda_referencias(self):
+        store = DiagnosticsStore()
+        df = pd.DataFrame({'label': ['a'], 'value': [1.0]})
+        snapshot = _turno(store, df=df, response_time=1.5)
+
+        assert snapshot['response_time'] == 1.5
+        assert list(snapshot['sql_queries']) == ['SELECT 0', 'SELECT 1', 'SELECT 2']
+        assert snapshot['visualization_metadata'][0]['data'] is df
+        # clear() prepara o próximo turno sem esvaziar o snapshot
+        assert 'sql_queries' not in store
+
+    def test_chaves_persistentes_sobrevivem_ao_turno(self):
+        store = DiagnosticsStore()
+        store['initialization_warnings'] = [{'type': 'rollup_build_failed'}]
+        _turno(store)
+
+        assert 'initialization_warnings' in store
+        assert 'sql_queries' not in store
+
+    def test_limite_de_snapshots(self):
+        store = DiagnosticsStore({'max_snapshots': 2})
+        primeiro = _turno(store)
+        _turno(store)
+        _turno(store)
+
+        assert primeiro == {}
+        assert len(store.snapshots) == 2
+
+    def test_orcamento_compacta_e_depois_esvazia(self):
+        df = pd.DataFrame({'label': range(200_000), 'value': 1.0})  # ~3 MB
+        store = DiagnosticsStore({'snapshot_budget_mb': 4})
+        antigo = _turno(store, df=df)
+        recente = _turno(store, df=df.copy())
+        _turno(store)
+
+        # Antigos perdem primeiro os DataFrames; o SQL continua disponível
+        assert 'visualization_metadata' not in antigo
+        assert list(antigo['sql_queries'])
+        assert 'visualization_metadata' in recente
+
+        store.config['snapshot_budget_mb'] = 0
+        _turno(store)
+        assert antigo == {} and recente == {}
+        assert len(store.snapshots) == 1
@@ -0,0 +1,60 @@
+"""
+Testes para o módulo visualization/downsampling.py
+Valida a redução de pontos de séries temporais longas
+"""
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from visualization.downsampling import downsample_series
+
+
+def _serie_diaria(dias=3000, pico_em=1234):
+    values = np.sin(np.arange(dias) / 30.0) * 100 + 1000
+    values[pico_em] = 5000
+    return pd.DataFrame({
+        'date': pd.date_range('2015-01-01', periods=dias, freq='D'),
+        'value': values
+    })
+
+
+class TestDownsampleSeries:
+    """Testes para downsample_series"""
+
+    def test_lttb_respeita_orcamento_e_preserva_extremos(self):
+        df = _serie_diaria()
+        reduzido = downsample_series(df, config={'line_chart_max_points': 200, 'downsampling_method': 'lttb'})
+
+        assert len(reduzido) == 200
+        assert reduzido['date'].iloc[0] == df['date'].iloc[0]
+        assert reduzido['date'].iloc[-1] == df['date'].iloc[-1]
+        assert reduzido['value'].max() == 5000
+
+    def test_minmax_preserva_minimo_e_maximo(self):
+        df = _serie_diaria()
+        reduzido = downsample_series(df, config={'line_chart_max_points': 100, 'downsampling_method': 'minmax'})
+
+        assert len(reduzido) <= 100
+        assert reduzido['value'].max() == df['value'].max()
+        assert reduzido['value'].min() == df['value'].min()
+
+    def test_multi_serie_divide_orcamento(self):
+        partes = []
+        for categoria in ['sc', 'pr', 'rs', 'sp']:
+            parte = _serie_diaria(dias=1000, pico_em=500)
+            parte['category'] = categoria
+            partes.append(parte)
+        df = pd.concat(partes, ignore_index=True)
+
+        config = {'line_chart_max_points': 400, 'downsampling_method': 'lttb', 'min_points_per_series': 50}
+        reduzido = downsample_series(df, group_col='category', config=config)
+
+        assert reduzido.groupby('category').size().to_dict() == {'pr': 100, 'rs': 100, 'sc': 100, 'sp': 100}
+
+    def test_serie_curta_nao_e_alterada(self):
+        df = _serie_diaria(dias=50, pico_em=10)
+        assert downsample_series(df, config={'line_chart_max_points': 200}) is df
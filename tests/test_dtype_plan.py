@@ -0,0 +1,59 @@
+"""
+Testes para o módulo datastore/dtype_plan.py
+Valida o plano de tipos e a limpeza vetorizada de texto
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from datastore.dtype_plan import memory_report, read_compact_dataset
+
+
+def _gravar_dataset(path, linhas=1000):
+    table = pa.table({
+        'Data': pa.array(pd.date_range('2015-01-01', periods=linhas, freq='D')),
+        'UF_Cliente': pa.array([['sc', 'pr', None][i % 3] for i in range(linhas)]),
+        'Des_Produto': pa.array([f"produto {i}" for i in range(linhas)]),
+        'Cod_Segmento_Cliente': pa.array([i % 12 for i in range(linhas)], type=pa.int64()),
+        'Nome_Bytes': pa.array([b'caf\xc3\xa9' if i % 2 else b'\xff' for i in range(linhas)], type=pa.binary()),
+        'Valor_Vendido': pa.array([i * 1.5 for i in range(linhas)]),
+    })
+    pq.write_table(table, path)
+
+
+class TestReadCompactDataset:
+    """Testes para read_compact_dataset"""
+
+    def test_tipos_do_plano(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path)
+        df = read_compact_dataset(path, config={'categorical_max_ratio': 0.1})
+
+        assert isinstance(df['UF_Cliente'].dtype, pd.CategoricalDtype)
+        assert df['Des_Produto'].dtype == pd.StringDtype("pyarrow")
+        assert df['Cod_Segmento_Cliente'].dtype == 'int8'
+        assert df['Valor_Vendido'].dtype == 'float64'
+
+    def test_limpeza_de_texto(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path, linhas=4)
+        df = read_compact_dataset(path)
+
+        # Nulos viram string vazia e bytes inválidos são substituídos
+        assert list(df['UF_Cliente'].astype(str)) == ['sc', 'pr', '', 'sc']
+        assert list(df['Nome_Bytes'].astype(str)) == ['�', 'café', '�', 'café']
+
+    def test_relatorio_de_memoria(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path)
+        compacto = read_compact_dataset(path)
+        original = pd.read_parquet(path)
+        report = memory_report(original, compacto)
+
+        assert report.loc['TOTAL', 'mb_depois'] <= report.loc['TOTAL', 'mb_antes']
+        assert report.loc['Cod_Segmento_Cliente', 'dtype_depois'] == 'int8'
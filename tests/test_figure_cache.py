@@ -0,0 +1,49 @@
+"""
+Testes para o módulo visualization/figure_cache.py
+Valida o cache LRU de figuras por mensagem
+"""
+
+import os
+import sys
+from collections import OrderedDict
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from visualization.figure_cache import cache_figure, cached_figure, drop_figures
+
+
+class TestCacheDeFiguras:
+    """Testes para o cache LRU de figuras por mensagem"""
+
+    def test_cache_limitado_mantem_as_mais_recentes(self):
+        cache = OrderedDict()
+        for i in range(5):
+            cache_figure(cache, f'msg-{i}', 'light', f'fig-{i}', max_entries=3)
+
+        assert list(cache) == ['msg-2', 'msg-3', 'msg-4']
+
+    def test_acesso_marca_figura_como_recente(self):
+        cache = OrderedDict()
+        for i in range(3):
+            cache_figure(cache, f'msg-{i}', 'light', f'fig-{i}', max_entries=3)
+
+        assert cached_figure(cache, 'msg-0', 'light') == 'fig-0'
+        cache_figure(cache, 'msg-3', 'light', 'fig-3', max_entries=3)
+        assert list(cache) == ['msg-2', 'msg-0', 'msg-3']
+
+    def test_troca_de_tema_invalida_figura(self):
+        cache = OrderedDict()
+        cache_figure(cache, 'msg-0', 'light', 'fig-0', max_entries=3)
+
+        assert cached_figure(cache, 'msg-0', 'dark') is None
+        assert cached_figure(cache, 'msg-1', 'light') is None
+
+    def test_figuras_arquivadas_removidas(self):
+        cache = OrderedDict()
+        for i in range(3):
+            cache_figure(cache, f'msg-{i}', 'light', f'fig-{i}', max_entries=3)
+
+        drop_figures(cache, ['msg-0', 'msg-1', 'inexistente'])
+        drop_figures(None, ['msg-2'])
+
+        assert list(cache) == ['msg-2']
@@ -0,0 +1,45 @@
+"""
+Testes para as funções vetorizadas de utils/formatters.py
+Valida a paridade com a formatação escalar de números compactos
+"""
+
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.formatters import format_compact_number, format_compact_numbers, parse_numeric_cells
+
+
+class TestFormatCompactNumbers:
+    """Testes para format_compact_numbers"""
+
+    def test_paridade_com_funcao_escalar(self):
+        valores = [0, 0.5, 2.5, 999.4, 999.5, 1000, 12345, 999_950, 2_550_000,
+                   1e9, 3.25e12, -5000, np.int64(7), float('nan'), None, 'abc']
+
+        esperado = [format_compact_number(v) for v in valores]
+        assert list(format_compact_numbers(valores)) == esperado
+
+    def test_series_grande(self):
+        serie = pd.Series(np.random.default_rng(0).uniform(-1e4, 5e9, 5000))
+
+        rotulos = format_compact_numbers(serie)
+
+        assert len(rotulos) == len(serie)
+        assert list(rotulos) == [format_compact_number(v) for v in serie]
+
+    def test_entrada_vazia(self):
+        assert len(format_compact_numbers([])) == 0
+
+
+class TestParseNumericCells:
+    """Testes para parse_numeric_cells"""
+
+    def test_moeda_e_separadores(self):
+        valores = parse_numeric_cells(['R$ 1,234.50', '1000', 'Vendas', ''])
+
+        assert valores[:2].tolist() == [1234.5, 1000.0]
+        assert np.isnan(valores[2:]).all()
@@ -0,0 +1,156 @@
+"""
+Testes para o módulo datastore/layout.py
+Valida a geração do ORDER BY/DDL do layout clusterizado e o parquet reordenado
+"""
+
+import duckdb
+import os
+import sys
+import time
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from datastore.layout import (build_dataset_ddl, build_table_source_sql, get_order_by_clause,
+                              profile_scan, write_clustered_parquet)
+from datastore.partitions import write_partitioned_dataset
+
+
+LAYOUT = {
+    "cluster": True,
+    "time_column": "Data",
+    "time_bucket": "month",
+    "secondary_key": "UF_Cliente",
+    "row_group_size": 2048,
+    "clustered_path": None
+}
+
+
+def _criar_parquet(tmp_path):
+    """Grava um dataset reduzido fora de ordem (Data e UF embaralhadas)"""
+    connection = duckdb.connect()
+    source = str(tmp_path / "dados.parquet")
+    connection.execute(f"""
+        COPY (
+            SELECT
+                DATE '2015-01-01' + CAST((i * 7919) % 730 AS INTEGER) AS Data,
+                ['sc', 'pr', 'rs'][1 + (i * 31) % 3] AS UF_Cliente,
+                CAST(i % 7 AS DOUBLE) * 10.5 AS Valor_Vendido
+            FROM range(30000) t(i)
+        ) TO '{source}' (FORMAT PARQUET)
+    """)
+    return connection, source
+
+
+class TestOrderBy:
+    """Testes para get_order_by_clause"""
+
+    def test_mes_chave_secundaria_e_data(self):
+        assert get_order_by_clause(LAYOUT) == "DATE_TRUNC('month', Data), UF_Cliente, Data"
+
+    def test_sem_chave_secundaria(self):
+        layout = {**LAYOUT, "secondary_key": None}
+        assert get_order_by_clause(layout) == "DATE_TRUNC('month', Data), Data"
+
+    def test_sem_bucket_temporal(self):
+        layout = {**LAYOUT, "time_bucket": None}
+        assert get_order_by_clause(layout) == "UF_Cliente, Data"
+
+    def test_chave_secundaria_ausente_ignorada(self):
+        clause = get_order_by_clause(LAYOUT, available_columns=["Data", "Valor_Vendido"])
+        assert clause == "DATE_TRUNC('month', Data), Data"
+
+    def test_sem_coluna_temporal(self):
+        assert get_order_by_clause(LAYOUT, available_columns=["UF_Cliente", "Valor_Vendido"]) == ""
+
+
+class TestDDL:
+    """Testes para build_table_source_sql e build_dataset_ddl"""
+
+    def test_sem_cluster_le_a_origem(self):
+        sql = build_table_source_sql("dados.parquet", {**LAYOUT, "cluster": False})
+        assert sql == "SELECT * FROM read_parquet('dados.parquet')"
+
+    def test_cluster_ordena_na_carga(self):
+        sql = build_table_source_sql("dados.parquet", LAYOUT)
+        assert sql == ("SELECT * FROM read_parquet('dados.parquet') "
+                       "ORDER BY DATE_TRUNC('month', Data), UF_Cliente, Data")
+
+    def test_cluster_sem_chave_secundaria(self):
+        sql = build_table_source_sql("dados.parquet", {**LAYOUT, "secondary_key": None})
+        assert sql.endswith("ORDER BY DATE_TRUNC('month', Data), Data")
+
+    def test_parquet_reordenado_mais_novo_dispensa_ordenacao(self, tmp_path):
+        connection, source = _criar_parquet(tmp_path)
+        clustered = str(tmp_path / "reordenado.parquet")
+        write_clustered_parquet(connection, source, clustered, LAYOUT)
+        layout = {**LAYOUT, "clustered_path": clustered}
+
+        assert build_table_source_sql(source, layout) == f"SELECT * FROM read_parquet('{clustered}')"
+
+        # Origem atualizada depois do arquivo reordenado: volta a ordenar na carga
+        futuro = time.time() + 60
+        os.utime(source, (futuro, futuro))
+        assert "ORDER BY" in build_table_source_sql(source, layout)
+
+    def test_ddl_de_arquivo_cria_tabela(self):
+        ddl = build_dataset_ddl("dados.parquet", table="vendas")
+        assert ddl.startswith("CREATE OR REPLACE TABLE vendas AS SELECT * FROM read_parquet('dados.parquet')")
+
+    def test_ddl_de_diretorio_particionado_cria_view(self, tmp_path):
+        connection, source = _criar_parquet(tmp_path)
+        target = str(tmp_path / "particionado")
+        write_partitioned_dataset(connection, source, target)
+
+        ddl = build_dataset_ddl(target)
+        assert ddl.startswith("CREATE OR REPLACE VIEW dados_comerciais AS SELECT * EXCLUDE (")
+        connection.execute(ddl)
+        assert connection.execute("SELECT COUNT(*) FROM dados_comerciais").fetchone()[0] == 30000
+
+
+class TestParquetReordenado:
+    """Testes para write_clustered_parquet e profile_scan"""
+
+    def test_parquet_ordenado_com_row_groups_configurados(self, tmp_path):
+        connection, source = _criar_parquet(tmp_path)
+        target = str(tmp_path / "saida" / "reordenado.parquet")
+
+        assert write_clustered_parquet(connection, source, target, LAYOUT) == target
+
+        rows = connection.execute(
+            f"SELECT DATE_TRUNC('month', Data), UF_Cliente, Data FROM read_parquet('{target}')"
+        ).fetchall()
+        assert len(rows) == 30000
+        assert rows == sorted(rows)
+        row_groups = connection.execute(
+            f"SELECT COUNT(DISTINCT row_group_id) FROM parquet_metadata('{target}')"
+        ).fetchone()[0]
+        assert row_groups == 15
+
+    def test_poda_por_zonemap_reduz_row_groups(self, tmp_path):
+        connection, source = _criar_parquet(tmp_path)
+        desordenado = str(tmp_path / "desordenado.parquet")
+        reordenado = str(tmp_path / "reordenado.parquet")
+        connection.execute(f"COPY (SELECT * FROM read_parquet('{source}')) TO '{desordenado}' "
+                           f"(FORMAT PARQUET, ROW_GROUP_SIZE {LAYOUT['row_group_size']})")
+        write_clustered_parquet(connection, source, reordenado, LAYOUT)
+
+        def row_groups_do_periodo(path):
+            # Row groups cujo min/max de Data cruza março/2015 (os únicos que o leitor não descarta)
+            return connection.execute(f"""
+                SELECT COUNT(*) FROM parquet_metadata('{path}')
+                WHERE path_in_schema = 'Data'
+                  AND CAST(stats_min AS DATE) <= DATE '2015-03-31'
+                  AND CAST(stats_max AS DATE) >= DATE '2015-03-01'
+            """).fetchone()[0]
+
+        assert row_groups_do_periodo(desordenado) == 15
+        assert row_groups_do_periodo(reordenado) <= 2
+
+    def test_profile_scan(self, tmp_path):
+        connection, source = _criar_parquet(tmp_path)
+        stats = profile_scan(connection, "SELECT COUNT(*) FROM read_parquet($path) WHERE UF_Cliente = $uf",
+                             {'path': source, 'uf': 'sc'})
+
+        assert set(stats) == {'rows_scanned', 'bytes_read', 'latency'}
+        assert stats['rows_scanned'] == 30000
+        assert stats['latency'] >= 0
@@ -0,0 +1,62 @@
+"""
+Testes para o módulo utils/memory_updates.py
+Valida a extração de memórias em segundo plano e a contagem de chamadas de memória
+"""
+
+import os
+import sys
+import threading
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.memory_updates import count_memory_tool_calls, schedule_memory_update
+from utils.metrics import get_metrics_registry
+
+
+class Ferramenta:
+    def __init__(self, tool_name):
+        self.tool_name = tool_name
+
+
+class Resposta:
+    def __init__(self, *nomes):
+        self.tools = [Ferramenta(nome) for nome in nomes]
+
+
+class TestMemoryUpdates:
+    """Testes para schedule_memory_update e count_memory_tool_calls"""
+
+    def test_extracao_roda_em_segundo_plano(self):
+        liberar = threading.Event()
+        chamadas = []
+
+        def extrair(message, user_id):
+            liberar.wait(timeout=5)
+            chamadas.append((message, user_id))
+            return "ok"
+
+        future = schedule_memory_update(extrair, message="Vendas de SC", user_id="sessao-1")
+        # O chamador não espera a extração
+        assert not future.done()
+        liberar.set()
+
+        assert future.result(timeout=5) == "ok"
+        assert chamadas == [("Vendas de SC", "sessao-1")]
+        assert get_metrics_registry().histogram("memory_update_seconds").count(mode="background") >= 1
+
+    def test_erro_na_extracao_nao_propaga(self):
+        def extrair(**kwargs):
+            raise RuntimeError("falha do modelo")
+
+        contador = get_metrics_registry().counter("memory_updates_total")
+        antes = contador.value(status="error")
+
+        assert schedule_memory_update(extrair, message="x").result(timeout=5) is None
+        assert contador.value(status="error") == antes + 1
+
+    def test_conta_chamadas_de_memoria(self):
+        resposta = Resposta("run_query", "update_user_memory", "update_user_memory")
+
+        assert count_memory_tool_calls(resposta) == 2
+        assert count_memory_tool_calls(Resposta("run_query")) == 0
+        assert count_memory_tool_calls(object()) == 0
@@ -0,0 +1,155 @@
+"""
+Testes para o módulo utils/metrics.py
+Valida contadores, histogramas, quantis, hooks e o endpoint /metrics
+"""
+
+import os
+import socket
+import sys
+import urllib.request
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils import metrics
+from utils.metrics import MetricsRegistry, get_metrics_registry, start_metrics_server, timed, tool_metrics_hook
+
+
+class TestCounterEHistograma:
+    """Testes para Counter e Histogram"""
+
+    def test_contador_por_labels_no_formato_prometheus(self):
+        registry = MetricsRegistry()
+        contador = registry.counter("tool_calls_total", "Chamadas")
+        contador.inc(tool="a", status="ok")
+        contador.inc(2, tool="a", status="ok")
+        contador.inc(tool="b", status="error")
+
+        assert contador.value(tool="a", status="ok") == 3
+        texto = registry.render_prometheus()
+        assert "# TYPE tool_calls_total counter" in texto
+        assert 'tool_calls_total{status="ok",tool="a"} 3' in texto
+        assert 'tool_calls_total{status="error",tool="b"} 1' in texto
+
+    def test_histograma_buckets_cumulativos(self):
+        registry = MetricsRegistry()
+        histograma = registry.histogram("lat_seconds", "Latência", buckets=[0.1, 1.0])
+        for valor in (0.05, 0.5, 0.7, 5.0):
+            histograma.observe(valor)
+
+        texto = registry.render_prometheus()
+        assert 'lat_seconds_bucket{le="0.1"} 1' in texto
+        assert 'lat_seconds_bucket{le="1"} 3' in texto
+        assert 'lat_seconds_bucket{le="+Inf"} 4' in texto
+        assert 'lat_seconds_count 4' in texto
+
+    def test_quantil_interpolado_no_bucket(self):
+        histograma = MetricsRegistry().histogram("lat_seconds", buckets=[1.0, 2.0, 4.0])
+        for _ in range(50):
+            histograma.observe(0.5)
+        for _ in range(50):
+            histograma.observe(3.0)
+
+        assert histograma.quantile(0.5) == 1.0
+        assert 3.0 < histograma.quantile(0.95) <= 4.0
+        assert histograma.quantile(0.5, source="inexistente") is None
+
+    def test_quantil_combina_series_que_contem_os_labels(self):
+        histograma = MetricsRegistry().histogram("run_seconds", buckets=[1.0, 2.0, 4.0])
+        for _ in range(10):
+            histograma.observe(0.5, memory_mode="off", complexity="simple")
+            histograma.observe(3.0, memory_mode="off", complexity="complex")
+
+        assert histograma.quantile(0.5, complexity="simple") <= 1.0
+        assert histograma.quantile(0.5, complexity="complex") > 2.0
+        # Um label só seleciona as duas séries do modo
+        assert histograma.quantile(0.5, memory_mode="off") == 1.0
+        assert histograma.quantile(0.5, memory_mode="off", complexity="simple") <= 1.0
+
+    def test_resumo_para_o_painel(self):
+        registry = MetricsRegistry()
+        registry.histogram("q_seconds", buckets=[1.0]).observe(0.2, source="rollup")
+        registry.counter("hits_total").inc(cache="metadata")
+
+        linhas = {linha['metric']: linha for linha in registry.summary()}
+        assert linhas['q_seconds']['labels'] == {"source": "rollup"}
+        assert linhas['q_seconds']['count'] == 1 and linhas['q_seconds']['p95'] is not None
+        assert linhas['hits_total']['value'] == 1
+
+
+class TestIntegracao:
+    """Testes para o decorador, o hook de ferramentas e o endpoint HTTP"""
+
+    def test_timed_registra_no_registro_global(self):
+        @timed("teste_timed_seconds")
+        def soma(a, b):
+            return a + b
+
+        antes = get_metrics_registry().histogram("teste_timed_seconds").count()
+        assert soma(1, 2) == 3
+        assert get_metrics_registry().histogram("teste_timed_seconds").count() == antes + 1
+
+    def test_hook_de_ferramenta_conta_sucesso_e_erro(self):
+        def ferramenta(x):
+            if x < 0:
+                raise ValueError("negativo")
+            return x * 2
+
+        contador = get_metrics_registry().counter("tool_calls_total")
+        ok_antes = contador.value(tool="teste_hook", status="ok")
+        erro_antes = contador.value(tool="teste_hook", status="error")
+
+        assert tool_metrics_hook("teste_hook", ferramenta, {"x": 2}) == 4
+        try:
+            tool_metrics_hook("teste_hook", ferramenta, {"x": -1})
+            assert False, "Deveria propagar o erro da ferramenta"
+        except ValueError:
+            pass
+
+        assert contador.value(tool="teste_hook", status="ok") == ok_antes + 1
+        assert contador.value(tool="teste_hook", status="error") == erro_antes + 1
+
+    def test_endpoint_metrics(self):
+        registry = MetricsRegistry({"http_enabled": True})
+        registry.counter("endpoint_total", "Teste").inc()
+
+        servidor_anterior, erro_anterior = metrics._server, metrics._server_error
+        metrics._server, metrics._server_error = None, None
+        try:
+            servidor = start_metrics_server(registry, host="127.0.0.1", port=0)
+            assert servidor is not None
+            porta = servidor.server_address[1]
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/metrics", timeout=5) as resposta:
+                corpo = resposta.read().decode('utf-8')
+            assert "endpoint_total 1" in corpo
+            # Segunda chamada reutiliza o servidor em execução
+            assert start_metrics_server(registry, port=0) is servidor
+            servidor.shutdown()
+            servidor.server_close()
+        finally:
+            metrics._server, metrics._server_error = servidor_anterior, erro_anterior
+
+    def test_endpoint_desabilitado(self):
+        assert start_metrics_server(MetricsRegistry({"http_enabled": False})) is None
+
+    def test_endpoint_desligado_por_padrao(self):
+        if not os.getenv("AGENT_METRICS_HTTP"):
+            assert metrics.METRICS_CONFIG["http_enabled"] is False
+
+    def test_porta_ocupada_nao_interrompe(self):
+        ocupada = socket.socket()
+        ocupada.bind(("127.0.0.1", 0))
+        ocupada.listen()
+        porta = ocupada.getsockname()[1]
+
+        servidor_anterior, erro_anterior = metrics._server, metrics._server_error
+        metrics._server, metrics._server_error = None, None
+        try:
+            registry = MetricsRegistry({"http_enabled": True})
+            assert start_metrics_server(registry, host="127.0.0.1", port=porta) is None
+            assert metrics._server_error is not None
+            # Falha lembrada: a próxima chamada (rerun) não tenta abrir a porta de novo
+            ocupada.close()
+            assert start_metrics_server(registry, host="127.0.0.1", port=porta) is None
+        finally:
+            ocupada.close()
+            metrics._server, metrics._server_error = servidor_anterior, erro_anterior
@@ -0,0 +1,69 @@
+"""
+Benchmark do numeric_analyzer em resultados grandes
+Garante que o resumo numérico continua barato em 100 mil linhas
+
+Uso direto (imprime os tempos):
+    python tests/test_numeric_analyzer_benchmark.py
+"""
+
+import time
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from insights.numeric_analyzer import gerar_resumo_numerico
+
+LINHAS = 100_000
+REPETICOES = 5
+# Orçamento generoso por resumo para não oscilar em máquinas de CI
+LIMITE_SEGUNDOS = 0.5
+
+
+def _resultado_grande(linhas=LINHAS):
+    rng = np.random.default_rng(42)
+    return pd.DataFrame({
+        'label': [f"cliente {i}" for i in range(linhas)],
+        'date': pd.date_range('2000-01-01', periods=linhas, freq='h'),
+        'value': rng.lognormal(mean=10, sigma=1.5, size=linhas)
+    }).sample(frac=1, random_state=7).reset_index(drop=True)
+
+
+def medir_resumos(df, repeticoes=REPETICOES):
+    """Menor tempo (s) de gerar_resumo_numerico por tipo de gráfico"""
+    tempos = {}
+    for tipo, eixo_x in [('horizontal_bar', 'label'), ('vertical_bar', 'label'), ('line', 'date')]:
+        melhor = float('inf')
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            gerar_resumo_numerico(df, eixo_x, 'value', tipo, total_universo=float(df['value'].sum()) * 2)
+            melhor = min(melhor, time.perf_counter() - inicio)
+        tempos[tipo] = melhor
+    return tempos
+
+
+class TestBenchmarkResumoNumerico:
+    """Benchmark de escala para gerar_resumo_numerico"""
+
+    def test_resumos_em_100k_linhas(self):
+        df = _resultado_grande()
+        tempos = medir_resumos(df)
+
+        for tipo, segundos in tempos.items():
+            assert segundos < LIMITE_SEGUNDOS, f"{tipo}: {segundos:.3f}s"
+
+    def test_ranking_em_100k_linhas(self):
+        df = _resultado_grande()
+        resumo = gerar_resumo_numerico(df, 'label', 'value', 'horizontal_bar')
+        esperado = df.sort_values('value', ascending=False)
+
+        assert resumo['top_categorias'] == esperado['label'].head(3).tolist()
+        assert resumo['valor_min'] == float(esperado['value'].iloc[-1])
+        assert resumo['concentracao_top5_pct'] == round(esperado['value'].head(5).sum() / df['value'].sum() * 100, 1)
+
+
+if __name__ == "__main__":
+    for tipo, segundos in medir_resumos(_resultado_grande()).items():
+        print(f"{tipo:>16}: {segundos * 1000:8.2f} ms ({LINHAS:,} linhas)")
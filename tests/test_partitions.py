@@ -0,0 +1,105 @@
+"""
+Testes para o módulo datastore/partitions.py
+Valida a gravação particionada e a poda de partições por período
+"""
+
+import duckdb
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from datastore.partitions import PartitionPruner, dataset_select_sql, write_partitioned_dataset
+
+
+def _criar_dataset_particionado(tmp_path):
+    """Grava um dataset reduzido particionado por year/month"""
+    connection = duckdb.connect()
+    source = str(tmp_path / "dados.parquet")
+    target = str(tmp_path / "particionado")
+    connection.execute(f"""
+        COPY (
+            SELECT
+                DATE '2015-01-01' + CAST(i % 730 AS INTEGER) AS Data,
+                ['sc', 'pr', 'rs'][1 + i % 3] AS UF_Cliente,
+                CAST(i % 7 AS DOUBLE) * 10.5 AS Valor_Vendido
+            FROM range(5000) t(i)
+        ) TO '{source}' (FORMAT PARQUET)
+    """)
+    write_partitioned_dataset(connection, source, target)
+    connection.execute(f"CREATE VIEW dados_comerciais AS {dataset_select_sql(target)}")
+    return connection, target
+
+
+class TestPartitionPruner:
+    """Testes para PartitionPruner.prune"""
+
+    def test_poda_preserva_resultado(self, tmp_path):
+        connection, target = _criar_dataset_particionado(tmp_path)
+        pruner = PartitionPruner(target)
+
+        query = ("SELECT UF_Cliente, SUM(Valor_Vendido) AS total FROM dados_comerciais "
+                 "WHERE Data >= '2015-03-01' AND Data < '2015-07-01' GROUP BY UF_Cliente ORDER BY UF_Cliente")
+        pruned, info = pruner.prune(query)
+
+        assert info['partition_filter'] == "(year * 100 + month) >= 201503 AND (year * 100 + month) <= 201506"
+        assert connection.execute(pruned).fetchall() == connection.execute(query).fetchall()
+
+    def test_filtro_por_ano(self, tmp_path):
+        connection, target = _criar_dataset_particionado(tmp_path)
+        pruner = PartitionPruner(target)
+
+        query = "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE YEAR(Data) = 2016"
+        pruned, info = pruner.prune(query)
+
+        assert info is not None
+        assert connection.execute(pruned).fetchall() == connection.execute(query).fetchall()
+
+    def test_nao_poda_queries_inelegiveis(self, tmp_path):
+        _, target = _criar_dataset_particionado(tmp_path)
+        pruner = PartitionPruner(target)
+
+        inelegiveis = [
+            # Sem filtro de período
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais",
+            # Filtros combinados por OR
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE Data >= '2016-01-01' OR UF_Cliente = 'sc'",
+            # Literal com aritmética de intervalo
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE Data >= '2016-04-01' - INTERVAL 3 MONTH",
+            # Subquery
+            "SELECT * FROM (SELECT * FROM dados_comerciais WHERE Data >= '2016-01-01') t",
+            # Data em CASE no SELECT: a query precisa de todas as linhas
+            "SELECT SUM(CASE WHEN Data >= '2016-01-01' THEN Valor_Vendido END) FROM dados_comerciais",
+            # Limites contraditórios
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE Data >= '2016-05-01' AND Data < '2016-02-01'",
+        ]
+
+        for query in inelegiveis:
+            pruned, info = pruner.prune(query)
+            assert info is None, query
+            assert pruned == query
+
+    def test_comparacao_de_periodos_com_case_nao_e_podada(self, tmp_path):
+        connection, target = _criar_dataset_particionado(tmp_path)
+        pruner = PartitionPruner(target)
+
+        query = ("SELECT SUM(CASE WHEN Data BETWEEN '2015-01-01' AND '2015-03-31' THEN Valor_Vendido END) AS q1, "
+                 "SUM(CASE WHEN Data BETWEEN '2015-04-01' AND '2015-06-30' THEN Valor_Vendido END) AS q2 "
+                 "FROM dados_comerciais")
+        pruned, info = pruner.prune(query)
+
+        assert info is None and pruned == query
+        q1, q2 = connection.execute(pruned).fetchone()
+        assert q1 is not None and q2 is not None
+
+    def test_limites_apenas_do_where_externo(self, tmp_path):
+        connection, target = _criar_dataset_particionado(tmp_path)
+        pruner = PartitionPruner(target)
+
+        query = ("SELECT UF_Cliente, SUM(Valor_Vendido) FILTER (WHERE UF_Cliente = 'sc') AS sc "
+                 "FROM dados_comerciais WHERE Data BETWEEN '2016-02-01' AND '2016-04-30' AND UF_Cliente <> 'rs' "
+                 "GROUP BY UF_Cliente ORDER BY UF_Cliente")
+        pruned, info = pruner.prune(query)
+
+        assert info['partition_filter'] == "(year * 100 + month) >= 201602 AND (year * 100 + month) <= 201604"
+        assert connection.execute(pruned).fetchall() == connection.execute(query).fetchall()
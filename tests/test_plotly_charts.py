@@ -0,0 +1,100 @@
+"""
+Testes para o módulo visualization/plotly_charts.py
+Valida os construtores de figuras (build_*) chamados diretamente
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# O módulo de gráficos depende de streamlit e plotly (ignorado onde não estão instalados)
+pytest.importorskip("streamlit")
+pytest.importorskip("plotly")
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from visualization.plotly_charts import (build_bar_chart, build_grouped_vertical_bar_chart, build_line_chart,
+                                         build_plotly_figure, build_vertical_bar_chart)
+
+
+def _ranking():
+    return pd.DataFrame({'label': ['SC', 'PR', 'RS'], 'value': [1500000.0, 980000.0, 45000.0]})
+
+
+class TestConstrutores:
+    """Testes para os construtores build_*"""
+
+    def test_barras_horizontais(self):
+        fig = build_bar_chart(_ranking(), {'title': 'Top UFs', 'value_format': 'currency'})
+
+        assert fig.layout.title.text == 'Top UFs'
+        assert fig.data[0].orientation == 'h'
+        assert list(fig.data[0].y) == ['SC', 'PR', 'RS']
+        assert list(fig.data[0].text) == ['1.5M', '980.0K', '45.0K']
+        assert fig.layout.xaxis.tickprefix == 'R$ '
+        assert fig.layout.height == 400
+
+    def test_codigos_de_cliente_viram_categoria(self):
+        df = pd.DataFrame({'label': ['10234', '20456'], 'value': [10.0, 5.0]})
+        fig = build_bar_chart(df, {'original_label_column': 'Cod_Cliente'})
+
+        assert list(fig.data[0].y) == ['Cliente 10234', 'Cliente 20456']
+        assert fig.layout.yaxis.type == 'category'
+
+    def test_barras_verticais(self):
+        fig = build_vertical_bar_chart(_ranking(), {'title': 'Comparação'})
+
+        assert fig.data[0].orientation == 'v'
+        assert list(fig.data[0].x) == ['SC', 'PR', 'RS']
+        assert fig.layout.xaxis.tickangle == -45
+        assert fig.layout.yaxis.tickprefix is None
+
+    def test_barras_agrupadas(self):
+        df = pd.DataFrame({
+            'group': ['Mar/2015'] * 3 + ['Abr/2015'] * 3,
+            'category': ['SC', 'PR', 'RS'] * 2,
+            'value': [10.0, 20.0, 30.0, 15.0, 25.0, 35.0]
+        })
+        fig = build_grouped_vertical_bar_chart(df, {'title': 'Março x Abril'})
+
+        assert fig.layout.barmode == 'group'
+        assert [trace.name for trace in fig.data] == ['SC', 'PR', 'RS']
+        assert fig.layout.showlegend is True
+
+    def test_barras_agrupadas_fora_dos_limites(self):
+        df = pd.DataFrame({
+            'group': ['2013', '2014', '2015'],
+            'category': ['SC', 'PR', 'RS'],
+            'value': [1.0, 2.0, 3.0]
+        })
+        assert build_grouped_vertical_bar_chart(df, {}) is None
+        assert build_grouped_vertical_bar_chart(df.drop(columns='group'), {}) is None
+
+    def test_linha_serie_unica(self):
+        df = pd.DataFrame({'date': ['2015-01-01', '2015-02-01', '2015-03-01'], 'value': [1.0, 2.0, 3.0]})
+        fig = build_line_chart(df, {'title': 'Evolução'})
+
+        assert len(fig.data) == 1
+        assert fig.layout.showlegend is False
+        assert pd.Timestamp(fig.data[0].x[0]) == pd.Timestamp('2015-01-01')
+
+    def test_linha_multiplas_series_reduzida(self):
+        dias = pd.date_range('2015-01-01', periods=3000, freq='D')
+        df = pd.concat([
+            pd.DataFrame({'date': dias, 'value': range(3000), 'category': uf}) for uf in ('SC', 'PR')
+        ])
+        fig = build_line_chart(df, {})
+
+        assert sorted(trace.name for trace in fig.data) == ['PR', 'SC']
+        # Orçamento de pontos respeitado (VISUALIZATION_CONFIG['line_chart_max_points'])
+        assert sum(len(trace.x) for trace in fig.data) <= 1000
+
+    def test_figura_a_partir_dos_dados_do_agente(self):
+        dados = {'type': 'bar_chart', 'has_data': True, 'data': _ranking(), 'config': {}}
+
+        assert build_plotly_figure(dados) is not None
+        assert build_plotly_figure({**dados, 'has_data': False}) is None
+        assert build_plotly_figure({**dados, 'type': 'pie_chart'}) is None
+        assert build_plotly_figure({**dados, 'data': _ranking().iloc[0:0]}) is None
@@ -0,0 +1,122 @@
+"""
+Testes para o módulo utils/query_results.py
+Valida os handles estruturados dos resultados SQL
+"""
+
+import duckdb
+import pyarrow as pa
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.query_results import QueryResultStore, format_result_digest, format_result_text, relation_to_arrow
+
+
+def _criar_conexao():
+    connection = duckdb.connect()
+    connection.execute("""
+        CREATE TABLE dados_comerciais AS
+        SELECT
+            DATE '2015-01-01' + CAST(i % 365 AS INTEGER) AS Data,
+            ['sc', 'pr', 'rs'][1 + i % 3] AS UF_Cliente,
+            CAST(i % 7 AS DECIMAL(18, 2)) * 10.5 AS Valor_Vendido
+        FROM range(1000) t(i)
+    """)
+    return connection
+
+
+class TestQueryResultStore:
+    """Testes para QueryResultStore"""
+
+    def test_resultado_preserva_tipos(self):
+        connection = _criar_conexao()
+        table = relation_to_arrow(connection.sql(
+            "SELECT UF_Cliente, SUM(Valor_Vendido) AS total, MAX(Data) AS ultima FROM dados_comerciais GROUP BY 1 ORDER BY 1"
+        ))
+        store = QueryResultStore()
+        result = store.add("SELECT ...", table)
+
+        assert result.result_id == "q1"
+        assert result.num_rows == 3
+        assert result.table.schema.field('ultima').type == pa.date32()
+        assert pa.types.is_decimal(result.table.schema.field('total').type)
+        # DataFrame no mesmo formato do .df() do DuckDB
+        assert result.df['total'].dtype == 'float64'
+        assert str(result.df['ultima'].dtype).startswith('datetime64')
+        assert list(result.df['UF_Cliente']) == ['pr', 'rs', 'sc']
+
+    def test_resultados_anteriores_por_id(self):
+        connection = _criar_conexao()
+        store = QueryResultStore(max_results=2)
+        for uf in ['sc', 'pr', 'rs']:
+            query = f"SELECT UF_Cliente, COUNT(*) AS n FROM dados_comerciais WHERE UF_Cliente = '{uf}' GROUP BY 1"
+            store.add(query, relation_to_arrow(connection.sql(query)))
+
+        assert store.ids() == ['q2', 'q3']
+        assert store.get('q1') is None
+        assert store.get('q2').df['UF_Cliente'].iloc[0] == 'pr'
+        assert store.get().result_id == 'q3'
+
+        store.clear()
+        assert store.get() is None
+        assert store.add("SELECT 1", relation_to_arrow(connection.sql("SELECT 1 AS a"))).result_id == 'q1'
+
+    def test_texto_para_o_llm(self):
+        connection = _criar_conexao()
+        table = relation_to_arrow(connection.sql("SELECT 'sc' AS uf, 2 AS n UNION ALL SELECT 'pr', 3"))
+
+        assert format_result_text(table) == "uf,n\nsc,2\npr,3"
+
+    def test_resumo_compacto_do_resultado(self):
+        connection = _criar_conexao()
+        table = relation_to_arrow(connection.sql("SELECT range AS n, range * 2 AS dobro FROM range(25)"))
+        result = QueryResultStore().add("SELECT ... LIMIT 25", table, universe_total=1500.0)
+
+        linhas = format_result_digest(result, max_rows=3).split("\n")
+        assert linhas[0] == "Resultado q1: 25 linhas (n, dobro)"
+        assert linhas[1] == "Total do universo filtrado: 1500"
+        assert linhas[2:6] == ["n,dobro", "0,0", "1,2", "2,4"]
+        assert linhas[-1] == "... 22 linhas omitidas"
+
+        pequeno = QueryResultStore().add("SELECT 1", relation_to_arrow(connection.sql("SELECT 1 AS a")))
+        assert format_result_digest(pequeno) == "Resultado q1: 1 linhas (a)\na\n1"
+
+    def test_query_repetida_reaproveita_resultado(self):
+        connection = _criar_conexao()
+        query = "SELECT UF_Cliente, COUNT(*) AS n FROM dados_comerciais GROUP BY 1"
+        store = QueryResultStore()
+        result = store.add(query, relation_to_arrow(connection.sql(query)))
+        store.remember(query, "texto", result)
+
+        assert store.recall(query) == ("texto", result)
+        assert store.recall("  " + query.upper() + " ") == ("texto", result)
+        # Só a repetição imediata é atendida pelo atalho
+        store.remember("SELECT 1", "1")
+        assert store.recall(query) is None
+        assert store.recall("SELECT 1") == ("1", None)
+
+    def test_atalho_descartado_com_os_resultados(self):
+        # Mesma SQL como primeira query da pergunta seguinte (após clear_execution_state)
+        connection = _criar_conexao()
+        query = "SELECT UF_Cliente, COUNT(*) AS n FROM dados_comerciais GROUP BY 1"
+        store = QueryResultStore()
+        store.remember(query, "texto", store.add(query, relation_to_arrow(connection.sql(query))))
+
+        store.clear()
+        assert store.recall(query) is None
+
+        # Reexecutada, a query ganha um handle válido na nova pergunta
+        result = store.add(query, relation_to_arrow(connection.sql(query)))
+        store.remember(query, "texto", result)
+        assert store.recall(query)[1] is store.get() is result
+
+    def test_atalho_exige_handle_vivo(self):
+        connection = _criar_conexao()
+        store = QueryResultStore(max_results=1)
+        primeira = "SELECT 1 AS a"
+        store.remember(primeira, "a\n1", store.add(primeira, relation_to_arrow(connection.sql(primeira))))
+        # Handle descartado pelo limite de resultados sem passar por remember
+        store.add("SELECT 2 AS b", relation_to_arrow(connection.sql("SELECT 2 AS b")))
+
+        assert store.recall(primeira) is None
@@ -0,0 +1,56 @@
+"""
+Testes para o módulo utils/question_complexity.py
+Valida a pontuação das perguntas e a escolha do perfil do turno
+"""
+
+import os
+import sys
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.question_complexity import classify_question, select_profile
+
+
+class TestClassifyQuestion:
+    """Testes para classify_question"""
+
+    def test_agregado_direto_e_simples(self):
+        for pergunta in ("Qual o faturamento total de SC?", "Top 5 clientes por receita"):
+            resultado = classify_question(pergunta)
+            assert resultado['level'] == 'simple', resultado
+
+    def test_comparacao_entre_periodos_e_moderada(self):
+        resultado = classify_question("Compare o crescimento de SC vs PR entre 2023 e 2024")
+
+        assert resultado['level'] == 'moderate'
+        assert 'needs_growth_calculation' in resultado['signals']
+
+    def test_analise_em_varias_etapas_e_complexa(self):
+        resultado = classify_question(
+            "Por que as vendas caíram em junho? Explique a tendência mensal e compare os clientes por segmento"
+        )
+
+        assert resultado['level'] == 'complex'
+        assert 'analysis' in resultado['signals']
+
+    def test_pergunta_vazia(self):
+        assert classify_question("") == {'level': 'simple', 'score': 0, 'signals': []}
+        assert classify_question(None)['level'] == 'simple'
+
+
+class TestSelectProfile:
+    """Testes para select_profile"""
+
+    def test_perfil_simples_enxuto(self):
+        simples = select_profile('simple')
+        completo = select_profile('complex')
+
+        assert set(simples['tools']) < set(completo['tools'])
+        assert 'reasoning' not in simples['tools']
+        assert simples['reasoning_effort'] == 'minimal'
+
+    def test_nivel_desconhecido_usa_perfil_completo(self):
+        assert select_profile('inexistente') == select_profile('complex')
+
+    def test_desabilitado(self):
+        assert select_profile('simple', {'enabled': False}) is None
@@ -0,0 +1,98 @@
+"""
+Testes para o módulo datastore/refresh.py
+Valida a detecção de novas versões e a aplicação incremental do delta
+"""
+
+import duckdb
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.agent_config import ROLLUP_CONFIG
+from datastore.refresh import DatasetRefresher, ingest_delta
+from datastore.rollups import RollupCatalog
+
+
+def _gravar_dataset(path, dias, valor_extra=0.0):
+    """Grava um parquet com 10 vendas por dia a partir de 2015-01-01"""
+    duckdb.connect().execute(f"""
+        COPY (
+            SELECT
+                DATE '2015-01-01' + CAST(d AS INTEGER) AS Data,
+                ['sc', 'pr', 'rs'][1 + (d + c) % 3] AS UF_Cliente,
+                CAST((d * c) % 7 AS DOUBLE) * 10.5 + {valor_extra} AS Valor_Vendido,
+                CAST(c % 4 AS BIGINT) AS Qtd_Vendida
+            FROM range({dias}) t1(d), range(10) t2(c)
+        ) TO '{path}' (FORMAT PARQUET)
+    """)
+    # Garantir mtime distinto entre gravações consecutivas
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + dias))
+
+
+def _criar_refresher(path):
+    return DatasetRefresher(path, config={'check_interval_seconds': 0, 'max_versions': 10})
+
+
+class TestDatasetRefresher:
+    """Testes para detecção de versões"""
+
+    def test_acrescimo_gera_delta(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path, 90)
+        refresher = _criar_refresher(path)
+        assert refresher.current_version().version == 1
+        assert refresher.check_for_update() is None
+
+        _gravar_dataset(path, 120)
+        version = refresher.check_for_update()
+
+        assert version.version == 2
+        assert not version.full_reload
+        assert len(version.delta) == 300
+        assert [v.version for v in refresher.pending_versions(1)] == [2]
+
+    def test_historico_alterado_exige_recarga(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path, 90)
+        refresher = _criar_refresher(path)
+        refresher.current_version()
+
+        _gravar_dataset(path, 120, valor_extra=1.0)
+        version = refresher.check_for_update()
+
+        assert version.full_reload
+        assert refresher.pending_versions(1) is None
+
+
+class TestIngestDelta:
+    """Testes para ingest_delta"""
+
+    def test_tabela_e_rollups_iguais_a_carga_completa(self, tmp_path):
+        path = str(tmp_path / "dados.parquet")
+        _gravar_dataset(path, 100)
+        refresher = _criar_refresher(path)
+        refresher.current_version()
+
+        connection = duckdb.connect()
+        connection.execute(f"CREATE TABLE dados_comerciais AS SELECT * FROM read_parquet('{path}')")
+        catalog = RollupCatalog(connection, dict(ROLLUP_CONFIG, cache_dir=None, extra_combinations=[]))
+        catalog.build()
+
+        _gravar_dataset(path, 130)
+        version = refresher.check_for_update()
+        added = ingest_delta(connection, version.delta, rollup_catalog=catalog)
+
+        query = ("SELECT UF_Cliente, SUM(Valor_Vendido) AS total, COUNT(*) AS n FROM dados_comerciais "
+                 "WHERE Data >= '2015-03-01' GROUP BY UF_Cliente ORDER BY UF_Cliente")
+        rewritten, rollup = catalog.rewrite(query)
+        expected = duckdb.connect().execute(
+            query.replace("dados_comerciais", f"read_parquet('{path}')")
+        ).fetchall()
+
+        assert added == len(version.delta)
+        assert connection.execute("SELECT COUNT(*) FROM dados_comerciais").fetchone()[0] == 1300
+        assert rollup is not None
+        assert connection.execute(rewritten).fetchall() == expected
+        assert connection.execute(query).fetchall() == expected
@@ -0,0 +1,142 @@
+"""
+Testes para o módulo datastore/rollups.py
+Valida a construção dos rollups e a reescrita transparente das queries
+"""
+
+import duckdb
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.agent_config import ROLLUP_CONFIG
+from datastore.rollups import RollupCatalog, plan_rollups
+
+
+def _criar_conexao():
+    """Cria conexão DuckDB com uma versão reduzida de dados_comerciais"""
+    connection = duckdb.connect()
+    connection.execute("""
+        CREATE TABLE dados_comerciais AS
+        SELECT
+            DATE '2015-01-01' + CAST(i % 365 AS INTEGER) AS Data,
+            CAST(i % 50 AS VARCHAR) AS Cod_Cliente,
+            CAST(i % 5 AS VARCHAR) AS Cod_Segmento_Cliente,
+            ['joinville', 'curitiba', 'porto alegre'][1 + i % 3] AS Municipio_Cliente,
+            ['sc', 'pr', 'rs'][1 + i % 3] AS UF_Cliente,
+            CAST(i % 7 AS DOUBLE) * 10.5 AS Valor_Vendido,
+            CAST(i % 4 AS BIGINT) AS Qtd_Vendida
+        FROM range(20000) t(i)
+    """)
+    return connection
+
+
+def _criar_catalogo(connection):
+    config = dict(ROLLUP_CONFIG, cache_dir=None, extra_combinations=[])
+    catalog = RollupCatalog(connection, config)
+    catalog.build()
+    return catalog
+
+
+class TestPlanejamento:
+    """Testes para plan_rollups"""
+
+    def test_niveis_incluem_niveis_mais_amplos(self):
+        planned = dict(plan_rollups(['Data', 'Municipio_Cliente', 'UF_Cliente'], dict(ROLLUP_CONFIG, extra_combinations=[])))
+
+        assert planned['rollup_tempo'] == []
+        assert planned['rollup_regiao_municipio_cliente'] == ['Municipio_Cliente', 'UF_Cliente']
+        assert planned['rollup_regiao_uf_cliente'] == ['UF_Cliente']
+
+
+class TestReescrita:
+    """Testes para RollupCatalog.rewrite"""
+
+    def test_usa_menor_rollup_e_preserva_resultado(self):
+        connection = _criar_conexao()
+        catalog = _criar_catalogo(connection)
+
+        query = ("SELECT UF_Cliente, SUM(Valor_Vendido) AS total, COUNT(*) AS n FROM dados_comerciais "
+                 "WHERE Data >= '2015-03-01' AND Data < '2015-07-01' GROUP BY UF_Cliente ORDER BY total DESC")
+        rewritten, rollup = catalog.rewrite(query)
+
+        assert rollup['name'] == 'rollup_regiao_uf_cliente'
+        assert 'FROM rollup_regiao_uf_cliente' in rewritten
+        assert connection.execute(rewritten).fetchall() == connection.execute(query).fetchall()
+
+    def test_funcoes_temporais_mensais(self):
+        connection = _criar_conexao()
+        catalog = _criar_catalogo(connection)
+
+        query = ("SELECT DATE_TRUNC('month', Data) AS mes_ano, SUM(Qtd_Vendida) AS qtd FROM dados_comerciais "
+                 "WHERE LOWER(UF_Cliente) = 'sc' AND Data BETWEEN '2015-02-01' AND '2015-04-30' "
+                 "GROUP BY mes_ano ORDER BY mes_ano")
+        rewritten, rollup = catalog.rewrite(query)
+
+        assert rollup is not None
+        assert connection.execute(rewritten).fetchall() == connection.execute(query).fetchall()
+
+    def test_nao_reescreve_queries_inelegiveis(self):
+        connection = _criar_conexao()
+        catalog = _criar_catalogo(connection)
+
+        inelegiveis = [
+            # Data não alinhada ao mês
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE Data >= '2015-03-15'",
+            # Agregação que não é soma
+            "SELECT UF_Cliente, AVG(Valor_Vendido) FROM dados_comerciais GROUP BY UF_Cliente",
+            # Granularidade diária
+            "SELECT Data, SUM(Valor_Vendido) FROM dados_comerciais GROUP BY Data",
+            # Linhas individuais
+            "SELECT * FROM dados_comerciais LIMIT 5",
+            # COUNT de coluna sem DISTINCT
+            "SELECT COUNT(Cod_Cliente) FROM dados_comerciais",
+            # Colunas qualificadas pela tabela ou por alias
+            "SELECT dados_comerciais.UF_Cliente, SUM(Valor_Vendido) FROM dados_comerciais GROUP BY 1",
+            "SELECT d.UF_Cliente, SUM(d.Valor_Vendido) FROM dados_comerciais d GROUP BY 1",
+        ]
+
+        for query in inelegiveis:
+            rewritten, rollup = catalog.rewrite(query)
+            assert rollup is None, query
+            assert rewritten == query
+
+    def test_literal_com_ponto_nao_bloqueia_reescrita(self):
+        connection = _criar_conexao()
+        catalog = _criar_catalogo(connection)
+
+        query = "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE Municipio_Cliente = 'sta.catarina'"
+        rewritten, rollup = catalog.rewrite(query)
+
+        assert rollup is not None
+        assert connection.execute(rewritten).fetchall() == connection.execute(query).fetchall()
+
+
+class TestCacheOffline:
+    """Testes para o cache parquet dos rollups"""
+
+    def test_cache_depende_da_configuracao(self, tmp_path):
+        connection = _criar_conexao()
+        origem = tmp_path / "dados.parquet"
+        connection.execute(f"COPY dados_comerciais TO '{origem}' (FORMAT PARQUET)")
+        cache_dir = str(tmp_path / "rollups")
+
+        config = dict(ROLLUP_CONFIG, cache_dir=cache_dir, extra_combinations=[], max_size_ratio=1.0)
+        RollupCatalog(connection, config).build(str(origem))
+        arquivos = set(os.listdir(cache_dir))
+        assert arquivos
+
+        # Outra medida: o cache anterior não é reaproveitado e é substituído
+        outra = dict(config, measures=["Valor_Vendido"])
+        catalog = RollupCatalog(connection, outra)
+        catalog.build(str(origem))
+        novos = set(os.listdir(cache_dir))
+        assert novos.isdisjoint(arquivos)
+        assert len(novos) == len(arquivos)
+        colunas = [linha[0] for linha in connection.execute(f"DESCRIBE {catalog.rollups[0]['name']}").fetchall()]
+        assert "Qtd_Vendida" not in colunas
+
+        # Mesma configuração: cache reaproveitado sem regravar
+        antes = {nome: os.path.getmtime(os.path.join(cache_dir, nome)) for nome in novos}
+        RollupCatalog(connection, outra).build(str(origem))
+        assert {nome: os.path.getmtime(os.path.join(cache_dir, nome)) for nome in novos} == antes
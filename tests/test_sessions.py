@@ -0,0 +1,192 @@
+"""
+Testes para o módulo utils/sessions.py
+Valida a contabilidade de memória e a liberação de agentes ociosos ou sob pressão
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import duckdb
+import pandas as pd
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from config.agent_config import CHAT_HISTORY_CONFIG
+from utils.sessions import SessionManager, estimate_agent_bytes
+
+
+class FerramentaDuckDb:
+    def __init__(self):
+        self._connection = duckdb.connect()
+        self._connection.execute("CREATE TABLE t AS SELECT range AS x FROM range(100000)")
+
+
+class AgenteFalso:
+    """Mesmos atributos que o SessionManager lê de um PrincipalAgent"""
+
+    def __init__(self, linhas=1000):
+        self.df_normalized = pd.DataFrame({'valor': range(linhas)})
+        self.tools = [FerramentaDuckDb()]
+        self.persistent_context = {'UF_Cliente': 'SC'}
+        self.conversation_memory = "Usuário perguntou sobre SC"
+
+
+def _com_historico(tmp_dir, *session_ids):
+    """Aponta o histórico arquivado para tmp_dir e cria o arquivo de cada sessão"""
+    CHAT_HISTORY_CONFIG['storage_dir'] = tmp_dir
+    paths = {}
+    for session_id in session_ids:
+        paths[session_id] = os.path.join(tmp_dir, f'{session_id}.sqlite')
+        open(paths[session_id], 'wb').close()
+    return paths
+
+
+def _manager(**config):
+    return SessionManager({'sweep_interval_seconds': 0, 'pressure_min_idle_seconds': 0, **config})
+
+
+class TestSessionManager:
+    """Testes para SessionManager"""
+
+    def test_estimativa_de_memoria(self):
+        agente = AgenteFalso(linhas=10000)
+        uso = estimate_agent_bytes(agente, agente.df_normalized)
+
+        # O mesmo DataFrame passado duas vezes conta uma vez
+        assert uso['dataframes'] == agente.df_normalized.memory_usage(index=True).sum()
+        assert uso['duckdb'] > 0
+
+    def test_get_devolve_agente_da_versao(self):
+        manager = _manager()
+        agente = AgenteFalso()
+        manager.put('s1', agente, agente.df_normalized, agent_version='v1')
+
+        assert manager.get('s1', 'v1') == (agente, agente.df_normalized)
+        assert manager.get('s1', 'v2') is None
+        assert manager.get('outra', 'v1') is None
+
+    def test_libera_agente_ocioso_e_guarda_estado(self):
+        manager = _manager(idle_ttl_seconds=60)
+        agente = AgenteFalso()
+        manager.put('s1', agente, agent_version='v1')
+
+        assert manager.evict_idle(now=time.time() + 120) == ['s1']
+        assert manager.get('s1', 'v1') is None
+        estado = manager.restored_state('s1')
+        assert estado['persistent_context'] == {'UF_Cliente': 'SC'}
+        assert estado['conversation_memory'] == "Usuário perguntou sobre SC"
+        assert estado['evicted_reason'] == 'idle'
+
+        # Conexão DuckDB do agente liberado foi fechada
+        try:
+            agente.tools[0]._connection.execute("SELECT 1")
+            assert False, "A conexão deveria estar fechada"
+        except duckdb.Error:
+            pass
+
+        # Recriação limpa o estado guardado
+        manager.put('s1', AgenteFalso(), agent_version='v1')
+        assert manager.restored_state('s1') == {}
+
+    def test_pressao_de_memoria_libera_menos_recente(self):
+        manager = _manager(memory_budget_mb=1)
+        manager.put('antiga', AgenteFalso(linhas=100000))
+        time.sleep(0.01)
+        manager.put('nova', AgenteFalso(linhas=100000))
+
+        ativas = {s['session_id']: s['active'] for s in manager.stats()}
+        assert ativas == {'antiga': False, 'nova': True}
+        assert manager.restored_state('antiga')['evicted_reason'] == 'memory'
+
+    def test_sessao_esquecida_apos_prazo(self):
+        manager = _manager(idle_ttl_seconds=60, forget_after_seconds=3600)
+        manager.put('s1', AgenteFalso())
+        manager.evict_idle(now=time.time() + 120)
+        manager.evict_idle(now=time.time() + 7200)
+
+        assert manager.stats() == []
+
+    def test_remove_libera_agente(self):
+        manager = _manager()
+        manager.put('s1', AgenteFalso())
+        manager.remove('s1')
+
+        assert manager.stats() == []
+        assert manager.restored_state('s1') == {}
+
+    def test_historico_arquivado_removido_com_a_sessao(self):
+        storage_dir = CHAT_HISTORY_CONFIG['storage_dir']
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                paths = _com_historico(tmp_dir, 'limpa', 'esquecida', 'liberada')
+                manager = _manager(idle_ttl_seconds=60, forget_after_seconds=3600)
+                for session_id in paths:
+                    manager.put(session_id, AgenteFalso())
+
+                manager.remove('limpa')
+                # Agente recriado na mesma sessão: a conversa arquivada continua
+                manager.remove('liberada', forget_history=False)
+                assert os.path.exists(paths['liberada'])
+                manager.put('liberada', AgenteFalso())
+                manager.evict_idle(now=time.time() + 120)
+                # Liberada (sem agente) mantém o histórico até ser esquecida
+                assert not os.path.exists(paths['limpa'])
+                assert os.path.exists(paths['esquecida'])
+
+                manager.put('liberada', AgenteFalso())
+                manager.evict_idle(now=time.time() + 7200)
+                assert not os.path.exists(paths['esquecida'])
+                assert os.path.exists(paths['liberada'])
+        finally:
+            CHAT_HISTORY_CONFIG['storage_dir'] = storage_dir
+
+    def test_varredura_remove_historico_de_sessao_desconhecida(self):
+        storage_dir = CHAT_HISTORY_CONFIG['storage_dir']
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                paths = _com_historico(tmp_dir, 'registrada', 'anterior')
+                manager = _manager(forget_after_seconds=3600)
+                manager.put('registrada', AgenteFalso())
+
+                removidas = manager.sweep_chat_archives(now=time.time() + 7200)
+
+                assert removidas == ['anterior']
+                assert os.path.exists(paths['registrada'])
+        finally:
+            CHAT_HISTORY_CONFIG['storage_dir'] = storage_dir
+
+    def test_agente_clonado_nao_conta_partes_compartilhadas(self):
+        agente = AgenteFalso(linhas=10000)
+        agente.template_key = ('prompt', 1, 'dados.parquet')
+        uso = estimate_agent_bytes(agente, agente.df_normalized)
+
+        assert uso['dataframes'] == 0 and uso['duckdb'] == 0
+        assert uso['shared'] >= agente.df_normalized.memory_usage(index=True).sum()
+
+    def test_orcamento_libera_clones_contando_template_uma_vez(self):
+        # Três clones do mesmo template: DataFrame e banco compartilhados
+        df = pd.DataFrame({'valor': range(100000)})
+        ferramenta = FerramentaDuckDb()
+        clones = []
+        for _ in range(3):
+            clone = AgenteFalso(linhas=1)
+            clone.df_normalized = df
+            clone.tools = [ferramenta]
+            clone.template_key = ('prompt', 1, 'dados.parquet')
+            clones.append(clone)
+
+        manager = _manager(memory_budget_mb=10_000)
+        for i, clone in enumerate(clones):
+            manager.put(f's{i}', clone, df)
+            time.sleep(0.01)
+        compartilhado = estimate_agent_bytes(clones[0], df)['shared']
+        # O template entra no total uma única vez
+        assert compartilhado <= manager.total_bytes() < 2 * compartilhado
+
+        # Orçamento abaixo do template: a pressão de memória ainda libera as sessões menos recentes
+        manager.config['memory_budget_mb'] = compartilhado / (1024 * 1024) / 2
+        liberadas = manager.enforce_memory_budget(protect='s2')
+        assert liberadas == ['s0', 's1']
+        assert manager.restored_state('s0')['evicted_reason'] == 'memory'
@@ -0,0 +1,128 @@
+"""
+Testes para o módulo insights/summary_executor.py
+Valida o resumo numérico em segundo plano e o fallback por tempo esgotado
+"""
+
+import threading
+import pandas as pd
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from insights.numeric_analyzer import gerar_resumo_numerico, gerar_prompt_insights
+from insights.summary_executor import (
+    PendingInsights, _get_executor, aguardar_resumo, iniciar_resumo
+)
+
+
+class TestResumoEmSegundoPlano:
+    """Testes para iniciar_resumo / aguardar_resumo"""
+
+    def test_resultado_igual_ao_sincrono(self):
+        df = pd.DataFrame({
+            'label': ['Cliente A', 'Cliente B', 'Cliente C', 'Cliente D'],
+            'value': [100000, 56000, 42000, 28000]
+        })
+
+        future = iniciar_resumo(df, 'label', 'value', 'horizontal_bar', total_universo=400000)
+        resumo, prompt = aguardar_resumo(future, timeout=5)
+
+        esperado = gerar_resumo_numerico(df, 'label', 'value', 'horizontal_bar', total_universo=400000)
+        assert resumo == esperado
+        assert prompt == gerar_prompt_insights(esperado, 'horizontal_bar', max_insights=5)
+
+    def test_tempo_esgotado_retorna_none(self):
+        liberar = threading.Event()
+        future = _get_executor().submit(liberar.wait, 5)
+        try:
+            assert aguardar_resumo(future, timeout=0.05) is None
+        finally:
+            liberar.set()
+
+    def test_erro_do_calculo_e_propagado(self):
+        df = pd.DataFrame({'label': ['A'], 'value': [1.0]})
+        future = iniciar_resumo(df, 'label', 'coluna_inexistente', 'horizontal_bar')
+
+        try:
+            aguardar_resumo(future, timeout=5)
+            assert False, "esperava KeyError"
+        except KeyError:
+            pass
+
+
+class Mensagem:
+    def __init__(self, role, content):
+        self.role = role
+        self.content = content
+
+
+class TestPromptDeInsightsAdiado:
+    """Testes para PendingInsights e o hook de ferramenta"""
+
+    def _ferramenta(self, pendentes, liberar):
+        """Mesmo fluxo das ferramentas de gráfico: agenda o resumo e responde sem esperar"""
+        def resumo_lento():
+            liberar.wait(timeout=5)
+            return "PROMPT DE INSIGHTS"
+
+        future = _get_executor().submit(resumo_lento)
+        marcador = pendentes.defer(lambda: aguardar_resumo(future, timeout=5))
+        return f"✅ Gráfico preparado\n\n{marcador}", future
+
+    def test_resumo_em_calculo_durante_a_ferramenta(self):
+        pendentes = PendingInsights()
+        liberar = threading.Event()
+
+        resposta, future = self._ferramenta(pendentes, liberar)
+
+        # O corpo da ferramenta terminou com o resumo ainda em cálculo
+        assert not future.done()
+        assert len(pendentes) == 1
+
+        liberar.set()
+        assert pendentes.resolve_text(resposta) == "✅ Gráfico preparado\n\nPROMPT DE INSIGHTS"
+        assert len(pendentes) == 0
+
+    def test_hook_resolve_o_resultado_da_ferramenta(self):
+        pendentes = PendingInsights()
+        liberar = threading.Event()
+        liberar.set()
+
+        def criar_grafico(titulo):
+            resposta, _ = self._ferramenta(pendentes, liberar)
+            return resposta.replace("Gráfico", titulo)
+
+        resultado = pendentes.tool_hook("create_bar_chart", criar_grafico, {"titulo": "Top UFs"})
+
+        assert resultado == "✅ Top UFs preparado\n\nPROMPT DE INSIGHTS"
+        assert len(pendentes) == 0
+        # Resultados sem marcador passam sem alteração
+        assert pendentes.tool_hook("run_query", lambda sql: [1, 2], {"sql": "SELECT 1"}) == [1, 2]
+
+    def test_sem_resumo_remove_marcador(self):
+        pendentes = PendingInsights()
+        marcador = pendentes.defer(lambda: "")
+
+        assert pendentes.resolve_text(f"✅ Gráfico preparado\n\n{marcador}") == "✅ Gráfico preparado"
+
+    def test_marcadores_nao_resolvidos_removidos(self):
+        pendentes = PendingInsights()
+        marcador = pendentes.defer(lambda: "nunca")
+        mensagens = [Mensagem("tool", f"✅ Gráfico preparado\n\n{marcador}"),
+                     {"role": "assistant", "content": f"Resposta {marcador}final"},
+                     Mensagem("user", "pergunta")]
+
+        assert PendingInsights.strip_markers(f"ok\n\n{marcador}") == "ok"
+        assert PendingInsights.strip_messages(mensagens) == 2
+        assert mensagens[0].content == "✅ Gráfico preparado"
+        assert mensagens[1]["content"] == "Resposta final"
+        assert mensagens[2].content == "pergunta"
+
+    def test_descartar_pendentes(self):
+        pendentes = PendingInsights()
+        marcador = pendentes.defer(lambda: "nunca")
+        pendentes.discard()
+
+        assert len(pendentes) == 0
+        assert pendentes.resolve_text(f"ok {marcador}") == f"ok {marcador}"
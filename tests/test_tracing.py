@@ -0,0 +1,127 @@
+"""
+Testes para o módulo utils/tracing.py
+Valida spans aninhados, exportação JSON lines / OTLP e integração com o agente
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.tracing import Tracer, summarize_trace
+
+
+def _tracer(tmp_dir, export_format="jsonl"):
+    return Tracer({"enabled": True, "export_format": export_format,
+                   "export_path": os.path.join(tmp_dir, "traces.jsonl")})
+
+
+def _linhas(tmp_dir):
+    with open(os.path.join(tmp_dir, "traces.jsonl"), encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+class _ModeloFalso:
+    id = "modelo-falso"
+
+    def invoke(self, messages=None, **kwargs):
+        return type('Resposta', (), {'tool_calls': [{'name': 'run_query'}]})()
+
+
+class TestTracer:
+    """Testes para Tracer"""
+
+    def test_spans_aninhados_exportados_ao_fechar_o_turno(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tracer = _tracer(tmp_dir)
+            with tracer.span("turn", prompt="vendas de sc"):
+                with tracer.span("agent.run"):
+                    with tracer.span("sql.execute", query="SELECT 1") as span:
+                        span.set_attribute("rows", 1)
+                assert not os.path.exists(os.path.join(tmp_dir, "traces.jsonl"))
+
+            spans = {s['name']: s for s in _linhas(tmp_dir)}
+
+        assert set(spans) == {"turn", "agent.run", "sql.execute"}
+        assert len({s['trace_id'] for s in spans.values()}) == 1
+        assert spans["turn"]['parent_id'] is None
+        assert spans["agent.run"]['parent_id'] == spans["turn"]['span_id']
+        assert spans["sql.execute"]['parent_id'] == spans["agent.run"]['span_id']
+        assert spans["sql.execute"]['attributes'] == {"query": "SELECT 1", "rows": 1}
+        assert spans["turn"]['duration_ms'] >= spans["agent.run"]['duration_ms']
+        assert [s['depth'] for s in summarize_trace(list(spans.values()))] == [0, 1, 2]
+
+    def test_erro_marca_span_e_propaga(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tracer = _tracer(tmp_dir)
+            try:
+                with tracer.span("turn"):
+                    raise ValueError("falhou")
+                assert False, "exceção deveria propagar"
+            except ValueError:
+                pass
+
+            span = _linhas(tmp_dir)[0]
+
+        assert span['status'] == 'error'
+        assert span['attributes']['error.type'] == 'ValueError'
+        assert tracer.current_span() is None
+
+    def test_exportacao_otlp(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tracer = _tracer(tmp_dir, export_format="otlp")
+            with tracer.span("turn"):
+                with tracer.span("filters.extract", queries=2):
+                    pass
+
+            linhas = _linhas(tmp_dir)
+
+        assert len(linhas) == 1
+        spans = linhas[0]['resourceSpans'][0]['scopeSpans'][0]['spans']
+        filho = next(s for s in spans if s['name'] == "filters.extract")
+        raiz = next(s for s in spans if s['name'] == "turn")
+        assert filho['parentSpanId'] == raiz['spanId'] and 'parentSpanId' not in raiz
+        assert filho['attributes'] == [{'key': 'queries', 'value': {'intValue': '2'}}]
+        assert int(raiz['endTimeUnixNano']) >= int(raiz['startTimeUnixNano'])
+
+    def test_turnos_em_threads_nao_se_misturam(self):
+        tracer = Tracer({"export_path": None})
+        barreira = threading.Barrier(2)
+        trace_ids = {}
+
+        def turno(nome):
+            with tracer.span("turn") as raiz:
+                barreira.wait()
+                with tracer.span("agent.run") as filho:
+                    trace_ids[nome] = (raiz.trace_id, filho.trace_id, filho.parent_id == raiz.span_id)
+
+        threads = [threading.Thread(target=turno, args=(n,)) for n in ("a", "b")]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert trace_ids["a"][0] != trace_ids["b"][0]
+        assert all(raiz == filho and aninhado for raiz, filho, aninhado in trace_ids.values())
+
+    def test_hooks_de_ferramenta_e_modelo(self):
+        tracer = Tracer({"export_path": None})
+        modelo = tracer.instrument_model(_ModeloFalso())
+
+        with tracer.span("turn"):
+            modelo.invoke(messages=[{"role": "user"}, {"role": "assistant"}])
+            resultado = tracer.tool_hook("run_query", lambda query: "a,b\n1,2", {"query": "SELECT 1"})
+
+        spans = {s['name']: s for s in tracer.last_trace}
+        assert resultado == "a,b\n1,2"
+        assert spans["llm.step"]['attributes'] == {"model": "modelo-falso", "messages": 2, "tool_calls": 1}
+        assert spans["tool.run_query"]['attributes']['result_chars'] == 7
+
+    def test_desabilitado_nao_registra(self):
+        tracer = Tracer({"enabled": False, "export_path": None})
+        with tracer.span("turn") as span:
+            span.set_attribute("x", 1)
+        assert tracer.last_trace == []
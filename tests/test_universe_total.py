@@ -0,0 +1,112 @@
+"""
+Testes para o módulo utils/universe_total.py
+Valida o total do universo calculado na mesma execução da query Top N
+"""
+
+import duckdb
+import sys
+import os
+
+# Adicionar src ao path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from utils.universe_total import UNIVERSE_TOTAL_COLUMN, add_universe_total
+
+
+def _criar_conexao():
+    connection = duckdb.connect()
+    connection.execute("""
+        CREATE TABLE dados_comerciais AS
+        SELECT
+            CAST(i % 40 AS VARCHAR) AS Cod_Cliente,
+            ['sc', 'pr', 'rs'][1 + i % 3] AS UF_Cliente,
+            CAST(i % 7 AS DOUBLE) * 10.5 AS Valor_Vendido
+        FROM range(2000) t(i)
+    """)
+    return connection
+
+
+class TestAddUniverseTotal:
+    """Testes para add_universe_total"""
+
+    def test_total_igual_a_query_sem_limit(self):
+        connection = _criar_conexao()
+        query = ("SELECT Cod_Cliente, SUM(Valor_Vendido) AS total FROM dados_comerciais "
+                 "WHERE UF_Cliente = 'sc' GROUP BY Cod_Cliente ORDER BY total DESC, Cod_Cliente LIMIT 5")
+
+        fused = add_universe_total(query)
+        df = connection.execute(fused).df()
+        expected = connection.execute(
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE UF_Cliente = 'sc'"
+        ).fetchone()[0]
+
+        assert len(df) == 5
+        assert df[UNIVERSE_TOTAL_COLUMN].iloc[0] == expected
+        assert list(df.drop(columns=[UNIVERSE_TOTAL_COLUMN]).itertuples(index=False)) == \
+            list(connection.execute(query).df().itertuples(index=False))
+
+    def test_medida_do_order_by(self):
+        query = ("SELECT UF_Cliente, SUM(Valor_Vendido) AS valor, COUNT(*) AS n FROM dados_comerciais "
+                 "GROUP BY UF_Cliente ORDER BY n DESC LIMIT 2")
+
+        assert f"SUM(COUNT(*)) OVER () AS {UNIVERSE_TOTAL_COLUMN}" in add_universe_total(query)
+
+    def test_medida_dentro_de_wrappers_escalares(self):
+        connection = _criar_conexao()
+        casos = {
+            "ROUND(SUM(Valor_Vendido), 2)": "ROUND(SUM(Valor_Vendido), 2)",
+            "SUM(Valor_Vendido) / 1000": "SUM(Valor_Vendido) / 1000",
+            "CAST(SUM(Valor_Vendido) AS BIGINT)": "CAST(SUM(Valor_Vendido) AS BIGINT)",
+            "COALESCE(SUM(Valor_Vendido), 0) * 100": "COALESCE(SUM(Valor_Vendido), 0) * 100",
+        }
+
+        for medida in casos:
+            query = (f"SELECT Cod_Cliente, {medida} AS total FROM dados_comerciais "
+                     f"WHERE UF_Cliente = 'sc' GROUP BY Cod_Cliente ORDER BY total DESC LIMIT 5")
+            fused = add_universe_total(query)
+            assert fused is not None, medida
+
+            total = connection.execute(fused).df()[UNIVERSE_TOTAL_COLUMN].iloc[0]
+            # Mesma unidade dos valores do gráfico: soma da expressão em todos os grupos
+            expected = connection.execute(
+                f"SELECT SUM(total) FROM ({query.replace(' LIMIT 5', '')})"
+            ).fetchone()[0]
+            assert abs(total - expected) < 1e-6, medida
+
+    def test_having_nao_reduz_o_universo(self):
+        connection = _criar_conexao()
+        query = ("SELECT Cod_Cliente, ROUND(SUM(Valor_Vendido), 2) AS total FROM dados_comerciais "
+                 "WHERE UF_Cliente = 'sc' GROUP BY Cod_Cliente HAVING SUM(Valor_Vendido) > 530 "
+                 "ORDER BY total DESC, Cod_Cliente LIMIT 5")
+
+        fused = add_universe_total(query)
+        df = connection.execute(fused).df()
+        expected = connection.execute(
+            "SELECT SUM(Valor_Vendido) FROM dados_comerciais WHERE UF_Cliente = 'sc'"
+        ).fetchone()[0]
+        grupos_no_having = connection.execute(
+            f"SELECT SUM(total) FROM ({query.replace(' LIMIT 5', '')})"
+        ).fetchone()[0]
+
+        assert "QUALIFY SUM(Valor_Vendido) > 530" in fused
+        assert grupos_no_having < expected
+        assert df[UNIVERSE_TOTAL_COLUMN].iloc[0] == expected
+        # Linhas retornadas iguais às da query original
+        assert list(df.drop(columns=[UNIVERSE_TOTAL_COLUMN]).itertuples(index=False)) == \
+            list(connection.execute(query).df().itertuples(index=False))
+
+    def test_queries_sem_total(self):
+        nao_elegiveis = [
+            # Sem LIMIT
+            "SELECT UF_Cliente, SUM(Valor_Vendido) FROM dados_comerciais GROUP BY UF_Cliente",
+            # Medida ranqueada não aditiva
+            "SELECT UF_Cliente, AVG(Valor_Vendido) AS media FROM dados_comerciais GROUP BY 1 ORDER BY media DESC LIMIT 3",
+            "SELECT Cod_Cliente, COUNT(DISTINCT UF_Cliente) AS n FROM dados_comerciais GROUP BY 1 ORDER BY n DESC LIMIT 3",
+            "SELECT UF_Cliente, ROUND(AVG(Valor_Vendido), 2) AS media FROM dados_comerciais GROUP BY 1 ORDER BY media DESC LIMIT 3",
+            "SELECT UF_Cliente, SUM(Valor_Vendido) / COUNT(*) AS ticket FROM dados_comerciais GROUP BY 1 ORDER BY ticket DESC LIMIT 3",
+            "SELECT UF_Cliente, SUM(Valor_Vendido) - 10 AS ajuste FROM dados_comerciais GROUP BY 1 ORDER BY ajuste DESC LIMIT 3",
+            # Sem agregação
+            "SELECT * FROM dados_comerciais LIMIT 10",
+        ]
+
+        for query in nao_elegiveis:
+            assert add_universe_total(query) is None, query